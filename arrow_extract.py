@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Vectorized extraction of nested investor data using pyarrow compute kernels
+
+Each nested list column of investors.parquet is exploded with
+list_flatten + list_parent_indices so every child table comes out as one
+columnar pyarrow Table, keyed by the sequential investor_id (row + 1).
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from arrow_json import json_string_literals
+
+# Bump whenever an extractor's output changes - it keys the on-disk extract cache
+EXTRACTOR_VERSION = 2
+
+# Columns of investors.parquet that the child-table extractors read
+CHILD_SOURCE_COLUMNS = [
+    'person', 'stages', 'areas_of_interest', 'investment_locations',
+    'image_urls', 'image_urls_edit_mode', 'media_links', 'positions',
+    'degrees', 'investments_on_record', 'network_list_investor_profiles',
+    'network_list_scouts_and_angels_profiles', 'investing_connections', 'investor_lists',
+]
+
+# Output column order of every child table
+CHILD_TABLE_COLUMNS = {
+    'areas_of_interest': ['investor_id', 'kind', 'display_name'],
+    'investment_locations': ['investor_id', 'kind', 'display_name'],
+    'investor_stages': ['investor_id', 'kind', 'display_name'],
+    'image_urls': ['investor_id', 'url', 'is_edit_mode'],
+    'media_links': ['investor_id', 'url', 'title', 'image_url'],
+    'positions': ['investor_id', 'person_slug', 'company_name', 'company_display_name',
+                  'company_employee_count', 'title', 'start_month', 'start_year',
+                  'end_month', 'end_year'],
+    'degrees': ['investor_id', 'person_slug', 'school_name', 'school_display_name',
+                'school_student_count', 'degree_name', 'field_of_study'],
+    'investments': ['investor_id', 'company_display_name', 'total_raised_json'],
+    # investment_index is the row's position among its investor's investments rows
+    'investment_rounds': ['investor_id', 'investment_index', 'stage', 'amount', 'date', 'is_lead',
+                          'board_role_title', 'company_name'],
+    'coinvestors': ['investor_id', 'investment_index', 'name'],
+    'network_connections': ['investor_id', 'target_slug', 'target_name', 'target_first_name',
+                            'target_last_name', 'list_type', 'position'],
+    'investor_lists': ['investor_id', 'slug', 'stage_name', 'vertical_kind', 'vertical_display_name',
+                       'location_kind', 'location_display_name'],
+}
+
+# Columns COPY-loaded into the tables that hang off investments
+INVESTMENT_CHILD_COLUMNS = {
+    'investment_rounds': ['investment_id', 'investor_id', 'stage', 'amount', 'date', 'is_lead',
+                          'board_role_title', 'company_name'],
+    'coinvestors': ['investment_id', 'name'],
+}
+
+# Sources of network_connections rows: (column, list_type override)
+NETWORK_SOURCES = [
+    ('network_list_investor_profiles', None),
+    ('network_list_scouts_and_angels_profiles', None),
+    ('investing_connections', 'investing_connections'),
+]
+
+
+def as_array(column):
+    """Collapse a ChunkedArray into a single contiguous Array"""
+    if isinstance(column, pa.ChunkedArray):
+        if column.num_chunks == 1:
+            return column.chunk(0)
+        return column.combine_chunks()
+    return column
+
+
+def get_column(table, path):
+    """Fetch a (possibly nested) column by dotted path, e.g. 'person.slug'"""
+    parts = path.split('.')
+    arr = as_array(table.column(parts[0]))
+    if len(parts) > 1:
+        arr = pc.struct_field(arr, parts[1:])
+    return arr
+
+
+def field(values, path):
+    """Fetch a nested struct field by dotted path; null parents yield null"""
+    return pc.struct_field(values, path.split('.'))
+
+
+def explode(list_array, start_id=1, drop_null=True):
+    """Flatten a list column into (investor_id, element) arrays"""
+    list_array = as_array(list_array)
+    parents = pc.list_parent_indices(list_array)
+    values = pc.list_flatten(list_array)
+    ids = pc.cast(pc.add(parents, start_id), pa.int32())
+    if drop_null and values.null_count:
+        mask = values.is_valid()
+        ids = pc.filter(ids, mask)
+        values = pc.filter(values, mask)
+    return ids, values
+
+
+def explode_parents(list_array):
+    """Flatten a list array into (parent_index, element) with null elements dropped"""
+    list_array = as_array(list_array)
+    parents = pc.list_parent_indices(list_array)
+    values = pc.list_flatten(list_array)
+    if values.null_count:
+        mask = values.is_valid()
+        parents = pc.filter(parents, mask)
+        values = pc.filter(values, mask)
+    return parents, values
+
+
+def explode_edges(table, column, start_id=1):
+    """Flatten a <column>.edges[].node connection into (investor_id, parent_row, node)
+
+    Null edges and null nodes are dropped.
+    """
+    parents, edges = explode_parents(get_column(table, f'{column}.edges'))
+    nodes = field(edges, 'node')
+    if nodes.null_count:
+        mask = nodes.is_valid()
+        parents = pc.filter(parents, mask)
+        nodes = pc.filter(nodes, mask)
+    return pc.cast(pc.add(parents, start_id), pa.int32()), parents, nodes
+
+
+def group_ordinal(ids):
+    """0-based position of each row within its run of equal ids (rows already grouped by id)"""
+    ids = np.asarray(ids)
+    if len(ids) == 0:
+        return np.empty(0, dtype=np.int32)
+    rows = np.arange(len(ids))
+    starts = np.concatenate([[True], ids[1:] != ids[:-1]])
+    first = np.maximum.accumulate(np.where(starts, rows, 0))
+    return (rows - first).astype(np.int32)
+
+
+def json_string_lists(list_array):
+    """Render list<string> values as JSON array text; empty or null lists become null"""
+    list_array = as_array(list_array)
+    if isinstance(list_array, pa.LargeListArray):
+        list_array = list_array.cast(pa.list_(list_array.type.value_type))
+    # Every control character is escaped, or Postgres rejects the JSONB and aborts the COPY
+    quoted = json_string_literals(list_array.flatten()).cast(pa.string())
+    quoted = pc.fill_null(quoted, 'null')
+    # Rebuild zero-based offsets so sliced arrays and null lists line up with flatten()
+    lengths = pc.fill_null(pc.list_value_length(list_array), 0).to_numpy(zero_copy_only=False)
+    offsets = pa.array(np.concatenate([[0], np.cumsum(lengths)]), type=pa.int32())
+    rebuilt = pa.ListArray.from_arrays(offsets, quoted, mask=list_array.is_null())
+    joined = pc.binary_join(rebuilt, ',')
+    wrapped = pc.binary_join_element_wise('[', joined, ']', '')
+    empty = pc.equal(pc.list_value_length(list_array), 0)
+    return pc.if_else(empty, pa.scalar(None, pa.string()), wrapped)
+
+
+def _kind_display_table(table, column, start_id):
+    ids, values = explode(get_column(table, column), start_id)
+    return pa.table({
+        'investor_id': ids,
+        'kind': field(values, 'kind'),
+        'display_name': field(values, 'display_name'),
+    })
+
+
+def extract_areas_of_interest(table, start_id=1):
+    return _kind_display_table(table, 'areas_of_interest', start_id)
+
+
+def extract_investment_locations(table, start_id=1):
+    return _kind_display_table(table, 'investment_locations', start_id)
+
+
+def extract_investor_stages(table, start_id=1):
+    return _kind_display_table(table, 'stages', start_id)
+
+
+def extract_image_urls(table, start_id=1):
+    parts = []
+    for column, is_edit_mode in (('image_urls', False), ('image_urls_edit_mode', True)):
+        ids, urls = explode(get_column(table, column), start_id)
+        keep = pc.not_equal(urls, '')
+        ids, urls = pc.filter(ids, keep), pc.filter(urls, keep)
+        parts.append(pa.table({
+            'investor_id': ids,
+            'url': pc.cast(urls, pa.string()),
+            'is_edit_mode': pa.array(np.full(len(ids), is_edit_mode), type=pa.bool_()),
+        }))
+    return pa.concat_tables(parts)
+
+
+def extract_media_links(table, start_id=1):
+    ids, values = explode(get_column(table, 'media_links'), start_id)
+    return pa.table({
+        'investor_id': ids,
+        'url': field(values, 'url'),
+        'title': field(values, 'title'),
+        'image_url': field(values, 'image_url'),
+    })
+
+
+def _with_person_slug(table, column, start_id):
+    list_array = get_column(table, column)
+    parents = pc.list_parent_indices(list_array)
+    values = pc.list_flatten(list_array)
+    slugs = pc.take(get_column(table, 'person.slug'), parents)
+    ids = pc.cast(pc.add(parents, start_id), pa.int32())
+    mask = values.is_valid()
+    return pc.filter(ids, mask), pc.filter(slugs, mask), pc.filter(values, mask)
+
+
+def extract_positions(table, start_id=1):
+    ids, slugs, values = _with_person_slug(table, 'positions', start_id)
+    return pa.table({
+        'investor_id': ids,
+        'person_slug': slugs,
+        'company_name': field(values, 'company.name'),
+        'company_display_name': field(values, 'company.display_name'),
+        'company_employee_count': field(values, 'company.total_employee_count'),
+        'title': field(values, 'title'),
+        'start_month': field(values, 'start_date.month'),
+        'start_year': field(values, 'start_date.year'),
+        'end_month': field(values, 'end_date.month'),
+        'end_year': field(values, 'end_date.year'),
+    })
+
+
+def extract_degrees(table, start_id=1):
+    ids, slugs, values = _with_person_slug(table, 'degrees', start_id)
+    return pa.table({
+        'investor_id': ids,
+        'person_slug': slugs,
+        'school_name': field(values, 'school.name'),
+        'school_display_name': field(values, 'school.display_name'),
+        'school_student_count': field(values, 'school.total_student_count'),
+        'degree_name': field(values, 'name'),
+        'field_of_study': field(values, 'field_of_study'),
+    })
+
+
+def extract_investments(table, start_id=1):
+    ids, _, nodes = explode_edges(table, 'investments_on_record', start_id)
+    return pa.table({
+        'investor_id': ids,
+        'company_display_name': field(nodes, 'company_display_name'),
+        'total_raised_json': json_string_lists(field(nodes, 'total_raised')),
+    })
+
+
+def _investment_lists(table, start_id, path):
+    """Explode a list nested in each investment node, keyed like the investments rows"""
+    ids, _, nodes = explode_edges(table, 'investments_on_record', start_id)
+    index = pa.array(group_ordinal(ids.to_numpy()), type=pa.int32())
+    parents, values = explode_parents(field(nodes, path))
+    return pc.take(ids, parents), pc.take(index, parents), pc.take(nodes, parents), values
+
+
+def extract_investment_rounds(table, start_id=1):
+    ids, index, nodes, rounds = _investment_lists(table, start_id, 'investor_profile_funding_rounds')
+    return pa.table({
+        'investor_id': ids,
+        'investment_index': index,
+        'stage': field(rounds, 'funding_round.stage'),
+        'amount': field(rounds, 'funding_round.amount'),
+        'date': field(rounds, 'funding_round.date'),
+        'is_lead': pc.fill_null(field(rounds, 'is_lead'), False),
+        'board_role_title': field(rounds, 'board_role.title'),
+        'company_name': field(nodes, 'company_display_name'),
+    })
+
+
+def extract_coinvestors(table, start_id=1):
+    ids, index, _, names = _investment_lists(table, start_id, 'coinvestor_names')
+    keep = pc.not_equal(names, '')
+    return pa.table({
+        'investor_id': pc.filter(ids, keep),
+        'investment_index': pc.filter(index, keep),
+        'name': pc.cast(pc.filter(names, keep), pa.string()),
+    })
+
+
+def extract_network_connections(table, start_id=1):
+    parts = []
+    for column, list_type in NETWORK_SOURCES:
+        ids, parents, nodes = explode_edges(table, column, start_id)
+        if list_type is None:
+            list_types = pc.take(get_column(table, f'{column}.list_type'), parents)
+            person = field(nodes, 'person')
+            position = field(nodes, 'position')
+        else:
+            list_types = pa.array([list_type] * len(ids), type=pa.string())
+            person = field(nodes, 'target_person')
+            position = pa.nulls(len(ids), type=pa.string())
+        parts.append(pa.table({
+            'investor_id': ids,
+            'target_slug': field(person, 'slug'),
+            'target_name': field(person, 'name'),
+            'target_first_name': field(person, 'first_name'),
+            'target_last_name': field(person, 'last_name'),
+            'list_type': list_types,
+            'position': position,
+        }))
+    return pa.concat_tables(parts)
+
+
+def extract_investor_lists(table, start_id=1):
+    ids, lists = explode(get_column(table, 'investor_lists'), start_id)
+    return pa.table({
+        'investor_id': ids,
+        'slug': field(lists, 'slug'),
+        'stage_name': field(lists, 'stage_name'),
+        'vertical_kind': field(lists, 'vertical.kind'),
+        'vertical_display_name': field(lists, 'vertical.display_name'),
+        'location_kind': field(lists, 'location.kind'),
+        'location_display_name': field(lists, 'location.display_name'),
+    })
+
+
+CHILD_EXTRACTORS = {
+    'areas_of_interest': extract_areas_of_interest,
+    'investment_locations': extract_investment_locations,
+    'investor_stages': extract_investor_stages,
+    'image_urls': extract_image_urls,
+    'media_links': extract_media_links,
+    'positions': extract_positions,
+    'degrees': extract_degrees,
+    'investments': extract_investments,
+    'investment_rounds': extract_investment_rounds,
+    'coinvestors': extract_coinvestors,
+    'network_connections': extract_network_connections,
+    'investor_lists': extract_investor_lists,
+}
+
+
+def extract_child_tables(table, start_id=1, tables=None):
+    """Explode every nested child collection of a parquet Table/RecordBatch"""
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    names = tables or list(CHILD_EXTRACTORS)
+    return {name: CHILD_EXTRACTORS[name](table, start_id) for name in names}
+
+
+def unique_by(table, key, columns):
+    """First row per non-null key, in first-seen order (companies, schools)"""
+    table = table.filter(pc.is_valid(table.column(key))).select([key] + columns)
+    if table.num_rows == 0:
+        return table
+    encoded = as_array(pc.dictionary_encode(table.column(key)))
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    _, first_idx = np.unique(codes, return_index=True)
+    return table.take(pa.array(np.sort(first_idx)))
+
+
+def investment_keys(investor_ids, investment_index):
+    """Composite (investor_id, investment_index) key as one sortable int64"""
+    return (np.asarray(investor_ids, dtype=np.int64) << 32) | np.asarray(investment_index, dtype=np.int64)
+
+
+def map_investment_ids(investments, investment_ids, rows):
+    """investment_id for rows keyed by (investor_id, investment_index) into an investments batch"""
+    investor_ids = investments.column('investor_id').to_numpy()
+    # investments rows are grouped by investor in order, so their keys are already sorted
+    keys = investment_keys(investor_ids, group_ordinal(investor_ids))
+    row_keys = investment_keys(rows.column('investor_id').to_numpy(), rows.column('investment_index').to_numpy())
+    positions = np.searchsorted(keys, row_keys)
+    return pa.array(np.asarray(investment_ids)[positions], type=pa.int32())
+
+
+def map_keys(keys, mapping, value_type=pa.int32()):
+    """Resolve natural keys to integer ids with a single hash lookup (null if missing)"""
+    if not mapping:
+        return pa.nulls(len(keys), type=value_type)
+    lookup_keys = pa.array(list(mapping.keys()), type=pa.string())
+    lookup_ids = pa.array(list(mapping.values()), type=value_type)
+    positions = pc.index_in(as_array(keys), value_set=lookup_keys)
+    return pc.take(lookup_ids, positions)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Arrow JSON encoder - renders nested struct/list columns as JSON text with Arrow compute kernels
+
+Each column is encoded bottom-up: leaves are cast or escaped into JSON literals,
+structs join their encoded fields between braces and lists join their encoded
+elements between brackets, so no row ever becomes a Python object.
+"""
+
+import json
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# JSON text is built as large_string so a batch of big documents cannot overflow 32-bit offsets
+JSON_TYPE = pa.large_string()
+
+# Backslash goes first so the escapes added afterwards are not escaped again
+JSON_ESCAPES = [('\\', '\\\\'), ('"', '\\"'), ('\n', '\\n'), ('\r', '\\r'), ('\t', '\\t'),
+                ('\b', '\\b'), ('\f', '\\f')]
+JSON_CONTROL_ESCAPES = [(chr(code), f'\\u{code:04x}') for code in range(0x20)
+                        if chr(code) not in '\n\r\t\b\f']
+
+
+def _literal(text):
+    return pa.scalar(text, type=JSON_TYPE)
+
+
+def _wrap(prefix, values, suffix):
+    return pc.binary_join_element_wise(_literal(prefix), values, _literal(suffix), _literal(''))
+
+
+def _with_nulls(array, encoded):
+    """Null out the rows where the source array is null"""
+    if array.null_count == 0:
+        return encoded
+    return pc.if_else(array.is_valid(), encoded, pa.scalar(None, type=JSON_TYPE))
+
+
+def json_string_literals(array):
+    """Quote and escape a string array as JSON string literals; nulls stay null"""
+    escaped = array.cast(JSON_TYPE)
+    for char, escape in JSON_ESCAPES:
+        escaped = pc.replace_substring(escaped, char, escape)
+    # Other control characters are rare, so only pay for their escapes when one is present
+    if pc.any(pc.match_substring_regex(escaped, '[\\x00-\\x1f]')).as_py():
+        for char, escape in JSON_CONTROL_ESCAPES:
+            escaped = pc.replace_substring(escaped, char, escape)
+    return _wrap('"', escaped, '"')
+
+
+def _encode_struct(array):
+    fields = array.flatten()
+    parts = []
+    for index, field in enumerate(array.type):
+        parts.append(_literal(('{' if index == 0 else ',') + json.dumps(field.name) + ':'))
+        parts.append(pc.fill_null(encode_json(fields[index]), _literal('null')))
+    if not parts:
+        return pc.if_else(array.is_valid(), _literal('{}'), pa.scalar(None, type=JSON_TYPE))
+    parts.append(_literal('}'))
+    return _with_nulls(array, pc.binary_join_element_wise(*parts, _literal('')))
+
+
+def _encode_list(array):
+    offsets = array.offsets
+    if offsets[0].as_py():
+        # Sliced arrays keep their parent's offsets; rebase them onto the flattened values
+        offsets = pc.subtract(offsets, offsets[0])
+    values = pc.fill_null(encode_json(array.flatten()), _literal('null'))
+    if pa.types.is_large_list(array.type):
+        elements = pa.LargeListArray.from_arrays(offsets, values, mask=array.is_null())
+    else:
+        elements = pa.ListArray.from_arrays(offsets, values, mask=array.is_null())
+    return _wrap('[', pc.binary_join(elements, _literal(',')), ']')
+
+
+def encode_json(array):
+    """Encode an Arrow array (any nesting of structs, lists and scalars) as JSON text per row"""
+    if isinstance(array, pa.ChunkedArray):
+        return pa.chunked_array([encode_json(chunk) for chunk in array.chunks], type=JSON_TYPE)
+    array_type = array.type
+    if pa.types.is_dictionary(array_type):
+        return encode_json(array.dictionary_decode())
+    if pa.types.is_struct(array_type):
+        return _encode_struct(array)
+    if pa.types.is_list(array_type) or pa.types.is_large_list(array_type):
+        return _encode_list(array)
+    if pa.types.is_null(array_type):
+        return pa.nulls(len(array), type=JSON_TYPE)
+    if pa.types.is_boolean(array_type):
+        return pc.if_else(array, _literal('true'), _literal('false'))
+    if pa.types.is_integer(array_type) or pa.types.is_decimal(array_type):
+        return array.cast(JSON_TYPE)
+    if pa.types.is_floating(array_type):
+        # JSON has no NaN or Infinity
+        return pc.if_else(pc.is_finite(array), array.cast(JSON_TYPE), pa.scalar(None, type=JSON_TYPE))
+    if pa.types.is_string(array_type) or pa.types.is_large_string(array_type):
+        return json_string_literals(array)
+    if pa.types.is_timestamp(array_type):
+        # strftime prints sub-second units as fractional seconds, so drop them first
+        seconds = array.cast(pa.timestamp('s', array_type.tz), safe=False)
+        return json_string_literals(pc.strftime(seconds, format='%Y-%m-%dT%H:%M:%S'))
+    # Dates and anything else render as their Arrow string form
+    return json_string_literals(array.cast(pa.string()))
+
+
+def encode_json_column(array, empty_as_null=True):
+    """Encode a top-level column; empty lists become NULL like the row-wise exporter stored them"""
+    encoded = encode_json(array)
+    if empty_as_null and (pa.types.is_list(array.type) or pa.types.is_large_list(array.type)):
+        empty = pc.equal(pc.list_value_length(array), 0)
+        encoded = pc.if_else(empty, pa.scalar(None, type=JSON_TYPE), encoded)
+    return encoded
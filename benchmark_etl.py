@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+ETL benchmark suite - times each load stage against a local PostgreSQL
+
+Generates (or reuses) synthetic investors.parquet files at the requested
+scales with synthetic_investors.py and runs the bulk load on each:
+
+  read      parquet -> Arrow (parent and child source columns)
+  extract   parent tables with client-side keys + flattened child tables
+  load      bare schema, COPY of parent and child tables
+  finalize  deferred keys, indexes, foreign keys and ANALYZE
+
+Every stage records wall time, rows/s (investors for read/extract, rows
+written for load/finalize) and peak memory (sampled RSS and Arrow
+allocations). Results are appended as JSON lines tagged with the git
+commit, data and settings; --compare reports stages that got slower than
+the latest run of the same configuration on another commit.
+
+The benchmark drops and recreates every table in the target database -
+point it at a scratch database, never at signal_db.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, text
+
+from arrow_extract import CHILD_SOURCE_COLUMNS, extract_child_tables
+from bulk_copy import ARROW_COPY_FORMATS
+from complete_population import load_child_tables
+from entity_resolution import new_resolvers
+from export_relational_fast import DB_CONFIG, create_relational_schema
+from load_finalize import finalize_schema, split_schema
+from load_metrics import PeakMemory
+from parent_tables import (PARENT_SOURCE_COLUMNS, extract_parent_tables, finish_parent_load, load_parent_tables,
+                           new_allocators)
+from surrogate_keys import bump_sequences
+from synthetic_investors import (BASE_ROWS, GENERATOR_VERSION, default_path, generate_investors, scale_rows,
+                                 verify_layout)
+
+# Bump when stage boundaries or measurements change; results of different versions are never compared
+BENCHMARK_VERSION = 1
+
+STAGES = ['read', 'extract', 'load', 'finalize']
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(REPO_DIR, 'benchmark_data')
+DEFAULT_RESULTS = os.path.join(DEFAULT_DATA_DIR, 'results.jsonl')
+
+# Scratch database the benchmark may wipe
+BENCHMARK_DB_CONFIG = {
+    'host': 'localhost',
+    'port': 5432,
+    'database': 'signal_benchmark',
+    'username': 'postgres',
+    'password': 'postgres'
+}
+
+# Slowdowns below this many seconds are treated as noise by --compare
+NOISE_FLOOR_SECONDS = 0.05
+
+
+def benchmark_database_url(url=None):
+    if url:
+        return url
+    if os.environ.get('BENCHMARK_DATABASE_URL'):
+        return os.environ['BENCHMARK_DATABASE_URL']
+    config = BENCHMARK_DB_CONFIG
+    return f"postgresql://{config['username']}:{config['password']}@{config['host']}:{config['port']}/{config['database']}"
+
+
+def refuse_production(engine):
+    """The benchmark drops every table, so never let it near the production database"""
+    url = engine.url
+    if (url.host, url.port or 5432, url.database) == (DB_CONFIG['host'], DB_CONFIG['port'], DB_CONFIG['database']):
+        raise ValueError(f"Refusing to benchmark against the production database {url.database}@{url.host}")
+
+
+def run_stages(engine, path, copy_format='csv', load_workers=1, finalize_workers=4, verbose=False):
+    """Run read/extract/load/finalize once on path; returns one result dict per stage"""
+    state = {}
+    results = []
+
+    def read():
+        state['parent_source'] = pq.read_table(path, columns=PARENT_SOURCE_COLUMNS)
+        state['child_source'] = pq.read_table(path, columns=CHILD_SOURCE_COLUMNS)
+        return state['parent_source'].num_rows
+
+    def extract():
+        state['allocators'] = new_allocators()
+        state['parents'] = extract_parent_tables(state['parent_source'], state['allocators'])
+        state['children'] = extract_child_tables(state.pop('child_source'))
+        return state.pop('parent_source').num_rows
+
+    def load():
+        schema, state['deferred'] = split_schema(create_relational_schema())
+        with engine.connect() as conn:
+            conn.execute(text(schema))
+            conn.commit()
+        parents = state.pop('parents')
+        investor_count = parents['investors'].num_rows
+        counts = load_parent_tables(engine, parents, copy_format)
+        finish_parent_load(engine, state.pop('allocators'), investor_count)
+        # Same lookups complete_population.py starts from after the parent load
+        with engine.connect() as conn:
+            key_maps = {
+                'persons': {row[1]: row[0] for row in conn.execute(text("SELECT id, slug FROM persons")).fetchall()},
+                **new_resolvers(conn),
+            }
+        children = state.pop('children')
+        counts.update(load_child_tables(engine, children, key_maps, copy_format, load_workers))
+        bump_sequences(engine, {'investments': children['investments'].num_rows})
+        state['rows_loaded'] = sum(counts.values())
+        return state['rows_loaded']
+
+    def finalize():
+        finalize_schema(engine, state.pop('deferred'), workers=finalize_workers)
+        return state['rows_loaded']
+
+    for name, stage in zip(STAGES, (read, extract, load, finalize)):
+        gc.collect()
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output, PeakMemory() as memory:
+            started = time.perf_counter()
+            rows = stage()
+            seconds = time.perf_counter() - started
+        results.append({
+            'stage': name,
+            'seconds': round(seconds, 4),
+            'rows': rows,
+            'rows_per_s': round(rows / seconds) if seconds else None,
+            'peak_rss_mb': round(memory.peak_rss_mb, 1),
+            'peak_arrow_mb': round(memory.peak_arrow_mb, 1),
+        })
+    return results
+
+
+def combine_repeats(runs):
+    """Median time per stage over repeated runs, worst peak memory"""
+    combined = []
+    for stage_runs in zip(*runs):
+        seconds = statistics.median(run['seconds'] for run in stage_runs)
+        rows = stage_runs[0]['rows']
+        combined.append({
+            'stage': stage_runs[0]['stage'],
+            'seconds': round(seconds, 4),
+            'rows': rows,
+            'rows_per_s': round(rows / seconds) if seconds else None,
+            'peak_rss_mb': max(run['peak_rss_mb'] for run in stage_runs),
+            'peak_arrow_mb': max(run['peak_arrow_mb'] for run in stage_runs),
+        })
+    return combined
+
+
+def git_revision():
+    """(commit, dirty) of the checkout being measured; (None, None) outside a git repo"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def configuration_key(record):
+    """Everything that must match for two results to be comparable"""
+    return json.dumps([record['benchmark_version'], record['data'], record['settings'],
+                       record['environment']['host'], record['environment']['cpus']], sort_keys=True)
+
+
+def load_results(results_path):
+    if not os.path.exists(results_path):
+        return []
+    with open(results_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(record, previous, baseline_commit=None):
+    """Latest earlier result with the same configuration on another (or the given) commit"""
+    key = configuration_key(record)
+    for candidate in reversed(previous):
+        if configuration_key(candidate) != key:
+            continue
+        if baseline_commit:
+            if (candidate['commit'] or '').startswith(baseline_commit):
+                return candidate
+        elif candidate['commit'] != record['commit'] or candidate['dirty'] != record['dirty']:
+            return candidate
+    return None
+
+
+def compare_results(record, baseline, threshold):
+    """Print per-stage changes against baseline; returns the stages that regressed"""
+    before = {stage['stage']: stage for stage in baseline['stages']}
+    regressions = []
+    print(f"  📉 vs {(baseline['commit'] or 'unknown')[:10]}{' (dirty)' if baseline['dirty'] else ''} "
+          f"from {baseline['timestamp']}:")
+    for stage in record['stages']:
+        old = before.get(stage['stage'])
+        if old is None:
+            continue
+        change = (stage['seconds'] - old['seconds']) / old['seconds'] if old['seconds'] else 0.0
+        regressed = change > threshold and stage['seconds'] - old['seconds'] > NOISE_FLOOR_SECONDS
+        marker = '❌' if regressed else '✅'
+        print(f"    {marker} {stage['stage']:<9} {old['seconds']:>8.3f}s -> {stage['seconds']:>8.3f}s "
+              f"({change:+.1%}), peak RSS {old['peak_rss_mb']:.0f} -> {stage['peak_rss_mb']:.0f} MB")
+        if regressed:
+            regressions.append(stage['stage'])
+    return regressions
+
+
+def print_stages(stages):
+    for stage in stages:
+        rate = f"{stage['rows_per_s']:,}" if stage['rows_per_s'] is not None else '-'
+        print(f"    {stage['stage']:<9} {stage['seconds']:>8.3f}s {stage['rows']:>11,} rows "
+              f"{rate:>12} rows/s  peak RSS {stage['peak_rss_mb']:>7.0f} MB  Arrow {stage['peak_arrow_mb']:>7.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parquet -> PostgreSQL load stage by stage')
+    parser.add_argument('--scale', type=float, nargs='+', default=[1.0],
+                        help=f'Multiples of the {BASE_ROWS:,}-row sample to benchmark, e.g. 1 10 100 (default: 1)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Synthetic data seed (default: 0)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per scale; the median time per stage is recorded (default: 1)')
+    parser.add_argument('--copy-format', choices=ARROW_COPY_FORMATS, default='csv',
+                        help='COPY wire format used for bulk loading (default: csv)')
+    parser.add_argument('--load-workers', type=int, default=1,
+                        help='Child tables COPY-loaded concurrently (default: 1)')
+    parser.add_argument('--finalize-workers', type=int, default=4,
+                        help='Deferred constraint/index statements run concurrently (default: 4)')
+    parser.add_argument('--database-url', default=None,
+                        help='Scratch database to load into (default: $BENCHMARK_DATABASE_URL or '
+                             f"{BENCHMARK_DB_CONFIG['database']} on localhost); all its tables are dropped")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help=f'Where synthetic parquet files are generated and reused (default: {DEFAULT_DATA_DIR})')
+    parser.add_argument('--results', default=DEFAULT_RESULTS,
+                        help=f'JSON lines file results are appended to (default: {DEFAULT_RESULTS})')
+    parser.add_argument('--compare', action='store_true',
+                        help='Compare with the latest comparable result from another commit; '
+                             'exit with status 1 if a stage regressed')
+    parser.add_argument('--baseline', default=None,
+                        help='Commit (prefix) to compare with instead of the latest other one')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown that counts as a regression (default: 0.10)')
+    parser.add_argument('--verbose', action='store_true',
+                        help="Show the loaders' own progress output")
+    args = parser.parse_args()
+
+    engine = create_engine(benchmark_database_url(args.database_url),
+                           pool_size=max(5, args.load_workers, args.finalize_workers))
+    refuse_production(engine)
+    with engine.connect() as conn:
+        server_version = conn.execute(text("SHOW server_version")).scalar()
+
+    commit, dirty = git_revision()
+    environment = {
+        'host': platform.node(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'pyarrow': pa.__version__,
+        'postgres': server_version,
+    }
+    settings = {'copy_format': args.copy_format, 'load_workers': args.load_workers,
+                'finalize_workers': args.finalize_workers}
+    previous = load_results(args.results)
+    os.makedirs(args.data_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    regressions = []
+
+    print(f"🏎️ Benchmarking commit {(commit or 'unknown')[:10]}{' (dirty)' if dirty else ''} "
+          f"against PostgreSQL {server_version}")
+    for scale in args.scale:
+        rows = scale_rows(scale)
+        path = default_path(args.data_dir, rows, args.seed)
+        if not os.path.exists(path):
+            print(f"🧪 Generating {rows:,} synthetic investors...")
+            started = time.perf_counter()
+            generate_investors(path, rows, args.seed)
+            print(f"  ✅ {path} in {time.perf_counter() - started:.1f}s")
+        verify_layout(path)
+
+        print(f"\n📏 Scale {scale:g} ({rows:,} investors, {os.path.getsize(path) / (1024 * 1024):.0f} MB)")
+        runs = []
+        for attempt in range(args.repeat):
+            runs.append(run_stages(engine, path, args.copy_format, args.load_workers, args.finalize_workers,
+                                   args.verbose))
+            if args.repeat > 1:
+                print(f"  Run {attempt + 1}/{args.repeat}: "
+                      + ', '.join(f"{stage['stage']} {stage['seconds']:.2f}s" for stage in runs[-1]))
+        record = {
+            'benchmark_version': BENCHMARK_VERSION,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit,
+            'dirty': dirty,
+            'data': {'rows': rows, 'seed': args.seed, 'generator_version': GENERATOR_VERSION},
+            'settings': settings,
+            'environment': environment,
+            'repeats': args.repeat,
+            'stages': combine_repeats(runs),
+        }
+        print_stages(record['stages'])
+
+        if args.compare or args.baseline:
+            baseline = find_baseline(record, previous, args.baseline)
+            if baseline is None:
+                print("  ⚠️ No comparable earlier result to compare with")
+            else:
+                regressions += [f"scale {scale:g} {stage}" for stage in
+                                compare_results(record, baseline, args.threshold)]
+
+        with open(args.results, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        previous.append(record)
+
+    print(f"\n📝 Results appended to {args.results}")
+    if regressions:
+        print(f"❌ Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
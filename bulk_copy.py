@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Bulk COPY loader - streams rows into PostgreSQL via COPY ... FROM STDIN
+"""
+
+import io
+import json
+import math
+import struct
+from datetime import date, datetime
+
+import pyarrow.csv as pa_csv
+
+# Rows per in-memory buffer handed to a single copy_expert call
+COPY_CHUNK_ROWS = 50000
+
+COPY_FORMATS = ('text', 'binary')
+
+# Arrow tables can additionally be serialized by Arrow's C++ CSV writer
+ARROW_COPY_FORMATS = ('csv',) + COPY_FORMATS
+
+# PostgreSQL type OIDs understood by the binary encoder
+OID_BOOL = 16
+OID_INT8 = 20
+OID_INT2 = 21
+OID_INT4 = 23
+OID_TEXT = 25
+OID_JSON = 114
+OID_FLOAT4 = 700
+OID_FLOAT8 = 701
+OID_BPCHAR = 1042
+OID_VARCHAR = 1043
+OID_DATE = 1082
+OID_TIMESTAMP = 1114
+OID_TIMESTAMPTZ = 1184
+OID_JSONB = 3802
+
+BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+BINARY_TRAILER = struct.pack('!h', -1)
+PG_EPOCH = datetime(2000, 1, 1)
+PG_EPOCH_DATE = date(2000, 1, 1)
+
+_TEXT_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def is_null(value):
+    """Check for None and float NaN (pandas missing values)"""
+    if value is None:
+        return True
+    return isinstance(value, float) and math.isnan(value)
+
+
+def to_json_text(value):
+    """Serialize a value destined for a JSON/JSONB column"""
+    if isinstance(value, str):
+        return value
+    if hasattr(value, 'tolist'):
+        value = value.tolist()
+    return json.dumps(value, default=str)
+
+
+def format_text_value(value):
+    """Render a single value in COPY text format"""
+    if hasattr(value, 'tolist'):
+        # numpy scalars and arrays
+        value = value.tolist()
+    if is_null(value):
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list, tuple)):
+        value = to_json_text(value)
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.translate(_TEXT_ESCAPES)
+
+
+def encode_text_rows(rows):
+    """Encode an iterable of row tuples as a COPY text payload"""
+    lines = ['\t'.join(format_text_value(v) for v in row) for row in rows]
+    if not lines:
+        return b''
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _pack_text(value):
+    return str(value).encode('utf-8')
+
+
+def _pack_json(value):
+    return to_json_text(value).encode('utf-8')
+
+
+def _pack_jsonb(value):
+    # JSONB binary format is a version byte followed by the JSON text
+    return b'\x01' + _pack_json(value)
+
+
+def _pack_timestamp(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    delta = value - PG_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return struct.pack('!q', micros)
+
+
+def _pack_date(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = date.fromisoformat(value)
+    return struct.pack('!i', (value - PG_EPOCH_DATE).days)
+
+
+BINARY_ENCODERS = {
+    OID_BOOL: lambda v: b'\x01' if v else b'\x00',
+    OID_INT2: lambda v: struct.pack('!h', int(v)),
+    OID_INT4: lambda v: struct.pack('!i', int(v)),
+    OID_INT8: lambda v: struct.pack('!q', int(v)),
+    OID_FLOAT4: lambda v: struct.pack('!f', float(v)),
+    OID_FLOAT8: lambda v: struct.pack('!d', float(v)),
+    OID_TEXT: _pack_text,
+    OID_VARCHAR: _pack_text,
+    OID_BPCHAR: _pack_text,
+    OID_JSON: _pack_json,
+    OID_JSONB: _pack_jsonb,
+    OID_DATE: _pack_date,
+    OID_TIMESTAMP: _pack_timestamp,
+    OID_TIMESTAMPTZ: _pack_timestamp,
+}
+
+
+def encode_binary_rows(rows, type_oids, header=True, trailer=True):
+    """Encode an iterable of row tuples as a COPY binary payload"""
+    encoders = []
+    for oid in type_oids:
+        if oid not in BINARY_ENCODERS:
+            raise ValueError(f"No binary COPY encoder for type OID {oid}; use format='text'")
+        encoders.append(BINARY_ENCODERS[oid])
+
+    field_count = struct.pack('!h', len(encoders))
+    null_field = struct.pack('!i', -1)
+    out = io.BytesIO()
+    if header:
+        out.write(BINARY_HEADER)
+    for row in rows:
+        out.write(field_count)
+        for encode, value in zip(encoders, row):
+            if hasattr(value, 'tolist'):
+                value = value.tolist()
+            if is_null(value):
+                out.write(null_field)
+            else:
+                data = encode(value)
+                out.write(struct.pack('!i', len(data)))
+                out.write(data)
+    if trailer:
+        out.write(BINARY_TRAILER)
+    return out.getvalue()
+
+
+def fetch_column_types(cursor, table, columns):
+    """Look up column type OIDs with a zero-row SELECT"""
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table} LIMIT 0")
+    return [col[1] for col in cursor.description]
+
+
+def chunked(rows, size):
+    """Yield lists of at most `size` rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def copy_rows_raw(raw_conn, table, columns, rows, format='text', chunk_rows=COPY_CHUNK_ROWS):
+    """COPY row tuples over an open DB-API connection; caller owns the transaction"""
+    if format not in COPY_FORMATS:
+        raise ValueError(f"Unknown COPY format {format!r}, expected one of {COPY_FORMATS}")
+
+    column_sql = ', '.join(columns)
+    sql = f"COPY {table} ({column_sql}) FROM STDIN WITH (FORMAT {format})"
+    total = 0
+
+    with raw_conn.cursor() as cursor:
+        type_oids = fetch_column_types(cursor, table, columns) if format == 'binary' else None
+        for chunk in chunked(rows, chunk_rows):
+            if format == 'binary':
+                payload = encode_binary_rows(chunk, type_oids)
+            else:
+                payload = encode_text_rows(chunk)
+            cursor.copy_expert(sql, io.BytesIO(payload))
+            total += len(chunk)
+
+    return total
+
+
+def copy_rows(engine, table, columns, rows, format='text', chunk_rows=COPY_CHUNK_ROWS):
+    """COPY row tuples into a table in a single transaction"""
+    raw_conn = engine.raw_connection()
+    try:
+        total = copy_rows_raw(raw_conn, table, columns, rows, format, chunk_rows)
+        raw_conn.commit()
+        return total
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+
+def copy_records(engine, table, records, columns=None, format='text', chunk_rows=COPY_CHUNK_ROWS):
+    """COPY a list of dicts (the loaders' batch format) into a table"""
+    if not records:
+        return 0
+    if columns is None:
+        columns = list(records[0].keys())
+    rows = (tuple(record.get(col) for col in columns) for record in records)
+    return copy_rows(engine, table, columns, rows, format, chunk_rows)
+
+
+def copy_dataframe(engine, table, df, format='text', chunk_rows=COPY_CHUNK_ROWS):
+    """COPY a pandas DataFrame into a table (drop-in for DataFrame.to_sql append)"""
+    if df.empty:
+        return 0
+    columns = list(df.columns)
+    rows = df.itertuples(index=False, name=None)
+    return copy_rows(engine, table, columns, rows, format, chunk_rows)
+
+
+def encode_arrow_csv(batch):
+    """Encode an Arrow table/batch as COPY csv; nulls stay unquoted, values are quoted"""
+    out = io.BytesIO()
+    options = pa_csv.WriteOptions(include_header=False, quoting_style='all_valid')
+    pa_csv.write_csv(batch, out, write_options=options)
+    return out.getvalue()
+
+
+def copy_arrow_raw(raw_conn, table, arrow_table, format='csv', chunk_rows=COPY_CHUNK_ROWS):
+    """COPY an Arrow table over an open DB-API connection; caller owns the transaction"""
+    if format not in ARROW_COPY_FORMATS:
+        raise ValueError(f"Unknown COPY format {format!r}, expected one of {ARROW_COPY_FORMATS}")
+    if arrow_table.num_rows == 0:
+        return 0
+    columns = arrow_table.column_names
+    if format != 'csv':
+        rows = (row for batch in arrow_table.to_batches(max_chunksize=chunk_rows)
+                for row in zip(*(col.to_pylist() for col in batch.columns)))
+        return copy_rows_raw(raw_conn, table, columns, rows, format, chunk_rows)
+
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    with raw_conn.cursor() as cursor:
+        for batch in arrow_table.to_batches(max_chunksize=chunk_rows):
+            cursor.copy_expert(sql, io.BytesIO(encode_arrow_csv(batch)))
+    return arrow_table.num_rows
+
+
+def copy_arrow(engine, table, arrow_table, format='csv', chunk_rows=COPY_CHUNK_ROWS):
+    """COPY a pyarrow Table into a table in a single transaction"""
+    raw_conn = engine.raw_connection()
+    try:
+        total = copy_arrow_raw(raw_conn, table, arrow_table, format, chunk_rows)
+        raw_conn.commit()
+        return total
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+
+def copy_query_arrow_raw(raw_conn, sql, column_types=None):
+    """Read the rows of a query as an Arrow table via COPY ... TO STDOUT (csv)
+
+    column_types ({column: Arrow type}) keeps the schema when no rows come back.
+    """
+    out = io.BytesIO()
+    with raw_conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+    out.seek(0)
+    # Unquoted empty fields are NULLs, quoted ones empty strings
+    options = pa_csv.ConvertOptions(column_types=column_types or {}, strings_can_be_null=True,
+                                    quoted_strings_can_be_null=False)
+    return pa_csv.read_csv(out, convert_options=options)
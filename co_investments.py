@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Co-investment graph from sparse matrix products
+
+Builds the investor x portfolio-company incidence matrix A as a
+scipy.sparse CSR: an investor has a 1 for every company in its own
+investments and for every company whose investment lists it among the
+coinvestor_names (names matched to exactly one investor's person).
+A @ A.T then holds, for every pair of investors, the number of portfolio
+companies they share; its upper triangle is bulk-loaded as the weighted
+edge list co_investments(investor1_id < investor2_id, shared_deals), with
+an index on each endpoint.
+
+The product is taken one block of investor rows at a time, so memory is
+bounded by the pairs of a single block rather than the whole graph.
+Companies are matched on investments.company_id, the canonical company
+the display name resolved to (see entity_resolution.py).
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
+from sqlalchemy import create_engine
+
+from bulk_copy import ARROW_COPY_FORMATS, copy_arrow_raw, copy_query_arrow_raw
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+# Investor rows multiplied against the whole matrix at once
+BLOCK_ROWS = 20000
+
+CO_INVESTMENTS_SCHEMA = """
+DROP TABLE IF EXISTS co_investments CASCADE;
+CREATE TABLE co_investments (
+    investor1_id INTEGER NOT NULL,
+    investor2_id INTEGER NOT NULL,
+    shared_deals INTEGER NOT NULL
+);
+"""
+
+# Keys and indexes are built after the COPY, like the deferred constraints of a bulk load
+CO_INVESTMENTS_INDEXES = """
+ALTER TABLE co_investments ADD PRIMARY KEY (investor1_id, investor2_id);
+CREATE INDEX idx_co_investments_investor2_id ON co_investments(investor2_id);
+ALTER TABLE co_investments ADD FOREIGN KEY (investor1_id) REFERENCES investors(id) ON DELETE CASCADE;
+ALTER TABLE co_investments ADD FOREIGN KEY (investor2_id) REFERENCES investors(id) ON DELETE CASCADE;
+ANALYZE co_investments;
+"""
+
+# (investor, company) pairs: the investor's own investments plus the coinvestors named on them
+INCIDENCE_SQL = """
+WITH named_investors AS (
+    SELECT p.name, MIN(i.id) AS investor_id
+    FROM investors i
+    JOIN persons p ON p.id = i.person_id
+    WHERE p.name IS NOT NULL
+    GROUP BY p.name
+    HAVING COUNT(*) = 1
+)
+SELECT investor_id, company_id
+FROM investments
+WHERE investor_id IS NOT NULL AND company_id IS NOT NULL
+UNION ALL
+SELECT n.investor_id, inv.company_id
+FROM coinvestors c
+JOIN investments inv ON inv.id = c.investment_id
+JOIN named_investors n ON n.name = c.name
+WHERE inv.company_id IS NOT NULL
+"""
+
+
+def incidence_matrix(pairs):
+    """Binary CSR matrix investors x companies (row = investor id) from an (investor_id, company_id) table"""
+    investor_ids = pairs.column('investor_id').to_numpy()
+    companies = pc.dictionary_encode(pairs.column('company_id')).combine_chunks()
+    company_codes = companies.indices.to_numpy()
+    shape = (int(investor_ids.max(initial=0)) + 1, len(companies.dictionary))
+    matrix = sparse.csr_matrix((np.ones(len(investor_ids), dtype=np.int32), (investor_ids, company_codes)),
+                               shape=shape)
+    # An investor named on several investments in the same company still holds it once
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def co_investment_blocks(matrix, block_rows=BLOCK_ROWS):
+    """Yield (investor1_id, investor2_id, shared_deals) Arrow tables of A @ A.T above the diagonal"""
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[0], block_rows):
+        # Row r of the block is investor start + r; only partners with a higher id are kept
+        shared = sparse.triu(matrix[start:start + block_rows] @ transposed, k=start + 1).tocoo()
+        if shared.nnz == 0:
+            continue
+        yield pa.table({
+            'investor1_id': pa.array(shared.row + start, type=pa.int32()),
+            'investor2_id': pa.array(shared.col, type=pa.int32()),
+            'shared_deals': pa.array(shared.data, type=pa.int32()),
+        })
+
+
+def build_co_investments(engine, copy_format='csv', block_rows=BLOCK_ROWS):
+    """Rebuild co_investments from the loaded investments; returns the number of edges"""
+    print("🤝 Building co-investment graph from investments and coinvestor names...")
+    with measure_stage('co-investments') as stage_metrics:
+        started = time.perf_counter()
+        raw_conn = engine.raw_connection()
+        try:
+            pairs = copy_query_arrow_raw(raw_conn, INCIDENCE_SQL,
+                                         {'investor_id': pa.int32(), 'company_id': pa.int32()})
+            matrix = incidence_matrix(pairs)
+            print(f"  📐 Incidence matrix: {matrix.shape[0] - 1:,} investors x {matrix.shape[1]:,} companies, "
+                  f"{matrix.nnz:,} holdings")
+
+            with raw_conn.cursor() as cursor:
+                cursor.execute(CO_INVESTMENTS_SCHEMA)
+            edges = 0
+            for block in co_investment_blocks(matrix, block_rows):
+                edges += copy_arrow_raw(raw_conn, 'co_investments', block, copy_format)
+            with raw_conn.cursor() as cursor:
+                cursor.execute(CO_INVESTMENTS_INDEXES)
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+        stage_metrics['rows'] = edges
+    print(f"✅ Loaded {edges:,} co-investment edges in {time.perf_counter() - started:.2f}s")
+    return edges
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the co-investment graph from the loaded investments')
+    parser.add_argument('--copy-format', choices=ARROW_COPY_FORMATS, default='csv',
+                        help='COPY wire format used for bulk loading (default: csv)')
+    parser.add_argument('--block-rows', type=int, default=BLOCK_ROWS,
+                        help=f'Investor rows per sparse product block (default: {BLOCK_ROWS})')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('co_investments', args.trace_allocations)
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        build_co_investments(engine, args.copy_format, args.block_rows)
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Co-investment graph failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,40 @@
 Complete population of all nested relational data - OPTIMIZED
 """
 
-import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from sqlalchemy import create_engine, text
-import json
+import argparse
 import sys
+import time
+from functools import partial
+
+from arrow_extract import (CHILD_SOURCE_COLUMNS, INVESTMENT_CHILD_COLUMNS, extract_child_tables, map_investment_ids,
+                           map_keys, unique_by)
+from bulk_copy import copy_arrow_raw, copy_query_arrow_raw, ARROW_COPY_FORMATS
+from co_investments import build_co_investments
+from dimension_tables import (DIMENSION_TABLES, NORMALIZED_RELATIONS, dimension_allocators_from_db, is_normalized,
+                              load_dimension_junction, merge_deferred, new_dimension_allocators, normalized_schema,
+                              without_flat_tables)
+from entity_resolution import company_rows, new_resolvers, school_rows
+from extract_cache import DEFAULT_CACHE_DIR, cached_child_tables
+from index_advisor import run_index_advisor
+from parallel_extract import default_workers, iter_parallel_extract, parallel_extract_child_tables, plan_slices
+from export_relational_fast import create_relational_schema
+from load_finalize import HOT_TABLES, finalize_schema, split_schema
+from load_manifest import LoadManifest, run_unit, source_fingerprint
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+from load_statistics import RelationshipStatistics, new_load_id
+from name_lookup import build_name_indexes
+from network_metrics import build_network_metrics
+from parallel_load import LOAD_DEPENDENCIES, run_load_dag
+from parent_tables import slug_or_default
+from parquet_stream import DEFAULT_BATCH_ROWS, iter_parquet_batches, parquet_row_count, peak_rss_mb
+from research_views import check_redeployable, dependent_views, redeploy_views, refresh_materialized_views
+from search_index import build_search_index
+from surrogate_keys import bump_sequences
 
 # Database connection settings
 DB_CONFIG = {
@@ -18,310 +47,485 @@ DB_CONFIG = {
     'password': 'Adminaccount1!'
 }
 
-def safe_get(obj, key, default=None):
-    """Safely get value from dict-like object"""
-    if isinstance(obj, dict):
-        return obj.get(key, default)
-    return default
+PARQUET_PATH = '/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet'
 
-def process_all_nested_data():
-    """Process all nested data in batches"""
-    
-    print("🚀 Loading and processing all nested data...")
-    
-    # Load parquet file
-    df = pd.read_parquet('/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet')
-    engine = create_engine(f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
-    
-    print(f"📄 Processing {len(df)} records...")
+# Child tables keyed only by investor_id - loaded straight from the extracted batches
+INVESTOR_CHILD_TABLES = ['areas_of_interest', 'investment_locations', 'investor_stages',
+                         'image_urls', 'media_links', 'investor_lists']
+
+# Tables with investment_id / target_person_id foreign keys resolved while loading
+RELATIONSHIP_TABLES = ['investments', 'investment_rounds', 'coinvestors', 'network_persons', 'network_connections']
+
+INVESTOR_SLUGS_SQL = """
+SELECT i.id, p.slug FROM investors i LEFT JOIN persons p ON p.id = i.person_id
+"""
+
+# Every load step, each recorded in the run manifest per investor id range
+LOAD_STEPS = INVESTOR_CHILD_TABLES + RELATIONSHIP_TABLES + ['companies', 'positions', 'schools', 'degrees']
+
+def ensure_dimension(raw_conn, table_name, rows, key_map, copy_format, key='name'):
+    """Insert dimension rows whose key is not in key_map yet and record their new ids"""
+    if rows.num_rows == 0:
+        return 0
+    known = pc.is_in(rows.column(key), value_set=pa.array(list(key_map), type=pa.string()))
+    new_rows = rows.filter(pc.invert(known))
+    if new_rows.num_rows == 0:
+        return 0
+
+    copy_arrow_raw(raw_conn, table_name, new_rows, format=copy_format)
+    with raw_conn.cursor() as cursor:
+        cursor.execute(f"SELECT id, {key} FROM {table_name} WHERE {key} = ANY(%s)",
+                       (new_rows.column(key).to_pylist(),))
+        key_map.update({row[1]: row[0] for row in cursor.fetchall()})
+    return new_rows.num_rows
+
+def prepare_rows(rows, person_map):
+    """Attach person_id from the person slug and drop rows whose person isn't loaded"""
+    rows = rows.append_column('person_id', map_keys(rows.column('person_slug'), person_map))
+    return rows.filter(pc.is_valid(rows.column('person_id')))
+
+def load_companies(raw_conn, positions, investments, company_resolver, copy_format):
+    """Resolve the company names of positions and investments, creating the new companies"""
+    return company_resolver.resolve(raw_conn, company_rows(positions, investments), copy_format)
+
+def copy_positions(raw_conn, positions, company_resolver, copy_format):
+    """Load positions with person/company foreign keys (companies must exist already)"""
+    if positions.num_rows == 0:
+        return 0
+    positions_with_fk = pa.table({
+        'person_id': positions.column('person_id'),
+        'company_id': company_resolver.ids(positions.column('company_name')),
+        'title': positions.column('title'),
+        'start_month': positions.column('start_month'),
+        'start_year': positions.column('start_year'),
+        'end_month': positions.column('end_month'),
+        'end_year': positions.column('end_year'),
+    })
+    copy_arrow_raw(raw_conn, 'positions', positions_with_fk, format=copy_format)
+    return positions_with_fk.num_rows
+
+def load_schools(raw_conn, degrees, school_resolver, copy_format):
+    """Resolve the school names of degrees, creating the new schools"""
+    return school_resolver.resolve(raw_conn, school_rows(degrees), copy_format)
+
+def copy_degrees(raw_conn, degrees, school_resolver, copy_format):
+    """Load degrees with person/school foreign keys (schools must exist already)"""
+    if degrees.num_rows == 0:
+        return 0
+    degrees_with_fk = pa.table({
+        'person_id': degrees.column('person_id'),
+        'school_id': school_resolver.ids(degrees.column('school_name')),
+        'degree_name': degrees.column('degree_name'),
+        'field_of_study': degrees.column('field_of_study'),
+    })
+    copy_arrow_raw(raw_conn, 'degrees', degrees_with_fk, format=copy_format)
+    return degrees_with_fk.num_rows
+
+def copy_investments(raw_conn, investments, investment_ids, company_resolver, copy_format):
+    """Load investments with client-assigned ids so rounds and coinvestors can reference them
+
+    company_id links each investment to its resolved portfolio company.
+    """
+    if investments.num_rows == 0:
+        return 0
+    investments = investments.add_column(0, 'id', investment_ids)
+    investments = investments.add_column(2, 'company_id', company_resolver.ids(investments.column('company_display_name')))
+    copy_arrow_raw(raw_conn, 'investments', investments, format=copy_format)
+    return investments.num_rows
+
+def copy_investment_children(raw_conn, table_name, rows, investments, investment_ids, copy_format):
+    """Load investment_rounds/coinvestors with investment_id resolved from (investor_id, investment_index)"""
+    if rows.num_rows == 0:
+        return 0
+    rows = rows.add_column(0, 'investment_id', map_investment_ids(investments, investment_ids, rows))
+    copy_arrow_raw(raw_conn, table_name, rows.select(INVESTMENT_CHILD_COLUMNS[table_name]), format=copy_format)
+    return rows.num_rows
+
+def load_network_persons(raw_conn, connections, person_map, copy_format):
+    """Create stub persons for network targets that aren't investors themselves"""
+    targets = unique_by(connections, 'target_slug', ['target_name', 'target_first_name', 'target_last_name'])
+    targets = targets.rename_columns(['slug', 'name', 'first_name', 'last_name'])
+    return ensure_dimension(raw_conn, 'persons', targets, person_map, copy_format, key='slug')
+
+def copy_network_connections(raw_conn, connections, person_map, copy_format):
+    """Load network_connections with target_person_id resolved by slug"""
+    if connections.num_rows == 0:
+        return 0
+    connections_with_fk = pa.table({
+        'investor_id': connections.column('investor_id'),
+        'target_person_id': map_keys(connections.column('target_slug'), person_map),
+        'list_type': connections.column('list_type'),
+        'position': connections.column('position'),
+    })
+    copy_arrow_raw(raw_conn, 'network_connections', connections_with_fk, format=copy_format)
+    return connections_with_fk.num_rows
+
+def copy_child_table(raw_conn, table_name, batch, copy_format):
+    if batch.num_rows:
+        copy_arrow_raw(raw_conn, table_name, batch, format=copy_format)
+    return batch.num_rows
+
+def load_child_tables(engine, child_tables, key_maps, copy_format, load_workers=1, id_counters=None,
+                      manifest=None, id_range=(0, 0), dimension_allocators=None):
+    """Load one extracted batch of child tables; returns rows written per table
+
+    Independent tables are COPY-loaded concurrently on up to load_workers
+    pooled connections; companies/schools are resolved before positions,
+    degrees and investments reference them.
+    Each table commits in its own transaction together with its manifest
+    unit for id_range, so units a previous run finished are skipped.
+    id_counters['investments'] is the next free investment id and is
+    advanced past this batch. With dimension_allocators, stages, areas of
+    interest and investment locations go to the normalized dimension and
+    junction tables instead of the flat ones.
+    """
+    positions = prepare_rows(child_tables['positions'], key_maps['persons'])
+    degrees = prepare_rows(child_tables['degrees'], key_maps['persons'])
     
-    # Clear existing nested data to avoid duplicates
+    id_counters = id_counters if id_counters is not None else {'investments': 1}
+    investments = child_tables['investments']
+    first_id = id_counters['investments']
+    investment_ids = pa.array(range(first_id, first_id + investments.num_rows), type=pa.int32())
+    id_counters['investments'] = first_id + investments.num_rows
+
+    def unit(load, *args):
+        return lambda raw_conn: load(raw_conn, *args)
+
+    loads = {table_name: unit(copy_child_table, table_name, child_tables[table_name], copy_format)
+             for table_name in INVESTOR_CHILD_TABLES}
+    if dimension_allocators is not None:
+        for table_name in DIMENSION_TABLES:
+            loads[table_name] = unit(load_dimension_junction, table_name, child_tables[table_name],
+                                     dimension_allocators[table_name], copy_format)
+    loads['companies'] = unit(load_companies, positions, investments, key_maps['companies'], copy_format)
+    loads['positions'] = unit(copy_positions, positions, key_maps['companies'], copy_format)
+    loads['schools'] = unit(load_schools, degrees, key_maps['schools'], copy_format)
+    loads['degrees'] = unit(copy_degrees, degrees, key_maps['schools'], copy_format)
+    loads['investments'] = unit(copy_investments, investments, investment_ids, key_maps['companies'], copy_format)
+    for table_name in ('investment_rounds', 'coinvestors'):
+        loads[table_name] = unit(copy_investment_children, table_name, child_tables[table_name],
+                                 investments, investment_ids, copy_format)
+    connections = child_tables['network_connections']
+    loads['network_persons'] = unit(load_network_persons, connections, key_maps['persons'], copy_format)
+    loads['network_connections'] = unit(copy_network_connections, connections, key_maps['persons'], copy_format)
+    steps = {name: partial(run_unit, engine, manifest, name, *id_range, load) for name, load in loads.items()}
+    return run_load_dag(steps, LOAD_DEPENDENCIES, max_workers=load_workers)
+
+def skip_finished_range(manifest, id_counters, id_range):
+    """Counts for an id range every load step finished in a previous run (None if any is left)
+
+    Lets a resumed run skip extracting the batch; the investment id counter
+    still advances by the investments that range already holds.
+    """
+    counts = manifest.finished_counts(LOAD_STEPS, *id_range)
+    if counts is not None:
+        id_counters['investments'] += counts['investments']
+    return counts
+
+def print_load_counts(counts):
+    for table_name in LOAD_STEPS:
+        if counts.get(table_name):
+            print(f"  ✅ Inserted {counts[table_name]} {table_name.replace('_', ' ')}")
+
+def finish_children_load(engine, manifest, id_counters, counts, statistics):
+    print_load_counts(counts)
+    bump_sequences(engine, {'investments': id_counters['investments'] - 1})
+    statistics.save(engine, new_load_id(), manifest.source)
+    manifest.print_summary()
+
+def check_investor_rows(engine, path):
+    """Refuse to load children unless every investor id is still its file row + 1
+
+    Children are keyed by investor_id = row + 1, but delta_sync.py gives
+    new investors ids after the highest one and leaves gaps for deleted
+    ones, so after a delta sync they would attach to the wrong investors.
+    """
+    raw_conn = engine.raw_connection()
+    try:
+        investors = copy_query_arrow_raw(raw_conn, INVESTOR_SLUGS_SQL, {'id': pa.int64(), 'slug': pa.string()})
+    finally:
+        raw_conn.close()
+    investors = investors.sort_by('id')
+    ids = investors.column('id').to_numpy()
+    stored_slugs = investors.column('slug').combine_chunks()
+
+    # Only the person.slug leaf is decoded, one batch at a time
+    mismatched, rows = 0, 0
+    for start_id, batch in iter_parquet_batches(path, columns=['person.slug']):
+        rows += batch.num_rows
+        first, last = np.searchsorted(ids, [start_id, start_id + batch.num_rows])
+        expected = pc.take(slug_or_default(batch, 'person', 'person_', start_id), pa.array(ids[first:last] - start_id))
+        actual = stored_slugs[first:last]
+        same = pc.equal(expected, actual)
+        same = pc.if_else(pc.is_null(same), pc.and_(pc.is_null(expected), pc.is_null(actual)), same)
+        mismatched += int((~same.to_numpy(zero_copy_only=False)).sum())
+    in_file = int(((ids >= 1) & (ids <= rows)).sum())
+    mismatched += len(ids) - in_file + max(0, rows - len(ids))
+    if mismatched:
+        raise ValueError(f"{mismatched} investors are not keyed by their row in {path} (delta_sync.py assigns "
+                         "its own ids) - re-export the parents with export_relational_fast.py first, "
+                         "or keep applying changes with delta_sync.py")
+
+def clear_child_tables(engine, normalized=False):
     with engine.connect() as conn:
-        tables_to_clear = ['positions', 'degrees', 'investments', 'areas_of_interest', 
+        tables_to_clear = ['investment_rounds', 'coinvestors', 'network_connections', 'investor_lists',
+                          'positions', 'degrees', 'investments', 'areas_of_interest', 
                           'investment_locations', 'investor_stages', 'image_urls', 'media_links']
-        for table in tables_to_clear:
-            conn.execute(text(f"TRUNCATE TABLE {table} CASCADE"))
+        if normalized:
+            # The flat tables are views there; normalized_schema() has just recreated the real ones empty
+            tables_to_clear = [name for name in tables_to_clear if name not in DIMENSION_TABLES]
+        for table_name in tables_to_clear:
+            conn.execute(text(f"TRUNCATE TABLE {table_name} CASCADE"))
         conn.commit()
         print("🧹 Cleared existing nested data")
+
+def process_all_nested_data(copy_format='csv', stream=False, batch_size=DEFAULT_BATCH_ROWS, workers=1,
+                            load_workers=1, resume=False, cache_dir=DEFAULT_CACHE_DIR, normalized=False,
+                            defer_constraints=False):
+    """Process all nested data in batches
+
+    With resume=True the tables are not cleared and every (table, id range)
+    unit the run manifest already marks done is skipped. Whole-file runs
+    read the flattened child tables from cache_dir when it is set.
+    normalized=True loads stages, areas of interest and investment
+    locations into dimension + junction tables (created bare, keys
+    deferred, when defer_constraints is set). Per-investor list-length
+    statistics are counted from the extracted batches and saved to
+    load_statistics at the end.
+    """
     
-    # Get person mappings
-    with engine.connect() as conn:
-        person_map = {row[1]: row[0] for row in conn.execute(text("SELECT id, slug FROM persons")).fetchall()}
-    
-    # Collect all data
-    all_positions = []
-    all_degrees = []
-    all_investments = []
-    all_areas = []
-    all_locations = []
-    all_stages = []
-    all_images = []
-    all_media = []
+    print("🚀 Loading and processing all nested data...")
     
-    school_map = {}
-    company_map = {}
+    # One pooled connection per concurrent load step
+    engine = create_engine(f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}",
+                           pool_size=max(5, load_workers), connect_args=counting_connect_args())
+    total_rows = parquet_row_count(PARQUET_PATH)
     
-    print("🔄 Extracting all nested data...")
+    print(f"📄 Processing {total_rows} records...")
     
-    for idx, row in df.iterrows():
-        if idx % 5000 == 0:
-            print(f"  Processing {idx}/{len(df)} - Areas: {len(all_areas)}, Positions: {len(all_positions)}")
-        
-        investor_id = idx + 1
-        
-        # Get person_id
-        person_data = safe_get(row, 'person', {})
-        person_id = None
-        if isinstance(person_data, dict) and person_data:
-            person_slug = safe_get(person_data, 'slug', f'person_{idx}')
-            person_id = person_map.get(person_slug)
-        
-        # 1. Areas of Interest
-        areas = row.get('areas_of_interest')
-        if isinstance(areas, np.ndarray) and areas.size > 0:
-            for area in areas:
-                if isinstance(area, dict):
-                    all_areas.append({
-                        'investor_id': investor_id,
-                        'kind': safe_get(area, 'kind'),
-                        'display_name': safe_get(area, 'display_name')
-                    })
-        
-        # 2. Investment Locations
-        locations = row.get('investment_locations')
-        if isinstance(locations, np.ndarray) and locations.size > 0:
-            for loc in locations:
-                if isinstance(loc, dict):
-                    all_locations.append({
-                        'investor_id': investor_id,
-                        'kind': safe_get(loc, 'kind'),
-                        'display_name': safe_get(loc, 'display_name')
-                    })
-        
-        # 3. Stages
-        stages = row.get('stages')
-        if isinstance(stages, np.ndarray) and stages.size > 0:
-            for stage in stages:
-                if isinstance(stage, dict):
-                    all_stages.append({
-                        'investor_id': investor_id,
-                        'kind': safe_get(stage, 'kind'),
-                        'display_name': safe_get(stage, 'display_name')
-                    })
-        
-        # 4. Image URLs
-        images = row.get('image_urls')
-        if isinstance(images, np.ndarray) and images.size > 0:
-            for img in images:
-                if img and isinstance(img, str):
-                    all_images.append({
-                        'investor_id': investor_id,
-                        'url': img,
-                        'is_edit_mode': False
-                    })
-        
-        # Edit mode images
-        edit_images = row.get('image_urls_edit_mode')
-        if isinstance(edit_images, np.ndarray) and edit_images.size > 0:
-            for img in edit_images:
-                if img and isinstance(img, str):
-                    all_images.append({
-                        'investor_id': investor_id,
-                        'url': img,
-                        'is_edit_mode': True
-                    })
-        
-        # 5. Media Links
-        media = row.get('media_links')
-        if isinstance(media, np.ndarray) and media.size > 0:
-            for m in media:
-                if isinstance(m, dict):
-                    all_media.append({
-                        'investor_id': investor_id,
-                        'url': safe_get(m, 'url'),
-                        'title': safe_get(m, 'title'),
-                        'image_url': safe_get(m, 'image_url')
-                    })
-        
-        # 6. Positions (if person exists)
-        if person_id:
-            positions = row.get('positions')
-            if isinstance(positions, np.ndarray) and positions.size > 0:
-                for pos in positions:
-                    if isinstance(pos, dict):
-                        # Handle company
-                        company_data = safe_get(pos, 'company', {})
-                        company_name = safe_get(company_data, 'name') if company_data else None
-                        
-                        start_date = safe_get(pos, 'start_date', {})
-                        end_date = safe_get(pos, 'end_date', {})
-                        
-                        all_positions.append({
-                            'person_id': person_id,
-                            'company_name': company_name,  # We'll resolve this later
-                            'company_display_name': safe_get(company_data, 'display_name') if company_data else None,
-                            'company_employee_count': safe_get(company_data, 'total_employee_count') if company_data else None,
-                            'title': safe_get(pos, 'title'),
-                            'start_month': safe_get(start_date, 'month') if isinstance(start_date, dict) else None,
-                            'start_year': safe_get(start_date, 'year') if isinstance(start_date, dict) else None,
-                            'end_month': safe_get(end_date, 'month') if isinstance(end_date, dict) else None,
-                            'end_year': safe_get(end_date, 'year') if isinstance(end_date, dict) else None
-                        })
-            
-            # 7. Degrees
-            degrees = row.get('degrees')
-            if isinstance(degrees, np.ndarray) and degrees.size > 0:
-                for deg in degrees:
-                    if isinstance(deg, dict):
-                        school_data = safe_get(deg, 'school', {})
-                        school_name = safe_get(school_data, 'name') if school_data else None
-                        
-                        all_degrees.append({
-                            'person_id': person_id,
-                            'school_name': school_name,
-                            'school_display_name': safe_get(school_data, 'display_name') if school_data else None,
-                            'school_student_count': safe_get(school_data, 'total_student_count') if school_data else None,
-                            'degree_name': safe_get(deg, 'name'),
-                            'field_of_study': safe_get(deg, 'field_of_study')
-                        })
-        
-        # 8. Investments
-        investments = row.get('investments_on_record')
-        if isinstance(investments, dict):
-            edges = safe_get(investments, 'edges', [])
-            if isinstance(edges, np.ndarray) and edges.size > 0:
-                for edge in edges:
-                    if isinstance(edge, dict):
-                        node = safe_get(edge, 'node', {})
-                        if isinstance(node, dict):
-                            total_raised = safe_get(node, 'total_raised', [])
-                            # Convert numpy array to list for JSON serialization
-                            if isinstance(total_raised, np.ndarray):
-                                total_raised = total_raised.tolist()
-                            
-                            all_investments.append({
-                                'investor_id': investor_id,
-                                'company_display_name': safe_get(node, 'company_display_name'),
-                                'total_raised_json': json.dumps(total_raised) if total_raised else None
-                            })
+    # Unit ranges depend on how the file is split, so the layout is part of the manifest's fingerprint
+    if stream and workers > 1:
+        layout = {'mode': 'slices', 'workers': workers}
+    elif stream:
+        layout = {'mode': 'batches', 'batch_size': batch_size}
+    else:
+        layout = {'mode': 'whole'}
+    layout['normalized'] = normalized
+    manifest = LoadManifest(engine, 'children', source_fingerprint(PARQUET_PATH, **layout), resume=resume)
     
-    print(f"✅ Extracted all data:")
-    print(f"  Areas of interest: {len(all_areas)}")
-    print(f"  Investment locations: {len(all_locations)}")
-    print(f"  Stages: {len(all_stages)}")
-    print(f"  Image URLs: {len(all_images)}")
-    print(f"  Media links: {len(all_media)}")
-    print(f"  Positions: {len(all_positions)}")
-    print(f"  Degrees: {len(all_degrees)}")
-    print(f"  Investments: {len(all_investments)}")
-    
-    # Bulk insert all data
-    print("💾 Bulk inserting all data...")
+    with engine.connect() as conn:
+        normalized_in_db = is_normalized(conn)
+    if normalized_in_db and not normalized:
+        raise ValueError("The database holds the normalized stage/sector/location layout - "
+                         "rerun with --normalized-dimensions or re-export the schema first")
+    if normalized and not (resume and normalized_in_db):
+        print("🗂️ Creating normalized stage/sector/location dimension tables...")
+        schema = normalized_schema()
+        with engine.connect() as conn:
+            # DROP ... CASCADE takes the research views reading the old tables with it
+            views = dependent_views(conn, NORMALIZED_RELATIONS)
+            check_redeployable(views)
+            conn.execute(text(split_schema(schema)[0] if defer_constraints else schema))
+            conn.commit()
+        redeploy_views(engine, views)
     
-    if all_areas:
-        pd.DataFrame(all_areas).to_sql('areas_of_interest', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(all_areas)} areas of interest")
+    check_investor_rows(engine, PARQUET_PATH)
+    if resume:
+        print(f"⏩ Resuming: {sum(1 for status, _ in manifest.units.values() if status == 'done')} units already loaded")
+    else:
+        # Clear existing nested data to avoid duplicates
+        clear_child_tables(engine, normalized)
     
-    if all_locations:
-        pd.DataFrame(all_locations).to_sql('investment_locations', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(all_locations)} investment locations")
+    # Get person mappings and the company/school resolvers
+    with engine.connect() as conn:
+        key_maps = {
+            'persons': {row[1]: row[0] for row in conn.execute(text("SELECT id, slug FROM persons")).fetchall()},
+            **new_resolvers(conn),
+        }
+        # Dimension ids are client-side; a resumed run continues from the rows already loaded
+        dimension_allocators = None
+        if normalized:
+            dimension_allocators = dimension_allocators_from_db(conn) if resume else new_dimension_allocators()
+    # investments was just truncated (or is refilled range by range on resume), so ids start over at 1
+    id_counters = {'investments': 1}
+    statistics = RelationshipStatistics()
     
-    if all_stages:
-        pd.DataFrame(all_stages).to_sql('investor_stages', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(all_stages)} investor stages")
+    if stream and workers > 1:
+        print(f"🌊 Extracting slices across {workers} processes, loading each in order via COPY ({copy_format})...")
+        totals = {}
+        # Each slice is one manifest unit range; iter_parallel_extract plans the same slices
+        slice_ends = {start_id: end_id for start_id, end_id, _ in plan_slices(PARQUET_PATH, workers)}
+        # Slices a previous run finished completely are not even read
+        finished = {start_id for start_id, end_id in slice_ends.items()
+                    if all(manifest.is_done(name, start_id, end_id) for name in LOAD_STEPS)}
+        with measure_stage('children'):
+            for start_id, child_tables in iter_parallel_extract(PARQUET_PATH, workers, skip=finished):
+                id_range = (start_id, slice_ends[start_id])
+                if child_tables is None:
+                    counts = skip_finished_range(manifest, id_counters, id_range)
+                    statistics.skip()
+                else:
+                    counts = load_child_tables(engine, child_tables, key_maps, copy_format, load_workers,
+                                               id_counters, manifest, id_range, dimension_allocators)
+                    statistics.add(child_tables, slice_ends[start_id] - start_id + 1)
+                for table_name, count in counts.items():
+                    totals[table_name] = totals.get(table_name, 0) + count
+                del child_tables
+                print(f"  Loaded slice starting at investor {start_id} - Areas: {totals['areas_of_interest']}, "
+                      f"Positions: {totals['positions']}")
+        finish_children_load(engine, manifest, id_counters, totals, statistics)
+        return
     
-    if all_images:
-        pd.DataFrame(all_images).to_sql('image_urls', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(all_images)} image URLs")
+    if stream:
+        print(f"🌊 Streaming {batch_size}-row batches via COPY ({copy_format})...")
+        totals = {}
+        with measure_stage('children'):
+            for start_id, batch in iter_parquet_batches(PARQUET_PATH, CHILD_SOURCE_COLUMNS, batch_size):
+                processed = start_id - 1 + batch.num_rows
+                id_range = (start_id, processed)
+                counts = skip_finished_range(manifest, id_counters, id_range)
+                if counts is None:
+                    child_tables = extract_child_tables(batch, start_id)
+                    counts = load_child_tables(engine, child_tables, key_maps, copy_format, load_workers,
+                                               id_counters, manifest, id_range, dimension_allocators)
+                    statistics.add(child_tables, batch.num_rows)
+                    del child_tables
+                else:
+                    statistics.skip()
+                for table_name, count in counts.items():
+                    totals[table_name] = totals.get(table_name, 0) + count
+                # Release the batch before reading the next one
+                del batch
+                print(f"  Processed {processed}/{total_rows} - Areas: {totals['areas_of_interest']}, "
+                      f"Positions: {totals['positions']}, peak RSS {peak_rss_mb():.0f} MB")
+        finish_children_load(engine, manifest, id_counters, totals, statistics)
+        return
     
-    if all_media:
-        pd.DataFrame(all_media).to_sql('media_links', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(all_media)} media links")
+    counts = skip_finished_range(manifest, id_counters, (1, total_rows))
+    if counts is not None:
+        statistics.skip()
+        finish_children_load(engine, manifest, id_counters, counts, statistics)
+        return
     
-    if all_investments:
-        pd.DataFrame(all_investments).to_sql('investments', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(all_investments)} investments")
+    started = time.perf_counter()
+    with measure_stage('extract') as stage_metrics:
+        stage_metrics['rows'] = total_rows
+        if cache_dir:
+            child_tables = cached_child_tables(PARQUET_PATH, workers=workers, cache_dir=cache_dir)
+        elif workers > 1:
+            print(f"🔄 Extracting all nested data across {workers} processes...")
+            child_tables = parallel_extract_child_tables(PARQUET_PATH, workers)
+        else:
+            # Load only the nested columns the extractors need
+            table = pq.read_table(PARQUET_PATH, columns=CHILD_SOURCE_COLUMNS)
+            print("🔄 Extracting all nested data...")
+            child_tables = extract_child_tables(table)
     
-    # Handle positions and degrees with foreign keys
-    if all_positions:
-        # Create companies first
-        unique_companies = {}
-        for pos in all_positions:
-            if pos['company_name']:
-                unique_companies[pos['company_name']] = {
-                    'name': pos['company_name'],
-                    'display_name': pos['company_display_name'],
-                    'total_employee_count': pos['company_employee_count']
-                }
-        
-        if unique_companies:
-            companies_df = pd.DataFrame(list(unique_companies.values()))
-            companies_df.to_sql('companies', engine, if_exists='append', index=False)
-            print(f"  ✅ Inserted {len(unique_companies)} companies")
-        
-        # Get company mappings and insert positions
-        with engine.connect() as conn:
-            company_map = {row[1]: row[0] for row in conn.execute(text("SELECT id, name FROM companies")).fetchall()}
-        
-        positions_with_fk = []
-        for pos in all_positions:
-            positions_with_fk.append({
-                'person_id': pos['person_id'],
-                'company_id': company_map.get(pos['company_name']),
-                'title': pos['title'],
-                'start_month': pos['start_month'],
-                'start_year': pos['start_year'],
-                'end_month': pos['end_month'],
-                'end_year': pos['end_year']
-            })
-        
-        pd.DataFrame(positions_with_fk).to_sql('positions', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(positions_with_fk)} positions")
+    print(f"✅ Extracted all data in {time.perf_counter() - started:.3f}s:")
+    print(f"  Areas of interest: {child_tables['areas_of_interest'].num_rows}")
+    print(f"  Investment locations: {child_tables['investment_locations'].num_rows}")
+    print(f"  Stages: {child_tables['investor_stages'].num_rows}")
+    print(f"  Image URLs: {child_tables['image_urls'].num_rows}")
+    print(f"  Media links: {child_tables['media_links'].num_rows}")
+    print(f"  Positions: {child_tables['positions'].num_rows}")
+    print(f"  Degrees: {child_tables['degrees'].num_rows}")
+    print(f"  Investments: {child_tables['investments'].num_rows}")
+    print(f"  Investment rounds: {child_tables['investment_rounds'].num_rows}")
+    print(f"  Coinvestors: {child_tables['coinvestors'].num_rows}")
+    print(f"  Network connections: {child_tables['network_connections'].num_rows}")
+    print(f"  Investor lists: {child_tables['investor_lists'].num_rows}")
     
-    if all_degrees:
-        # Create schools first
-        unique_schools = {}
-        for deg in all_degrees:
-            if deg['school_name']:
-                unique_schools[deg['school_name']] = {
-                    'name': deg['school_name'],
-                    'display_name': deg['school_display_name'],
-                    'total_student_count': deg['school_student_count']
-                }
-        
-        if unique_schools:
-            schools_df = pd.DataFrame(list(unique_schools.values()))
-            schools_df.to_sql('schools', engine, if_exists='append', index=False)
-            print(f"  ✅ Inserted {len(unique_schools)} schools")
-        
-        # Get school mappings and insert degrees
-        with engine.connect() as conn:
-            school_map = {row[1]: row[0] for row in conn.execute(text("SELECT id, name FROM schools")).fetchall()}
-        
-        degrees_with_fk = []
-        for deg in all_degrees:
-            degrees_with_fk.append({
-                'person_id': deg['person_id'],
-                'school_id': school_map.get(deg['school_name']),
-                'degree_name': deg['degree_name'],
-                'field_of_study': deg['field_of_study']
-            })
-        
-        pd.DataFrame(degrees_with_fk).to_sql('degrees', engine, if_exists='append', index=False)
-        print(f"  ✅ Inserted {len(degrees_with_fk)} degrees")
+    # Bulk load all data
+    print(f"💾 Bulk loading all data via COPY ({copy_format}, {load_workers} concurrent)...")
+    with measure_stage('children'):
+        counts = load_child_tables(engine, child_tables, key_maps, copy_format, load_workers, id_counters,
+                                   manifest, (1, total_rows), dimension_allocators)
+    statistics.add(child_tables, total_rows)
+    finish_children_load(engine, manifest, id_counters, counts, statistics)
 
 def main():
+    parser = argparse.ArgumentParser(description='Populate nested relational tables from investors.parquet')
+    parser.add_argument('--copy-format', choices=ARROW_COPY_FORMATS, default='csv',
+                        help='COPY wire format used for bulk loading (default: csv)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read, extract and load one record batch at a time in bounded memory')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f'Rows per streamed batch (default: {DEFAULT_BATCH_ROWS})')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Extraction processes, one slice per row group or, for a single row group, one row range '
+                             'per process (0 = one per core, default: 1)')
+    parser.add_argument('--load-workers', type=int, default=1,
+                        help='Tables COPY-loaded concurrently, one pooled connection each (default: 1)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Keep loaded data and skip the units the run manifest marks done; '
+                             'use the same file and --stream/--batch-size/--workers as the failed run')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help='Directory of cached flattened child tables, keyed by file digest and extractor '
+                             f'version (default: {DEFAULT_CACHE_DIR}; whole-file runs only)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always re-extract from the parquet file and leave the cache alone')
+    parser.add_argument('--normalized-dimensions', action='store_true',
+                        help='Store stages, areas of interest and investment locations as SMALLINT dimension tables '
+                             'plus (investor_id, dim_id) junctions, with views under the old table names')
+    parser.add_argument('--finalize', action='store_true',
+                        help='Build deferred keys, indexes and foreign keys after loading '
+                             '(for schemas created with export_relational_fast.py --defer-constraints)')
+    parser.add_argument('--prewarm', action='store_true',
+                        help='Prewarm the hot tables with pg_prewarm during finalization')
+    parser.add_argument('--advise-indexes', action='store_true',
+                        help='EXPLAIN ANALYZE the research workload after loading and create indexes for its '
+                             'sequential scans')
+    parser.add_argument('--no-co-investments', action='store_true',
+                        help='Skip rebuilding the co_investments graph afterwards')
+    parser.add_argument('--no-network-metrics', action='store_true',
+                        help='Skip recomputing degree, PageRank and betweenness into investor_network_metrics')
+    parser.add_argument('--no-search-index', action='store_true',
+                        help='Skip rebuilding the investor_search full-text index afterwards')
+    parser.add_argument('--no-name-indexes', action='store_true',
+                        help='Skip building the pg_trgm fuzzy lookup indexes on person and firm names')
+    parser.add_argument('--no-view-refresh', action='store_true',
+                        help='Skip refreshing the materialized research views afterwards')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('complete_population', args.trace_allocations)
+    workers = args.workers or default_workers()
+
     try:
-        process_all_nested_data()
+        process_all_nested_data(copy_format=args.copy_format, stream=args.stream,
+                                batch_size=args.batch_size, workers=workers,
+                                load_workers=args.load_workers, resume=args.resume,
+                                cache_dir=None if args.no_cache else args.cache_dir,
+                                normalized=args.normalized_dimensions, defer_constraints=args.finalize)
+        
+        engine = create_engine(f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}",
+                               connect_args=counting_connect_args())
+        if args.finalize:
+            _, deferred = split_schema(create_relational_schema())
+            if args.normalized_dimensions:
+                deferred = merge_deferred(without_flat_tables(deferred), split_schema(normalized_schema())[1])
+            finalize_schema(engine, deferred, workers=max(4, args.load_workers),
+                            prewarm_tables=HOT_TABLES if args.prewarm else None, advise_indexes=args.advise_indexes)
+        elif args.advise_indexes:
+            run_index_advisor(engine)
+        if not args.no_co_investments:
+            build_co_investments(engine, args.copy_format)
+        if not args.no_network_metrics:
+            build_network_metrics(engine, args.copy_format)
+        if not args.no_search_index:
+            build_search_index(engine)
+        if not args.no_name_indexes:
+            build_name_indexes(engine)
+        if not args.no_view_refresh:
+            refresh_materialized_views(engine)
         
         # Final verification
         print("\n📊 Final comprehensive table counts:")
-        engine = create_engine(f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
         
         with engine.connect() as conn:
             tables = ['persons', 'firms', 'locations', 'investors', 'positions', 'degrees', 
                      'investments', 'areas_of_interest', 'investment_locations', 'investor_stages', 
-                     'image_urls', 'media_links', 'schools', 'companies']
+                     'image_urls', 'media_links', 'schools', 'companies', 'investment_rounds',
+                     'coinvestors', 'network_connections', 'investor_lists']
             
             for table in tables:
                 result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
@@ -329,11 +533,15 @@ def main():
                 print(f"  {table}: {count:,} records")
         
         print("\n🎉 COMPLETE RELATIONAL DATABASE WITH ALL NESTED DATA!")
+        finish_run(args)
         
     except Exception as e:
         print(f"❌ Failed: {e}")
+        print("   Finished units are committed - rerun with --resume to load only the rest")
         import traceback
         traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,679 @@
+#!/usr/bin/env python3
+"""
+Incremental delta sync of investors.parquet into the relational tables
+
+Every investor record and each of its nested collections is content-hashed
+and keyed by its row's sync key: the person slug, with '#<n>' appended on
+the slug's n-th repeat and '#<n>' alone for rows without a person, so
+every row is synced as an investor of its own just like in a full load.
+Hashes from the previous sync live in investor_sync_state; only investors
+whose hashes changed are upserted, only the collections that changed are
+rewritten, and investors missing from the new file are deleted - all in
+one transaction, so readers never see half-loaded or empty tables.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, text
+
+from arrow_extract import (CHILD_SOURCE_COLUMNS, INVESTMENT_CHILD_COLUMNS, as_array, extract_child_tables, get_column,
+                           map_investment_ids)
+from bulk_copy import ARROW_COPY_FORMATS, copy_arrow_raw
+from co_investments import build_co_investments
+from dimension_tables import DIMENSION_TABLES, dimension_allocators_from_db, is_normalized, load_dimension_junction
+from entity_resolution import company_rows, new_resolvers
+from extract_cache import DEFAULT_CACHE_DIR, cached_child_tables
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+from load_statistics import new_load_id, save_statistics_from_db
+from network_metrics import build_network_metrics
+from parent_tables import INVESTOR_FLAG_COLUMNS, INVESTOR_TEXT_COLUMNS, PARENT_SOURCE_COLUMNS, PERSON_FIELDS, slug_or_default
+from research_views import refresh_materialized_views
+from search_index import update_search_index_raw
+from staging_load import stage_and_resolve
+from surrogate_keys import KeyAllocator, bump_sequences
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+PARQUET_PATH = '/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet'
+
+# Collections rewritten per investor when their hash changes
+INVESTOR_CHILD_TABLES = ['areas_of_interest', 'investment_locations', 'investor_stages',
+                         'image_urls', 'media_links', 'investor_lists']
+# Linked by investment_id, so a change to any of them rewrites all three
+INVESTMENT_TABLES = ['investments', 'investment_rounds', 'coinvestors']
+# Collections keyed by the investor's person rather than the investor row
+PERSON_CHILD_TABLES = ['positions', 'degrees']
+SYNC_COLLECTIONS = INVESTOR_CHILD_TABLES + INVESTMENT_TABLES + ['network_connections'] + PERSON_CHILD_TABLES
+
+# person_slug holds the row's sync key (see row_sync_keys)
+SYNC_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS investor_sync_state (
+    person_slug VARCHAR(255) PRIMARY KEY,
+    investor_id INTEGER,
+    record_hash CHAR(32),
+    collection_hashes JSONB,
+    synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Sync key of every loaded investor: the n-th investor (by id) of a person gets the n-th repeat's key
+INVESTOR_KEYS_SQL = """
+    SELECT CASE WHEN slug IS NOT NULL AND n = 0 THEN slug ELSE COALESCE(slug, '') || '#' || n END, id
+    FROM (
+        SELECT p.slug, i.id, ROW_NUMBER() OVER (PARTITION BY p.slug ORDER BY i.id) - 1 AS n
+        FROM investors i LEFT JOIN persons p ON p.id = i.person_id
+    ) numbered
+"""
+
+RECORD_PERSON_COLUMNS = [f'person_{name}' for name in PERSON_FIELDS]
+RECORD_INVESTOR_COLUMNS = INVESTOR_TEXT_COLUMNS + ['vote_count'] + INVESTOR_FLAG_COLUMNS
+
+
+def investor_records(table, person_slugs):
+    """Natural-key view of everything the parent loader writes for each investor row"""
+    columns = {'person_slug': person_slugs}
+    for name in PERSON_FIELDS:
+        columns[f'person_{name}'] = get_column(table, f'person.{name}')
+    for name in ('person_is_me', 'person_is_on_target_list'):
+        columns[name] = pc.fill_null(columns[name], False)
+    columns['firm_slug'] = slug_or_default(table, 'firm', 'firm_', 1)
+    columns['firm_name'] = get_column(table, 'firm.name')
+    columns['firm_current_fund_size'] = get_column(table, 'firm.current_fund_size')
+    columns['location_name'] = get_column(table, 'location.display_name')
+    for name in INVESTOR_TEXT_COLUMNS:
+        columns[name] = as_array(table.column(name))
+    columns['vote_count'] = pc.fill_null(as_array(table.column('vote_count')), 0)
+    for name in INVESTOR_FLAG_COLUMNS:
+        columns[name] = pc.fill_null(as_array(table.column(name)), False)
+    return pa.table(columns)
+
+
+# Seeds of the two 64-bit halves of every content hash
+HASH_SEEDS = (0x9e3779b97f4a7c15, 0xc2b2ae3d27d4eb4f)
+HEX_DIGITS = np.array([f'{byte:02x}'.encode() for byte in range(256)], dtype='S2')
+
+
+def _mix(values):
+    """murmur3's 64-bit finalizer, element-wise"""
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xff51afd7ed558ccd)
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xc4ceb9fe1a85ec53)
+    return values ^ (values >> np.uint64(33))
+
+
+def _salts(seed, count):
+    """A distinct pseudo-random word per position under one seed"""
+    return _mix(np.arange(count, dtype=np.uint64) * np.uint64(0x100000001b3) + np.uint64(seed))
+
+
+def _group_positions(group_starts, size):
+    """Position of every element within its group"""
+    return np.arange(size) - np.repeat(group_starts, np.diff(np.append(group_starts, size)))
+
+
+def _ordered_sums(values, group_starts, positions, seed):
+    """Per group, the sum of its values each mixed with its position in the group (order-sensitive)"""
+    mixed = _mix(values ^ _salts(seed, int(positions.max(initial=0)) + 1)[positions])
+    return np.add.reduceat(mixed, group_starts) if len(values) else np.zeros(0, dtype=np.uint64)
+
+
+def _string_hashes(strings, seeds):
+    """Hash of every string under each seed, from its zero-padded 8-byte words"""
+    strings = pc.fill_null(strings.cast(pa.large_string()), '')
+    lengths = pc.binary_length(strings).to_numpy(zero_copy_only=False)
+    # At least one word per string, so empty strings hash like any other
+    word_counts = lengths // 8 + 1
+    padding = pc.binary_repeat(pa.scalar('\0', type=pa.large_string()), pa.array(word_counts * 8 - lengths))
+    padded = pc.binary_join_element_wise(strings, padding, pa.scalar('', type=pa.large_string()))
+    words = np.frombuffer(padded.buffers()[2], dtype='<u8', count=int(word_counts.sum()))
+    starts = np.cumsum(word_counts) - word_counts
+    positions = _group_positions(starts, len(words))
+    return [_mix(_ordered_sums(words, starts, positions, seed) ^ lengths.astype(np.uint64)) for seed in seeds]
+
+
+def _value_hashes(array, seeds):
+    """Hash of every value of a flat column under each seed; nulls hash apart from every value"""
+    array = as_array(array)
+    value_type = array.type
+    if pa.types.is_dictionary(value_type):
+        return _value_hashes(array.dictionary_decode(), seeds)
+    if pa.types.is_floating(value_type):
+        values = pc.fill_null(array.cast(pa.float64()), 0.0).to_numpy(zero_copy_only=False).view(np.uint64)
+    elif pa.types.is_date32(value_type):
+        values = pc.fill_null(array.cast(pa.int32()).cast(pa.int64()), 0).to_numpy().view(np.uint64)
+    elif pa.types.is_integer(value_type) or pa.types.is_boolean(value_type) or pa.types.is_temporal(value_type):
+        values = pc.fill_null(array.cast(pa.int64()), 0).to_numpy().view(np.uint64)
+    else:
+        values = None
+    per_seed = _string_hashes(array, seeds) if values is None else [values] * len(seeds)
+    nulls = ~array.is_valid().to_numpy(zero_copy_only=False) if array.null_count else None
+    hashes = []
+    for seed_values, seed in zip(per_seed, seeds):
+        seed_hashes = _mix(seed_values ^ np.uint64(seed))
+        if nulls is not None:
+            seed_hashes[nulls] = _mix(np.array([seed + 1], dtype=np.uint64))
+        hashes.append(seed_hashes)
+    return hashes
+
+
+def _hash_halves(table):
+    """The two 64-bit halves of every row's hash, one array per seed"""
+    totals = [np.zeros(table.num_rows, dtype=np.uint64) for _ in HASH_SEEDS]
+    # Each column hashes under its own salts, so moving a value to another column changes the row
+    salts = [_salts(seed, table.num_columns) for seed in HASH_SEEDS]
+    for index, column in enumerate(table.columns):
+        for total, column_hashes in zip(totals, _value_hashes(column, [int(salt[index]) for salt in salts])):
+            total += column_hashes
+    return [_mix(total) for total in totals]
+
+
+def _hex(halves):
+    """32 hex digits per row from two uint64 arrays"""
+    digest_bytes = np.stack(halves, axis=1).astype('>u8').view(np.uint8).reshape(len(halves[0]), 16)
+    return pa.array(np.ascontiguousarray(HEX_DIGITS[digest_bytes]).view('S32').ravel(),
+                    type=pa.binary()).cast(pa.string())
+
+
+def row_hashes(table):
+    """128-bit hash of every row's values as 32 hex digits, in row order
+
+    Computed column by column with numpy, never one row at a time.
+    """
+    return _hex(_hash_halves(table))
+
+
+def collection_hashes(child, row_keys):
+    """Hash of each investor's rows in one child collection (in order), keyed by sync key"""
+    child = child.take(pc.sort_indices(child.column('investor_id')))
+    investor_ids = as_array(child.column('investor_id'))
+    keys = pc.take(pa.array(row_keys, type=pa.string()), pc.subtract(investor_ids, 1))
+    keep = keys.is_valid()
+    if not pc.all(keep).as_py():
+        child, investor_ids, keys = child.filter(keep), pc.filter(investor_ids, keep), pc.filter(keys, keep)
+    if child.num_rows == 0:
+        return {}
+    ids = investor_ids.to_numpy()
+    starts = np.flatnonzero(np.concatenate([[True], ids[1:] != ids[:-1]]))
+    counts = np.diff(np.append(starts, len(ids))).astype(np.uint64)
+    positions = _group_positions(starts, len(ids))
+    halves = [_mix(_ordered_sums(half, starts, positions, seed) ^ counts)
+              for half, seed in zip(_hash_halves(child.drop_columns(['investor_id'])), HASH_SEEDS)]
+    return dict(zip(pc.take(keys, pa.array(starts)).to_pylist(), _hex(halves).to_pylist()))
+
+
+def row_sync_keys(person_slugs):
+    """Sync key of every row: its person slug, '<slug>#<n>' on the slug's n-th repeat
+
+    Rows without a person slug are keyed '#<n>' by their order among those
+    rows, so no row is left out of the sync.
+    """
+    seen = {}
+    row_keys = []
+    for slug in person_slugs:
+        repeat = seen.get(slug, 0)
+        seen[slug] = repeat + 1
+        row_keys.append(slug if slug is not None and repeat == 0 else f"{slug or ''}#{repeat}")
+    return row_keys
+
+
+def plan_delta(current, stored, existing_ids):
+    """Compare current and stored hashes; returns new/changed/removed sync keys and changed collections"""
+    new = [key for key in current if key not in existing_ids]
+    removed = [key for key in existing_ids if key not in current]
+    changed_records = []
+    changed_collections = {name: [] for name in SYNC_COLLECTIONS}
+    for key, (record_hash, hashes) in current.items():
+        previous = stored.get(key)
+        if previous is None or key not in existing_ids:
+            changed_records.append(key)
+            for name in SYNC_COLLECTIONS:
+                changed_collections[name].append(key)
+            continue
+        if previous[0] != record_hash:
+            changed_records.append(key)
+        for name in SYNC_COLLECTIONS:
+            if previous[1].get(name) != hashes.get(name):
+                changed_collections[name].append(key)
+    investment_keys = list(dict.fromkeys(key for name in INVESTMENT_TABLES for key in changed_collections[name]))
+    for name in INVESTMENT_TABLES:
+        changed_collections[name] = investment_keys
+    return new, changed_records, removed, changed_collections
+
+
+def _sql_type(arrow_type):
+    if pa.types.is_boolean(arrow_type):
+        return 'BOOLEAN'
+    if pa.types.is_integer(arrow_type):
+        return 'BIGINT'
+    if pa.types.is_floating(arrow_type):
+        return 'DOUBLE PRECISION'
+    return 'TEXT'
+
+
+def copy_temp_table(raw_conn, name, arrow_table, copy_format):
+    """COPY an Arrow table into a transaction-scoped temp table with matching columns"""
+    columns = ', '.join(f"{field.name} {_sql_type(field.type)}" for field in arrow_table.schema)
+    with raw_conn.cursor() as cursor:
+        cursor.execute(f"CREATE TEMP TABLE {name} ({columns}) ON COMMIT DROP")
+    copy_arrow_raw(raw_conn, name, arrow_table, format=copy_format)
+
+
+def upsert_records(raw_conn, records, copy_format):
+    """Upsert persons/firms/locations and update or insert investors from tmp_delta_investors
+
+    Like the full load, a person repeated across rows takes its fields from
+    its first row (records.person_first).
+    """
+    copy_temp_table(raw_conn, 'tmp_delta_investors', records, copy_format)
+    person_columns = ', '.join(PERSON_FIELDS)
+    person_updates = ', '.join(f"{name} = EXCLUDED.{name}" for name in PERSON_FIELDS)
+    investor_columns = ', '.join(RECORD_INVESTOR_COLUMNS)
+    investor_values = ', '.join(f"t.{name}" for name in RECORD_INVESTOR_COLUMNS)
+    investor_updates = ', '.join(f"{name} = t.{name}" for name in RECORD_INVESTOR_COLUMNS)
+    resolve_joins = """
+        FROM tmp_delta_investors t
+        LEFT JOIN persons p ON p.slug = t.person_slug
+        LEFT JOIN firms f ON f.slug = t.firm_slug
+        LEFT JOIN (
+            SELECT DISTINCT ON (display_name) id, display_name FROM locations ORDER BY display_name, id
+        ) l ON l.display_name = t.location_name
+    """
+    statements = [
+        ('persons', f"""
+            INSERT INTO persons (slug, {person_columns})
+            SELECT person_slug, {', '.join(RECORD_PERSON_COLUMNS)} FROM tmp_delta_investors
+            WHERE person_first
+            ON CONFLICT (slug) DO UPDATE SET {person_updates}
+        """),
+        ('firms', """
+            INSERT INTO firms (slug, name, current_fund_size)
+            SELECT DISTINCT ON (firm_slug) firm_slug, firm_name, firm_current_fund_size
+            FROM tmp_delta_investors WHERE firm_slug IS NOT NULL
+            ORDER BY firm_slug
+            ON CONFLICT (slug) DO UPDATE SET name = EXCLUDED.name, current_fund_size = EXCLUDED.current_fund_size
+        """),
+        ('locations', """
+            INSERT INTO locations (display_name, kind)
+            SELECT DISTINCT t.location_name, 'location' FROM tmp_delta_investors t
+            WHERE t.location_name IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM locations l WHERE l.display_name = t.location_name)
+        """),
+        ('investors (updated)', f"""
+            UPDATE investors i
+            SET person_id = p.id, firm_id = f.id, location_id = l.id, {investor_updates}
+            {resolve_joins}
+            WHERE i.id = t.id
+        """),
+        ('investors (inserted)', f"""
+            INSERT INTO investors (id, person_id, firm_id, location_id, {investor_columns})
+            SELECT t.id, p.id, f.id, l.id, {investor_values}
+            {resolve_joins}
+            WHERE NOT EXISTS (SELECT 1 FROM investors i WHERE i.id = t.id)
+        """),
+    ]
+    counts = {}
+    with raw_conn.cursor() as cursor:
+        for label, statement in statements:
+            cursor.execute(statement)
+            counts[label] = cursor.rowcount
+    return counts
+
+
+def _stored_table(table_name, dimension_allocators):
+    """Table actually holding a collection's rows - its junction table in the normalized layout"""
+    if dimension_allocators is not None and table_name in DIMENSION_TABLES:
+        return DIMENSION_TABLES[table_name][1]
+    return table_name
+
+
+def delete_investors(raw_conn, keys, investor_ids, dimension_allocators=None):
+    """Delete investors (and their collections and orphaned persons) that left the file
+
+    Returns the slugs of their persons, whose positions and degrees are
+    deleted too and have to be rebuilt from any rows the persons still have.
+    """
+    with raw_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT DISTINCT p.slug FROM investors i JOIN persons p ON p.id = i.person_id
+            WHERE i.id = ANY(%s) AND p.slug IS NOT NULL
+        """, (investor_ids,))
+        person_slugs = [row[0] for row in cursor.fetchall()]
+        _delete_investments(cursor, investor_ids)
+        for table_name in INVESTOR_CHILD_TABLES + ['network_connections']:
+            cursor.execute(f"DELETE FROM {_stored_table(table_name, dimension_allocators)} WHERE investor_id = ANY(%s)",
+                           (investor_ids,))
+        for table_name in PERSON_CHILD_TABLES:
+            cursor.execute(f"DELETE FROM {table_name} WHERE person_id IN (SELECT id FROM persons WHERE slug = ANY(%s))",
+                           (person_slugs,))
+        cursor.execute("DELETE FROM investors WHERE id = ANY(%s)", (investor_ids,))
+        cursor.execute("""
+            DELETE FROM persons p WHERE p.slug = ANY(%s)
+              AND NOT EXISTS (SELECT 1 FROM investors i WHERE i.person_id = p.id)
+              AND NOT EXISTS (SELECT 1 FROM network_connections n WHERE n.target_person_id = p.id)
+        """, (person_slugs,))
+        cursor.execute("DELETE FROM investor_sync_state WHERE person_slug = ANY(%s)", (keys,))
+    return person_slugs
+
+
+def _delete_investments(cursor, investor_ids):
+    cursor.execute("DELETE FROM coinvestors WHERE investment_id IN (SELECT id FROM investments WHERE investor_id = ANY(%s))",
+                   (investor_ids,))
+    cursor.execute("DELETE FROM investment_rounds WHERE investor_id = ANY(%s)", (investor_ids,))
+    cursor.execute("DELETE FROM investments WHERE investor_id = ANY(%s)", (investor_ids,))
+
+
+def _changed_rows(batch, keys, key_rows):
+    """Rows of an extracted batch that belong to the given investors (still keyed by file row id)"""
+    file_ids = pa.array([key_rows[key] + 1 for key in keys], type=pa.int32())
+    return batch.filter(pc.is_in(batch.column('investor_id'), value_set=file_ids)), file_ids
+
+
+def _remap_investor_ids(batch, row_investor_ids):
+    remapped = row_investor_ids[batch.column('investor_id').to_numpy()]
+    return batch.set_column(batch.schema.get_field_index('investor_id'), 'investor_id',
+                            pa.array(remapped, type=pa.int32()))
+
+
+def rewrite_investments(raw_conn, child_tables, keys, key_rows, row_investor_ids, copy_format, company_resolver):
+    """Replace investments, their rounds and coinvestors for the given investors"""
+    investments, file_ids = _changed_rows(child_tables['investments'], keys, key_rows)
+    company_resolver.resolve(raw_conn, company_rows(investments=investments), copy_format)
+    with raw_conn.cursor() as cursor:
+        _delete_investments(cursor, np.unique(row_investor_ids[file_ids.to_numpy()]).tolist())
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM investments")
+        first_id = cursor.fetchone()[0]
+
+    investment_ids = pa.array(range(first_id, first_id + investments.num_rows), type=pa.int32())
+    counts = {'investments': investments.num_rows}
+    if investments.num_rows:
+        rows = _remap_investor_ids(investments, row_investor_ids).add_column(0, 'id', investment_ids)
+        rows = rows.add_column(2, 'company_id', company_resolver.ids(rows.column('company_display_name')))
+        copy_arrow_raw(raw_conn, 'investments', rows, format=copy_format)
+
+    for table_name, columns in INVESTMENT_CHILD_COLUMNS.items():
+        rows, _ = _changed_rows(child_tables[table_name], keys, key_rows)
+        counts[table_name] = rows.num_rows
+        if rows.num_rows:
+            # investment_index is matched against the file-keyed investments before investor ids are remapped
+            rows = rows.add_column(0, 'investment_id', map_investment_ids(investments, investment_ids, rows))
+            rows = _remap_investor_ids(rows, row_investor_ids)
+            copy_arrow_raw(raw_conn, table_name, rows.select(columns), format=copy_format)
+    return counts
+
+
+def rewrite_network_connections(raw_conn, connections, copy_format):
+    """Replace network_connections, creating stub persons for targets that aren't loaded yet"""
+    copy_temp_table(raw_conn, 'tmp_delta_network', connections, copy_format)
+    with raw_conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO persons (slug, name, first_name, last_name)
+            SELECT DISTINCT ON (target_slug) target_slug, target_name, target_first_name, target_last_name
+            FROM tmp_delta_network WHERE target_slug IS NOT NULL
+            ORDER BY target_slug
+            ON CONFLICT (slug) DO NOTHING
+        """)
+        cursor.execute("""
+            INSERT INTO network_connections (investor_id, target_person_id, list_type, position)
+            SELECT t.investor_id, p.id, t.list_type, t.position
+            FROM tmp_delta_network t
+            LEFT JOIN persons p ON p.slug = t.target_slug
+        """)
+        return cursor.rowcount
+
+
+def rewrite_collections(raw_conn, child_tables, changed_collections, key_rows, row_investor_ids, copy_format,
+                        resolvers, dimension_allocators=None, rebuilt_persons=None):
+    """Replace the rows of every changed collection for the affected investors only
+
+    resolvers map company and school names to their canonical rows;
+    dimension_allocators is set when the database uses the normalized
+    stage/sector/location layout. rebuilt_persons maps positions and
+    degrees to the slugs of the persons whose rows are rebuilt, from every
+    file row carrying the slug.
+    """
+    counts = {}
+    for table_name in INVESTOR_CHILD_TABLES + ['network_connections']:
+        keys = changed_collections[table_name]
+        if not keys:
+            continue
+        batch, file_ids = _changed_rows(child_tables[table_name], keys, key_rows)
+        batch = _remap_investor_ids(batch, row_investor_ids)
+
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {_stored_table(table_name, dimension_allocators)} WHERE investor_id = ANY(%s)",
+                           (np.unique(row_investor_ids[file_ids.to_numpy()]).tolist(),))
+        if table_name == 'network_connections':
+            counts[table_name] = rewrite_network_connections(raw_conn, batch, copy_format)
+            continue
+        if _stored_table(table_name, dimension_allocators) != table_name:
+            counts[table_name] = load_dimension_junction(raw_conn, table_name, batch,
+                                                         dimension_allocators[table_name], copy_format)
+            continue
+        if batch.num_rows:
+            copy_arrow_raw(raw_conn, table_name, batch, format=copy_format)
+        counts[table_name] = batch.num_rows
+
+    if changed_collections['investments']:
+        counts.update(rewrite_investments(raw_conn, child_tables, changed_collections['investments'],
+                                          key_rows, row_investor_ids, copy_format, resolvers['companies']))
+
+    person_tables = {}
+    for table_name, slugs in (rebuilt_persons or {}).items():
+        if not slugs:
+            continue
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table_name} WHERE person_id IN (SELECT id FROM persons WHERE slug = ANY(%s))",
+                           (slugs,))
+        batch = child_tables[table_name]
+        batch = batch.filter(pc.is_in(batch.column('person_slug'), value_set=pa.array(slugs, type=pa.string())))
+        person_tables[table_name] = _remap_investor_ids(batch, row_investor_ids)
+    if person_tables:
+        positions = person_tables.get('positions', child_tables['positions'].slice(0, 0))
+        degrees = person_tables.get('degrees', child_tables['degrees'].slice(0, 0))
+        resolved = stage_and_resolve(raw_conn, positions, degrees, copy_format, resolvers)
+        counts['positions'] = resolved['positions']
+        counts['degrees'] = resolved['degrees']
+    return counts
+
+
+def save_sync_state(raw_conn, current, keys, investor_ids, copy_format):
+    """Upsert the new hashes for every investor that was written"""
+    state = pa.table({
+        'person_slug': pa.array(keys, type=pa.string()),
+        'investor_id': pa.array([investor_ids[key] for key in keys], type=pa.int32()),
+        'record_hash': pa.array([current[key][0] for key in keys], type=pa.string()),
+        'collection_hashes': pa.array([json.dumps(current[key][1], sort_keys=True) for key in keys],
+                                      type=pa.string()),
+    })
+    copy_temp_table(raw_conn, 'tmp_sync_state', state, copy_format)
+    with raw_conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO investor_sync_state (person_slug, investor_id, record_hash, collection_hashes, synced_at)
+            SELECT person_slug, investor_id, record_hash, collection_hashes::jsonb, CURRENT_TIMESTAMP
+            FROM tmp_sync_state
+            ON CONFLICT (person_slug) DO UPDATE SET
+                investor_id = EXCLUDED.investor_id,
+                record_hash = EXCLUDED.record_hash,
+                collection_hashes = EXCLUDED.collection_hashes,
+                synced_at = EXCLUDED.synced_at
+        """)
+
+
+def sync_delta(engine, table, copy_format='csv', dry_run=False, child_tables=None):
+    """Hash the file, diff against investor_sync_state and apply only the changes
+
+    child_tables (e.g. from the extract cache) saves re-extracting the
+    nested collections from table.
+    """
+    with measure_stage('diff') as stage_metrics:
+        print("🔑 Hashing investor records and nested collections...")
+        person_slugs = slug_or_default(table, 'person', 'person_', 1)
+        row_person_slugs = person_slugs.to_pylist()
+        row_keys = row_sync_keys(row_person_slugs)
+        key_rows = {key: row for row, key in enumerate(row_keys)}
+
+        records = investor_records(table, person_slugs)
+        record_hashes = row_hashes(records).to_pylist()
+        current = {key: (record_hashes[row], {}) for key, row in key_rows.items()}
+        if child_tables is None:
+            child_tables = extract_child_tables(table, tables=SYNC_COLLECTIONS)
+        for table_name in SYNC_COLLECTIONS:
+            for key, digest in collection_hashes(child_tables[table_name], row_keys).items():
+                current[key][1][table_name] = digest
+
+        with engine.connect() as conn:
+            if not dry_run:
+                conn.execute(text(SYNC_STATE_SCHEMA))
+                conn.commit()
+            stored = {}
+            # A dry run creates nothing, so there may be no state to read yet
+            if conn.execute(text("SELECT to_regclass('investor_sync_state')")).scalar() is not None:
+                stored = {row[0]: (row[1], row[2] or {}) for row in conn.execute(text(
+                    "SELECT person_slug, record_hash, collection_hashes FROM investor_sync_state"))}
+            dimension_allocators = dimension_allocators_from_db(conn) if is_normalized(conn) else None
+            resolvers = new_resolvers(conn)
+            investor_ids = KeyAllocator.from_query(conn, INVESTOR_KEYS_SQL)
+            max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM investors")).scalar()
+            investor_ids.next_id = max(investor_ids.next_id, max_id + 1)
+
+        new, changed_records, removed, changed_collections = plan_delta(current, stored, investor_ids.ids)
+        stage_metrics['rows'] = len(current)
+    print(f"📋 Delta: {len(new)} new, {len(changed_records) - len(new)} changed, {len(removed)} removed, "
+          f"{len(current) - len(changed_records)} unchanged investor records")
+    for table_name in SYNC_COLLECTIONS:
+        if changed_collections[table_name]:
+            print(f"  {table_name}: {len(changed_collections[table_name])} investors to rewrite")
+    if dry_run:
+        print("🧪 Dry run - nothing written")
+        return
+
+    removed_ids = [investor_ids.ids.pop(key) for key in removed]
+    # Ids for new investors continue after the highest existing one
+    row_investor_ids = np.zeros(table.num_rows + 1, dtype=np.int64)
+    for key, row in key_rows.items():
+        row_investor_ids[row + 1] = investor_ids.get(key) or 0
+    if new:
+        new_ids, _ = investor_ids.assign(pa.array(new, type=pa.string()))
+        for key, investor_id in zip(new, new_ids.to_pylist()):
+            row_investor_ids[key_rows[key] + 1] = investor_id
+
+    changed_rows = [key_rows[key] for key in changed_records]
+    changed = records.take(pa.array(changed_rows, type=pa.int64()))
+    changed = changed.add_column(0, 'id', pa.array(row_investor_ids[np.array(changed_rows, dtype=np.int64) + 1],
+                                                   type=pa.int32()))
+    changed = changed.append_column('person_first', pa.array(
+        [row_person_slugs[row] is not None and row_keys[row] == row_person_slugs[row] for row in changed_rows],
+        type=pa.bool_()))
+
+    # Positions and degrees hang off the person, so they are rebuilt from all of its rows
+    rebuilt_persons = {table_name: {row_person_slugs[key_rows[key]] for key in changed_collections[table_name]} - {None}
+                       for table_name in PERSON_CHILD_TABLES}
+
+    written = sorted(set(changed_records).union(*changed_collections.values()))
+    with measure_stage('apply') as stage_metrics:
+        stage_metrics['rows'] = len(written)
+        raw_conn = engine.raw_connection()
+        try:
+            if removed:
+                removed_persons = delete_investors(raw_conn, removed, removed_ids, dimension_allocators)
+                for slugs in rebuilt_persons.values():
+                    slugs.update(slug for slug in removed_persons if slug in key_rows)
+                print(f"  🗑️ Deleted {len(removed)} investors")
+            if changed.num_rows:
+                for label, count in upsert_records(raw_conn, changed, copy_format).items():
+                    print(f"  ✅ Upserted {label}: {count}")
+            rebuilt_persons = {table_name: sorted(slugs) for table_name, slugs in rebuilt_persons.items()}
+            for table_name, count in rewrite_collections(raw_conn, child_tables, changed_collections, key_rows,
+                                                         row_investor_ids, copy_format, resolvers,
+                                                         dimension_allocators, rebuilt_persons).items():
+                print(f"  ✅ Rewrote {count} {table_name.replace('_', ' ')}")
+            if written:
+                indexed = update_search_index_raw(raw_conn, [investor_ids.ids[key] for key in written])
+                if indexed:
+                    print(f"  ✅ Reindexed {indexed} investors for search")
+                save_sync_state(raw_conn, current, written, investor_ids.ids, copy_format)
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+
+    bump_sequences(engine, {'investors': investor_ids.last_id, 'investments': 0})
+    print(f"💾 Synced {len(written)} investors in one transaction")
+    if written or removed:
+        # Only the rewritten investors were extracted, so the list-length statistics are recounted from the tables
+        save_statistics_from_db(engine, new_load_id(), 'delta_sync')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally sync investors.parquet into the relational tables')
+    parser.add_argument('--copy-format', choices=ARROW_COPY_FORMATS, default='csv',
+                        help='COPY wire format used for bulk loading (default: csv)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only report what would change')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'Directory of cached flattened child tables (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always re-extract the nested collections from the parquet file')
+    parser.add_argument('--no-co-investments', action='store_true',
+                        help='Skip rebuilding the co_investments graph afterwards')
+    parser.add_argument('--no-network-metrics', action='store_true',
+                        help='Skip recomputing degree, PageRank and betweenness into investor_network_metrics')
+    parser.add_argument('--no-view-refresh', action='store_true',
+                        help='Skip refreshing the materialized research views afterwards')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('delta_sync', args.trace_allocations)
+
+    print("🚀 Starting incremental delta sync...")
+
+    try:
+        child_tables = None
+        if args.no_cache:
+            columns = PARENT_SOURCE_COLUMNS + [name for name in CHILD_SOURCE_COLUMNS if name not in PARENT_SOURCE_COLUMNS]
+        else:
+            # Nested collections come flattened from the cache, so only the parent columns are parsed
+            child_tables = cached_child_tables(PARQUET_PATH, tables=SYNC_COLLECTIONS, cache_dir=args.cache_dir)
+            columns = PARENT_SOURCE_COLUMNS
+        with measure_stage('read') as stage_metrics:
+            table = pq.read_table(PARQUET_PATH, columns=columns)
+            stage_metrics['rows'] = table.num_rows
+        print(f"📄 Loaded {table.num_rows} records")
+
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+
+        sync_delta(engine, table, copy_format=args.copy_format, dry_run=args.dry_run, child_tables=child_tables)
+        if not args.dry_run and not args.no_co_investments:
+            build_co_investments(engine, args.copy_format)
+        if not args.dry_run and not args.no_network_metrics:
+            build_network_metrics(engine, args.copy_format)
+        if not args.dry_run and not args.no_view_refresh:
+            refresh_materialized_views(engine)
+        print("\n🎉 Delta sync complete!")
+        finish_run(args)
+
+    except Exception as e:
+        print(f"❌ Delta sync failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
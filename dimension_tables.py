@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Normalized dimension + junction layout for stages, sectors and investment locations
+
+investor_stages, areas_of_interest and investment_locations repeat the
+same (kind, display_name) pair on every row. In the normalized layout
+each distinct pair is stored once in a small dimension table with a
+SMALLINT id, and the investor links become (investor_id, dim_id)
+junction rows. Pairs are dictionary-encoded during extraction with
+KeyAllocator, so dimension ids are assigned client-side and stay stable
+across streamed batches.
+
+Views with the old table names and columns are created on top, so the
+API and the research views keep working unchanged (the research views
+the swap drops are re-created by complete_population.py);
+normalized_dimension_views.sql has versions of sector_focus_analysis
+and stage_preferences_analysis that group by the dimension id directly.
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import text
+
+from bulk_copy import copy_arrow_raw
+from surrogate_keys import KeyAllocator
+
+# flat child table -> (dimension table, junction table, junction id column)
+DIMENSION_TABLES = {
+    'investor_stages': ('investment_stages', 'investor_stage_preferences', 'stage_id'),
+    'areas_of_interest': ('interest_areas', 'investor_interests', 'interest_id'),
+    'investment_locations': ('investment_regions', 'investor_location_preferences', 'region_id'),
+}
+
+# Every relation normalized_schema() drops and re-creates
+NORMALIZED_RELATIONS = list(DIMENSION_TABLES) + [name for dimension, junction, _ in DIMENSION_TABLES.values()
+                                                 for name in (dimension, junction)]
+
+SMALLINT_MAX = 32767
+
+# Control characters that never occur in the source strings: a null marker and a field separator
+NULL_MARKER = '\x1e'
+KEY_SEPARATOR = '\x1f'
+
+
+def _drop_normalized_sql():
+    flat_tables = ', '.join(f"'{name}'" for name in DIMENSION_TABLES)
+    drops = ''.join(f"""
+    DROP TABLE IF EXISTS {junction} CASCADE;
+    DROP TABLE IF EXISTS {dimension} CASCADE;""" for dimension, junction, _ in DIMENSION_TABLES.values())
+    return f"""
+    -- Normalized loads turn the flat tables into views; DROP TABLE would fail on those
+    DO $$
+    DECLARE
+        flat_name TEXT;
+    BEGIN
+        FOREACH flat_name IN ARRAY ARRAY[{flat_tables}] LOOP
+            IF EXISTS (SELECT 1 FROM pg_class WHERE relname = flat_name AND relkind = 'v'
+                       AND relnamespace = current_schema()::regnamespace) THEN
+                EXECUTE format('DROP VIEW %I CASCADE', flat_name);
+            END IF;
+        END LOOP;
+    END $$;{drops}
+    """
+
+
+# Prepended to the exporters' schemas so they can rebuild the flat layout over a normalized one
+DROP_NORMALIZED_DIMENSIONS = _drop_normalized_sql()
+
+
+def normalized_schema():
+    """DDL replacing the three flat tables with dimension tables, junctions and compatibility views"""
+    schema = DROP_NORMALIZED_DIMENSIONS + ''.join(f"""
+    DROP TABLE IF EXISTS {flat_name} CASCADE;""" for flat_name in DIMENSION_TABLES)
+    for flat_name, (dimension, junction, id_column) in DIMENSION_TABLES.items():
+        schema += f"""
+
+    CREATE TABLE {dimension} (
+        id SMALLINT PRIMARY KEY,
+        kind VARCHAR(100),
+        display_name VARCHAR(255),
+        UNIQUE (kind, display_name)
+    );
+
+    CREATE TABLE {junction} (
+        investor_id INTEGER REFERENCES investors(id),
+        {id_column} SMALLINT REFERENCES {dimension}(id)
+    );
+
+    CREATE INDEX idx_{junction}_investor_id ON {junction}(investor_id);
+    CREATE INDEX idx_{junction}_{id_column} ON {junction}({id_column});
+
+    CREATE VIEW {flat_name} AS
+    SELECT j.investor_id, d.kind, d.display_name
+    FROM {junction} j
+    JOIN {dimension} d ON d.id = j.{id_column};
+    """
+    return schema
+
+
+def is_normalized(conn):
+    """True when the database holds the normalized layout (checked on one dimension table)"""
+    dimension = next(iter(DIMENSION_TABLES.values()))[0]
+    return conn.execute(text(f"SELECT to_regclass('{dimension}') IS NOT NULL")).scalar()
+
+
+def without_flat_tables(deferred):
+    """Drop deferred keys and foreign keys of the flat tables, which are views in the normalized layout"""
+    flat = set(DIMENSION_TABLES)
+    return {
+        'tables': [table for table in deferred['tables'] if table not in flat],
+        'keys': [(name, sql) for name, sql in deferred['keys'] if sql.split()[2] not in flat],
+        'indexes': [(name, sql) for name, sql in deferred['indexes'] if sql.split(' ON ')[1].split('(')[0] not in flat],
+        'foreign_keys': [fk for fk in deferred['foreign_keys'] if fk[0] not in flat],
+    }
+
+
+def merge_deferred(deferred, extra):
+    return {key: deferred[key] + extra[key] for key in deferred}
+
+
+def dimension_keys(batch):
+    """One string per (kind, display_name) pair, with nulls kept distinct from empty strings"""
+    kind = pc.fill_null(batch.column('kind'), NULL_MARKER)
+    display_name = pc.fill_null(batch.column('display_name'), NULL_MARKER)
+    return pc.binary_join_element_wise(kind, display_name, KEY_SEPARATOR)
+
+
+def new_dimension_allocators():
+    return {flat_name: KeyAllocator() for flat_name in DIMENSION_TABLES}
+
+
+def dimension_allocators_from_db(conn):
+    """Seed the allocators from dimension rows already loaded (resumed and incremental loads)"""
+    return {
+        flat_name: KeyAllocator.from_query(conn, f"""
+            SELECT COALESCE(kind, chr({ord(NULL_MARKER)})) || chr({ord(KEY_SEPARATOR)})
+                   || COALESCE(display_name, chr({ord(NULL_MARKER)})), id
+            FROM {dimension}
+        """)
+        for flat_name, (dimension, _, _) in DIMENSION_TABLES.items()
+    }
+
+
+def encode_dimension(flat_name, batch, allocator):
+    """Dictionary-encode a flat (investor_id, kind, display_name) batch
+
+    Returns (junction, new_dimensions): junction rows with a SMALLINT
+    dimension id, and the dimension rows first seen in this batch.
+    """
+    _, _, id_column = DIMENSION_TABLES[flat_name]
+    ids, new_rows = allocator.assign(dimension_keys(batch))
+    if allocator.last_id > SMALLINT_MAX:
+        raise ValueError(f"{flat_name} has more than {SMALLINT_MAX} distinct (kind, display_name) pairs")
+
+    new_positions = pa.array(new_rows, type=pa.int64())
+    new_dimensions = pa.table({
+        'id': pc.cast(pc.take(ids, new_positions), pa.int16()),
+        'kind': pc.take(batch.column('kind'), new_positions),
+        'display_name': pc.take(batch.column('display_name'), new_positions),
+    })
+    junction = pa.table({
+        'investor_id': batch.column('investor_id'),
+        id_column: pc.cast(ids, pa.int16()),
+    })
+    return junction, new_dimensions
+
+
+def load_dimension_junction(raw_conn, flat_name, batch, allocator, copy_format):
+    """COPY new dimension rows and the junction rows of one batch; returns junction rows written"""
+    dimension, junction_table, _ = DIMENSION_TABLES[flat_name]
+    junction, new_dimensions = encode_dimension(flat_name, batch, allocator)
+    copy_arrow_raw(raw_conn, dimension, new_dimensions, format=copy_format)
+    copy_arrow_raw(raw_conn, junction_table, junction, format=copy_format)
+    return junction.num_rows
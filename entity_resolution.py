@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Entity resolution for companies and schools
+
+The raw names in the file spell one entity many ways ("Google",
+"Google Inc.", "google"). Before companies and schools are loaded, every
+new raw name is resolved to a canonical row:
+
+1. normalized key - accents stripped, lower-cased, punctuation folded
+   into spaces and legal suffixes (inc, corp, llc, ...) dropped; names
+   with equal keys are the same entity
+2. blocking - the remaining keys are only compared with keys sharing a
+   distinctive token or their first four characters, as a sparse
+   key x block incidence product, so the pairs scored stay close to
+   linear in the number of names
+3. scoring - trigram Jaccard similarity from a sparse key x trigram
+   matrix, row-wise products over all candidate pairs at once, plus a
+   rule for school names extended only by trailing generic words
+   ("Stanford" / "Stanford University", but not "Washington University" /
+   "University of Washington"); keys numbered differently ("Sequoia
+   Capital" / "Sequoia Capital II") never match
+4. clustering - new keys are only compared with canonical keys, never
+   chained through each other: a key matching an existing entity's
+   canonical key joins it; the rest are taken most frequent first, each
+   unclaimed key leading a new entity (named after its most frequent raw
+   name) that claims the unclaimed keys matching it
+
+The canonical id map is kept in company_aliases / school_aliases (raw
+name -> id), which the loaders join through instead of the raw names.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
+from sqlalchemy import create_engine, text
+
+from arrow_extract import as_array, map_keys, unique_by
+from bulk_copy import copy_arrow_raw
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, start_run
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+LEGAL_SUFFIXES = ['ag', 'bv', 'co', 'company', 'corp', 'corporation', 'gmbh', 'inc', 'incorporated',
+                  'limited', 'llc', 'llp', 'lp', 'ltd', 'nv', 'pbc', 'plc', 'sa', 'the']
+
+# kind -> alias table, its id column, tokens dropped from keys and words a name may be extended by
+ENTITY_KINDS = {
+    'companies': {
+        'aliases': 'company_aliases',
+        'id_column': 'company_id',
+        'stop_words': LEGAL_SUFFIXES,
+        # "Apple" and "Apple Labs" or "Sony" and "Sony Group" are different companies
+        'generic_words': [],
+    },
+    'schools': {
+        'aliases': 'school_aliases',
+        'id_column': 'school_id',
+        'stop_words': ['the'],
+        'generic_words': ['and', 'at', 'college', 'institute', 'of', 'school', 'university'],
+    },
+}
+
+# Lowest trigram Jaccard similarity merged
+MATCH_THRESHOLD = 0.8
+
+# Numbers and roman numerals up to xxxix tell numbered entities apart ("Fund II", "Zen Software 2")
+NUMERAL_PATTERN = r'^(\d+|x{0,3}(ix|iv|v?i{0,3}))$'
+
+# Tokens and prefixes shared by more keys than this are too common to block on
+MAX_BLOCK_SIZE = 200
+
+PREFIX_LENGTH = 4
+
+
+def normalize_names(names, stop_words=()):
+    """Normalized keys of an Arrow string array (null stays null)"""
+    keys = pc.utf8_normalize(as_array(names), 'NFKD')
+    keys = pc.replace_substring_regex(keys, r'\p{Mn}+', '')
+    keys = pc.replace_substring(pc.utf8_lower(keys), '&', ' and ')
+    keys = pc.utf8_trim_whitespace(pc.replace_substring_regex(keys, r'[^\p{L}\p{N}]+', ' '))
+    if not stop_words:
+        return keys
+
+    tokens = pc.split_pattern(pc.fill_null(keys, ''), ' ')
+    flat = pc.list_flatten(tokens)
+    parents = pc.list_parent_indices(tokens).to_numpy()
+    keep = pc.invert(pc.is_in(flat, value_set=pa.array(sorted(stop_words))))
+    lengths = np.bincount(parents[keep.to_numpy(zero_copy_only=False)], minlength=len(keys))
+    offsets = np.zeros(len(keys) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    stripped = pc.binary_join(pa.ListArray.from_arrays(pa.array(offsets), pc.filter(flat, keep)), ' ')
+    # A name made only of stop words ("The Company") keeps them
+    return pc.if_else(pc.equal(stripped, ''), keys, stripped)
+
+
+def _incidence(rows, columns, shape):
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns)), shape=shape)
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def token_sequences(keys):
+    """keys x tokens matrix of token codes in name order (-1 past the end) and the token vocabulary"""
+    tokens = pc.split_pattern(keys, ' ')
+    encoded = as_array(pc.dictionary_encode(pc.list_flatten(tokens)))
+    lengths = pc.list_value_length(tokens).to_numpy(zero_copy_only=False)
+    rows = pc.list_parent_indices(tokens).to_numpy()
+    positions = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    codes = np.full((len(keys), int(lengths.max(initial=0))), -1, dtype=np.int64)
+    codes[rows, positions] = encoded.indices.to_numpy()
+    return codes, encoded.dictionary
+
+
+def token_matrix(codes, vocabulary):
+    """Binary keys x tokens CSR matrix from token_sequences()"""
+    rows, positions = np.nonzero(codes >= 0)
+    return _incidence(rows, codes[rows, positions], (codes.shape[0], len(vocabulary)))
+
+
+def trigram_matrix(keys):
+    """Binary keys x character trigrams CSR matrix (keys padded like pg_trgm)"""
+    padded = ['  ' + key + ' ' for key in keys.to_pylist()]
+    codepoints = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+    lengths = np.array([len(key) for key in padded], dtype=np.int64)
+    counts = lengths - 2
+    starts = np.repeat(np.cumsum(lengths) - lengths, counts)
+    starts += np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    # Code points fit in 21 bits, so three of them pack into one integer
+    codes = (codepoints[starts] << 42) | (codepoints[starts + 1] << 21) | codepoints[starts + 2]
+    _, columns = np.unique(codes, return_inverse=True)
+    return _incidence(np.repeat(np.arange(len(keys)), counts), columns.ravel(),
+                      (len(keys), int(columns.max(initial=-1)) + 1))
+
+
+def generic_tokens(vocabulary, generic_words):
+    """Boolean mask of the vocabulary tokens that are generic words"""
+    return pc.is_in(vocabulary, value_set=pa.array(generic_words, type=pa.string())).to_numpy(zero_copy_only=False)
+
+
+def numeral_tokens(vocabulary):
+    """Boolean mask of the vocabulary tokens that are numbers or roman numerals"""
+    numeral = pc.and_(pc.match_substring_regex(vocabulary, NUMERAL_PATTERN), pc.greater(pc.utf8_length(vocabulary), 0))
+    return numeral.to_numpy(zero_copy_only=False)
+
+
+def block_matrix(keys, tokens, vocabulary, generic_words):
+    """Binary keys x blocks matrix: the distinctive tokens of each key plus its prefix"""
+    frequency = np.asarray(tokens.sum(axis=0)).ravel()
+    generic = generic_tokens(vocabulary, generic_words)
+    token_blocks = tokens[:, np.flatnonzero(~generic & (frequency <= MAX_BLOCK_SIZE))]
+
+    prefixes = as_array(pc.dictionary_encode(pc.utf8_slice_codeunits(keys, 0, PREFIX_LENGTH)))
+    prefix_blocks = _incidence(np.arange(len(keys)), prefixes.indices.to_numpy(),
+                               (len(keys), len(prefixes.dictionary)))
+    prefix_blocks = prefix_blocks[:, np.flatnonzero(np.asarray(prefix_blocks.sum(axis=0)).ravel() <= MAX_BLOCK_SIZE)]
+    return sparse.hstack([token_blocks, prefix_blocks], format='csr')
+
+
+def _row_overlap(matrix, left, right):
+    return np.asarray(matrix[left].multiply(matrix[right]).sum(axis=1)).ravel()
+
+
+def _same_rows(matrix, left, right):
+    """Pairs whose rows of a binary matrix hold the same columns"""
+    sizes = np.diff(matrix.indptr)
+    shared = _row_overlap(matrix, left, right)
+    return (shared == sizes[left]) & (shared == sizes[right])
+
+
+def match_pairs(keys, first_new, generic_words, threshold=MATCH_THRESHOLD):
+    """(left, right) index arrays of matching keys, every pair touching a key at or after first_new
+
+    Keys before first_new are already resolved and are not compared with
+    each other. Keys whose numbers or roman numerals differ never match.
+    """
+    if first_new >= len(keys):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    codes, vocabulary = token_sequences(keys)
+    tokens = token_matrix(codes, vocabulary)
+    blocks = block_matrix(keys, tokens, vocabulary, generic_words)
+    candidates = (blocks[first_new:] @ blocks.T).tocoo()
+    left = candidates.row.astype(np.int64) + first_new
+    right = candidates.col.astype(np.int64)
+    # New keys pair with every known key and with the new keys after them, each pair once
+    keep = (right < first_new) | (right > left)
+    left, right = left[keep], right[keep]
+    if len(left) == 0:
+        return left, right
+
+    trigrams = trigram_matrix(keys)
+    sizes = np.asarray(trigrams.sum(axis=1)).ravel()
+    shared = _row_overlap(trigrams, left, right)
+    similar = shared / (sizes[left] + sizes[right] - shared) >= threshold
+
+    generic = generic_tokens(vocabulary, generic_words)
+    same_numerals = _same_rows(tokens[:, np.flatnonzero(numeral_tokens(vocabulary))], left, right)
+    matched = (similar | _extends(codes, tokens, generic, left, right)) & same_numerals
+    return left[matched], right[matched]
+
+
+def _extends(codes, tokens, generic, left, right):
+    """Pairs where the longer name is the shorter one followed only by generic words
+
+    The shorter name needs a distinctive token of its own, its tokens have
+    to start the longer name in the same order, and both names have to be
+    left with the same tokens once the generic words are dropped.
+    """
+    lengths = (codes >= 0).sum(axis=1)
+    swap = lengths[left] > lengths[right]
+    shorter, longer = np.where(swap, right, left), np.where(swap, left, right)
+    short_codes, long_codes = codes[shorter], codes[longer]
+    prefix = np.all((short_codes == long_codes) | (short_codes < 0), axis=1)
+    tail = np.arange(codes.shape[1]) >= lengths[shorter][:, None]
+    generic_tail = np.all(~tail | (long_codes < 0) | generic[np.maximum(long_codes, 0)], axis=1)
+    distinctive = np.any((short_codes >= 0) & ~generic[np.maximum(short_codes, 0)], axis=1)
+    same_tokens = _same_rows(tokens[:, np.flatnonzero(~generic)], left, right)
+    return prefix & generic_tail & distinctive & same_tokens
+
+
+class EntityResolver:
+    """Canonical ids of one kind's raw names, backed by its alias table"""
+
+    def __init__(self, kind, aliases, key_ids, entity_names):
+        self.kind = kind
+        self.config = ENTITY_KINDS[kind]
+        self.aliases = aliases
+        self.key_ids = key_ids
+        self.entity_names = entity_names
+        # id -> normalized key of the entity's own name, the only key new names are matched against
+        entity_keys = normalize_names(pa.array(list(entity_names), type=pa.string()), self.config['stop_words'])
+        self.canonical_keys = dict(zip(entity_names.values(), entity_keys.to_pylist()))
+
+    @classmethod
+    def from_db(cls, conn, kind):
+        config = ENTITY_KINDS[kind]
+        if conn.execute(text("SELECT to_regclass(:name)"), {'name': config['aliases']}).scalar() is None:
+            raise ValueError(f"{config['aliases']} is missing; re-create the schema with export_relational_fast.py first")
+        aliases, key_ids = {}, {}
+        for alias, entity_id, key in conn.execute(text(
+                f"SELECT alias, {config['id_column']}, normalized_name FROM {config['aliases']}")):
+            aliases[alias] = entity_id
+            key_ids.setdefault(key, entity_id)
+        entity_names = {row[1]: row[0] for row in conn.execute(text(f"SELECT id, name FROM {kind}"))}
+        return cls(kind, aliases, key_ids, entity_names)
+
+    def ids(self, names):
+        """Canonical ids of raw names (null if unresolved)"""
+        return map_keys(names, self.aliases)
+
+    def resolve(self, raw_conn, rows, copy_format='csv'):
+        """Resolve the raw names of rows (name, display_name, count; repeats allowed) on raw_conn
+
+        Inserts the new canonical rows and the alias rows of every new raw
+        name without committing; returns the number of new entities.
+        """
+        rows = rows.filter(pc.and_(pc.is_valid(rows.column('name')), pc.not_equal(rows.column('name'), '')))
+        rows = rows.filter(pc.invert(pc.is_in(rows.column('name'),
+                                              value_set=pa.array(list(self.aliases), type=pa.string()))))
+        if rows.num_rows == 0:
+            return 0
+        occurrences = pc.value_counts(rows.column('name'))
+        names = unique_by(rows, 'name', rows.column_names[1:])
+        frequency = pc.take(occurrences.field('counts'), pc.index_in(names.column('name'),
+                                                                    value_set=occurrences.field('values')))
+        keys = normalize_names(names.column('name'), self.config['stop_words'])
+        ids = map_keys(keys, self.key_ids).to_pylist()
+
+        # Keys no entity has yet are matched against the canonical keys and each other
+        new_keys = pc.unique(pc.filter(keys, pc.is_null(pa.array(ids, type=pa.int32())))).to_pylist()
+        known_ids = np.array(sorted(self.canonical_keys), dtype=np.int64)
+        first_new = len(known_ids)
+        all_keys = pa.array([self.canonical_keys[entity_id] for entity_id in known_ids.tolist()] + new_keys,
+                            type=pa.string())
+        left, right = match_pairs(all_keys, first_new, self.config['generic_words'])
+
+        # A key matching existing entities joins the lowest id among them
+        known = right < first_new
+        joined = np.full(len(new_keys), first_new, dtype=np.int64)
+        np.minimum.at(joined, left[known] - first_new, right[known])
+        for key, index in zip(new_keys, joined.tolist()):
+            if index < first_new:
+                self.key_ids[key] = int(known_ids[index])
+
+        # The other keys lead new entities most frequent first and claim the unclaimed keys matching them
+        leaders = {}
+        for row, (name, key, frequency_count) in enumerate(zip(names.column('name').to_pylist(), keys.to_pylist(),
+                                                                frequency.to_pylist())):
+            if key is None or key in self.key_ids:
+                continue
+            best = leaders.get(key)
+            if best is None or (-frequency_count, name) < (-best[1], best[2]):
+                leaders[key] = (row, frequency_count, name)
+        positions = {key: position for position, key in enumerate(new_keys)}
+        pairs = ~known
+        neighbours = _incidence(np.concatenate([left[pairs], right[pairs]]) - first_new,
+                                np.concatenate([right[pairs], left[pairs]]) - first_new,
+                                (len(new_keys), len(new_keys)))
+        claimed = {}
+        for key in sorted(leaders, key=lambda key: (-leaders[key][1], leaders[key][2], key)):
+            if key in claimed:
+                continue
+            claimed[key] = key
+            position = positions[key]
+            for other in neighbours.indices[neighbours.indptr[position]:neighbours.indptr[position + 1]].tolist():
+                claimed.setdefault(new_keys[other], key)
+
+        entities = names.take(pa.array(sorted(leaders[key][0] for key in set(claimed.values())), type=pa.int64()))
+        if entities.num_rows:
+            entities = entities.set_column(1, entities.column_names[1],
+                                           pc.coalesce(entities.column(1), entities.column('name')))
+            copy_arrow_raw(raw_conn, self.kind, entities, format=copy_format)
+            with raw_conn.cursor() as cursor:
+                cursor.execute(f"SELECT id, name FROM {self.kind} WHERE name = ANY(%s)",
+                               (entities.column('name').to_pylist(),))
+                self.entity_names.update({row[1]: row[0] for row in cursor.fetchall()})
+            for key in set(claimed.values()):
+                self.canonical_keys[self.entity_names[leaders[key][2]]] = key
+
+        for key, leader in claimed.items():
+            self.key_ids[key] = self.entity_names[leaders[leader][2]]
+        alias_ids = map_keys(keys, self.key_ids)
+        copy_arrow_raw(raw_conn, self.config['aliases'], pa.table({
+            'alias': names.column('name'),
+            self.config['id_column']: alias_ids,
+            'normalized_name': keys,
+        }), format=copy_format)
+        self.aliases.update(zip(names.column('name').to_pylist(), alias_ids.to_pylist()))
+        print(f"  🔗 Resolved {names.num_rows} new {self.kind} names to {entities.num_rows} new {self.kind}")
+        return entities.num_rows
+
+
+def new_resolvers(conn):
+    return {kind: EntityResolver.from_db(conn, kind) for kind in ENTITY_KINDS}
+
+
+def company_rows(positions=None, investments=None):
+    """Company (name, display_name, total_employee_count) rows named by positions and/or investments"""
+    tables = []
+    if positions is not None:
+        tables.append(pa.table({
+            'name': positions.column('company_name'),
+            'display_name': positions.column('company_display_name'),
+            'total_employee_count': pc.cast(positions.column('company_employee_count'), pa.int64()),
+        }))
+    if investments is not None:
+        names = investments.column('company_display_name')
+        tables.append(pa.table({
+            'name': names,
+            'display_name': names,
+            'total_employee_count': pa.nulls(len(names), type=pa.int64()),
+        }))
+    return pa.concat_tables(tables)
+
+
+def school_rows(degrees):
+    """School (name, display_name, total_student_count) rows named by degrees"""
+    rows = degrees.select(['school_name', 'school_display_name', 'school_student_count'])
+    return rows.rename_columns(['name', 'display_name', 'total_student_count'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show how the loaded companies or schools resolve a name')
+    parser.add_argument('kind', choices=list(ENTITY_KINDS))
+    parser.add_argument('names', nargs='+', help='Raw names to normalize and look up')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('entity_resolution', args.trace_allocations)
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            resolver = EntityResolver.from_db(conn, args.kind)
+        print(f"📚 {len(resolver.aliases):,} aliases of {len(resolver.entity_names):,} {args.kind} "
+              f"loaded in {time.perf_counter() - started:.2f}s")
+        names = pa.array(args.names, type=pa.string())
+        keys = normalize_names(names, resolver.config['stop_words'])
+        for name, key, entity_id in zip(args.names, keys.to_pylist(),
+                                        map_keys(keys, resolver.key_ids).to_pylist()):
+            entity_id = resolver.aliases.get(name, entity_id)
+            print(f"  {name!r} -> {key!r} -> {f'#{entity_id}' if entity_id else 'no match'}")
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Entity resolution failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
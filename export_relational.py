@@ -3,13 +3,17 @@
 Export investors.parquet to comprehensive relational PostgreSQL database
 """
 
-import pandas as pd
-import psycopg2
+import pyarrow.parquet as pq
 from sqlalchemy import create_engine, text
-import json
+import argparse
 import sys
-from datetime import datetime
-import uuid
+from functools import partial
+
+from dimension_tables import DROP_NORMALIZED_DIMENSIONS
+from load_manifest import LoadManifest, execute_raw, reset_manifest, run_unit, source_fingerprint
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+from parent_tables import (PARENT_SOURCE_COLUMNS, extract_parent_tables, finish_parent_load,
+                           load_parent_tables, new_allocators)
 
 # Database connection settings
 DB_CONFIG = {
@@ -20,6 +24,8 @@ DB_CONFIG = {
     'password': 'Adminaccount1!'
 }
 
+PARQUET_PATH = '/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet'
+
 def create_relational_schema():
     """Create comprehensive relational database schema"""
     schema = """
@@ -37,6 +43,8 @@ def create_relational_schema():
     DROP TABLE IF EXISTS investor_lists CASCADE;
     DROP TABLE IF EXISTS network_connections CASCADE;
     DROP TABLE IF EXISTS firms CASCADE;
+    DROP TABLE IF EXISTS school_aliases CASCADE;
+    DROP TABLE IF EXISTS company_aliases CASCADE;
     DROP TABLE IF EXISTS schools CASCADE;
     DROP TABLE IF EXISTS companies CASCADE;
     DROP TABLE IF EXISTS locations CASCADE;
@@ -99,6 +107,19 @@ def create_relational_schema():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
 
+    -- Raw company and school names resolved to their canonical rows (see entity_resolution.py)
+    CREATE TABLE company_aliases (
+        alias VARCHAR(255) PRIMARY KEY,
+        company_id INTEGER REFERENCES companies(id),
+        normalized_name VARCHAR(255)
+    );
+
+    CREATE TABLE school_aliases (
+        alias VARCHAR(255) PRIMARY KEY,
+        school_id INTEGER REFERENCES schools(id),
+        normalized_name VARCHAR(255)
+    );
+
     -- Main investors table
     CREATE TABLE investors (
         id SERIAL PRIMARY KEY,
@@ -202,8 +223,9 @@ def create_relational_schema():
     CREATE TABLE investments (
         id SERIAL PRIMARY KEY,
         investor_id INTEGER REFERENCES investors(id),
+        company_id INTEGER REFERENCES companies(id),
         company_display_name VARCHAR(255),
-        total_raised TEXT[],
+        total_raised_json JSONB,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
 
@@ -260,199 +282,75 @@ def create_relational_schema():
     CREATE INDEX idx_positions_person_id ON positions(person_id);
     CREATE INDEX idx_degrees_person_id ON degrees(person_id);
     CREATE INDEX idx_investment_rounds_investor_id ON investment_rounds(investor_id);
+    CREATE INDEX idx_investment_rounds_investment_id ON investment_rounds(investment_id);
+    CREATE INDEX idx_investments_investor_id ON investments(investor_id);
+    CREATE INDEX idx_investments_company_id ON investments(company_id);
+    CREATE INDEX idx_coinvestors_investment_id ON coinvestors(investment_id);
+    CREATE INDEX idx_coinvestors_name ON coinvestors(name);
+    CREATE INDEX idx_network_connections_investor_id ON network_connections(investor_id);
+    CREATE INDEX idx_network_connections_target_person_id ON network_connections(target_person_id);
+    CREATE INDEX idx_investor_lists_investor_id ON investor_lists(investor_id);
     """
-    return schema
-
-def safe_get(obj, key, default=None):
-    """Safely get value from dict-like object"""
-    if isinstance(obj, dict):
-        return obj.get(key, default)
-    return default
-
-def safe_int(value, default=None):
-    """Safely convert to integer"""
-    try:
-        if value and str(value).strip():
-            return int(float(str(value)))
-        return default
-    except:
-        return default
+    # Rebuilds the flat stage/sector/location tables even over a normalized layout
+    return DROP_NORMALIZED_DIMENSIONS + schema
 
-def process_investor_data(df, engine):
+def process_investor_data(table, engine, copy_format='csv', manifest=None):
     """Process and insert all investor data into relational tables"""
     
-    # Track foreign keys
-    person_map = {}
-    firm_map = {}
-    location_map = {}
-    school_map = {}
-    company_map = {}
+    print(f"🔄 Processing {table.num_rows} investor records...")
     
-    print(f"🔄 Processing {len(df)} investor records...")
+    # Ids are allocated client-side from slugs/names, so nothing is read back per row
+    allocators = new_allocators()
+    parent_tables = extract_parent_tables(table, allocators)
+    counts = load_parent_tables(engine, parent_tables, copy_format, manifest, (1, table.num_rows))
+    finish_parent_load(engine, allocators, table.num_rows)
     
-    with engine.connect() as conn:
-        for idx, row in df.iterrows():
-            if idx % 1000 == 0:
-                print(f"  Processing record {idx}/{len(df)}")
-            
-            try:
-                # 1. Process Person
-                person_data = safe_get(row, 'person', {})
-                person_id = None
-                
-                if person_data and isinstance(person_data, dict):
-                    person_slug = safe_get(person_data, 'slug', f'person_{idx}')
-                    
-                    if person_slug not in person_map:
-                        person_result = conn.execute(text("""
-                            INSERT INTO persons (slug, first_name, last_name, name, linkedin_url, 
-                                                facebook_url, twitter_url, crunchbase_url, angellist_url, 
-                                                url, is_me, first_degree_count, is_on_target_list)
-                            VALUES (:slug, :first_name, :last_name, :name, :linkedin_url, 
-                                    :facebook_url, :twitter_url, :crunchbase_url, :angellist_url, 
-                                    :url, :is_me, :first_degree_count, :is_on_target_list)
-                            RETURNING id
-                        """), {
-                            'slug': person_slug,
-                            'first_name': safe_get(person_data, 'first_name'),
-                            'last_name': safe_get(person_data, 'last_name'),
-                            'name': safe_get(person_data, 'name'),
-                            'linkedin_url': safe_get(person_data, 'linkedin_url'),
-                            'facebook_url': str(safe_get(person_data, 'facebook_url', '')),
-                            'twitter_url': safe_get(person_data, 'twitter_url'),
-                            'crunchbase_url': safe_get(person_data, 'crunchbase_url'),
-                            'angellist_url': safe_get(person_data, 'angellist_url'),
-                            'url': safe_get(person_data, 'url'),
-                            'is_me': safe_get(person_data, 'is_me', False),
-                            'first_degree_count': safe_int(safe_get(person_data, 'first_degree_count')),
-                            'is_on_target_list': safe_get(person_data, 'is_on_target_list', False)
-                        })
-                        person_id = person_result.fetchone()[0]
-                        person_map[person_slug] = person_id
-                    else:
-                        person_id = person_map[person_slug]
-                
-                # 2. Process Location
-                location_data = safe_get(row, 'location', {})
-                location_id = None
-                
-                if location_data and isinstance(location_data, dict):
-                    location_name = safe_get(location_data, 'display_name')
-                    if location_name and location_name not in location_map:
-                        location_result = conn.execute(text("""
-                            INSERT INTO locations (display_name, kind)
-                            VALUES (:display_name, :kind)
-                            RETURNING id
-                        """), {
-                            'display_name': location_name,
-                            'kind': safe_get(location_data, 'kind', 'location')
-                        })
-                        location_id = location_result.fetchone()[0]
-                        location_map[location_name] = location_id
-                    elif location_name:
-                        location_id = location_map[location_name]
-                
-                # 3. Process Firm
-                firm_data = safe_get(row, 'firm', {})
-                firm_id = None
-                
-                if firm_data and isinstance(firm_data, dict):
-                    firm_slug = safe_get(firm_data, 'slug', f'firm_{idx}')
-                    
-                    if firm_slug not in firm_map:
-                        firm_result = conn.execute(text("""
-                            INSERT INTO firms (name, slug, current_fund_size)
-                            VALUES (:name, :slug, :current_fund_size)
-                            RETURNING id
-                        """), {
-                            'name': safe_get(firm_data, 'name'),
-                            'slug': firm_slug,
-                            'current_fund_size': safe_get(firm_data, 'current_fund_size')
-                        })
-                        firm_id = firm_result.fetchone()[0]
-                        firm_map[firm_slug] = firm_id
-                    else:
-                        firm_id = firm_map[firm_slug]
-                
-                # 4. Insert Investor
-                investor_result = conn.execute(text("""
-                    INSERT INTO investors (
-                        person_id, firm_id, location_id, position, headline, 
-                        previous_position, previous_firm, min_investment, max_investment, 
-                        target_investment, areas_of_interest_freeform, no_current_interest_freeform,
-                        vote_count, leads_rounds, claimed, can_edit, include_in_list,
-                        in_founder_investor_list, in_diverse_investor_list, in_female_investor_list,
-                        in_invests_in_diverse_founders_investor_list, in_invests_in_female_founders_investor_list,
-                        has_profile_vote
-                    ) VALUES (
-                        :person_id, :firm_id, :location_id, :position, :headline,
-                        :previous_position, :previous_firm, :min_investment, :max_investment,
-                        :target_investment, :areas_of_interest_freeform, :no_current_interest_freeform,
-                        :vote_count, :leads_rounds, :claimed, :can_edit, :include_in_list,
-                        :in_founder_investor_list, :in_diverse_investor_list, :in_female_investor_list,
-                        :in_invests_in_diverse_founders_investor_list, :in_invests_in_female_founders_investor_list,
-                        :has_profile_vote
-                    ) RETURNING id
-                """), {
-                    'person_id': person_id,
-                    'firm_id': firm_id,
-                    'location_id': location_id,
-                    'position': safe_get(row, 'position'),
-                    'headline': safe_get(row, 'headline'),
-                    'previous_position': safe_get(row, 'previous_position'),
-                    'previous_firm': safe_get(row, 'previous_firm'),
-                    'min_investment': safe_get(row, 'min_investment'),
-                    'max_investment': safe_get(row, 'max_investment'),
-                    'target_investment': safe_get(row, 'target_investment'),
-                    'areas_of_interest_freeform': safe_get(row, 'areas_of_interest_freeform'),
-                    'no_current_interest_freeform': safe_get(row, 'no_current_interest_freeform'),
-                    'vote_count': safe_int(safe_get(row, 'vote_count'), 0),
-                    'leads_rounds': safe_get(row, 'leads_rounds'),
-                    'claimed': safe_get(row, 'claimed', False),
-                    'can_edit': safe_get(row, 'can_edit', False),
-                    'include_in_list': safe_get(row, 'include_in_list', False),
-                    'in_founder_investor_list': safe_get(row, 'in_founder_investor_list', False),
-                    'in_diverse_investor_list': safe_get(row, 'in_diverse_investor_list', False),
-                    'in_female_investor_list': safe_get(row, 'in_female_investor_list', False),
-                    'in_invests_in_diverse_founders_investor_list': safe_get(row, 'in_invests_in_diverse_founders_investor_list', False),
-                    'in_invests_in_female_founders_investor_list': safe_get(row, 'in_invests_in_female_founders_investor_list', False),
-                    'has_profile_vote': safe_get(row, 'has_profile_vote', False)
-                })
-                
-                investor_id = investor_result.fetchone()[0]
-                
-                # Process related data (stages, areas of interest, etc.)
-                # This is a simplified version - in production you'd process all nested arrays
-                
-                conn.commit()
-                
-            except Exception as e:
-                print(f"Error processing record {idx}: {e}")
-                conn.rollback()
-                continue
+    for table_name in ('persons', 'firms', 'locations', 'investors'):
+        print(f"  ✅ Inserted {counts[table_name]} {table_name}")
+    
+    # Process related data (stages, areas of interest, etc.)
+    # Nested child tables are populated by complete_population.py
 
 def main():
+    parser = argparse.ArgumentParser(description='Relational export of investors.parquet')
+    parser.add_argument('--resume', action='store_true',
+                        help='Keep the schema and loaded data and skip the units the run manifest marks done')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('export_relational', args.trace_allocations)
+
     print("🚀 Starting comprehensive relational database export...")
     
     try:
         # Load parquet file
         print("📄 Loading parquet file...")
-        df = pd.read_parquet('/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet')
-        print(f"✅ Loaded {len(df)} records")
+        with measure_stage('read') as stage_metrics:
+            table = pq.read_table(PARQUET_PATH, columns=PARENT_SOURCE_COLUMNS)
+            stage_metrics['rows'] = table.num_rows
+        print(f"✅ Loaded {table.num_rows} records")
         
         # Create connection
         connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-        engine = create_engine(connection_string)
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        if not args.resume:
+            # Recreating the schema invalidates every stage's checkpoints, not just this one's
+            reset_manifest(engine)
+        manifest = LoadManifest(engine, 'parents', source_fingerprint(PARQUET_PATH, mode='whole'),
+                                resume=args.resume)
         
         # Create schema
-        print("📋 Creating relational database schema...")
-        with engine.connect() as conn:
-            conn.execute(text(create_relational_schema()))
-            conn.commit()
-        print("✅ Schema created successfully")
+        if manifest.is_done('schema', 0, 0):
+            print("⏩ Resuming: schema already created")
+        else:
+            print("📋 Creating relational database schema...")
+            with measure_stage('schema'):
+                run_unit(engine, manifest, 'schema', 0, 0, partial(execute_raw, sql=create_relational_schema()))
+            print("✅ Schema created successfully")
         
         # Process data
-        process_investor_data(df, engine)
+        with measure_stage('parents'):
+            process_investor_data(table, engine, manifest=manifest)
+        manifest.print_summary()
         
         # Verify results
         print("\n📊 Verifying relational database...")
@@ -480,11 +378,15 @@ def main():
                 print(f"  - {row[0]} at {row[1]} ({row[2]}) in {row[3]}")
         
         print("\n🎉 Comprehensive relational database export completed!")
+        finish_run(args)
         
     except Exception as e:
         print(f"❌ Export failed: {e}")
+        print("   Finished units are committed - rerun with --resume to load only the rest")
         import traceback
         traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,12 +3,20 @@
 Fast export of investors.parquet to comprehensive relational PostgreSQL database
 """
 
-import pandas as pd
-import psycopg2
+import pyarrow.parquet as pq
 from sqlalchemy import create_engine, text
-import json
+import argparse
 import sys
-from datetime import datetime
+from functools import partial
+
+from bulk_copy import ARROW_COPY_FORMATS
+from dimension_tables import DROP_NORMALIZED_DIMENSIONS
+from load_finalize import HOT_TABLES, finalize_schema, split_schema
+from load_manifest import LoadManifest, execute_raw, reset_manifest, run_unit, source_fingerprint
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+from parent_tables import (PARENT_SOURCE_COLUMNS, extract_parent_tables, finish_parent_load,
+                           load_parent_tables, new_allocators)
+from parquet_stream import DEFAULT_BATCH_ROWS, iter_parquet_batches
 
 # Database connection settings
 DB_CONFIG = {
@@ -19,10 +27,15 @@ DB_CONFIG = {
     'password': 'Adminaccount1!'
 }
 
+PARQUET_PATH = '/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet'
+
 def create_relational_schema():
     """Create comprehensive relational database schema"""
     schema = """
     -- Drop existing tables if they exist
+    DROP TABLE IF EXISTS investor_lists CASCADE;
+    DROP TABLE IF EXISTS network_connections CASCADE;
+    DROP TABLE IF EXISTS coinvestors CASCADE;
     DROP TABLE IF EXISTS investment_rounds CASCADE;
     DROP TABLE IF EXISTS investments CASCADE;
     DROP TABLE IF EXISTS positions CASCADE;
@@ -33,6 +46,8 @@ def create_relational_schema():
     DROP TABLE IF EXISTS investment_locations CASCADE;
     DROP TABLE IF EXISTS investor_stages CASCADE;
     DROP TABLE IF EXISTS firms CASCADE;
+    DROP TABLE IF EXISTS school_aliases CASCADE;
+    DROP TABLE IF EXISTS company_aliases CASCADE;
     DROP TABLE IF EXISTS schools CASCADE;
     DROP TABLE IF EXISTS companies CASCADE;
     DROP TABLE IF EXISTS locations CASCADE;
@@ -93,6 +108,19 @@ def create_relational_schema():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
 
+    -- Raw company and school names resolved to their canonical rows (see entity_resolution.py)
+    CREATE TABLE company_aliases (
+        alias VARCHAR(255) PRIMARY KEY,
+        company_id INTEGER REFERENCES companies(id),
+        normalized_name VARCHAR(255)
+    );
+
+    CREATE TABLE school_aliases (
+        alias VARCHAR(255) PRIMARY KEY,
+        school_id INTEGER REFERENCES schools(id),
+        normalized_name VARCHAR(255)
+    );
+
     -- Main investors table
     CREATE TABLE investors (
         id SERIAL PRIMARY KEY,
@@ -195,6 +223,7 @@ def create_relational_schema():
     CREATE TABLE investments (
         id SERIAL PRIMARY KEY,
         investor_id INTEGER REFERENCES investors(id),
+        company_id INTEGER REFERENCES companies(id),
         company_display_name VARCHAR(255),
         total_raised_json JSONB,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -214,6 +243,37 @@ def create_relational_schema():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
 
+    -- Co-investors
+    CREATE TABLE coinvestors (
+        id SERIAL PRIMARY KEY,
+        investment_id INTEGER REFERENCES investments(id),
+        name VARCHAR(255),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Network connections
+    CREATE TABLE network_connections (
+        id SERIAL PRIMARY KEY,
+        investor_id INTEGER REFERENCES investors(id),
+        target_person_id INTEGER REFERENCES persons(id),
+        list_type VARCHAR(100),
+        position VARCHAR(255),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Investor lists
+    CREATE TABLE investor_lists (
+        id SERIAL PRIMARY KEY,
+        investor_id INTEGER REFERENCES investors(id),
+        slug VARCHAR(255),
+        stage_name VARCHAR(255),
+        vertical_kind VARCHAR(100),
+        vertical_display_name VARCHAR(255),
+        location_kind VARCHAR(100),
+        location_display_name VARCHAR(255),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
     -- Create indexes for better performance
     CREATE INDEX idx_persons_slug ON persons(slug);
     CREATE INDEX idx_firms_slug ON firms(slug);
@@ -222,182 +282,116 @@ def create_relational_schema():
     CREATE INDEX idx_positions_person_id ON positions(person_id);
     CREATE INDEX idx_degrees_person_id ON degrees(person_id);
     CREATE INDEX idx_investment_rounds_investor_id ON investment_rounds(investor_id);
+    CREATE INDEX idx_investment_rounds_investment_id ON investment_rounds(investment_id);
+    CREATE INDEX idx_investments_investor_id ON investments(investor_id);
+    CREATE INDEX idx_investments_company_id ON investments(company_id);
+    CREATE INDEX idx_coinvestors_investment_id ON coinvestors(investment_id);
+    CREATE INDEX idx_coinvestors_name ON coinvestors(name);
+    CREATE INDEX idx_network_connections_investor_id ON network_connections(investor_id);
+    CREATE INDEX idx_network_connections_target_person_id ON network_connections(target_person_id);
+    CREATE INDEX idx_investor_lists_investor_id ON investor_lists(investor_id);
     """
-    return schema
+    # Rebuilds the flat stage/sector/location tables even over a normalized layout
+    return DROP_NORMALIZED_DIMENSIONS + schema
+
+def extract_and_bulk_insert(engine, copy_format='csv', stream=False, batch_size=DEFAULT_BATCH_ROWS, manifest=None):
+    """Extract parents with client-side keys and COPY them without any id round trips
 
-def extract_and_bulk_insert(df, engine):
-    """Extract data and perform bulk inserts for better performance"""
+    Batches whose tables the manifest marks done are still extracted (the
+    key allocators must see every row to hand out the same ids) but not
+    loaded again.
+    """
     
     print("🔄 Extracting data for bulk insert...")
+    allocators = new_allocators()
+    totals = {}
+    last_investor_id = 0
     
-    # Extract persons data
-    persons_data = []
-    firms_data = []
-    locations_data = []
-    investors_data = []
-    
-    for idx, row in df.iterrows():
-        if idx % 5000 == 0:
-            print(f"  Extracting row {idx}/{len(df)}")
-        
-        # Extract person data
-        person = row.get('person', {}) if pd.notna(row.get('person')) else {}
-        if isinstance(person, dict) and person:
-            persons_data.append({
-                'slug': person.get('slug', f'person_{idx}'),
-                'first_name': person.get('first_name'),
-                'last_name': person.get('last_name'),
-                'name': person.get('name'),
-                'linkedin_url': person.get('linkedin_url'),
-                'facebook_url': str(person.get('facebook_url', '')),
-                'twitter_url': person.get('twitter_url'),
-                'crunchbase_url': person.get('crunchbase_url'),
-                'angellist_url': person.get('angellist_url'),
-                'url': person.get('url'),
-                'is_me': person.get('is_me', False),
-                'first_degree_count': person.get('first_degree_count'),
-                'is_on_target_list': person.get('is_on_target_list', False)
-            })
-        
-        # Extract firm data
-        firm = row.get('firm', {}) if pd.notna(row.get('firm')) else {}
-        if isinstance(firm, dict) and firm:
-            firms_data.append({
-                'name': firm.get('name'),
-                'slug': firm.get('slug', f'firm_{idx}'),
-                'current_fund_size': firm.get('current_fund_size')
-            })
-        
-        # Extract location data
-        location = row.get('location', {}) if pd.notna(row.get('location')) else {}
-        if isinstance(location, dict) and location:
-            locations_data.append({
-                'display_name': location.get('display_name'),
-                'kind': location.get('kind', 'location')
-            })
-    
-    print(f"✅ Extracted {len(persons_data)} persons, {len(firms_data)} firms, {len(locations_data)} locations")
-    
-    # Bulk insert using pandas to_sql (much faster)
-    print("💾 Bulk inserting data...")
+    if stream:
+        batches = iter_parquet_batches(PARQUET_PATH, PARENT_SOURCE_COLUMNS, batch_size)
+    else:
+        batches = [(1, pq.read_table(PARQUET_PATH, columns=PARENT_SOURCE_COLUMNS))]
     
-    if persons_data:
-        persons_df = pd.DataFrame(persons_data).drop_duplicates(subset=['slug'])
-        persons_df.to_sql('persons', engine, if_exists='append', index=False, method='multi')
-        print(f"  ✅ Inserted {len(persons_df)} persons")
+    for start_id, batch in batches:
+        parent_tables = extract_parent_tables(batch, allocators, start_id)
+        last_investor_id = start_id + batch.num_rows - 1
+        counts = load_parent_tables(engine, parent_tables, copy_format, manifest, (start_id, last_investor_id))
+        for table_name, count in counts.items():
+            totals[table_name] = totals.get(table_name, 0) + count
+        del batch, parent_tables
+        if stream:
+            print(f"  Loaded investors {start_id}-{last_investor_id}")
     
-    if firms_data:
-        firms_df = pd.DataFrame(firms_data).drop_duplicates(subset=['slug'])
-        firms_df.to_sql('firms', engine, if_exists='append', index=False, method='multi')
-        print(f"  ✅ Inserted {len(firms_df)} firms")
+    # One round trip to move the SERIAL sequences past the client-side ids
+    finish_parent_load(engine, allocators, last_investor_id)
     
-    if locations_data:
-        locations_df = pd.DataFrame(locations_data).drop_duplicates(subset=['display_name'])
-        locations_df.to_sql('locations', engine, if_exists='append', index=False, method='multi')
-        print(f"  ✅ Inserted {len(locations_df)} locations")
-    
-    # Now create investors with foreign key relationships
-    print("🔗 Creating investor records with foreign keys...")
-    
-    with engine.connect() as conn:
-        # Get foreign key mappings
-        person_map = {row[1]: row[0] for row in conn.execute(text("SELECT id, slug FROM persons")).fetchall()}
-        firm_map = {row[1]: row[0] for row in conn.execute(text("SELECT id, slug FROM firms")).fetchall()}
-        location_map = {row[1]: row[0] for row in conn.execute(text("SELECT id, display_name FROM locations")).fetchall()}
-        
-        print(f"  📋 Mapped {len(person_map)} persons, {len(firm_map)} firms, {len(location_map)} locations")
-        
-        # Create investors data with foreign keys
-        investors_batch = []
-        
-        for idx, row in df.iterrows():
-            if idx % 5000 == 0:
-                print(f"  Creating investor record {idx}/{len(df)}")
-            
-            # Get foreign keys
-            person = row.get('person', {}) if pd.notna(row.get('person')) else {}
-            firm = row.get('firm', {}) if pd.notna(row.get('firm')) else {}
-            location = row.get('location', {}) if pd.notna(row.get('location')) else {}
-            
-            person_id = None
-            firm_id = None
-            location_id = None
-            
-            if isinstance(person, dict) and person:
-                person_slug = person.get('slug', f'person_{idx}')
-                person_id = person_map.get(person_slug)
-            
-            if isinstance(firm, dict) and firm:
-                firm_slug = firm.get('slug', f'firm_{idx}')
-                firm_id = firm_map.get(firm_slug)
-            
-            if isinstance(location, dict) and location:
-                location_name = location.get('display_name')
-                location_id = location_map.get(location_name)
-            
-            investor_data = {
-                'person_id': person_id,
-                'firm_id': firm_id,
-                'location_id': location_id,
-                'position': row.get('position'),
-                'headline': row.get('headline'),
-                'previous_position': row.get('previous_position'),
-                'previous_firm': row.get('previous_firm'),
-                'min_investment': row.get('min_investment'),
-                'max_investment': row.get('max_investment'),
-                'target_investment': row.get('target_investment'),
-                'areas_of_interest_freeform': row.get('areas_of_interest_freeform'),
-                'no_current_interest_freeform': row.get('no_current_interest_freeform'),
-                'vote_count': int(row.get('vote_count', 0)) if pd.notna(row.get('vote_count')) else 0,
-                'leads_rounds': row.get('leads_rounds'),
-                'claimed': bool(row.get('claimed', False)),
-                'can_edit': bool(row.get('can_edit', False)),
-                'include_in_list': bool(row.get('include_in_list', False)),
-                'in_founder_investor_list': bool(row.get('in_founder_investor_list', False)),
-                'in_diverse_investor_list': bool(row.get('in_diverse_investor_list', False)),
-                'in_female_investor_list': bool(row.get('in_female_investor_list', False)),
-                'in_invests_in_diverse_founders_investor_list': bool(row.get('in_invests_in_diverse_founders_investor_list', False)),
-                'in_invests_in_female_founders_investor_list': bool(row.get('in_invests_in_female_founders_investor_list', False)),
-                'has_profile_vote': bool(row.get('has_profile_vote', False))
-            }
-            
-            investors_batch.append(investor_data)
-            
-            # Insert in batches of 1000
-            if len(investors_batch) >= 1000:
-                investors_df = pd.DataFrame(investors_batch)
-                investors_df.to_sql('investors', engine, if_exists='append', index=False, method='multi')
-                investors_batch = []
-        
-        # Insert remaining investors
-        if investors_batch:
-            investors_df = pd.DataFrame(investors_batch)
-            investors_df.to_sql('investors', engine, if_exists='append', index=False, method='multi')
-        
-        print(f"  ✅ Inserted all investor records")
+    print(f"  ✅ Inserted {totals.get('persons', 0)} persons")
+    print(f"  ✅ Inserted {totals.get('firms', 0)} firms")
+    print(f"  ✅ Inserted {totals.get('locations', 0)} locations")
+    print(f"  ✅ Inserted {totals.get('investors', 0)} investor records")
 
 def main():
+    parser = argparse.ArgumentParser(description='Fast relational export of investors.parquet')
+    parser.add_argument('--copy-format', choices=ARROW_COPY_FORMATS, default='csv',
+                        help='COPY wire format used for bulk loading (default: csv)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read, extract and load one record batch at a time in bounded memory')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f'Rows per streamed batch (default: {DEFAULT_BATCH_ROWS})')
+    parser.add_argument('--defer-constraints', action='store_true',
+                        help='Create bare tables and build keys, indexes and foreign keys after loading')
+    parser.add_argument('--finalize', action='store_true',
+                        help='Run the deferred build right after the parent load (otherwise run load_finalize.py '
+                             'once the child tables are loaded)')
+    parser.add_argument('--prewarm', action='store_true',
+                        help='Prewarm the hot tables with pg_prewarm during finalization')
+    parser.add_argument('--resume', action='store_true',
+                        help='Keep the schema and loaded data and skip the units the run manifest marks done; '
+                             'use the same file and --stream/--batch-size/--defer-constraints as the failed run')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('export_relational_fast', args.trace_allocations)
+
     print("🚀 Starting fast comprehensive relational database export...")
     
     try:
-        # Load parquet file
-        print("📄 Loading parquet file...")
-        df = pd.read_parquet('/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet')
-        print(f"✅ Loaded {len(df)} records")
-        
         # Create connection
         connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-        engine = create_engine(connection_string)
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        
+        # Unit ranges depend on the batch layout, so it is part of the manifest's fingerprint
+        layout = {'mode': 'batches', 'batch_size': args.batch_size} if args.stream else {'mode': 'whole'}
+        layout['defer_constraints'] = args.defer_constraints
+        if not args.resume:
+            # Recreating the schema invalidates every stage's checkpoints, not just this one's
+            reset_manifest(engine)
+        manifest = LoadManifest(engine, 'parents', source_fingerprint(PARQUET_PATH, **layout), resume=args.resume)
         
         # Create schema
-        print("📋 Creating relational database schema...")
-        with engine.connect() as conn:
-            conn.execute(text(create_relational_schema()))
-            conn.commit()
-        print("✅ Schema created successfully")
+        schema = create_relational_schema()
+        if args.defer_constraints:
+            schema, deferred = split_schema(schema)
+        if manifest.is_done('schema', 0, 0):
+            print("⏩ Resuming: schema already created")
+        else:
+            if args.defer_constraints:
+                print("📋 Creating bare relational tables (keys, indexes and foreign keys deferred)...")
+            else:
+                print("📋 Creating relational database schema...")
+            with measure_stage('schema'):
+                run_unit(engine, manifest, 'schema', 0, 0, partial(execute_raw, sql=schema))
+            print("✅ Schema created successfully")
         
         # Extract and bulk insert data
-        extract_and_bulk_insert(df, engine)
+        with measure_stage('parents'):
+            extract_and_bulk_insert(engine, copy_format=args.copy_format, stream=args.stream,
+                                    batch_size=args.batch_size, manifest=manifest)
+        manifest.print_summary()
+        
+        if args.defer_constraints and args.finalize:
+            finalize_schema(engine, deferred, prewarm_tables=HOT_TABLES if args.prewarm else None)
+        elif args.defer_constraints:
+            print("⏳ Keys, indexes and foreign keys deferred - run load_finalize.py after loading child tables")
         
         # Verify results
         print("\n📊 Verifying relational database...")
@@ -455,11 +449,15 @@ def main():
         print("  - investments (investment records)")
         print("  - investment_rounds (funding rounds)")
         print("  All tables are connected via foreign keys for relational queries!")
+        finish_run(args)
         
     except Exception as e:
         print(f"❌ Export failed: {e}")
+        print("   Finished units are committed - rerun with --resume to load only the rest")
         import traceback
         traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,10 +5,14 @@ Simple export of investors.parquet to PostgreSQL
 
 import pandas as pd
 import psycopg2
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from sqlalchemy import create_engine, text
 import json
 import sys
 
+from arrow_extract import get_column
+
 # Database connection settings
 DB_CONFIG = {
     'host': '135.181.194.2',
@@ -18,49 +22,38 @@ DB_CONFIG = {
     'password': 'Adminaccount1!'
 }
 
+# Only the columns the simplified table needs
+SIMPLE_SOURCE_COLUMNS = [
+    'person', 'firm', 'position', 'headline', 'previous_position', 'previous_firm',
+    'min_investment', 'max_investment', 'target_investment', 'vote_count',
+    'claimed', 'can_edit', 'include_in_list'
+]
+
 def main():
     print("🚀 Starting simple parquet export...")
     
     try:
         # Load parquet file
         print("📄 Loading parquet file...")
-        df = pd.read_parquet('/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet')
+        table = pq.read_table('/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet',
+                              columns=SIMPLE_SOURCE_COLUMNS)
+        df = table.drop_columns(['person', 'firm']).to_pandas()
         print(f"✅ Loaded {len(df)} records")
         
         # Create a simplified version with just basic columns
         print("🔄 Simplifying data structure...")
         
-        # Extract basic person info
-        person_names = []
-        person_linkedin = []
-        firm_names = []
-        
-        for idx, row in df.iterrows():
-            if idx % 5000 == 0:
-                print(f"  Processing row {idx}...")
-            
-            # Extract person name
-            person = row.get('person', {})
-            if isinstance(person, dict):
-                person_names.append(person.get('name', ''))
-                person_linkedin.append(person.get('linkedin_url', ''))
-            else:
-                person_names.append('')
-                person_linkedin.append('')
-            
-            # Extract firm name
-            firm = row.get('firm', {})
-            if isinstance(firm, dict):
-                firm_names.append(firm.get('name', ''))
-            else:
-                firm_names.append('')
+        # Extract basic person/firm info with vectorized struct field access
+        person_names = pc.fill_null(get_column(table, 'person.name'), '')
+        person_linkedin = pc.fill_null(get_column(table, 'person.linkedin_url'), '')
+        firm_names = pc.fill_null(get_column(table, 'firm.name'), '')
         
         # Create simplified dataframe
         df_simple = pd.DataFrame({
             'id': range(1, len(df) + 1),
-            'person_name': person_names,
-            'person_linkedin': person_linkedin,
-            'firm_name': firm_names,
+            'person_name': person_names.to_pandas(),
+            'person_linkedin': person_linkedin.to_pandas(),
+            'firm_name': firm_names.to_pandas(),
             'position': df['position'].fillna(''),
             'headline': df['headline'].fillna(''),
             'previous_position': df['previous_position'].fillna(''),
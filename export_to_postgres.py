@@ -3,13 +3,20 @@
 Export investors.parquet to PostgreSQL database
 """
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import psycopg2
 from sqlalchemy import create_engine, text
-import json
+import argparse
 import sys
+import time
 from datetime import datetime
 
+from arrow_json import encode_json_column
+from bulk_copy import copy_arrow
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, measure_unit, start_run
+from parquet_stream import DEFAULT_BATCH_ROWS, iter_parquet_batches, parquet_row_count, peak_rss_mb
+
 # Database connection settings
 DB_CONFIG = {
     'host': '135.181.194.2',
@@ -40,50 +47,22 @@ def test_connection():
         print(f"❌ Connection failed: {e}")
         return False
 
-def safe_json_serialize(obj):
-    """Safely serialize objects to JSON, handling numpy arrays and other types"""
-    try:
-        # Check for various types of None/NaN values
-        if obj is None:
-            return None
-        if isinstance(obj, float) and pd.isna(obj):
-            return None
-        if hasattr(obj, '__len__') and len(obj) == 0:
-            return None
-        
-        # Convert numpy arrays and other problematic types
-        if hasattr(obj, 'tolist'):
-            obj = obj.tolist()
-        elif isinstance(obj, dict):
-            # Recursively handle nested objects
-            obj = {k: safe_json_serialize(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            obj = [safe_json_serialize(item) for item in obj]
-        
-        return json.dumps(obj)
-    except (TypeError, ValueError, AttributeError):
-        # If serialization fails, convert to string
-        return str(obj) if obj is not None else None
+# Columns that contain complex nested data, stored as JSONB
+COMPLEX_COLUMNS = [
+    'person', 'stages', 'location', 'firm', 'degrees', 'positions',
+    'media_links', 'investments_on_record', 'investor_profile_funding_rounds',
+    'network_list_investor_profiles', 'network_list_scouts_and_angels_profiles',
+    'investing_connections', 'image_urls_edit_mode', 'investment_locations',
+    'areas_of_interest', 'image_urls', 'investor_lists'
+]
 
-def flatten_complex_columns(df):
-    """Flatten complex nested columns to JSON strings"""
-    df_copy = df.copy()
-    
-    # Columns that contain complex nested data
-    complex_columns = [
-        'person', 'stages', 'location', 'firm', 'degrees', 'positions',
-        'media_links', 'investments_on_record', 'investor_profile_funding_rounds',
-        'network_list_investor_profiles', 'network_list_scouts_and_angels_profiles',
-        'investing_connections', 'image_urls_edit_mode', 'investment_locations',
-        'areas_of_interest', 'image_urls', 'investor_lists'
-    ]
-    
-    for col in complex_columns:
-        if col in df_copy.columns:
-            # Convert complex objects to JSON strings using safe serialization
-            df_copy[col] = df_copy[col].apply(safe_json_serialize)
-    
-    return df_copy
+def flatten_complex_columns(table):
+    """Replace the nested columns of an Arrow table/batch with their JSON text"""
+    for col in COMPLEX_COLUMNS:
+        if col in table.column_names:
+            index = table.column_names.index(col)
+            table = table.set_column(index, col, encode_json_column(table.column(index)))
+    return table
 
 def create_table_schema():
     """Create the investors table schema"""
@@ -133,7 +112,40 @@ def create_table_schema():
     """
     return schema
 
+PARQUET_PATH = '/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet'
+
+def export_table(table, engine):
+    """Serialize the nested columns and append the rows to the investors table via COPY"""
+    started = time.perf_counter()
+    table_flat = flatten_complex_columns(table)
+    serialize_seconds = time.perf_counter() - started
+    with measure_unit('investors') as unit_metrics:
+        unit_metrics['rows'] = copy_arrow(engine, 'investors', table_flat)
+    return table_flat.num_rows, serialize_seconds
+
+def export_streaming(engine, batch_size):
+    """Flatten and export one record batch at a time so memory stays bounded"""
+    total_rows = parquet_row_count(PARQUET_PATH)
+    exported = 0
+    serialize_seconds = 0.0
+    for _, batch in iter_parquet_batches(PARQUET_PATH, batch_size=batch_size):
+        rows, seconds = export_table(pa.Table.from_batches([batch]), engine)
+        exported += rows
+        serialize_seconds += seconds
+        # Release the batch before reading the next one
+        del batch
+        print(f"  Exported {exported}/{total_rows} - JSON {serialize_seconds:.2f}s, peak RSS {peak_rss_mb():.0f} MB")
+
 def main():
+    parser = argparse.ArgumentParser(description='Export investors.parquet to a JSONB investors table')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read, flatten and export one record batch at a time in bounded memory')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f'Rows per streamed batch (default: {DEFAULT_BATCH_ROWS})')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('export_to_postgres', args.trace_allocations)
+
     print("🚀 Starting parquet to PostgreSQL export...")
     
     # Test connection first
@@ -141,18 +153,9 @@ def main():
         sys.exit(1)
     
     try:
-        # Load parquet file
-        print("📄 Loading parquet file...")
-        df = pd.read_parquet('/home/damian/ExperimentationKaizhen/Nvestiv/Sample_Investor_DB/investors.parquet')
-        print(f"✅ Loaded {len(df)} records with {len(df.columns)} columns")
-        
-        # Flatten complex columns
-        print("🔄 Flattening complex nested data...")
-        df_flat = flatten_complex_columns(df)
-        
         # Create SQLAlchemy engine
         connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-        engine = create_engine(connection_string)
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
         
         # Create table schema
         print("📋 Creating table schema...")
@@ -160,16 +163,23 @@ def main():
             conn.execute(text(create_table_schema()))
             conn.commit()
         
-        # Export to PostgreSQL
-        print("💾 Exporting data to PostgreSQL...")
-        df_flat.to_sql(
-            'investors', 
-            engine, 
-            if_exists='append',  # Change to 'replace' if you want to overwrite
-            index=False,
-            method='multi',
-            chunksize=1000
-        )
+        if args.stream:
+            print(f"🌊 Streaming {args.batch_size}-row batches to PostgreSQL...")
+            with measure_stage('export'):
+                export_streaming(engine, args.batch_size)
+        else:
+            # Load parquet file
+            print("📄 Loading parquet file...")
+            with measure_stage('read') as stage_metrics:
+                table = pq.read_table(PARQUET_PATH)
+                stage_metrics['rows'] = table.num_rows
+            print(f"✅ Loaded {table.num_rows} records with {table.num_columns} columns")
+            
+            # Serialize the nested columns straight to JSON text and COPY it in
+            print("💾 Exporting data to PostgreSQL...")
+            with measure_stage('export'):
+                rows, serialize_seconds = export_table(table, engine)
+            print(f"🔄 Serialized {len(COMPLEX_COLUMNS)} nested columns of {rows} records to JSON in {serialize_seconds:.2f}s")
         
         # Verify export
         with engine.connect() as conn:
@@ -186,9 +196,11 @@ def main():
                 print(f"  - {row[0]} at {row[1]} ({row[2]})")
         
         print(f"\n🎉 Export completed successfully at {datetime.now()}")
+        finish_run(args)
         
     except Exception as e:
         print(f"❌ Export failed: {e}")
+        finish_run(args, e)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of the flattened child tables, keyed by source file and extractor version
+
+The first run against an investors.parquet writes every extracted child
+table as an uncompressed Arrow IPC file under
+<cache dir>/<file digest>-v<EXTRACTOR_VERSION>/. Later stages and reruns
+memory-map those files instead of re-reading and re-flattening the
+nested structs. A changed file has a new digest and a changed extractor
+bumps EXTRACTOR_VERSION, so stale entries are never looked up again; once
+the current entry is complete, the ones it replaced for the same file are
+deleted.
+
+digests.json in the cache dir records each file's size, mtime and digest,
+so an untouched file is not re-read just to hash it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from arrow_extract import CHILD_EXTRACTORS, CHILD_SOURCE_COLUMNS, EXTRACTOR_VERSION, extract_child_tables
+from parallel_extract import parallel_extract_child_tables
+
+DEFAULT_CACHE_DIR = os.environ.get('EXTRACT_CACHE_DIR',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extract_cache'))
+
+DIGESTS_FILE = 'digests.json'
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """blake2b of the file contents - unlike mtime, survives copies and catches same-size rewrites"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_digests(cache_dir):
+    """{absolute path: {'size', 'mtime_ns', 'digest'}} of the files cached so far"""
+    try:
+        with open(os.path.join(cache_dir, DIGESTS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def source_digest(path, cache_dir=DEFAULT_CACHE_DIR):
+    """file_digest(), taken from digests.json while the file's size and mtime are unchanged"""
+    stat = os.stat(path)
+    record = read_digests(cache_dir).get(os.path.abspath(path))
+    if record and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+        return record['digest']
+    return file_digest(path)
+
+
+def cache_directory(path, cache_dir=DEFAULT_CACHE_DIR):
+    return os.path.join(cache_dir, f"{source_digest(path, cache_dir)}-v{EXTRACTOR_VERSION}")
+
+
+def record_cache_entry(path, directory, cache_dir=DEFAULT_CACHE_DIR):
+    """Remember the file's digest and delete the cache entries it replaced"""
+    stat = os.stat(path)
+    digest = os.path.basename(directory).rsplit('-v', 1)[0]
+    digests = read_digests(cache_dir)
+    previous = digests.get(os.path.abspath(path), {}).get('digest')
+    digests[os.path.abspath(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+    partial_path = os.path.join(cache_dir, f'{DIGESTS_FILE}.{os.getpid()}.tmp')
+    with open(partial_path, 'w') as f:
+        json.dump(digests, f)
+    os.replace(partial_path, os.path.join(cache_dir, DIGESTS_FILE))
+
+    # Older extractor versions of this file, and its previous contents unless another file shares them
+    stale = {digest}
+    if previous and previous != digest and all(record['digest'] != previous for record in digests.values()):
+        stale.add(previous)
+    for entry in os.listdir(cache_dir):
+        entry_path = os.path.join(cache_dir, entry)
+        if entry_path != directory and os.path.isdir(entry_path) and entry.rsplit('-v', 1)[0] in stale:
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+
+def read_cached_table(directory, table_name):
+    """Memory-map one cached table; its columns point straight into the page cache"""
+    source = pa.memory_map(os.path.join(directory, f'{table_name}.arrow'))
+    return pa.ipc.open_file(source).read_all()
+
+
+def write_cached_table(directory, table_name, table):
+    """Write via a temp file and rename, so readers never see a half-written table"""
+    target = os.path.join(directory, f'{table_name}.arrow')
+    partial_path = f'{target}.{os.getpid()}.tmp'
+    with pa.OSFile(partial_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(partial_path, target)
+
+
+def cached_child_tables(path, tables=None, workers=1, cache_dir=DEFAULT_CACHE_DIR):
+    """Child tables of the whole file, extracted only for tables not cached yet"""
+    names = tables or list(CHILD_EXTRACTORS)
+    directory = cache_directory(path, cache_dir)
+    missing = [name for name in names if not os.path.exists(os.path.join(directory, f'{name}.arrow'))]
+
+    if missing:
+        started = time.perf_counter()
+        if workers > 1:
+            extracted = parallel_extract_child_tables(path, workers, tables=missing)
+        else:
+            extracted = extract_child_tables(pq.read_table(path, columns=CHILD_SOURCE_COLUMNS), tables=missing)
+        os.makedirs(directory, exist_ok=True)
+        for table_name, table in extracted.items():
+            write_cached_table(directory, table_name, table)
+        del extracted
+        print(f"🗃️ Extracted and cached {len(missing)} child tables in {time.perf_counter() - started:.3f}s "
+              f"({directory})")
+    record_cache_entry(path, directory, cache_dir)
+    if len(missing) < len(names):
+        print(f"📦 Memory-mapped {len(names) - len(missing)} cached child tables from {directory}")
+
+    return {name: read_cached_table(directory, name) for name in names}
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Workload-driven index advisor
+
+Runs EXPLAIN (ANALYZE, BUFFERS) over the query workload - the research view
+definitions plus explore_relationships' sample joins - and looks for
+sequential scans of tables whose rows are matched on a column: a join key
+(Hash/Merge Cond, Join Filter), a filter correlated with an outer row
+(the per-investor count subqueries) or a selective plain filter. Columns
+that no index leads with become idx_<table>_<column> btree indexes, then
+the workload is measured again for a before/after latency report.
+
+finalize_schema(..., advise_indexes=True) runs it as the last step of a
+bulk load; on its own it can also just print the advice (--dry-run).
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from explore_relationships import SAMPLE_JOINS
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, measure_unit, start_run
+from research_views import MATERIALIZED_VIEWS, view_definitions
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+# EXPLAIN ANALYZE runs per query; the median latency is reported
+WORKLOAD_REPEATS = 3
+
+# Smaller tables are cheaper to scan than to look up through an index
+MIN_TABLE_ROWS = 1000
+
+# A plain (uncorrelated) filter has to keep at most this share of the scanned rows
+SELECTIVE_FILTER = 0.1
+
+JOIN_CONDITION_KEYS = ('Hash Cond', 'Merge Cond', 'Join Filter')
+QUALIFIED_RE = re.compile(r'\b([a-z_]\w*)\.([a-z_]\w*)\b')
+NAME_RE = re.compile(r'(?<![\w.$])([a-z_]\w*)\b(?![.(])')
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def workload(conn):
+    """[(name, sql)] - the research view bodies and the sample joins"""
+    definitions = view_definitions(conn)
+    # investor_network is left out: EXPLAIN ANALYZE would build every same-firm/same-location pair
+    queries = [(f"view {name}", definitions[name]) for name in MATERIALIZED_VIEWS]
+    queries += [(f"join {query['name']}", query['query'].strip().rstrip(';')) for query in SAMPLE_JOINS]
+    return queries
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def explain(conn, sql, repeats=WORKLOAD_REPEATS):
+    """Median latency (ms), shared buffers touched and the plan of the last of `repeats` EXPLAIN ANALYZE runs"""
+    latencies = []
+    for _ in range(max(1, repeats)):
+        result = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()[0]
+        latencies.append(result['Planning Time'] + result['Execution Time'])
+    plan = result['Plan']
+    seq_scans = sum(1 for node in _plan_nodes(plan) if node['Node Type'] == 'Seq Scan')
+    return {
+        'latency_ms': round(statistics.median(latencies), 3),
+        'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+        'seq_scans': seq_scans,
+        'plan': plan,
+    }
+
+
+def scanned_columns(plan, table_columns):
+    """(table, column, reason, scan ms) for each column a sequential scan was matched on"""
+    nodes = list(_plan_nodes(plan))
+    join_refs = set()
+    for node in nodes:
+        for key in JOIN_CONDITION_KEYS:
+            if key in node:
+                join_refs.update(QUALIFIED_RE.findall(LITERAL_RE.sub('', node[key])))
+
+    found = []
+    for node in nodes:
+        if node['Node Type'] != 'Seq Scan' or node.get('Relation Name') not in table_columns:
+            continue
+        table = node['Relation Name']
+        alias, columns = node.get('Alias', table), table_columns[table]
+        scan_ms = node.get('Actual Total Time', 0) * node.get('Actual Loops', 1)
+        hits = {column: 'join' for ref_alias, column in join_refs if ref_alias == alias and column in columns}
+
+        condition = LITERAL_RE.sub('', node.get('Filter', ''))
+        if condition:
+            refs = QUALIFIED_RE.findall(condition)
+            own = {column for ref_alias, column in refs if ref_alias == alias}
+            own.update(name for name in NAME_RE.findall(condition))
+            # Compared with a column of another relation or a parameter: looked up once per outer row
+            correlated = '$' in condition or any(ref_alias != alias for ref_alias, _ in refs)
+            kept, removed = node.get('Actual Rows', 0), node.get('Rows Removed by Filter', 0)
+            selective = kept + removed > 0 and kept / (kept + removed) <= SELECTIVE_FILTER
+            if correlated or selective:
+                for column in own & columns:
+                    hits.setdefault(column, 'correlated filter' if correlated else 'filter')
+        found.extend((table, column, reason, scan_ms) for column, reason in hits.items())
+    return found
+
+
+def _catalog(conn):
+    """Columns and estimated rows of the plain tables, and the (table, column) pairs an index leads with"""
+    table_columns, table_rows = {}, {}
+    for table, column, rows in conn.execute(text("""
+        SELECT c.relname, a.attname, c.reltuples
+        FROM pg_class c
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace
+    """)):
+        table_columns.setdefault(table, set()).add(column)
+        table_rows[table] = rows
+    indexed = {tuple(row) for row in conn.execute(text("""
+        SELECT c.relname, a.attname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indrelid
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE c.relnamespace = current_schema()::regnamespace
+    """))}
+    return table_columns, table_rows, indexed
+
+
+def recommend_indexes(measurements, table_columns, table_rows, indexed, min_rows=MIN_TABLE_ROWS):
+    """{(table, column): evidence} for scanned columns of large enough tables that no index leads with"""
+    advice = {}
+    for query, measurement in measurements.items():
+        for table, column, reason, scan_ms in scanned_columns(measurement['plan'], table_columns):
+            if (table, column) in indexed or table_rows.get(table, 0) < min_rows:
+                continue
+            evidence = advice.setdefault((table, column), {'queries': [], 'reasons': set(), 'scan_ms': 0.0})
+            if query not in evidence['queries']:
+                evidence['queries'].append(query)
+            evidence['reasons'].add(reason)
+            evidence['scan_ms'] += scan_ms
+    return dict(sorted(advice.items(), key=lambda item: -item[1]['scan_ms']))
+
+
+def index_name(table, column):
+    return f"idx_{table}_{column}"[:63]
+
+
+def _measure_workload(conn, queries, repeats):
+    measurements = {}
+    for name, sql in queries:
+        try:
+            measurements[name] = explain(conn, sql, repeats)
+        except Exception as e:
+            # A view that does not fit this schema (e.g. a missing column) is reported and skipped
+            conn.rollback()
+            print(f"  ⚠️ {name}: {str(e).splitlines()[0]}")
+    return measurements
+
+
+def run_index_advisor(engine, create=True, repeats=WORKLOAD_REPEATS, min_rows=MIN_TABLE_ROWS):
+    """Explain the workload, create the advised indexes and re-measure; returns the report dict"""
+    with measure_stage('index advisor'):
+        with engine.connect() as conn:
+            queries = workload(conn)
+            print(f"🧭 Index advisor: EXPLAIN ANALYZE of {len(queries)} workload queries x{repeats}...")
+            before = _measure_workload(conn, queries, repeats)
+            table_columns, table_rows, indexed = _catalog(conn)
+        advice = recommend_indexes(before, table_columns, table_rows, indexed, min_rows)
+
+        if not advice:
+            print("  ✅ No sequential scans on unindexed join or filter columns")
+        for (table, column), evidence in advice.items():
+            print(f"  💡 {table}({column}): {', '.join(sorted(evidence['reasons']))} in "
+                  f"{len(evidence['queries'])} queries, {evidence['scan_ms']:.1f} ms scanning")
+
+        created = {}
+        if create and advice:
+            for table, column in advice:
+                name = index_name(table, column)
+                with measure_unit(name):
+                    started = time.perf_counter()
+                    with engine.connect() as conn:
+                        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({column})"))
+                        conn.execute(text(f"ANALYZE {table}"))
+                        conn.commit()
+                    created[name] = time.perf_counter() - started
+                print(f"  ✅ Created {name} in {created[name]:.2f}s")
+
+        after = {}
+        if created:
+            with engine.connect() as conn:
+                after = _measure_workload(conn, queries, repeats)
+
+    report = {
+        'indexes': [{
+            'table': table, 'column': column, 'index': index_name(table, column),
+            'reasons': sorted(evidence['reasons']), 'queries': evidence['queries'],
+            'scan_ms': round(evidence['scan_ms'], 3), 'created': index_name(table, column) in created,
+            'build_seconds': round(created.get(index_name(table, column), 0), 3),
+        } for (table, column), evidence in advice.items()],
+        'queries': [{
+            'query': name,
+            'before_ms': before[name]['latency_ms'], 'before_buffers': before[name]['buffers'],
+            'before_seq_scans': before[name]['seq_scans'],
+            'after_ms': after[name]['latency_ms'] if name in after else None,
+            'after_buffers': after[name]['buffers'] if name in after else None,
+            'after_seq_scans': after[name]['seq_scans'] if name in after else None,
+        } for name in before],
+    }
+    print_latency_report(report)
+    return report
+
+
+def print_latency_report(report):
+    print("\n📊 Workload latency (median of EXPLAIN ANALYZE runs):")
+    for row in report['queries']:
+        line = f"  {row['query'][:48]:<48} {row['before_ms']:>10.1f} ms"
+        if row['after_ms'] is not None:
+            speedup = row['before_ms'] / row['after_ms'] if row['after_ms'] else float('inf')
+            line += f" → {row['after_ms']:>10.1f} ms  ({speedup:.1f}x, buffers {row['before_buffers']:,} → {row['after_buffers']:,})"
+        print(line)
+    timed = [row for row in report['queries'] if row['after_ms'] is not None]
+    if timed:
+        before_total = sum(row['before_ms'] for row in timed)
+        after_total = sum(row['after_ms'] for row in timed)
+        print(f"  {'total':<48} {before_total:>10.1f} ms → {after_total:>10.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Advise and create indexes from the research workload')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only report the advised indexes, do not create them')
+    parser.add_argument('--repeats', type=int, default=WORKLOAD_REPEATS,
+                        help=f'EXPLAIN ANALYZE runs per query (default: {WORKLOAD_REPEATS})')
+    parser.add_argument('--min-rows', type=int, default=MIN_TABLE_ROWS,
+                        help=f'Ignore scans of tables with fewer rows (default: {MIN_TABLE_ROWS})')
+    parser.add_argument('--report', help='Write the advice and before/after latencies to this JSON file')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('index_advisor', args.trace_allocations)
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        report = run_index_advisor(engine, create=not args.dry_run, repeats=args.repeats, min_rows=args.min_rows)
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"📝 Report written to {args.report}")
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Index advisor failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
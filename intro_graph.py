@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+In-memory warm-intro graph over the investors' network lists
+
+Every investing_connections, network_list_investor_profiles and
+network_list_scouts_and_angels_profiles entry loaded into
+network_connections links the investor's person to a target person. The
+persons become dense integer node ids (in slug order) and the undirected
+adjacency is kept as CSR arrays, so k-hop neighbourhoods and shortest intro
+paths are plain array lookups: bidirectional BFS expands the smaller
+frontier one level at a time until the two searches meet.
+
+The graph is built from the database once and can be snapshotted to a
+compact binary file (the CSR arrays and the slugs, little-endian) that
+loads without touching Postgres.
+"""
+
+import argparse
+import json
+import struct
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
+from sqlalchemy import create_engine
+
+from bulk_copy import copy_query_arrow_raw
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+DEFAULT_SNAPSHOT = 'intro_graph.bin'
+
+# Maximum intro path length the API asks for (maxDegrees)
+DEFAULT_MAX_HOPS = 2
+
+# Snapshot layout: header, indptr (nodes + 1), indices (edges), slug offsets (nodes + 1), slug bytes
+SNAPSHOT_MAGIC = b'NVINTRO1'
+SNAPSHOT_HEADER = struct.Struct('<8sqqq')
+
+EDGES_SQL = """
+SELECT i.person_id AS source_id, n.target_person_id AS target_id
+FROM network_connections n
+JOIN investors i ON i.id = n.investor_id
+WHERE i.person_id IS NOT NULL AND n.target_person_id IS NOT NULL AND i.person_id <> n.target_person_id
+"""
+
+PERSON_SLUGS_SQL = """
+SELECT id, slug FROM persons WHERE slug IS NOT NULL
+"""
+
+
+class IntroGraph:
+    """Undirected person graph in CSR form, addressed by person slug"""
+
+    def __init__(self, slugs, indptr, indices):
+        self.slugs = slugs
+        self.indptr = indptr
+        self.indices = indices
+        self.node_ids = {slug: node for node, slug in enumerate(slugs)}
+
+    @property
+    def num_nodes(self):
+        return len(self.slugs)
+
+    @property
+    def num_edges(self):
+        """Undirected edges (each is stored once per direction)"""
+        return len(self.indices) // 2
+
+    @classmethod
+    def from_edges(cls, source_slugs, target_slugs):
+        """Build from two aligned slug arrays; duplicate and reversed pairs collapse into one edge"""
+        endpoints = pc.unique(pa.concat_arrays([source_slugs, target_slugs]))
+        slugs = pc.take(endpoints, pc.sort_indices(endpoints))
+        sources = pc.index_in(source_slugs, value_set=slugs).to_numpy()
+        targets = pc.index_in(target_slugs, value_set=slugs).to_numpy()
+        size = len(slugs)
+        adjacency = sparse.csr_matrix((np.ones(len(sources), dtype=np.int32), (sources, targets)), shape=(size, size))
+        adjacency = (adjacency + adjacency.T).tocsr()
+        adjacency.sum_duplicates()
+        adjacency.sort_indices()
+        return cls(slugs.to_pylist(), adjacency.indptr.astype('<i8'), adjacency.indices.astype('<i4'))
+
+    @classmethod
+    def from_db(cls, engine):
+        """Build from network_connections, keyed by the slugs of the persons on either end"""
+        raw_conn = engine.raw_connection()
+        try:
+            edges = copy_query_arrow_raw(raw_conn, EDGES_SQL, {'source_id': pa.int32(), 'target_id': pa.int32()})
+            persons = copy_query_arrow_raw(raw_conn, PERSON_SLUGS_SQL, {'id': pa.int32(), 'slug': pa.string()})
+        finally:
+            raw_conn.close()
+        person_ids = persons.column('id').combine_chunks()
+        person_slugs = persons.column('slug').combine_chunks()
+        sources = pc.take(person_slugs, pc.index_in(edges.column('source_id'), value_set=person_ids))
+        targets = pc.take(person_slugs, pc.index_in(edges.column('target_id'), value_set=person_ids))
+        # Persons without a slug cannot be addressed, so their edges are dropped
+        keep = pc.and_(sources.is_valid(), targets.is_valid())
+        return cls.from_edges(pc.filter(sources, keep).combine_chunks(), pc.filter(targets, keep).combine_chunks())
+
+    def save(self, path):
+        """Write the graph as a binary snapshot"""
+        encoded = [slug.encode('utf-8') for slug in self.slugs]
+        offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+        np.cumsum([len(slug) for slug in encoded], out=offsets[1:])
+        with open(path, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.num_nodes, len(self.indices), int(offsets[-1])))
+            f.write(self.indptr.astype('<i8').tobytes())
+            f.write(self.indices.astype('<i4').tobytes())
+            f.write(offsets.tobytes())
+            f.write(b''.join(encoded))
+
+    @classmethod
+    def load(cls, path):
+        """Read a graph written by save()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, nodes, edges, slug_bytes = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not an intro graph snapshot")
+        position = SNAPSHOT_HEADER.size
+        indptr = np.frombuffer(data, dtype='<i8', count=nodes + 1, offset=position)
+        position += indptr.nbytes
+        indices = np.frombuffer(data, dtype='<i4', count=edges, offset=position)
+        position += indices.nbytes
+        offsets = np.frombuffer(data, dtype='<i8', count=nodes + 1, offset=position)
+        position += offsets.nbytes
+        slugs = pa.LargeStringArray.from_buffers(nodes, pa.py_buffer(offsets.tobytes()),
+                                                 pa.py_buffer(data[position:position + slug_bytes]))
+        return cls(slugs.to_pylist(), indptr, indices)
+
+    def node(self, slug):
+        node = self.node_ids.get(slug)
+        if node is None:
+            raise KeyError(f"Person {slug!r} is not in the intro graph")
+        return node
+
+    def _expand(self, frontier, visited):
+        """Unvisited neighbours of a frontier, marked in visited with their parent"""
+        reached = []
+        for node in frontier:
+            for neighbor in self.indices[self.indptr[node]:self.indptr[node + 1]].tolist():
+                if neighbor not in visited:
+                    visited[neighbor] = node
+                    reached.append(neighbor)
+        return reached
+
+    def k_hop(self, slug, k=DEFAULT_MAX_HOPS):
+        """{slug: hops} of every person within k hops (the person itself excluded)"""
+        start = self.node(slug)
+        visited, frontier, hops = {start: None}, [start], {}
+        for depth in range(1, k + 1):
+            frontier = self._expand(frontier, visited)
+            if not frontier:
+                break
+            hops.update((self.slugs[node], depth) for node in frontier)
+        return hops
+
+    def shortest_path(self, source, target, max_hops=None):
+        """Slugs along a shortest intro path from source to target, or None if none within max_hops"""
+        start, goal = self.node(source), self.node(target)
+        if start == goal:
+            return [source]
+        forward, backward = {start: None}, {goal: None}
+        forward_frontier, backward_frontier = [start], [goal]
+        hops = 0
+        while forward_frontier and backward_frontier and (max_hops is None or hops < max_hops):
+            hops += 1
+            # Expand the cheaper side; no node is on both sides yet, so any meeting node closes a shortest path
+            expand_forward = len(forward_frontier) <= len(backward_frontier)
+            if expand_forward:
+                forward_frontier = self._expand(forward_frontier, forward)
+                frontier, other = forward_frontier, backward
+            else:
+                backward_frontier = self._expand(backward_frontier, backward)
+                frontier, other = backward_frontier, forward
+            for node in frontier:
+                if node in other:
+                    return [self.slugs[step] for step in self._join(node, forward, backward)]
+        return None
+
+    @staticmethod
+    def _join(meeting, forward, backward):
+        path, node = [], meeting
+        while node is not None:
+            path.append(node)
+            node = forward[node]
+        path.reverse()
+        node = backward[meeting]
+        while node is not None:
+            path.append(node)
+            node = backward[node]
+        return path
+
+
+def build_intro_graph(engine, snapshot=None):
+    """Build the graph from the database and optionally snapshot it"""
+    with measure_stage('intro graph') as stage_metrics:
+        started = time.perf_counter()
+        graph = IntroGraph.from_db(engine)
+        stage_metrics['rows'] = graph.num_edges
+    print(f"🕸️ Intro graph: {graph.num_nodes:,} persons, {graph.num_edges:,} connections "
+          f"in {time.perf_counter() - started:.2f}s")
+    if snapshot:
+        graph.save(snapshot)
+        print(f"💾 Snapshot written to {snapshot}")
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build, snapshot and query the warm-intro graph')
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT,
+                        help=f'Binary graph snapshot file (default: {DEFAULT_SNAPSHOT})')
+    parser.add_argument('--build', action='store_true',
+                        help='Rebuild the graph from the database and rewrite the snapshot')
+    parser.add_argument('--from', dest='source', help='Person slug the intros start from')
+    parser.add_argument('--to', dest='target', help='Person slug to find a shortest intro path to')
+    parser.add_argument('--max-hops', type=int, default=DEFAULT_MAX_HOPS,
+                        help=f'Longest intro path considered (default: {DEFAULT_MAX_HOPS})')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('intro_graph', args.trace_allocations)
+
+    try:
+        if args.build:
+            connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+            engine = create_engine(connection_string, connect_args=counting_connect_args())
+            graph = build_intro_graph(engine, args.snapshot)
+        else:
+            started = time.perf_counter()
+            graph = IntroGraph.load(args.snapshot)
+            print(f"📂 Loaded {graph.num_nodes:,} persons, {graph.num_edges:,} connections from {args.snapshot} "
+                  f"in {time.perf_counter() - started:.2f}s")
+
+        if args.source:
+            started = time.perf_counter()
+            if args.target:
+                result = graph.shortest_path(args.source, args.target, args.max_hops)
+            else:
+                result = graph.k_hop(args.source, args.max_hops)
+            elapsed_us = (time.perf_counter() - started) * 1e6
+            print(json.dumps(result, indent=2))
+            print(f"⏱️ Answered in {elapsed_us:,.0f} µs")
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Intro graph failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Deferred key, index and constraint build for bulk loads
+
+split_schema() turns the exporters' DDL into bare CREATE TABLEs (no
+PRIMARY KEY / UNIQUE / REFERENCES, no secondary indexes) so rows load
+without index maintenance or FK checks. finalize_schema() then builds
+keys and indexes concurrently, adds foreign keys NOT VALID and validates
+them, runs ANALYZE, can run the index advisor over the research workload
+and can prewarm the hot tables - timing every step.
+Steps whose constraint or index already exists are skipped, so it is
+safe to rerun.
+"""
+
+import argparse
+import re
+import sys
+import time
+from functools import partial
+
+from sqlalchemy import create_engine, text
+
+from index_advisor import run_index_advisor
+from load_metrics import (add_metrics_arguments, counting_connect_args, finish_run, measure_stage, measure_unit,
+                          start_run)
+from parallel_load import run_load_dag
+from research_views import refresh_materialized_views
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+# Tables read by the API on every request - prewarmed into shared buffers
+HOT_TABLES = ['investors', 'persons', 'firms', 'positions', 'investments']
+
+TABLE_RE = re.compile(r'CREATE TABLE (\w+) \((.*?)\n\s*\);', re.S)
+INDEX_RE = re.compile(r'CREATE (?:UNIQUE )?INDEX (\w+) ON [^;]*;')
+REFERENCES_RE = re.compile(r'\s+REFERENCES\s+(\w+)\s*\((\w+)\)')
+UNIQUE_RE = re.compile(r'\s+UNIQUE\b')
+
+
+def split_schema(schema):
+    """Split DDL into bare tables plus the keys, indexes and foreign keys to build after loading
+
+    Returns (bare_schema, deferred) where deferred holds 'tables', 'keys'
+    and 'indexes' as (name, sql) pairs and 'foreign_keys' as
+    (table, name, definition) triples. Constraint names follow Postgres'
+    defaults so an eagerly created schema is recognised as finalized.
+    """
+    deferred = {'tables': [], 'keys': [], 'indexes': [], 'foreign_keys': []}
+
+    def strip_table(match):
+        table = match.group(1)
+        deferred['tables'].append(table)
+        columns = []
+        for line in match.group(2).split('\n'):
+            column = line.strip().rstrip(',')
+            if not column or column.startswith('--'):
+                continue
+            name = column.split()[0]
+            if ' PRIMARY KEY' in column:
+                column = column.replace(' PRIMARY KEY', '')
+                deferred['keys'].append((f'{table}_pkey',
+                                         f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({name})'))
+            if UNIQUE_RE.search(column):
+                column = UNIQUE_RE.sub('', column)
+                deferred['keys'].append((f'{table}_{name}_key',
+                                         f'ALTER TABLE {table} ADD CONSTRAINT {table}_{name}_key UNIQUE ({name})'))
+            reference = REFERENCES_RE.search(column)
+            if reference:
+                column = REFERENCES_RE.sub('', column)
+                deferred['foreign_keys'].append((table, f'{table}_{name}_fkey',
+                                                 f'FOREIGN KEY ({name}) REFERENCES {reference.group(1)}({reference.group(2)})'))
+            columns.append(column)
+        return f"CREATE TABLE {table} (\n        " + ',\n        '.join(columns) + "\n    );"
+
+    bare = TABLE_RE.sub(strip_table, schema)
+    deferred['indexes'] = [(match.group(1), match.group(0)) for match in INDEX_RE.finditer(bare)]
+    bare = INDEX_RE.sub('', bare)
+    return bare, deferred
+
+
+def _timed(engine, sql, maintenance_workers=None):
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        if maintenance_workers:
+            # Lets Postgres split each btree build across parallel workers
+            conn.execute(text(f"SET max_parallel_maintenance_workers = {int(maintenance_workers)}"))
+        conn.execute(text(sql))
+        conn.commit()
+    return time.perf_counter() - started
+
+
+def _measured(name, step):
+    with measure_unit(name):
+        return step()
+
+
+def _existing_objects(engine):
+    with engine.connect() as conn:
+        constraints = {row[0]: row[1] for row in conn.execute(text("""
+            SELECT conname, convalidated FROM pg_constraint
+            WHERE connamespace = current_schema()::regnamespace
+        """))}
+        indexes = {row[0] for row in conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"))}
+    return constraints, indexes
+
+
+def _run_phase(label, steps, workers, report):
+    if not steps:
+        print(f"  ⏭️ {label}: nothing to do")
+        return
+    started = time.perf_counter()
+    timings = run_load_dag({name: partial(_measured, name, step) for name, step in steps.items()}, {},
+                           max_workers=workers)
+    elapsed = time.perf_counter() - started
+    print(f"  ⏱️ {label}: {len(steps)} steps in {elapsed:.2f}s")
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f"      {name}: {seconds:.2f}s")
+        report.append((label, name, seconds))
+    report.append((label, 'total', elapsed))
+
+
+def finalize_schema(engine, deferred, workers=4, maintenance_workers=None, prewarm_tables=None, advise_indexes=False):
+    """Build deferred keys/indexes, add and validate FKs, ANALYZE, optionally advise indexes and prewarm
+
+    Returns a list of (phase, step, seconds) rows.
+    """
+    with measure_stage('finalize'):
+        return _finalize(engine, deferred, workers, maintenance_workers, prewarm_tables, advise_indexes)
+
+
+def _finalize(engine, deferred, workers, maintenance_workers, prewarm_tables, advise_indexes):
+    print("🏁 Finalizing schema after load...")
+    started = time.perf_counter()
+    report = []
+    constraints, indexes = _existing_objects(engine)
+    run = partial(_timed, engine, maintenance_workers=maintenance_workers)
+
+    # Keys first: foreign keys need the referenced primary keys
+    _run_phase('primary/unique keys', {name: partial(run, sql) for name, sql in deferred['keys']
+                                       if name not in constraints}, workers, report)
+    _run_phase('indexes', {name: partial(run, sql) for name, sql in deferred['indexes']
+                           if name not in indexes}, workers, report)
+
+    # NOT VALID only touches the catalog; adding them one at a time avoids lock queues on shared parents
+    _run_phase('foreign keys (NOT VALID)', {
+        name: partial(run, f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition} NOT VALID")
+        for table, name, definition in deferred['foreign_keys'] if name not in constraints
+    }, 1, report)
+    constraints, _ = _existing_objects(engine)
+    _run_phase('foreign key validation', {
+        name: partial(run, f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+        for table, name, _ in deferred['foreign_keys'] if constraints.get(name) is False
+    }, workers, report)
+
+    _run_phase('analyze', {table: partial(run, f"ANALYZE {table}") for table in deferred['tables']},
+               workers, report)
+
+    if advise_indexes:
+        # Needs the fresh statistics, so the workload plans look like production ones
+        advisor_started = time.perf_counter()
+        for index in run_index_advisor(engine)['indexes']:
+            if index['created']:
+                report.append(('index advisor', index['index'], index['build_seconds']))
+        report.append(('index advisor', 'total', time.perf_counter() - advisor_started))
+
+    if prewarm_tables:
+        try:
+            _timed(engine, "CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+            tables = [table for table in prewarm_tables if table in deferred['tables']]
+            _run_phase('prewarm', {table: partial(run, f"SELECT pg_prewarm('{table}')") for table in tables},
+                       workers, report)
+        except Exception as e:
+            print(f"  ⚠️ pg_prewarm unavailable, skipping prewarm: {str(e).splitlines()[0]}")
+
+    elapsed = time.perf_counter() - started
+    report.append(('finalize', 'total', elapsed))
+    print(f"✅ Finalization complete in {elapsed:.2f}s")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build deferred keys, indexes and foreign keys after a bulk load')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Statements run concurrently, one connection each (default: 4)')
+    parser.add_argument('--maintenance-workers', type=int, default=None,
+                        help='max_parallel_maintenance_workers for each index build')
+    parser.add_argument('--prewarm', action='store_true',
+                        help=f"Load {', '.join(HOT_TABLES)} into shared buffers with pg_prewarm")
+    parser.add_argument('--advise-indexes', action='store_true',
+                        help='EXPLAIN ANALYZE the research workload and create indexes for its sequential scans')
+    parser.add_argument('--no-view-refresh', action='store_true',
+                        help='Skip refreshing the materialized research views afterwards')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('load_finalize', args.trace_allocations)
+
+    from export_relational_fast import create_relational_schema
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, pool_size=max(5, args.workers),
+                               connect_args=counting_connect_args())
+        _, deferred = split_schema(create_relational_schema())
+        finalize_schema(engine, deferred, workers=args.workers, maintenance_workers=args.maintenance_workers,
+                        prewarm_tables=HOT_TABLES if args.prewarm else None, advise_indexes=args.advise_indexes)
+        if not args.no_view_refresh:
+            refresh_materialized_views(engine)
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Finalization failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Run manifest for checkpointed, resumable bulk loads
+
+Every load is split into units - one table over one range of investor
+ids (a streamed batch, extraction slice or the whole file). A unit's rows
+and its 'done' mark in load_manifest are committed in the same
+transaction, so after a crash or a dropped connection a unit is either
+fully loaded and marked, or absent. Rerunning with --resume skips the
+done units and loads only the failed and never-started ones.
+
+The manifest also records a fingerprint of the source file and batch
+layout; resuming against a different file or layout is refused because
+the unit ranges would no longer line up.
+"""
+
+import os
+
+from sqlalchemy import text
+
+from load_metrics import measure_unit
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS load_manifest (
+    stage VARCHAR(50) NOT NULL,
+    table_name VARCHAR(100) NOT NULL,
+    first_id INTEGER NOT NULL,
+    last_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    rows_loaded BIGINT,
+    attempts INTEGER DEFAULT 0,
+    error TEXT,
+    source TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (stage, table_name, first_id, last_id)
+)
+"""
+
+MARK_UNIT_SQL = """
+    INSERT INTO load_manifest (stage, table_name, first_id, last_id, status, rows_loaded, attempts, error, source)
+    VALUES (%s, %s, %s, %s, %s, %s, 1, %s, %s)
+    ON CONFLICT (stage, table_name, first_id, last_id) DO UPDATE SET
+        status = EXCLUDED.status,
+        rows_loaded = EXCLUDED.rows_loaded,
+        attempts = load_manifest.attempts + 1,
+        error = EXCLUDED.error,
+        source = EXCLUDED.source,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def source_fingerprint(path, **layout):
+    """Identify the parquet file (name, size, mtime) and the batch layout that produced the unit ranges"""
+    stat = os.stat(path)
+    settings = ','.join(f"{key}={value}" for key, value in sorted(layout.items()))
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}:{settings}"
+
+
+def execute_raw(raw_conn, sql):
+    """Run a statement as a unit (e.g. schema DDL); caller owns the transaction"""
+    with raw_conn.cursor() as cursor:
+        cursor.execute(sql)
+    return 0
+
+
+def reset_manifest(engine, stages=None):
+    """Forget previous runs of the given stages (all stages when None) before a fresh load"""
+    with engine.connect() as conn:
+        conn.execute(text(MANIFEST_SCHEMA))
+        if stages is None:
+            conn.execute(text("DELETE FROM load_manifest"))
+        else:
+            conn.execute(text("DELETE FROM load_manifest WHERE stage = ANY(:stages)"), {'stages': list(stages)})
+        conn.commit()
+
+
+class LoadManifest:
+    """Unit status for one stage of a load, backed by the load_manifest table"""
+
+    def __init__(self, engine, stage, source, resume=False):
+        self.engine = engine
+        self.stage = stage
+        self.source = source
+        self.units = {}
+        self.skipped = 0
+        self.loaded = 0
+        if not resume:
+            reset_manifest(engine, [stage])
+            return
+
+        with engine.connect() as conn:
+            conn.execute(text(MANIFEST_SCHEMA))
+            conn.commit()
+            rows = conn.execute(text("""
+                SELECT table_name, first_id, last_id, status, rows_loaded, source
+                FROM load_manifest WHERE stage = :stage
+            """), {'stage': stage}).fetchall()
+        stale = {row[5] for row in rows if row[5] != source}
+        if stale:
+            raise ValueError(f"load_manifest stage '{stage}' was written for {stale.pop()}, not {source}; "
+                             f"rerun without --resume")
+        self.units = {(row[0], row[1], row[2]): (row[3], row[4]) for row in rows}
+
+    def is_done(self, table_name, first_id, last_id):
+        status = self.units.get((table_name, first_id, last_id))
+        return status is not None and status[0] == 'done'
+
+    def rows_loaded(self, table_name, first_id, last_id):
+        return self.units[(table_name, first_id, last_id)][1]
+
+    def finished_counts(self, table_names, first_id, last_id):
+        """Recorded rows per table if every unit of the range is done (counted as skipped), else None"""
+        if not all(self.is_done(name, first_id, last_id) for name in table_names):
+            return None
+        self.skipped += len(table_names)
+        return {name: self.rows_loaded(name, first_id, last_id) for name in table_names}
+
+    def finish(self, table_name, first_id, last_id, rows):
+        self.units[(table_name, first_id, last_id)] = ('done', rows)
+        self.loaded += 1
+
+    def mark_done(self, raw_conn, table_name, first_id, last_id, rows):
+        """Record a finished unit inside the caller's transaction, so it commits with the unit's rows"""
+        with raw_conn.cursor() as cursor:
+            cursor.execute(MARK_UNIT_SQL, (self.stage, table_name, first_id, last_id, 'done', rows, None, self.source))
+
+    def mark_failed(self, table_name, first_id, last_id, error):
+        """Record a failed unit on its own connection; best effort, since the link may be what failed"""
+        self.units[(table_name, first_id, last_id)] = ('failed', None)
+        try:
+            raw_conn = self.engine.raw_connection()
+            try:
+                with raw_conn.cursor() as cursor:
+                    cursor.execute(MARK_UNIT_SQL, (self.stage, table_name, first_id, last_id, 'failed', None,
+                                                   str(error).splitlines()[0] if str(error) else repr(error),
+                                                   self.source))
+                raw_conn.commit()
+            finally:
+                raw_conn.close()
+        except Exception as e:
+            print(f"  ⚠️ Could not record failed unit {table_name} {first_id}-{last_id}: {e}")
+
+    def print_summary(self):
+        failed = sum(1 for status, _ in self.units.values() if status == 'failed')
+        print(f"📒 Manifest '{self.stage}': {self.loaded} units loaded, {self.skipped} already done"
+              + (f", {failed} failed" if failed else ""))
+
+
+def run_unit(engine, manifest, table_name, first_id, last_id, load):
+    """Run load(raw_conn) -> rows in one transaction
+
+    With a manifest the unit is skipped (returning its recorded row count)
+    if a previous run finished it, and its outcome is recorded otherwise.
+    The unit is measured for the active run's metrics.
+    """
+    if manifest is not None and manifest.is_done(table_name, first_id, last_id):
+        manifest.skipped += 1
+        return manifest.rows_loaded(table_name, first_id, last_id)
+    with measure_unit(table_name, first_id, last_id) as unit_metrics:
+        raw_conn = engine.raw_connection()
+        try:
+            rows = load(raw_conn)
+            if manifest is not None:
+                manifest.mark_done(raw_conn, table_name, first_id, last_id, rows)
+            raw_conn.commit()
+        except Exception as e:
+            raw_conn.rollback()
+            if manifest is not None:
+                manifest.mark_failed(table_name, first_id, last_id, e)
+            raise
+        finally:
+            raw_conn.close()
+        unit_metrics['rows'] = rows
+    if manifest is not None:
+        manifest.finish(table_name, first_id, last_id, rows)
+    return rows
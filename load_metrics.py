@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Run instrumentation for the loaders - per-stage and per-table metrics
+
+A run (one loader invocation) is split into stages - schema, parents,
+extract, children, finalize, ... - and each stage into table units, the
+same (table, id range) units the run manifest checkpoints. For every
+stage and table the run records wall and CPU time, rows and COPY bytes
+with their per-second rates, peak RSS and database round trips.
+
+Round trips are counted by a psycopg2 cursor class installed with
+create_engine(..., connect_args=counting_connect_args()), so raw COPYs,
+raw cursor statements and SQLAlchemy queries are all seen. With
+--trace-allocations the top Python allocation sites from tracemalloc are
+added (Arrow buffers live outside the Python heap and show up in RSS).
+
+At the end of a run the metrics are written as a JSON report and/or a
+Prometheus textfile for node_exporter's textfile collector, so the
+scheduler can alert when a nightly load slows down or fails.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import psycopg2.extensions
+import pyarrow as pa
+
+from parquet_stream import current_rss_mb, peak_rss_mb
+
+METRIC_PREFIX = 'nvestiv_load'
+
+_lock = threading.Lock()
+_local = threading.local()
+_active = None
+
+
+def _thread_counts():
+    """[round trips, bytes sent] issued by the calling thread so far"""
+    counts = getattr(_local, 'counts', None)
+    if counts is None:
+        counts = _local.counts = [0, 0]
+    return counts
+
+
+def _count(round_trips, bytes_sent=0):
+    counts = _thread_counts()
+    counts[0] += round_trips
+    counts[1] += bytes_sent
+    run = _active
+    if run is not None:
+        with _lock:
+            run.round_trips += round_trips
+            run.bytes_sent += bytes_sent
+
+
+def _remaining_bytes(file):
+    try:
+        position = file.tell()
+        end = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that counts statements sent to the server and COPY FROM payload bytes"""
+
+    def execute(self, query, vars=None):
+        _count(1)
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        # psycopg2 sends one statement per parameter set
+        vars_list = list(vars_list)
+        _count(len(vars_list))
+        return super().executemany(query, vars_list)
+
+    def callproc(self, procname, parameters=None):
+        _count(1)
+        return super().callproc(procname, parameters)
+
+    def copy_expert(self, sql, file, size=8192):
+        _count(1, _remaining_bytes(file) if 'FROM STDIN' in sql.upper() else 0)
+        return super().copy_expert(sql, file, size)
+
+    def copy_from(self, file, table, *args, **kwargs):
+        _count(1, _remaining_bytes(file))
+        return super().copy_from(file, table, *args, **kwargs)
+
+    def copy_to(self, file, table, *args, **kwargs):
+        _count(1)
+        return super().copy_to(file, table, *args, **kwargs)
+
+
+def counting_connect_args():
+    """connect_args for create_engine so every connection of the engine counts its round trips"""
+    return {'cursor_factory': CountingCursor}
+
+
+class PeakMemory:
+    """Peak RSS and Arrow allocations while a block runs, sampled on a background thread"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.peak_arrow_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+        self.peak_arrow_mb = max(self.peak_arrow_mb, pa.total_allocated_bytes() / (1024 * 1024))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _rate(amount, seconds):
+    return round(amount / seconds, 1) if seconds > 0 else None
+
+
+class RunMetrics:
+    """Stage and table-unit measurements of one loader run"""
+
+    def __init__(self, job, trace_allocations=0):
+        self.job = job
+        self.trace_allocations = trace_allocations
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.round_trips = 0
+        self.bytes_sent = 0
+        self.stages = []
+        self.units = []
+        self.current_stage = None
+        self.status = 'running'
+        self.error = None
+        self.allocations = []
+        self.python_peak_mb = None
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Measure a stage; its rows default to the rows of the table units recorded inside it"""
+        outer_stage = self.current_stage
+        self.current_stage = name
+        first_unit = len(self.units)
+        record = {'stage': name, 'status': 'failed'}
+        round_trips, bytes_sent = self.round_trips, self.bytes_sent
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        memory = PeakMemory()
+        try:
+            with memory:
+                yield record
+            record['status'] = 'done'
+        finally:
+            wall_seconds = time.perf_counter() - wall_started
+            units = self.units[first_unit:]
+            record.setdefault('rows', sum(unit['rows'] for unit in units))
+            record.update({
+                'wall_seconds': round(wall_seconds, 4),
+                'cpu_seconds': round(time.process_time() - cpu_started, 4),
+                'bytes': self.bytes_sent - bytes_sent,
+                'round_trips': self.round_trips - round_trips,
+                'tables': len({unit['table'] for unit in units}),
+                'peak_rss_mb': round(memory.peak_rss_mb, 1),
+                'peak_arrow_mb': round(memory.peak_arrow_mb, 1),
+            })
+            record['rows_per_s'] = _rate(record['rows'], wall_seconds)
+            record['bytes_per_s'] = _rate(record['bytes'], wall_seconds)
+            self.stages.append(record)
+            self.current_stage = outer_stage
+
+    @contextmanager
+    def unit(self, table_name, first_id=0, last_id=0):
+        """Measure one table unit on the calling thread; set record['rows'] to the rows written"""
+        counts = _thread_counts()
+        round_trips, bytes_sent = counts
+        wall_started, cpu_started = time.perf_counter(), time.thread_time()
+        record = {'stage': self.current_stage, 'table': table_name, 'first_id': first_id, 'last_id': last_id,
+                  'rows': 0, 'status': 'failed'}
+        try:
+            yield record
+            record['status'] = 'done'
+        finally:
+            record.update({
+                'wall_seconds': round(time.perf_counter() - wall_started, 4),
+                'cpu_seconds': round(time.thread_time() - cpu_started, 4),
+                'round_trips': counts[0] - round_trips,
+                'bytes': counts[1] - bytes_sent,
+            })
+            with _lock:
+                self.units.append(record)
+
+    def finish(self, error=None):
+        self.finished_at = datetime.now(timezone.utc)
+        self.wall_seconds = round(time.perf_counter() - self._wall_started, 4)
+        self.cpu_seconds = round(time.process_time() - self._cpu_started, 4)
+        self.status = 'failed' if error is not None else 'success'
+        if error is not None:
+            self.error = str(error).splitlines()[0] if str(error) else repr(error)
+        if self.trace_allocations and tracemalloc.is_tracing():
+            self.python_peak_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+            statistics = tracemalloc.take_snapshot().statistics('lineno')[:self.trace_allocations]
+            self.allocations = [{
+                'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                'size_mb': round(stat.size / (1024 * 1024), 2),
+                'blocks': stat.count,
+            } for stat in statistics]
+            tracemalloc.stop()
+
+    def table_totals(self):
+        """Units summed per (stage, table)"""
+        totals = {}
+        for unit in self.units:
+            total = totals.setdefault((unit['stage'], unit['table']), {
+                'stage': unit['stage'], 'table': unit['table'], 'units': 0, 'failed_units': 0, 'rows': 0,
+                'bytes': 0, 'round_trips': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+            })
+            total['units'] += 1
+            total['failed_units'] += unit['status'] != 'done'
+            for key in ('rows', 'bytes', 'round_trips', 'wall_seconds', 'cpu_seconds'):
+                total[key] += unit[key]
+        for total in totals.values():
+            total['wall_seconds'] = round(total['wall_seconds'], 4)
+            total['cpu_seconds'] = round(total['cpu_seconds'], 4)
+            total['rows_per_s'] = _rate(total['rows'], total['wall_seconds'])
+            total['bytes_per_s'] = _rate(total['bytes'], total['wall_seconds'])
+        return list(totals.values())
+
+    def report(self):
+        return {
+            'job': self.job,
+            'status': self.status,
+            'error': self.error,
+            'argv': sys.argv,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': self.finished_at.isoformat(timespec='seconds') if self.finished_at else None,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'rows': sum(unit['rows'] for unit in self.units if unit['status'] == 'done'),
+            'bytes': self.bytes_sent,
+            'round_trips': self.round_trips,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'python_peak_mb': self.python_peak_mb,
+            'stages': self.stages,
+            'tables': self.table_totals(),
+            'top_allocations': self.allocations,
+        }
+
+    def write_json(self, path):
+        _write_atomically(path, json.dumps(self.report(), indent=2) + '\n')
+
+    def prometheus_text(self):
+        """Gauges in the Prometheus text exposition format; repeated stages are summed"""
+        job = {'job': self.job}
+        lines = []
+
+        def gauge(name, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape_label(value_)}"' for key, value_ in labels.items())
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {_format_value(value)}")
+
+        gauge('run_success', 'Whether the last run finished without error', [(job, int(self.status == 'success'))])
+        gauge('run_timestamp_seconds', 'Unix time the last run finished',
+              [(job, (self.finished_at or datetime.now(timezone.utc)).timestamp())])
+        gauge('run_duration_seconds', 'Wall time of the last run', [(job, self.wall_seconds)])
+        gauge('run_cpu_seconds', 'Process CPU time of the last run', [(job, self.cpu_seconds)])
+        gauge('run_round_trips', 'Database round trips of the last run', [(job, self.round_trips)])
+        gauge('run_peak_rss_bytes', 'Peak resident set size of the last run', [(job, peak_rss_mb() * 1024 * 1024)])
+
+        stages = {}
+        for stage in self.stages:
+            total = stages.setdefault(stage['stage'], dict.fromkeys(
+                ('wall_seconds', 'cpu_seconds', 'rows', 'bytes', 'round_trips', 'peak_rss_mb'), 0))
+            for key in ('wall_seconds', 'cpu_seconds', 'rows', 'bytes', 'round_trips'):
+                total[key] += stage[key]
+            total['peak_rss_mb'] = max(total['peak_rss_mb'], stage['peak_rss_mb'])
+        stage_samples = [({'job': self.job, 'stage': name}, total) for name, total in stages.items()]
+        gauge('stage_duration_seconds', 'Wall time per stage',
+              [(labels, total['wall_seconds']) for labels, total in stage_samples])
+        gauge('stage_cpu_seconds', 'Process CPU time per stage',
+              [(labels, total['cpu_seconds']) for labels, total in stage_samples])
+        gauge('stage_rows', 'Rows written (or read) per stage',
+              [(labels, total['rows']) for labels, total in stage_samples])
+        gauge('stage_rows_per_second', 'Rows per second per stage',
+              [(labels, _rate(total['rows'], total['wall_seconds'])) for labels, total in stage_samples])
+        gauge('stage_bytes', 'COPY payload bytes sent per stage',
+              [(labels, total['bytes']) for labels, total in stage_samples])
+        gauge('stage_bytes_per_second', 'COPY payload bytes per second per stage',
+              [(labels, _rate(total['bytes'], total['wall_seconds'])) for labels, total in stage_samples])
+        gauge('stage_round_trips', 'Database round trips per stage',
+              [(labels, total['round_trips']) for labels, total in stage_samples])
+        gauge('stage_peak_rss_bytes', 'Peak resident set size per stage',
+              [(labels, total['peak_rss_mb'] * 1024 * 1024) for labels, total in stage_samples])
+
+        table_samples = [({'job': self.job, 'stage': total['stage'], 'table': total['table']}, total)
+                         for total in self.table_totals()]
+        gauge('table_duration_seconds', 'Summed wall time of the table units',
+              [(labels, total['wall_seconds']) for labels, total in table_samples])
+        gauge('table_cpu_seconds', 'Summed thread CPU time of the table units',
+              [(labels, total['cpu_seconds']) for labels, total in table_samples])
+        gauge('table_rows', 'Rows written per table', [(labels, total['rows']) for labels, total in table_samples])
+        gauge('table_bytes', 'COPY payload bytes sent per table',
+              [(labels, total['bytes']) for labels, total in table_samples])
+        gauge('table_round_trips', 'Database round trips per table',
+              [(labels, total['round_trips']) for labels, total in table_samples])
+        gauge('table_failed_units', 'Table units that failed',
+              [(labels, total['failed_units']) for labels, total in table_samples])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        _write_atomically(path, self.prometheus_text())
+
+    def print_summary(self):
+        for stage in self.stages:
+            rate = f" ({stage['rows_per_s']:,.0f} rows/s)" if stage['rows_per_s'] else ''
+            print(f"  ⏱️ {stage['stage']}: {stage['wall_seconds']:.2f}s wall, {stage['cpu_seconds']:.2f}s CPU, "
+                  f"{stage['rows']:,} rows{rate}, {stage['bytes'] / (1024 * 1024):.1f} MB sent, "
+                  f"{stage['round_trips']:,} round trips, peak RSS {stage['peak_rss_mb']:.0f} MB")
+        for allocation in self.allocations:
+            print(f"  🧠 {allocation['size_mb']:.2f} MB in {allocation['blocks']:,} blocks at {allocation['location']}")
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value is None:
+        return 'NaN'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _write_atomically(path, content):
+    """Write via a temp file and rename, so collectors never read a half-written file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    partial_path = f'{path}.{os.getpid()}.tmp'
+    with open(partial_path, 'w') as f:
+        f.write(content)
+    os.replace(partial_path, path)
+
+
+def start_run(job, trace_allocations=0):
+    """Make a new RunMetrics the one that measure_stage/measure_unit and the cursors report to"""
+    global _active
+    _active = RunMetrics(job, trace_allocations)
+    return _active
+
+
+def active_run():
+    return _active
+
+
+@contextmanager
+def measure_stage(name):
+    """Stage of the active run (a no-op outside a run); yields the stage record"""
+    if _active is None:
+        yield {}
+    else:
+        with _active.stage(name) as record:
+            yield record
+
+
+@contextmanager
+def measure_unit(table_name, first_id=0, last_id=0):
+    """Table unit of the active run (a no-op outside a run); set record['rows'] before leaving"""
+    if _active is None:
+        yield {}
+    else:
+        with _active.unit(table_name, first_id, last_id) as record:
+            yield record
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument('--metrics-json', default=None,
+                        help='Write a JSON run report (stages, tables, memory, round trips) to this file')
+    parser.add_argument('--metrics-prom', default=None,
+                        help="Write the run metrics as a Prometheus textfile (for node_exporter's textfile collector)")
+    parser.add_argument('--trace-allocations', type=int, default=0, metavar='N',
+                        help='Trace Python allocations with tracemalloc and report the top N source lines '
+                             '(slows the run)')
+
+
+def finish_run(args, error=None):
+    """Close the active run, print its stage summary and write the requested reports"""
+    run = _active
+    if run is None:
+        return
+    run.finish(error)
+    print(f"\n📈 Run metrics ({run.status}, {run.wall_seconds:.2f}s, {run.round_trips:,} round trips):")
+    run.print_summary()
+    try:
+        if args.metrics_json:
+            run.write_json(args.metrics_json)
+            print(f"  📝 JSON report: {args.metrics_json}")
+        if args.metrics_prom:
+            run.write_prometheus(args.metrics_prom)
+            print(f"  📝 Prometheus textfile: {args.metrics_prom}")
+    except OSError as e:
+        print(f"  ⚠️ Could not write run metrics: {e}")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Relationship statistics computed while loading
+
+RelationshipStatistics counts, for every investor-keyed child table, how
+many rows each investor got - the list lengths the extractors have just
+flattened - as a histogram {list length: investors}. Batches cover
+disjoint investor id ranges, so their histograms simply add up. save()
+writes one row per table to load_statistics, tagged with the load id,
+together with investor coverage; latest_statistics() reads the newest row
+per table, so statistics reports are a lookup instead of a GROUP BY over
+the child tables. Loads that skip batches (--resume) or rewrite single
+investors (delta sync) count the histograms from the tables instead.
+"""
+
+import json
+import secrets
+from collections import Counter
+from datetime import datetime, timezone
+
+import pyarrow.compute as pc
+from sqlalchemy import text
+
+# Child tables with an investor_id column, loaded one row per extracted row
+STATISTICS_TABLES = ['areas_of_interest', 'investment_locations', 'investor_stages', 'image_urls',
+                     'media_links', 'investor_lists', 'investments', 'investment_rounds', 'network_connections']
+
+LOAD_STATISTICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS load_statistics (
+    load_id VARCHAR(64) NOT NULL,
+    table_name VARCHAR(255) NOT NULL,
+    source TEXT,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_records BIGINT,
+    total_investors BIGINT,
+    unique_investors BIGINT,
+    avg_per_investor NUMERIC(12, 2),
+    max_per_investor INTEGER,
+    median_per_investor INTEGER,
+    p90_per_investor INTEGER,
+    length_histogram JSONB,
+    details JSONB,
+    PRIMARY KEY (load_id, table_name)
+);
+"""
+
+INVESTOR_COVERAGE_SQL = """
+SELECT COUNT(*), COUNT(person_id), COUNT(firm_id), COUNT(location_id) FROM investors
+"""
+
+
+def new_load_id():
+    """Sortable id for one load run"""
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{secrets.token_hex(3)}"
+
+
+def _percentile(histogram, total, share):
+    """List length at the given share of all investors (zero-length ones included)"""
+    seen = 0
+    for length in sorted(histogram):
+        seen += histogram[length]
+        if seen >= share * total:
+            return length
+    return 0
+
+
+def summarize(histogram, investors):
+    """Summary columns of one table from its {length: investors} histogram of non-empty lists"""
+    histogram = {length: count for length, count in histogram.items() if length > 0}
+    total_records = sum(length * count for length, count in histogram.items())
+    unique_investors = sum(histogram.values())
+    investors = max(investors, unique_investors)
+    if investors > unique_investors:
+        histogram[0] = investors - unique_investors
+    return {
+        'total_records': total_records,
+        'total_investors': investors,
+        'unique_investors': unique_investors,
+        # Averaged over the investors that have rows, as show_table_stats always reported it
+        'avg_per_investor': round(total_records / unique_investors, 2) if unique_investors else 0,
+        'max_per_investor': max(histogram, default=0),
+        'median_per_investor': _percentile(histogram, investors, 0.5),
+        'p90_per_investor': _percentile(histogram, investors, 0.9),
+        'length_histogram': {str(length): histogram[length] for length in sorted(histogram)},
+    }
+
+
+class RelationshipStatistics:
+    """List-length histograms accumulated over the extracted batches of one load"""
+
+    def __init__(self, tables=STATISTICS_TABLES):
+        self.histograms = {table_name: Counter() for table_name in tables}
+        self.investors = 0
+        self.complete = True
+
+    def add(self, child_tables, investors):
+        """Count one extracted batch covering `investors` investor rows"""
+        self.investors += investors
+        for table_name, histogram in self.histograms.items():
+            investor_ids = child_tables[table_name].column('investor_id')
+            if len(investor_ids) == 0:
+                continue
+            lengths = pc.value_counts(investor_ids).field('counts')
+            for entry in pc.value_counts(lengths).to_pylist():
+                histogram[entry['values']] += entry['counts']
+
+    def skip(self):
+        """A batch was not extracted (already loaded), so the histograms have to come from the tables"""
+        self.complete = False
+
+    def save(self, engine, load_id, source=None):
+        """Write the statistics of this load; counts from the tables if any batch was skipped"""
+        if not self.complete:
+            return save_statistics_from_db(engine, load_id, source, list(self.histograms))
+        with engine.connect() as conn:
+            rows = {table_name: summarize(histogram, self.investors)
+                    for table_name, histogram in self.histograms.items()}
+            _write(conn, load_id, source, rows)
+            conn.commit()
+        return rows
+
+
+def table_histogram(conn, table_name):
+    """{list length: investors} of one child table, counted in the database"""
+    return dict(conn.execute(text(f"""
+        SELECT per_investor, COUNT(*) FROM (
+            SELECT investor_id, COUNT(*) AS per_investor FROM {table_name} GROUP BY investor_id
+        ) lengths GROUP BY per_investor
+    """)).fetchall())
+
+
+def save_statistics_from_db(engine, load_id, source=None, tables=STATISTICS_TABLES):
+    """Count the histograms of `tables` from the loaded rows and write them for this load"""
+    with engine.connect() as conn:
+        investors = conn.execute(text("SELECT COUNT(*) FROM investors")).scalar()
+        rows = {table_name: summarize(table_histogram(conn, table_name), investors) for table_name in tables}
+        _write(conn, load_id, source, rows)
+        conn.commit()
+    return rows
+
+
+def _write(conn, load_id, source, rows):
+    conn.execute(text(LOAD_STATISTICS_SCHEMA))
+    total, with_person, with_firm, with_location = conn.execute(text(INVESTOR_COVERAGE_SQL)).fetchone()
+    rows = dict(rows)
+    rows['investors'] = {
+        'total_records': total, 'total_investors': total, 'unique_investors': total,
+        'details': {'with_person': with_person, 'with_firm': with_firm, 'with_location': with_location},
+    }
+    conn.execute(text("""
+        INSERT INTO load_statistics (load_id, table_name, source, total_records, total_investors, unique_investors,
+                                     avg_per_investor, max_per_investor, median_per_investor, p90_per_investor,
+                                     length_histogram, details)
+        VALUES (:load_id, :table_name, :source, :total_records, :total_investors, :unique_investors,
+                :avg_per_investor, :max_per_investor, :median_per_investor, :p90_per_investor,
+                CAST(:length_histogram AS JSONB), CAST(:details AS JSONB))
+        ON CONFLICT (load_id, table_name) DO UPDATE SET
+            source = EXCLUDED.source, computed_at = CURRENT_TIMESTAMP,
+            total_records = EXCLUDED.total_records, total_investors = EXCLUDED.total_investors,
+            unique_investors = EXCLUDED.unique_investors, avg_per_investor = EXCLUDED.avg_per_investor,
+            max_per_investor = EXCLUDED.max_per_investor, median_per_investor = EXCLUDED.median_per_investor,
+            p90_per_investor = EXCLUDED.p90_per_investor, length_histogram = EXCLUDED.length_histogram,
+            details = EXCLUDED.details
+    """), [{
+        'load_id': load_id, 'table_name': table_name, 'source': source,
+        'total_records': row['total_records'], 'total_investors': row['total_investors'],
+        'unique_investors': row['unique_investors'], 'avg_per_investor': row.get('avg_per_investor'),
+        'max_per_investor': row.get('max_per_investor'), 'median_per_investor': row.get('median_per_investor'),
+        'p90_per_investor': row.get('p90_per_investor'),
+        'length_histogram': json.dumps(row['length_histogram']) if 'length_histogram' in row else None,
+        'details': json.dumps(row['details']) if 'details' in row else None,
+    } for table_name, row in rows.items()])
+    print(f"📊 Saved relationship statistics for {len(rows)} tables (load {load_id})")
+
+
+def latest_statistics(conn):
+    """{table name: row mapping} of the most recent load_statistics row per table, or {} if none"""
+    if conn.execute(text("SELECT to_regclass('load_statistics')")).scalar() is None:
+        return {}
+    return {row['table_name']: row for row in conn.execute(text("""
+        SELECT DISTINCT ON (table_name) *
+        FROM load_statistics
+        ORDER BY table_name, computed_at DESC, load_id DESC
+    """)).mappings()}
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Typo-tolerant person and firm name lookup with pg_trgm
+
+build_name_indexes() enables pg_trgm and builds GIN trigram indexes on the
+lower-cased persons.name and firms.name, so fuzzy matches are index scans
+instead of sequential ILIKE scans. fuzzy_lookup() returns the top-k names
+whose words are most similar to what was typed (word_similarity, so a
+partial or misspelled prefix already matches) with their scores.
+"""
+
+import argparse
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+# Name columns indexed for trigram lookup
+NAME_COLUMNS = {'persons': 'name', 'firms': 'name'}
+
+LOOKUP_RESULTS = 10
+
+# Lowest word_similarity returned (pg_trgm's default is 0.6)
+DEFAULT_THRESHOLD = 0.4
+
+LOOKUP_SQL = {
+    'persons': """
+        SELECT 'person' AS kind, p.id, p.name, p.slug, i.investor_id,
+               word_similarity(:name, lower(p.name)) AS score
+        FROM persons p
+        LEFT JOIN LATERAL (SELECT MIN(id) AS investor_id FROM investors WHERE person_id = p.id) i ON true
+        WHERE :name <% lower(p.name)
+        ORDER BY score DESC, similarity(:name, lower(p.name)) DESC, p.id
+        LIMIT :limit
+    """,
+    'firms': """
+        SELECT 'firm' AS kind, f.id, f.name, f.slug, NULL::INTEGER AS investor_id,
+               word_similarity(:name, lower(f.name)) AS score
+        FROM firms f
+        WHERE :name <% lower(f.name)
+        ORDER BY score DESC, similarity(:name, lower(f.name)) DESC, f.id
+        LIMIT :limit
+    """,
+}
+
+
+def trigram_index_name(table, column):
+    return f"idx_{table}_{column}_trgm"
+
+
+def build_name_indexes(engine):
+    """Enable pg_trgm and build the trigram name indexes; False if the server lacks the extension"""
+    with measure_stage('name indexes'):
+        with engine.connect() as conn:
+            if not conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar():
+                print("⚠️ pg_trgm is not available on this server - skipping trigram name indexes")
+                return False
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.commit()
+            for table, column in NAME_COLUMNS.items():
+                started = time.perf_counter()
+                name = trigram_index_name(table, column)
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN (lower({column}) gin_trgm_ops)"))
+                conn.execute(text(f"ANALYZE {table}"))
+                conn.commit()
+                print(f"  ✅ {name} in {time.perf_counter() - started:.2f}s")
+    return True
+
+
+def fuzzy_lookup(conn, name, kinds=('persons', 'firms'), limit=LOOKUP_RESULTS, threshold=DEFAULT_THRESHOLD):
+    """Top `limit` persons and/or firms by trigram word similarity to `name`, best first"""
+    name = ' '.join(name.lower().split())
+    if not name:
+        return []
+    # Transaction-local, so the caller's other trigram queries keep their own threshold
+    conn.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                 {'threshold': str(threshold)})
+    matches = []
+    for kind in kinds:
+        matches.extend(conn.execute(text(LOOKUP_SQL[kind]), {'name': name, 'limit': limit}).mappings().fetchall())
+    return sorted(matches, key=lambda match: -match['score'])[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build trigram name indexes or look names up fuzzily')
+    parser.add_argument('--build', action='store_true',
+                        help='Enable pg_trgm and build the trigram indexes on person and firm names')
+    parser.add_argument('--lookup', help='Name (or partial, misspelled name) to look up')
+    parser.add_argument('--kind', choices=['persons', 'firms'], help='Only look up persons or firms')
+    parser.add_argument('--limit', type=int, default=LOOKUP_RESULTS,
+                        help=f'Matches to return (default: {LOOKUP_RESULTS})')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Lowest word similarity returned (default: {DEFAULT_THRESHOLD})')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('name_lookup', args.trace_allocations)
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        if args.build:
+            build_name_indexes(engine)
+        if args.lookup:
+            kinds = [args.kind] if args.kind else list(LOOKUP_SQL)
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                matches = fuzzy_lookup(conn, args.lookup, kinds, args.limit, args.threshold)
+            print(f"\n🔤 {len(matches)} matches for {args.lookup!r} in {(time.perf_counter() - started) * 1000:.1f} ms:")
+            for match in matches:
+                investor = f", investor #{match['investor_id']}" if match['investor_id'] else ''
+                print(f"  {match['score']:.3f}  {match['kind']} #{match['id']} {match['name']} ({match['slug']}{investor})")
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Name lookup failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
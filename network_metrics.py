@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Network importance metrics precomputed into investor_network_metrics
+
+Runs over the person-connection graph of intro_graph (investing_connections
+and the network_list_* entries, undirected) and computes, per person:
+
+- degree: distinct connections
+- pagerank: power iteration of the damped random walk, one sparse
+  matrix-vector product per step
+- betweenness: Brandes' algorithm from a random sample of source persons,
+  a batch of sources at a time - each BFS level and each dependency
+  back-propagation step is one sparse matrix x dense block product.
+  The sampled sum is scaled up to all sources and normalized by the
+  number of pairs; with at least as many samples as persons it is exact.
+
+The scores are bulk-loaded into investor_network_metrics keyed by person
+id (with the investor id of that person), indexed for top-N scans.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
+from sqlalchemy import create_engine
+
+from bulk_copy import ARROW_COPY_FORMATS, copy_arrow_raw, copy_query_arrow_raw
+from intro_graph import IntroGraph
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-9
+PAGERANK_MAX_ITERATIONS = 200
+
+# Source persons sampled for approximate betweenness
+BETWEENNESS_SAMPLES = 256
+
+# Cells (persons x sources) of each dense block the batched BFS keeps in memory
+BETWEENNESS_BLOCK_CELLS = 1 << 22
+
+NETWORK_METRICS_SCHEMA = """
+-- database_schema.sql defines investor_network_metrics as a view; DROP TABLE would fail on it
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'investor_network_metrics' AND relkind = 'v'
+               AND relnamespace = current_schema()::regnamespace) THEN
+        DROP VIEW investor_network_metrics CASCADE;
+    END IF;
+END $$;
+DROP TABLE IF EXISTS investor_network_metrics CASCADE;
+CREATE TABLE investor_network_metrics (
+    person_id INTEGER NOT NULL,
+    investor_id INTEGER,
+    degree INTEGER NOT NULL,
+    pagerank DOUBLE PRECISION NOT NULL,
+    betweenness DOUBLE PRECISION NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+NETWORK_METRICS_INDEXES = """
+ALTER TABLE investor_network_metrics ADD PRIMARY KEY (person_id);
+ALTER TABLE investor_network_metrics ADD FOREIGN KEY (person_id) REFERENCES persons(id) ON DELETE CASCADE;
+ALTER TABLE investor_network_metrics ADD FOREIGN KEY (investor_id) REFERENCES investors(id) ON DELETE SET NULL;
+CREATE INDEX idx_investor_network_metrics_investor_id ON investor_network_metrics(investor_id);
+CREATE INDEX idx_investor_network_metrics_degree ON investor_network_metrics(degree DESC);
+CREATE INDEX idx_investor_network_metrics_pagerank ON investor_network_metrics(pagerank DESC);
+CREATE INDEX idx_investor_network_metrics_betweenness ON investor_network_metrics(betweenness DESC);
+ANALYZE investor_network_metrics;
+"""
+
+PERSON_KEYS_SQL = """
+SELECT p.id, p.slug, MIN(i.id) AS investor_id
+FROM persons p
+LEFT JOIN investors i ON i.person_id = p.id
+WHERE p.slug IS NOT NULL
+GROUP BY p.id, p.slug
+"""
+
+
+def adjacency_matrix(graph):
+    """The graph's CSR arrays as a scipy matrix (no copy)"""
+    size = graph.num_nodes
+    return sparse.csr_matrix((np.ones(len(graph.indices)), graph.indices, graph.indptr), shape=(size, size))
+
+
+def degrees(graph):
+    return np.diff(graph.indptr)
+
+
+def pagerank(adjacency, damping=PAGERANK_DAMPING, tolerance=PAGERANK_TOLERANCE,
+             max_iterations=PAGERANK_MAX_ITERATIONS):
+    """PageRank by power iteration; isolated persons spread their rank uniformly"""
+    size = adjacency.shape[0]
+    if size == 0:
+        return np.zeros(0)
+    out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    inverse_degree = np.divide(1.0, out_degree, out=np.zeros(size), where=~dangling)
+    transposed = adjacency.T.tocsr()
+    rank = np.full(size, 1.0 / size)
+    for _ in range(max_iterations):
+        spread = damping * rank[dangling].sum() + 1.0 - damping
+        updated = damping * (transposed @ (rank * inverse_degree)) + spread / size
+        change = np.abs(updated - rank).sum()
+        rank = updated
+        if change < tolerance:
+            break
+    return rank
+
+
+def betweenness(adjacency, samples=BETWEENNESS_SAMPLES, block_cells=BETWEENNESS_BLOCK_CELLS, seed=0):
+    """Normalized betweenness centrality, exact or estimated from `samples` BFS sources"""
+    size = adjacency.shape[0]
+    scores = np.zeros(size)
+    if size < 3:
+        return scores
+    if samples >= size:
+        sources = np.arange(size)
+    else:
+        sources = np.random.default_rng(seed).choice(size, samples, replace=False)
+    batch = max(1, min(len(sources), block_cells // size))
+
+    for first in range(0, len(sources), batch):
+        block = sources[first:first + batch]
+        columns = np.arange(len(block))
+        # Shortest path counts and the frontier of every BFS level, one column per source
+        paths = np.zeros((size, len(block)))
+        paths[block, columns] = 1.0
+        reached = paths > 0
+        frontier = reached.copy()
+        levels = [frontier]
+        while True:
+            counts = adjacency @ np.where(frontier, paths, 0.0)
+            frontier = (counts > 0) & ~reached
+            if not frontier.any():
+                break
+            paths[frontier] = counts[frontier]
+            reached |= frontier
+            levels.append(frontier)
+
+        # Dependencies flow back one level at a time, deepest first; sources get none
+        dependency = np.zeros((size, len(block)))
+        for depth in range(len(levels) - 1, 1, -1):
+            share = np.where(levels[depth], (1.0 + dependency) / np.where(paths > 0, paths, 1.0), 0.0)
+            dependency += np.where(levels[depth - 1], paths * (adjacency @ share), 0.0)
+        scores += dependency.sum(axis=1)
+
+    # Scale the sampled sources up to all of them; undirected pairs were counted from both ends
+    scores *= size / len(sources) / 2.0
+    return scores / ((size - 1) * (size - 2) / 2.0)
+
+
+def compute_network_metrics(graph, samples=BETWEENNESS_SAMPLES):
+    """Arrow table of slug, degree, pagerank and betweenness per person in the graph"""
+    adjacency = adjacency_matrix(graph)
+    started = time.perf_counter()
+    ranks = pagerank(adjacency)
+    print(f"  📈 PageRank in {time.perf_counter() - started:.2f}s")
+    started = time.perf_counter()
+    centrality = betweenness(adjacency, samples)
+    exact = 'exact' if samples >= graph.num_nodes else f'{samples} sampled sources'
+    print(f"  🌉 Betweenness ({exact}) in {time.perf_counter() - started:.2f}s")
+    return pa.table({
+        'slug': pa.array(graph.slugs, type=pa.string()),
+        'degree': pa.array(degrees(graph), type=pa.int32()),
+        'pagerank': pa.array(ranks),
+        'betweenness': pa.array(centrality),
+    })
+
+
+def build_network_metrics(engine, copy_format='csv', samples=BETWEENNESS_SAMPLES, graph=None):
+    """Compute the metrics over the connection graph and reload investor_network_metrics"""
+    print("🏅 Computing network degree, PageRank and betweenness...")
+    with measure_stage('network metrics') as stage_metrics:
+        started = time.perf_counter()
+        graph = graph or IntroGraph.from_db(engine)
+        metrics = compute_network_metrics(graph, samples)
+
+        raw_conn = engine.raw_connection()
+        try:
+            persons = copy_query_arrow_raw(raw_conn, PERSON_KEYS_SQL,
+                                           {'id': pa.int32(), 'slug': pa.string(), 'investor_id': pa.int32()})
+            rows = pc.index_in(metrics.column('slug'), value_set=persons.column('slug').combine_chunks())
+            metrics = metrics.drop_columns(['slug'])
+            metrics = metrics.add_column(0, 'person_id', pc.take(persons.column('id'), rows))
+            metrics = metrics.add_column(1, 'investor_id', pc.take(persons.column('investor_id'), rows))
+            with raw_conn.cursor() as cursor:
+                cursor.execute(NETWORK_METRICS_SCHEMA)
+            loaded = copy_arrow_raw(raw_conn, 'investor_network_metrics', metrics, copy_format)
+            with raw_conn.cursor() as cursor:
+                cursor.execute(NETWORK_METRICS_INDEXES)
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+        stage_metrics['rows'] = loaded
+    print(f"✅ Loaded network metrics for {loaded:,} persons in {time.perf_counter() - started:.2f}s")
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute degree, PageRank and betweenness per person')
+    parser.add_argument('--copy-format', choices=ARROW_COPY_FORMATS, default='csv',
+                        help='COPY wire format used for bulk loading (default: csv)')
+    parser.add_argument('--samples', type=int, default=BETWEENNESS_SAMPLES,
+                        help=f'BFS sources sampled for betweenness (default: {BETWEENNESS_SAMPLES})')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('network_metrics', args.trace_allocations)
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        build_network_metrics(engine, args.copy_format, args.samples)
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Network metrics failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+-- ============================================================================
+-- SECTOR AND STAGE VIEWS FOR THE NORMALIZED DIMENSION LAYOUT
+-- Run after 10_RESEARCH_VIEWS_FIXED.sql on a database loaded with
+-- complete_population.py --normalized-dimensions. Same columns as the
+-- originals, but grouped by the SMALLINT dimension id instead of the
+-- (display_name, kind) strings; names are joined on once per group.
+-- ============================================================================
+
+-- 5. 🎯 SECTOR FOCUS ANALYSIS
+CREATE OR REPLACE VIEW sector_focus_analysis AS
+SELECT
+    ia.display_name as focus_area,
+    ia.kind as focus_category,
+    s.investors_count,
+    s.firms_involved,
+    s.related_investments,
+    s.geographic_spread,
+    s.avg_investor_votes,
+    s.diversity_percentage,
+    s.female_percentage
+FROM (
+    SELECT
+        ii.interest_id,
+        COUNT(DISTINCT ii.investor_id) as investors_count,
+        COUNT(DISTINCT i.firm_id) as firms_involved,
+        COUNT(DISTINCT inv.id) as related_investments,
+        COUNT(DISTINCT l.display_name) as geographic_spread,
+        ROUND(AVG(i.vote_count), 1) as avg_investor_votes,
+        ROUND(100.0 * COUNT(DISTINCT CASE WHEN i.in_diverse_investor_list THEN i.id END) /
+              NULLIF(COUNT(DISTINCT ii.investor_id), 0), 1) as diversity_percentage,
+        ROUND(100.0 * COUNT(DISTINCT CASE WHEN i.in_female_investor_list THEN i.id END) /
+              NULLIF(COUNT(DISTINCT ii.investor_id), 0), 1) as female_percentage
+    FROM investor_interests ii
+    LEFT JOIN investors i ON ii.investor_id = i.id
+    LEFT JOIN investments inv ON i.id = inv.investor_id
+    LEFT JOIN locations l ON i.location_id = l.id
+    GROUP BY ii.interest_id
+) s
+JOIN interest_areas ia ON ia.id = s.interest_id
+ORDER BY s.investors_count DESC;
+
+-- 6. 📈 INVESTMENT STAGE PREFERENCES
+CREATE OR REPLACE VIEW stage_preferences_analysis AS
+SELECT
+    st.display_name as investment_stage,
+    st.kind as stage_category,
+    s.investors_count,
+    s.firms_count,
+    s.geographic_spread,
+    s.related_investments,
+    s.avg_investor_votes
+FROM (
+    SELECT
+        sp.stage_id,
+        COUNT(DISTINCT sp.investor_id) as investors_count,
+        COUNT(DISTINCT i.firm_id) as firms_count,
+        COUNT(DISTINCT l.display_name) as geographic_spread,
+        COUNT(DISTINCT inv.id) as related_investments,
+        ROUND(AVG(i.vote_count), 1) as avg_investor_votes
+    FROM investor_stage_preferences sp
+    LEFT JOIN investors i ON sp.investor_id = i.id
+    LEFT JOIN investments inv ON i.id = inv.investor_id
+    LEFT JOIN locations l ON i.location_id = l.id
+    GROUP BY sp.stage_id
+) s
+JOIN investment_stages st ON st.id = s.stage_id
+ORDER BY s.investors_count DESC;
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Multi-process extraction of nested child tables from investors.parquet
+
+The file is split into slices - one per row group, or `workers` equal row
+ranges when it only has a single row group - and each slice is extracted
+in a ProcessPoolExecutor worker. Workers read their own row group; a
+single row group is decoded once here instead and its row ranges are sent
+to the workers as Arrow IPC buffers, since extraction rather than
+decoding is the GIL-bound part. Every slice carries the investor_id of
+its first row, and results are merged back in slice order, so ids are
+identical to a single-process run.
+"""
+
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from arrow_extract import CHILD_SOURCE_COLUMNS, extract_child_tables
+
+
+def default_workers():
+    """One worker per available core"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan_slices(path, workers):
+    """Split the file into (start_id, end_id, row_group) work items
+
+    Multi-row-group files get one item per row group. A file with a single
+    row group is cut into `workers` contiguous row ranges of that group.
+    """
+    metadata = pq.ParquetFile(path).metadata
+    if metadata.num_row_groups == 1:
+        total_rows = metadata.num_rows
+        length = max(1, math.ceil(total_rows / max(1, workers)))
+        return [(start_id, min(start_id + length - 1, total_rows), 0)
+                for start_id in range(1, total_rows + 1, length)]
+    slices = []
+    start_id = 1
+    for row_group in range(metadata.num_row_groups):
+        end_id = start_id + metadata.row_group(row_group).num_rows - 1
+        slices.append((start_id, end_id, row_group))
+        start_id = end_id + 1
+    return slices
+
+
+def read_slice(path, work_item, columns=None):
+    """Read the row group of one work item as an Arrow Table"""
+    return pq.ParquetFile(path, memory_map=True).read_row_group(work_item[2], columns=columns)
+
+
+def ipc_buffer(table):
+    """Serialize a table (or a zero-copy slice of one) as an Arrow IPC stream"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _extract_slice(args):
+    path, work_item, columns, tables = args
+    table = read_slice(path, work_item, columns)
+    return extract_child_tables(table, start_id=work_item[0], tables=tables)
+
+
+def _extract_rows(args):
+    buffer, work_item, tables = args
+    table = pa.ipc.open_stream(buffer).read_all()
+    return extract_child_tables(table, start_id=work_item[0], tables=tables)
+
+
+def iter_parallel_extract(path, workers=None, columns=CHILD_SOURCE_COLUMNS, tables=None, skip=()):
+    """Yield (start_id, child_tables) per slice, in file order, extracted across worker processes
+
+    At most `workers` slices are submitted ahead of the one being
+    consumed, so a slow loader holds a bounded number of extracted slices
+    in memory rather than the whole file. Slices whose start_id is in
+    skip are neither read nor extracted and come back as (start_id, None).
+    """
+    workers = workers or default_workers()
+    slices = plan_slices(path, workers)
+    if workers <= 1:
+        # Nothing to spread across processes: extract here, one row group at a time
+        for work_item in slices:
+            yield work_item[0], None if work_item[0] in skip else _extract_slice((path, work_item, columns, tables))
+        return
+
+    single_group = len({work_item[2] for work_item in slices}) == 1
+    group = None
+    slices = iter(slices)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit(work_item):
+            nonlocal group
+            start_id, end_id, _ = work_item
+            if start_id in skip:
+                return work_item, None
+            if not single_group:
+                return work_item, executor.submit(_extract_slice, (path, work_item, columns, tables))
+            # The single row group is decoded once; workers only get their row range of it
+            if group is None:
+                group = read_slice(path, work_item, columns)
+            rows = group.slice(start_id - 1, end_id - start_id + 1)
+            return work_item, executor.submit(_extract_rows, (ipc_buffer(rows), work_item, tables))
+
+        in_flight = deque(submit(work_item) for work_item in islice(slices, workers))
+        while in_flight:
+            # Results are taken in submission order, which keeps investor ids stable
+            work_item, future = in_flight.popleft()
+            child_tables = future.result() if future is not None else None
+            following = next(slices, None)
+            if following is not None:
+                in_flight.append(submit(following))
+            yield work_item[0], child_tables
+            del child_tables
+
+
+def parallel_extract_child_tables(path, workers=None, columns=CHILD_SOURCE_COLUMNS, tables=None):
+    """Extract every child table across worker processes and merge the slices in order"""
+    parts = {}
+    for _, child_tables in iter_parallel_extract(path, workers, columns, tables):
+        for table_name, batch in child_tables.items():
+            parts.setdefault(table_name, []).append(batch)
+    return {table_name: pa.concat_tables(batches) for table_name, batches in parts.items()}
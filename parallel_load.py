@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Concurrent table loading over a bounded pool of database connections
+
+Load steps are plain callables keyed by name. Steps with no unfinished
+dependencies run together on a thread pool (COPY and Arrow's CSV writer
+release the GIL), so independent child tables stream in parallel while
+dependent steps - companies before positions and investments, investments
+before their rounds and coinvestors - still run in order.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# step -> steps that must finish first
+LOAD_DEPENDENCIES = {
+    'positions': ['companies'],
+    'degrees': ['schools'],
+    'investments': ['companies'],
+    'investment_rounds': ['investments'],
+    'coinvestors': ['investments'],
+    'network_connections': ['network_persons'],
+}
+
+
+def run_load_dag(steps, dependencies=None, max_workers=4):
+    """Run {name: callable} steps concurrently in dependency order; returns {name: result}
+
+    At most max_workers steps run at once, so the engine's pool needs at
+    least that many connections. The first failing step's exception is
+    re-raised once the steps already running have finished.
+    """
+    dependencies = LOAD_DEPENDENCIES if dependencies is None else dependencies
+    pending = dict(steps)
+    running = {}
+    results = {}
+
+    def ready(name):
+        return all(dep in results for dep in dependencies.get(name, []) if dep in steps)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while pending or running:
+            for name in [name for name in pending if ready(name)]:
+                running[executor.submit(pending.pop(name))] = name
+            if not running:
+                raise ValueError(f"Unsatisfiable load dependencies for: {', '.join(sorted(pending))}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+    return results
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Bulk load of persons, firms, locations and investors with client-side keys
+
+Parent rows are extracted with Arrow struct kernels, ids come from
+KeyAllocator (slug/name -> id) and investors use the sequential
+investor_id (row + 1) that the child-table extractors already assume,
+so every table is COPY-loaded with foreign keys resolved up front.
+"""
+
+from functools import partial
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from arrow_extract import as_array, get_column
+from bulk_copy import copy_arrow_raw
+from load_manifest import run_unit
+from surrogate_keys import KeyAllocator, bump_sequences
+
+# Columns of investors.parquet the parent extractors read
+PARENT_SOURCE_COLUMNS = [
+    'person', 'firm', 'location', 'position', 'headline', 'previous_position',
+    'previous_firm', 'min_investment', 'max_investment', 'target_investment',
+    'areas_of_interest_freeform', 'no_current_interest_freeform', 'vote_count',
+    'leads_rounds', 'claimed', 'can_edit', 'include_in_list',
+    'in_founder_investor_list', 'in_diverse_investor_list', 'in_female_investor_list',
+    'in_invests_in_diverse_founders_investor_list',
+    'in_invests_in_female_founders_investor_list', 'has_profile_vote',
+]
+
+PERSON_FIELDS = [
+    'first_name', 'last_name', 'name', 'linkedin_url', 'facebook_url', 'twitter_url',
+    'crunchbase_url', 'angellist_url', 'url', 'is_me', 'first_degree_count', 'is_on_target_list',
+]
+
+INVESTOR_TEXT_COLUMNS = [
+    'position', 'headline', 'previous_position', 'previous_firm', 'min_investment',
+    'max_investment', 'target_investment', 'areas_of_interest_freeform',
+    'no_current_interest_freeform', 'leads_rounds',
+]
+
+INVESTOR_FLAG_COLUMNS = [
+    'claimed', 'can_edit', 'include_in_list', 'in_founder_investor_list',
+    'in_diverse_investor_list', 'in_female_investor_list',
+    'in_invests_in_diverse_founders_investor_list',
+    'in_invests_in_female_founders_investor_list', 'has_profile_vote',
+]
+
+# Load order: investors reference the other three
+PARENT_TABLES = ['persons', 'firms', 'locations', 'investors']
+
+
+def new_allocators():
+    """One KeyAllocator per parent table keyed by a natural key"""
+    return {'persons': KeyAllocator(), 'firms': KeyAllocator(), 'locations': KeyAllocator()}
+
+
+def slug_or_default(table, column, prefix, start_id):
+    """Struct slug with the loaders' '<prefix>_<row>' fallback when the struct exists but has no slug"""
+    struct = get_column(table, column)
+    slugs = get_column(table, f'{column}.slug')
+    row_numbers = pa.array(range(start_id - 1, start_id - 1 + table.num_rows), type=pa.int64())
+    fallback = pc.binary_join_element_wise(prefix, pc.cast(row_numbers, pa.string()), '')
+    fallback = pc.if_else(struct.is_valid(), fallback, pa.scalar(None, pa.string()))
+    return pc.coalesce(slugs, fallback)
+
+
+def _flag(array):
+    return pc.fill_null(as_array(array), False)
+
+
+def extract_parent_tables(table, allocators, start_id=1):
+    """Build persons/firms/locations rows for newly seen keys and one investors row per input row"""
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+
+    person_slugs = slug_or_default(table, 'person', 'person_', start_id)
+    firm_slugs = slug_or_default(table, 'firm', 'firm_', start_id)
+    location_names = get_column(table, 'location.display_name')
+
+    person_ids, new_persons = allocators['persons'].assign(person_slugs)
+    firm_ids, new_firms = allocators['firms'].assign(firm_slugs)
+    location_ids, new_locations = allocators['locations'].assign(location_names)
+    new_persons, new_firms, new_locations = pa.array(new_persons), pa.array(new_firms), pa.array(new_locations)
+
+    person_rows = table.take(new_persons)
+    persons = {
+        'id': pc.take(person_ids, new_persons),
+        'slug': pc.take(person_slugs, new_persons),
+    }
+    for name in PERSON_FIELDS:
+        persons[name] = get_column(person_rows, f'person.{name}')
+    for name in ('is_me', 'is_on_target_list'):
+        persons[name] = _flag(persons[name])
+
+    firm_rows = table.take(new_firms)
+    firms = {
+        'id': pc.take(firm_ids, new_firms),
+        'name': get_column(firm_rows, 'firm.name'),
+        'slug': pc.take(firm_slugs, new_firms),
+        'current_fund_size': get_column(firm_rows, 'firm.current_fund_size'),
+    }
+
+    locations = {
+        'id': pc.take(location_ids, new_locations),
+        'display_name': pc.take(location_names, new_locations),
+        'kind': pa.array(['location'] * len(new_locations), type=pa.string()),
+    }
+
+    investors = {
+        'id': pa.array(range(start_id, start_id + table.num_rows), type=pa.int32()),
+        'person_id': person_ids,
+        'firm_id': firm_ids,
+        'location_id': location_ids,
+    }
+    for name in INVESTOR_TEXT_COLUMNS:
+        investors[name] = as_array(table.column(name))
+    investors['vote_count'] = pc.fill_null(as_array(table.column('vote_count')), 0)
+    for name in INVESTOR_FLAG_COLUMNS:
+        investors[name] = _flag(table.column(name))
+
+    return {
+        'persons': pa.table(persons),
+        'firms': pa.table(firms),
+        'locations': pa.table(locations),
+        'investors': pa.table(investors),
+    }
+
+
+def load_parent_tables(engine, parent_tables, copy_format='csv', manifest=None, id_range=(0, 0)):
+    """COPY one extracted batch of parent tables; returns rows written per table
+
+    Each table commits in its own transaction; with a manifest, tables the
+    manifest already marks done for id_range are skipped.
+    """
+    counts = {}
+    for table_name in PARENT_TABLES:
+        load = partial(copy_arrow_raw, table=table_name, arrow_table=parent_tables[table_name], format=copy_format)
+        counts[table_name] = run_unit(engine, manifest, table_name, *id_range, load)
+    return counts
+
+
+def finish_parent_load(engine, allocators, last_investor_id):
+    """Move SERIAL sequences past the client-assigned ids so later INSERTs don't collide"""
+    last_ids = {name: allocator.last_id for name, allocator in allocators.items()}
+    last_ids['investors'] = last_investor_id
+    bump_sequences(engine, last_ids)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for investors.parquet - bounded-memory batch iteration
+
+Wraps ParquetFile.iter_batches with column projection so loaders can
+extract and load one record batch at a time instead of materializing the
+whole file (and its deeply nested structs) as Python objects.
+"""
+
+import resource
+import sys
+
+import pyarrow.parquet as pq
+
+# Rows per streamed record batch; keeps nested list columns to a few MB each
+DEFAULT_BATCH_ROWS = 10000
+
+
+def parquet_row_count(path):
+    """Row count from the parquet footer without reading any data pages"""
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def iter_parquet_batches(path, columns=None, batch_size=DEFAULT_BATCH_ROWS):
+    """Yield (start_id, RecordBatch) pairs; start_id is the 1-based investor id of the first row"""
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    start_id = 1
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield start_id, batch
+        start_id += batch.num_rows
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def current_rss_mb():
+    """Resident set size of this process right now in MB (the peak where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Materialized research views with dependency-ordered concurrent refresh
+
+deploy_materialized_views() re-creates the views of
+10_RESEARCH_VIEWS_FIXED.sql (with the normalized_dimension_views.sql
+variants on a normalized database) as materialized views under the same
+names, each with the unique index REFRESH MATERIALIZED VIEW CONCURRENTLY
+needs. refresh_materialized_views() runs at the end of every load: it
+refreshes each materialized view after the ones it reads from, concurrently
+where a unique index allows it so the API keeps reading the old rows, and
+records how long each took in research_view_refreshes.
+
+Materialized views keep no row order - query them with an explicit ORDER BY.
+Rerunning 10_RESEARCH_VIEWS_FIXED.sql needs --drop first, which puts the
+plain views back.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from functools import partial
+
+from sqlalchemy import create_engine, text
+
+from dimension_tables import is_normalized
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, measure_unit, start_run
+from parallel_load import run_load_dag
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+SQL_DIR = os.path.dirname(os.path.abspath(__file__))
+RESEARCH_VIEWS_SQL = os.path.join(SQL_DIR, '10_RESEARCH_VIEWS_FIXED.sql')
+NORMALIZED_VIEWS_SQL = os.path.join(SQL_DIR, 'normalized_dimension_views.sql')
+
+VIEW_RE = re.compile(r'CREATE OR REPLACE VIEW (\w+) AS\s*\n(.*?);\s*$', re.S | re.M)
+
+# Views materialized by --deploy and the columns of their unique index.
+# investor_network stays a plain view: it pairs every investor with each colleague at the
+# same firm or location, so materializing it would store a quadratic number of rows.
+MATERIALIZED_VIEWS = {
+    'investor_profiles': ['investor_id'],
+    'firm_analysis': ['firm_id'],
+    'investment_activity': ['investment_id'],
+    'geographic_investment_map': ['investor_location', 'location_type'],
+    'sector_focus_analysis': ['focus_area', 'focus_category'],
+    'stage_preferences_analysis': ['investment_stage', 'stage_category'],
+    'top_performers': ['investor_id'],
+    'diversity_metrics': ['segment_type', 'segment_name'],
+    'comprehensive_search': ['investor_id'],
+}
+
+# Key columns the plain view does not select, added to the front of the materialized view's select list
+ADDED_KEY_COLUMNS = {
+    'investment_activity': 'inv.id AS investment_id',
+    'top_performers': 'i.id AS investor_id',
+}
+
+REFRESH_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS research_view_refreshes (
+    id SERIAL PRIMARY KEY,
+    view_name VARCHAR(255) NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    seconds DOUBLE PRECISION,
+    concurrent BOOLEAN,
+    row_count BIGINT
+);
+"""
+
+
+def read_view_definitions(path):
+    """{view name: SELECT body} for the CREATE OR REPLACE VIEW statements of a SQL file"""
+    with open(path) as f:
+        return {match.group(1): match.group(2).strip() for match in VIEW_RE.finditer(f.read())}
+
+
+def view_definitions(conn):
+    """Research view bodies for this database's layout"""
+    definitions = read_view_definitions(RESEARCH_VIEWS_SQL)
+    if is_normalized(conn):
+        definitions.update(read_view_definitions(NORMALIZED_VIEWS_SQL))
+    return definitions
+
+
+def dependent_views(conn, relations):
+    """{name: relkind} of the views ('v') and materialized views ('m') reading relations, directly or via other views"""
+    return {row[0]: row[1] for row in conn.execute(text("""
+        WITH RECURSIVE readers(oid) AS (
+            SELECT r.ev_class
+            FROM pg_depend d
+            JOIN pg_rewrite r ON d.classid = 'pg_rewrite'::regclass AND r.oid = d.objid
+            JOIN pg_class s ON s.oid = d.refobjid
+            WHERE s.relname = ANY(:relations) AND s.relnamespace = current_schema()::regnamespace
+              AND r.ev_class <> d.refobjid
+            UNION
+            SELECT r.ev_class
+            FROM readers
+            JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.refobjid = readers.oid
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE r.ev_class <> d.refobjid
+        )
+        SELECT c.relname, c.relkind::text FROM readers JOIN pg_class c ON c.oid = readers.oid
+        WHERE c.relname <> ALL(:relations)
+    """), {'relations': list(relations)})}
+
+
+def check_redeployable(views):
+    """Raise unless redeploy_views() can re-create every one of dependent_views()"""
+    known = read_view_definitions(RESEARCH_VIEWS_SQL)
+    unknown = sorted(name for name, kind in views.items()
+                     if name not in known or (kind == 'm' and name not in MATERIALIZED_VIEWS))
+    if unknown:
+        raise ValueError(f"Views {', '.join(unknown)} read the tables about to be replaced and cannot be "
+                         "re-created afterwards - drop them first")
+
+
+def redeploy_views(engine, views):
+    """Re-create dropped research views, plain or materialized as they were, in definition order"""
+    with engine.connect() as conn:
+        definitions = view_definitions(conn)
+    for name in definitions:
+        if views.get(name) == 'm':
+            deploy_materialized_views(engine, [name])
+        elif views.get(name) == 'v':
+            with engine.connect() as conn:
+                conn.execute(text(f"CREATE VIEW {name} AS\n{definitions[name]}"))
+                conn.commit()
+    if views:
+        print(f"♻️ Re-created {len(views)} research views over the new tables")
+
+
+def _relkind(conn, name):
+    return conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+                        {'name': name}).scalar()
+
+
+def _drop_view(conn, name):
+    kind = _relkind(conn, name)
+    if kind == 'v':
+        conn.execute(text(f"DROP VIEW {name}"))
+    elif kind == 'm':
+        conn.execute(text(f"DROP MATERIALIZED VIEW {name}"))
+
+
+def deploy_materialized_views(engine, views=None):
+    """Replace the research views with populated, uniquely indexed materialized views"""
+    views = views or list(MATERIALIZED_VIEWS)
+    with engine.connect() as conn:
+        definitions = view_definitions(conn)
+    print(f"🏗️ Deploying {len(views)} materialized research views...")
+    for name in views:
+        started = time.perf_counter()
+        body, key = definitions[name], MATERIALIZED_VIEWS[name]
+        if name in ADDED_KEY_COLUMNS:
+            body = re.sub(r'^SELECT\b', f"SELECT {ADDED_KEY_COLUMNS[name]},", body)
+        with engine.connect() as conn:
+            _drop_view(conn, name)
+            conn.execute(text(f"CREATE MATERIALIZED VIEW {name} AS\n{body}\nWITH DATA"))
+            conn.execute(text(f"CREATE UNIQUE INDEX {name}_key ON {name} ({', '.join(key)})"))
+            conn.commit()
+        print(f"  ✅ {name} ({', '.join(key)}) in {time.perf_counter() - started:.2f}s")
+
+
+def drop_materialized_views(engine, views=None):
+    """Put the plain research views back in place of the materialized ones"""
+    views = views or list(MATERIALIZED_VIEWS)
+    with engine.connect() as conn:
+        definitions = view_definitions(conn)
+        for name in views:
+            _drop_view(conn, name)
+            conn.execute(text(f"CREATE VIEW {name} AS\n{definitions[name]}"))
+        conn.commit()
+    print(f"↩️ Restored {len(views)} plain research views")
+
+
+def materialized_views(conn):
+    """{name: (populated, refreshable concurrently)} for the materialized views in the current schema"""
+    return {row[0]: (row[1], row[2]) for row in conn.execute(text("""
+        SELECT c.relname, c.relispopulated, EXISTS (
+            SELECT 1 FROM pg_index i
+            WHERE i.indrelid = c.oid AND i.indisunique AND i.indpred IS NULL AND i.indexprs IS NULL)
+        FROM pg_class c
+        WHERE c.relkind = 'm' AND c.relnamespace = current_schema()::regnamespace
+    """))}
+
+
+def view_dependencies(conn, names):
+    """{materialized view: materialized views it reads}, following reads through plain views"""
+    reads = {}
+    for view, source in conn.execute(text("""
+        SELECT DISTINCT v.relname, s.relname
+        FROM pg_rewrite r
+        JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+        JOIN pg_class v ON v.oid = r.ev_class
+        JOIN pg_class s ON s.oid = d.refobjid
+        WHERE v.relkind IN ('m', 'v') AND s.relkind IN ('m', 'v') AND v.oid <> s.oid
+          AND v.relnamespace = current_schema()::regnamespace
+    """)):
+        reads.setdefault(view, set()).add(source)
+
+    def sources(view, seen):
+        for source in reads.get(view, ()):
+            if source in seen:
+                continue
+            seen.add(source)
+            if source not in names:
+                sources(source, seen)
+        return seen
+
+    return {name: sorted(source for source in sources(name, set()) if source in names) for name in names}
+
+
+def _refresh(engine, name, concurrently):
+    with measure_unit(name) as unit_metrics:
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{name}"))
+            conn.commit()
+            seconds = time.perf_counter() - started
+            # Planner estimate - an exact count would rescan the whole view after every refresh
+            unit_metrics['rows'] = conn.execute(text(
+                "SELECT GREATEST(reltuples, 0)::BIGINT FROM pg_class WHERE oid = to_regclass(:name)"
+            ), {'name': name}).scalar()
+    return seconds, unit_metrics['rows']
+
+
+def refresh_materialized_views(engine, workers=2):
+    """Refresh every materialized view in dependency order; returns {name: (seconds, rows, concurrent)}"""
+    with engine.connect() as conn:
+        views = materialized_views(conn)
+        if not views:
+            print("⏭️ No materialized research views deployed (research_views.py --deploy)")
+            return {}
+        dependencies = view_dependencies(conn, views)
+
+    # A view that was never populated has to be filled by a plain refresh first
+    concurrent = {name: populated and unique for name, (populated, unique) in views.items()}
+    print(f"🔄 Refreshing {len(views)} materialized views in dependency order...")
+    with measure_stage('views'):
+        started = time.perf_counter()
+        results = run_load_dag({name: partial(_refresh, engine, name, concurrent[name]) for name in views},
+                               dependencies, max_workers=workers)
+        elapsed = time.perf_counter() - started
+
+    with engine.connect() as conn:
+        conn.execute(text(REFRESH_LOG_SCHEMA))
+        conn.execute(text("""
+            INSERT INTO research_view_refreshes (view_name, seconds, concurrent, row_count)
+            VALUES (:name, :seconds, :concurrent, :rows)
+        """), [{'name': name, 'seconds': seconds, 'concurrent': concurrent[name], 'rows': rows}
+               for name, (seconds, rows) in results.items()])
+        conn.commit()
+
+    for name, (seconds, rows) in sorted(results.items(), key=lambda item: -item[1][0]):
+        mode = 'concurrently' if concurrent[name] else 'blocking'
+        print(f"  ✅ {name}: {rows:,} rows in {seconds:.2f}s ({mode})")
+    print(f"✅ Views refreshed in {elapsed:.2f}s")
+    return {name: (seconds, rows, concurrent[name]) for name, (seconds, rows) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deploy and refresh the materialized research views')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--deploy', action='store_true',
+                        help='Replace the research views with materialized views and their unique indexes')
+    action.add_argument('--drop', action='store_true',
+                        help='Replace the materialized research views with the plain views again')
+    parser.add_argument('--views', nargs='+', choices=list(MATERIALIZED_VIEWS),
+                        help='Only deploy or drop these views (default: all)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Independent views refreshed at once, one connection each (default: 2)')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('research_views', args.trace_allocations)
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, pool_size=max(5, args.workers),
+                               connect_args=counting_connect_args())
+        if args.deploy:
+            deploy_materialized_views(engine, args.views)
+        elif args.drop:
+            drop_materialized_views(engine, args.views)
+        else:
+            refresh_materialized_views(engine, workers=args.workers)
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Research views failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
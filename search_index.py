@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Full-text search index for investors
+
+comprehensive_search builds searchable_text by concatenating the joined
+columns on every query, so each search is a sequential scan. Instead the
+loader materializes one weighted tsvector per investor in investor_search,
+behind a GIN index:
+
+    A  person name
+    B  firm name
+    C  headline and the display names of the investor's sectors
+    D  areas_of_interest_freeform
+
+build_search_index() rebuilds the table after a bulk load;
+update_search_index_raw() rewrites the documents of single investors inside
+the delta sync transaction. search_investors() answers websearch-style
+queries ranked by ts_rank.
+"""
+
+import argparse
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from load_metrics import add_metrics_arguments, counting_connect_args, finish_run, measure_stage, start_run
+
+# Database connection settings
+DB_CONFIG = {
+    'host': '135.181.194.2',
+    'port': 5433,
+    'database': 'signal_db',
+    'username': 'damian.k',
+    'password': 'Adminaccount1!'
+}
+
+# Text search configuration of the documents and the queries; both have to match
+SEARCH_CONFIG = 'english'
+
+SEARCH_RESULTS = 20
+
+SEARCH_DOCUMENTS_SQL = f"""
+SELECT
+    i.id AS investor_id,
+    setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(p.name, '')), 'A') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(f.name, '')), 'B') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(i.headline, '') || ' ' || COALESCE(s.sectors, '')), 'C') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(i.areas_of_interest_freeform, '')), 'D') AS search_vector
+FROM investors i
+LEFT JOIN persons p ON p.id = i.person_id
+LEFT JOIN firms f ON f.id = i.firm_id
+LEFT JOIN (
+    SELECT investor_id, string_agg(display_name, ' ') AS sectors
+    FROM areas_of_interest
+    {{sector_filter}}
+    GROUP BY investor_id
+) s ON s.investor_id = i.id
+{{investor_filter}}
+"""
+
+INVESTOR_SEARCH_SCHEMA = f"""
+DROP TABLE IF EXISTS investor_search CASCADE;
+CREATE TABLE investor_search AS
+{SEARCH_DOCUMENTS_SQL.format(sector_filter='', investor_filter='')};
+ALTER TABLE investor_search ALTER COLUMN investor_id SET NOT NULL;
+ALTER TABLE investor_search ADD PRIMARY KEY (investor_id);
+ALTER TABLE investor_search ADD FOREIGN KEY (investor_id) REFERENCES investors(id) ON DELETE CASCADE;
+CREATE INDEX idx_investor_search_vector ON investor_search USING GIN (search_vector);
+ANALYZE investor_search;
+"""
+
+SEARCH_SQL = f"""
+SELECT
+    i.id AS investor_id,
+    p.name AS investor_name,
+    f.name AS firm_name,
+    i.headline,
+    ts_rank(s.search_vector, query) AS rank
+FROM investor_search s
+CROSS JOIN websearch_to_tsquery('{SEARCH_CONFIG}', :query) query
+JOIN investors i ON i.id = s.investor_id
+LEFT JOIN persons p ON p.id = i.person_id
+LEFT JOIN firms f ON f.id = i.firm_id
+WHERE s.search_vector @@ query
+ORDER BY rank DESC, i.id
+LIMIT :limit
+"""
+
+
+def build_search_index(engine):
+    """Rebuild investor_search and its GIN index from the loaded investors"""
+    print("🔎 Building full-text search index...")
+    with measure_stage('search index') as stage_metrics:
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text(INVESTOR_SEARCH_SCHEMA))
+            stage_metrics['rows'] = conn.execute(text("SELECT COUNT(*) FROM investor_search")).scalar()
+            conn.commit()
+    print(f"✅ Indexed {stage_metrics['rows']:,} investors for search in {time.perf_counter() - started:.2f}s")
+    return stage_metrics['rows']
+
+
+def update_search_index_raw(raw_conn, investor_ids):
+    """Rewrite the search documents of some investors; caller owns the transaction
+
+    Does nothing on databases where the index was never built.
+    """
+    with raw_conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('investor_search')")
+        if cursor.fetchone()[0] is None or not investor_ids:
+            return 0
+        cursor.execute("DELETE FROM investor_search WHERE investor_id = ANY(%(ids)s)", {'ids': investor_ids})
+        cursor.execute("INSERT INTO investor_search (investor_id, search_vector) " + SEARCH_DOCUMENTS_SQL.format(
+            sector_filter='WHERE investor_id = ANY(%(ids)s)', investor_filter='WHERE i.id = ANY(%(ids)s)'),
+            {'ids': investor_ids})
+        return cursor.rowcount
+
+
+def search_investors(conn, query, limit=SEARCH_RESULTS):
+    """Investors matching a websearch-style query ("quoted phrases", or, -exclusions), best ts_rank first"""
+    return conn.execute(text(SEARCH_SQL), {'query': query, 'limit': limit}).mappings().fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the investor full-text search index')
+    parser.add_argument('--build', action='store_true',
+                        help='Rebuild investor_search and its GIN index')
+    parser.add_argument('--search', help='Run a ranked search, e.g. "fintech seed" -crypto')
+    parser.add_argument('--limit', type=int, default=SEARCH_RESULTS,
+                        help=f'Results to show (default: {SEARCH_RESULTS})')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    start_run('search_index', args.trace_allocations)
+
+    try:
+        connection_string = f"postgresql://{DB_CONFIG['username']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        engine = create_engine(connection_string, connect_args=counting_connect_args())
+        if args.build:
+            build_search_index(engine)
+        if args.search:
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                results = search_investors(conn, args.search, args.limit)
+            print(f"\n🔎 {len(results)} results for {args.search!r} in {(time.perf_counter() - started) * 1000:.1f} ms:")
+            for row in results:
+                print(f"  {row['rank']:.4f}  #{row['investor_id']} {row['investor_name'] or '-'}"
+                      f" ({row['firm_name'] or 'no firm'}) - {row['headline'] or ''}")
+        finish_run(args)
+    except Exception as e:
+        print(f"❌ Search index failed: {e}")
+        import traceback
+        traceback.print_exc()
+        finish_run(args, e)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
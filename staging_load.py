@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Set-based staging load for positions and degrees
+
+Flattened rows are COPY-loaded with their natural keys (person slug,
+company name, school name) into UNLOGGED staging tables, then INSERT ...
+SELECT ... JOIN statements resolve every foreign key in one pass - no
+per-row lookups. Company and school names are first resolved to canonical
+rows by entity_resolution, so the joins go through the alias tables.
+"""
+
+import time
+
+from bulk_copy import copy_arrow_raw
+from entity_resolution import company_rows, new_resolvers, school_rows
+
+STAGING_SCHEMA = """
+CREATE UNLOGGED TABLE IF NOT EXISTS stg_positions (
+    person_slug TEXT,
+    company_name TEXT,
+    title TEXT,
+    start_month TEXT,
+    start_year TEXT,
+    end_month TEXT,
+    end_year TEXT
+);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS stg_degrees (
+    person_slug TEXT,
+    school_name TEXT,
+    degree_name TEXT,
+    field_of_study TEXT
+);
+
+TRUNCATE stg_positions, stg_degrees;
+"""
+
+# (label, statement) pairs run in order once staging is populated and the names are resolved
+RESOLVE_STATEMENTS = [
+    ('positions', """
+        INSERT INTO positions (person_id, company_id, title, start_month, start_year, end_month, end_year)
+        SELECT p.id, a.company_id, s.title, s.start_month, s.start_year, s.end_month, s.end_year
+        FROM stg_positions s
+        JOIN persons p ON p.slug = s.person_slug
+        LEFT JOIN company_aliases a ON a.alias = s.company_name
+    """),
+    ('degrees', """
+        INSERT INTO degrees (person_id, school_id, degree_name, field_of_study)
+        SELECT p.id, a.school_id, s.degree_name, s.field_of_study
+        FROM stg_degrees s
+        JOIN persons p ON p.slug = s.person_slug
+        LEFT JOIN school_aliases a ON a.alias = s.school_name
+    """),
+]
+
+STAGING_COLUMNS = {
+    'stg_positions': ['person_slug', 'company_name', 'title', 'start_month', 'start_year', 'end_month', 'end_year'],
+    'stg_degrees': ['person_slug', 'school_name', 'degree_name', 'field_of_study'],
+}
+
+
+def stage_and_resolve(raw_conn, positions, degrees, copy_format, resolvers):
+    """Stage positions/degrees and run the resolve statements on raw_conn without committing
+
+    positions and degrees are the Arrow tables produced by
+    arrow_extract.extract_positions / extract_degrees. resolvers
+    (entity_resolution.new_resolvers) map the company and school names
+    to canonical rows, creating the new ones. Returns a dict of rows
+    inserted per target table.
+    """
+    counts = {
+        'companies': resolvers['companies'].resolve(raw_conn, company_rows(positions), copy_format),
+        'schools': resolvers['schools'].resolve(raw_conn, school_rows(degrees), copy_format),
+    }
+    with raw_conn.cursor() as cursor:
+        cursor.execute(STAGING_SCHEMA)
+
+    staged = {'stg_positions': positions, 'stg_degrees': degrees}
+    for staging_table, batch in staged.items():
+        batch = batch.select(STAGING_COLUMNS[staging_table])
+        copy_arrow_raw(raw_conn, staging_table, batch, format=copy_format)
+        print(f"  📥 Staged {batch.num_rows} rows in {staging_table}")
+
+    with raw_conn.cursor() as cursor:
+        cursor.execute("ANALYZE stg_positions; ANALYZE stg_degrees")
+        for label, statement in RESOLVE_STATEMENTS:
+            started = time.perf_counter()
+            cursor.execute(statement)
+            counts[label] = cursor.rowcount
+            print(f"  ✅ Inserted {cursor.rowcount} {label} ({time.perf_counter() - started:.2f}s)")
+        cursor.execute("TRUNCATE stg_positions, stg_degrees")
+    return counts
+
+
+def load_via_staging(engine, positions, degrees, copy_format='csv'):
+    """Stage positions/degrees and resolve FKs set-based in a single transaction
+
+    Company and school names go through the alias tables like every other
+    loader's, so later runs resolve them to the same canonical rows.
+    """
+    with engine.connect() as conn:
+        resolvers = new_resolvers(conn)
+    raw_conn = engine.raw_connection()
+    try:
+        counts = stage_and_resolve(raw_conn, positions, degrees, copy_format, resolvers)
+        raw_conn.commit()
+        return counts
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
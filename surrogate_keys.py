@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Client-side surrogate key allocation for bulk loads
+
+Integer ids are assigned in Python from natural keys (person/firm slugs,
+location names) in first-seen order, so parents and children can be
+COPY-loaded with their foreign keys already resolved. SERIAL sequences
+are bumped once at the end of the load instead of round-tripping
+INSERT ... RETURNING id for every row.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import text
+
+from arrow_extract import as_array, map_keys
+
+
+class KeyAllocator:
+    """Dense integer ids for natural keys, stable across batches of one load"""
+
+    def __init__(self, start=1):
+        self.ids = {}
+        self.next_id = start
+
+    @classmethod
+    def from_query(cls, conn, sql):
+        """Seed from existing (natural_key, id) rows so incremental loads keep old ids"""
+        allocator = cls()
+        for key, key_id in conn.execute(text(sql)):
+            allocator.ids[key] = key_id
+            allocator.next_id = max(allocator.next_id, key_id + 1)
+        return allocator
+
+    @property
+    def last_id(self):
+        """Highest id handed out so far (0 when empty)"""
+        return self.next_id - 1
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, key):
+        return self.ids.get(key)
+
+    def assign(self, keys):
+        """Map a key array to ids, allocating unseen keys in first-seen order
+
+        Returns (ids, new_rows): ids is an int32 array aligned with keys (null
+        for null keys) and new_rows holds the row index of the first
+        occurrence of every newly allocated key, in id order.
+        """
+        encoded = as_array(pc.dictionary_encode(as_array(keys)))
+        dictionary = encoded.dictionary.to_pylist()
+        dict_ids = np.empty(len(dictionary), dtype=np.int32)
+        new_codes = []
+        for code, key in enumerate(dictionary):
+            key_id = self.ids.get(key)
+            if key_id is None:
+                key_id = self.next_id
+                self.ids[key] = key_id
+                self.next_id += 1
+                new_codes.append(code)
+            dict_ids[code] = key_id
+
+        ids = pc.take(pa.array(dict_ids, type=pa.int32()), encoded.indices)
+        if not new_codes:
+            return ids, np.empty(0, dtype=np.int64)
+
+        codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False)
+        unique_codes, first_rows = np.unique(codes, return_index=True)
+        first_row_by_code = dict(zip(unique_codes.tolist(), first_rows.tolist()))
+        new_rows = np.array([first_row_by_code[code] for code in new_codes], dtype=np.int64)
+        return ids, new_rows
+
+    def lookup(self, keys):
+        """Map a key array to already-allocated ids without allocating (null if unknown)"""
+        return map_keys(keys, self.ids)
+
+
+def bump_sequences(engine, last_ids):
+    """Advance each table's SERIAL sequence past the ids allocated client-side, in one round trip"""
+    if not last_ids:
+        return
+    calls = []
+    for table, last_id in last_ids.items():
+        # Never move a sequence below ids that already exist in the table
+        high = f"GREATEST({int(last_id)}, (SELECT COALESCE(MAX(id), 0) FROM {table}))"
+        calls.append(f"setval(pg_get_serial_sequence('{table}', 'id'), GREATEST({high}, 1), {high} > 0)")
+    calls = ', '.join(calls)
+    with engine.connect() as conn:
+        conn.execute(text(f"SELECT {calls}"))
+        conn.commit()
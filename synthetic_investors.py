@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+"""
+Synthetic investors.parquet generator for benchmarks
+
+Writes files with the exact nested layout of
+Sample_Investor_DB/investors.schema at any multiple of the 32,780-row
+sample. List lengths are skewed the way the real export is - most
+investors have a handful of positions or connections and a few have
+hundreds - and names, firms, companies and schools repeat with
+power-law popularity, so dimension lookups and COPY sizes behave like
+production. Rows are generated with vectorized numpy/Arrow kernels one
+row group at a time, so 100x files are written in bounded memory.
+
+Output is deterministic for a (rows, seed, GENERATOR_VERSION) triple;
+bump GENERATOR_VERSION whenever the distributions change so benchmark
+results are only compared on identical data.
+"""
+
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+GENERATOR_VERSION = 1
+
+# Rows in the real Sample_Investor_DB/investors.parquet (scale 1)
+BASE_ROWS = 32780
+
+DEFAULT_ROW_GROUP_ROWS = 16384
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Sample_Investor_DB', 'investors.schema')
+
+# list -> (share of empty lists, Zipf exponent of the length tail, longest list)
+LIST_LENGTHS = {
+    'roles': (0.2, 3.0, 4),
+    'stages': (0.35, 2.2, 8),
+    'degrees': (0.35, 2.8, 6),
+    'positions': (0.15, 1.9, 40),
+    'media_links': (0.7, 1.8, 30),
+    'investments': (0.45, 1.5, 300),
+    'total_raised': (0.3, 4.0, 2),
+    'coinvestors': (0.4, 2.0, 40),
+    'investment_rounds': (0.1, 3.0, 6),
+    'funding_rounds': (0.6, 1.6, 150),
+    'network_investors': (0.5, 1.8, 200),
+    'network_scouts': (0.8, 1.7, 100),
+    'investing_connections': (0.4, 1.7, 500),
+    'image_urls': (0.1, 4.0, 3),
+    'investment_locations': (0.4, 2.5, 10),
+    'areas_of_interest': (0.3, 1.8, 25),
+    'investor_lists': (0.7, 2.0, 20),
+}
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+               'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Wei', 'Priya',
+               'Carlos', 'Fatima', 'Hiroshi', 'Olga', 'Ahmed', 'Chloe', 'Mateo', 'Aisha', 'Lukas', 'Mei']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee',
+              'Chen', 'Patel', 'Kim', 'Nguyen', 'Cohen', 'Schmidt', 'Rossi', 'Silva', 'Tanaka', 'Okafor', 'Ivanova']
+FIRM_WORDS = ['Sequoia', 'Granite', 'Harbor', 'Summit', 'Lightspeed', 'Founders', 'Northstar', 'Redwood', 'Atlas',
+              'Beacon', 'Catalyst', 'Frontier', 'Pioneer', 'Horizon', 'Foundry', 'Canyon', 'Union', 'Bessemer']
+FIRM_SUFFIXES = ['Ventures', 'Capital', 'Partners', 'Fund', 'Venture Partners', 'Investments', 'Angels']
+COMPANY_WORDS = ['Acme', 'Stripe', 'Nova', 'Quantum', 'Blue', 'Bright', 'Cloud', 'Data', 'Green', 'Hyper', 'Insight',
+                 'Loop', 'Meta', 'Orbit', 'Pixel', 'Rocket', 'Signal', 'Spark', 'Terra', 'Vector', 'Zen', 'Open']
+COMPANY_KINDS = ['Labs', 'AI', 'Health', 'Pay', 'Robotics', 'Systems', 'Networks', 'Bio', 'Energy', 'Software']
+# Spelling variants of the same company/school, as they appear in scraped profiles
+COMPANY_VARIANTS = [' Inc.', ', Inc.', ' Inc', ' LLC', ' Corp', ' Corporation']
+SCHOOLS = ['Stanford University', 'Harvard University', 'Massachusetts Institute of Technology',
+           'University of Pennsylvania', 'University of California, Berkeley', 'Columbia University',
+           'Yale University', 'Princeton University', 'Cornell University', 'University of Michigan',
+           'Duke University', 'New York University', 'University of Oxford', 'University of Cambridge',
+           'INSEAD', 'London Business School', 'Tsinghua University', 'IIT Bombay', 'ETH Zurich']
+DEGREES = ['BA', 'BS', 'MBA', 'MS', 'PhD', 'JD', 'BBA', 'MEng']
+FIELDS_OF_STUDY = ['Economics', 'Computer Science', 'Finance', 'Business Administration', 'Engineering',
+                   'Mathematics', 'Physics', 'History', 'Political Science', 'Biology']
+TITLES = ['Partner', 'Managing Partner', 'General Partner', 'Principal', 'Associate', 'Founder', 'Co-Founder',
+          'CEO', 'CTO', 'VP Engineering', 'Product Manager', 'Software Engineer', 'Analyst', 'Venture Partner']
+CITIES = ['San Francisco Bay Area', 'New York City', 'Los Angeles', 'Boston', 'London', 'Seattle', 'Austin',
+          'Chicago', 'Berlin', 'Paris', 'Tel Aviv', 'Singapore', 'Toronto', 'Miami', 'Denver', 'Atlanta',
+          'Washington DC', 'Bangalore', 'Sao Paulo', 'Stockholm', 'Amsterdam', 'Sydney', 'Dubai', 'Lagos']
+STAGES = [('stage', 'Pre-Seed'), ('stage', 'Seed'), ('stage', 'Series A'), ('stage', 'Series B'),
+          ('stage', 'Series C'), ('stage', 'Growth'), ('stage', 'Series D+'), ('stage', 'Angel')]
+SECTORS = [('vertical', name) for name in [
+    'SaaS', 'Fintech', 'AI', 'Healthcare', 'Consumer', 'Enterprise', 'Crypto', 'Climate', 'Marketplaces',
+    'Developer Tools', 'Biotech', 'Edtech', 'Gaming', 'Security', 'Hardware', 'Real Estate', 'Food', 'Mobility',
+    'Media', 'Insurance', 'Robotics', 'Space', 'Web3', 'Future of Work', 'E-commerce', 'Logistics']]
+REGIONS = [('location', name) for name in ['United States', 'Europe', 'Latin America', 'Asia', 'Africa',
+                                            'Canada', 'Middle East', 'Israel', 'India', 'Oceania']]
+ROUND_STAGES = ['Pre Seed Round', 'Seed Round', 'Series A', 'Series B', 'Series C', 'Series D', 'Venture Round']
+AMOUNTS = ['$500K', '$1M', '$2M', '$3.5M', '$5M', '$10M', '$25M', '$50M', '$100M']
+CHECK_SIZES = ['$25K', '$50K', '$100K', '$250K', '$500K', '$1M', '$2M', '$5M', '$10M']
+FUND_SIZES = ['$10M', '$25M', '$50M', '$100M', '$250M', '$500M', '$1B']
+ROLES = ['investor', 'founder', 'operator', 'advisor']
+BOARD_TITLES = ['Board Member', 'Board Observer', 'Chairman']
+
+KIND_DISPLAY = pa.struct([('kind', pa.string()), ('display_name', pa.string())])
+
+
+def _list_type(item=pa.string()):
+    # Parquet LIST layout with DuckDB's list/element naming
+    return pa.list_(pa.field('element', item))
+
+
+NETWORK_PERSON = pa.struct([('name', pa.string()), ('first_name', pa.string()),
+                            ('last_name', pa.string()), ('slug', pa.string())])
+NETWORK_FIRM = pa.struct([('name', pa.string()), ('slug', pa.string())])
+NETWORK_LIST = pa.struct([
+    ('list_type', pa.string()),
+    ('edges', _list_type(pa.struct([('node', pa.struct([
+        ('position', pa.string()), ('person', NETWORK_PERSON), ('firm', NETWORK_FIRM),
+        ('image_urls', _list_type()),
+    ]))]))),
+])
+BOARD_ROLE = pa.struct([('title', pa.string())])
+PAGE_INFO = pa.struct([('hasNextPage', pa.bool_())])
+MONTH_YEAR = pa.struct([('month', pa.string()), ('year', pa.string())])
+
+# Arrow mirror of Sample_Investor_DB/investors.schema, field for field and in file order
+INVESTORS_SCHEMA = pa.schema([
+    ('claimed', pa.bool_()),
+    ('can_edit', pa.bool_()),
+    ('include_in_list', pa.bool_()),
+    ('in_founder_investor_list', pa.bool_()),
+    ('in_diverse_investor_list', pa.bool_()),
+    ('in_female_investor_list', pa.bool_()),
+    ('in_invests_in_diverse_founders_investor_list', pa.bool_()),
+    ('in_invests_in_female_founders_investor_list', pa.bool_()),
+    ('leads_rounds', pa.string()),
+    ('person', pa.struct([
+        ('slug', pa.string()), ('first_name', pa.string()), ('last_name', pa.string()), ('name', pa.string()),
+        ('linkedin_url', pa.string()), ('facebook_url', pa.string()), ('twitter_url', pa.string()),
+        ('crunchbase_url', pa.string()), ('angellist_url', pa.string()), ('roles', _list_type()),
+        ('url', pa.string()), ('is_me', pa.bool_()), ('first_degree_count', pa.int64()),
+        ('is_on_target_list', pa.bool_()), ('relationship_strength', pa.string()),
+        ('email_from_my_contacts_list', pa.string()),
+    ])),
+    ('stages', _list_type(KIND_DISPLAY)),
+    ('position', pa.string()),
+    ('min_investment', pa.string()),
+    ('max_investment', pa.string()),
+    ('target_investment', pa.string()),
+    ('areas_of_interest_freeform', pa.string()),
+    ('no_current_interest_freeform', pa.string()),
+    ('vote_count', pa.int64()),
+    ('headline', pa.string()),
+    ('previous_position', pa.string()),
+    ('previous_firm', pa.string()),
+    ('location', pa.struct([('display_name', pa.string())])),
+    ('firm', pa.struct([('current_fund_size', pa.string()), ('name', pa.string()), ('slug', pa.string())])),
+    ('degrees', _list_type(pa.struct([
+        ('name', pa.string()), ('field_of_study', pa.string()),
+        ('school', pa.struct([('name', pa.string()), ('display_name', pa.string()),
+                              ('total_student_count', pa.int64())])),
+    ]))),
+    ('positions', _list_type(pa.struct([
+        ('title', pa.string()),
+        ('company', pa.struct([('name', pa.string()), ('display_name', pa.string()),
+                               ('total_employee_count', pa.int64())])),
+        ('start_date', MONTH_YEAR),
+        ('end_date', MONTH_YEAR),
+    ]))),
+    ('media_links', _list_type(pa.struct([('url', pa.string()), ('title', pa.string()),
+                                            ('image_url', pa.string())]))),
+    ('investments_on_record', pa.struct([
+        ('pageInfo', PAGE_INFO),
+        ('record_count', pa.int64()),
+        ('edges', _list_type(pa.struct([('node', pa.struct([
+            ('company_display_name', pa.string()),
+            ('total_raised', _list_type()),
+            ('coinvestor_names', _list_type()),
+            ('investor_profile_funding_rounds', _list_type(pa.struct([
+                ('is_lead', pa.bool_()), ('board_role', BOARD_ROLE),
+                ('funding_round', pa.struct([('stage', pa.string()), ('date', pa.timestamp('us')),
+                                             ('amount', pa.string())])),
+            ]))),
+        ]))]))),
+    ])),
+    ('investor_profile_funding_rounds', pa.struct([
+        ('pageInfo', PAGE_INFO),
+        ('record_count', pa.int64()),
+        ('edges', _list_type(pa.struct([('node', pa.struct([
+            ('is_lead', pa.bool_()), ('board_role', BOARD_ROLE),
+            ('funding_round', pa.struct([('amount', pa.string()), ('date', pa.timestamp('us')),
+                                         ('stage', pa.string()),
+                                         ('company', pa.struct([('display_name', pa.string())]))])),
+        ]))]))),
+    ])),
+    ('network_list_investor_profiles', NETWORK_LIST),
+    ('network_list_scouts_and_angels_profiles', NETWORK_LIST),
+    ('investing_connections', pa.struct([
+        ('record_count', pa.int64()),
+        ('edges', _list_type(pa.struct([('node', pa.struct([('target_person', pa.struct([
+            ('name', pa.string()), ('slug', pa.string()), ('first_name', pa.string()), ('last_name', pa.string()),
+            ('investor_profile', pa.struct([('firm', NETWORK_FIRM), ('image_urls', _list_type())])),
+        ]))]))]))),
+    ])),
+    ('has_profile_vote', pa.bool_()),
+    ('image_urls_edit_mode', _list_type()),
+    ('is_preferred_coinvestor', pa.string()),
+    ('investment_locations', _list_type(KIND_DISPLAY)),
+    ('areas_of_interest', _list_type(KIND_DISPLAY)),
+    ('image_urls', _list_type()),
+    ('investor_lists', _list_type(pa.struct([
+        ('slug', pa.string()), ('stage_name', pa.string()), ('vertical', KIND_DISPLAY), ('location', KIND_DISPLAY),
+    ]))),
+])
+
+
+class _Chunk:
+    """Random draws for one row group; every helper returns Arrow arrays"""
+
+    def __init__(self, seed, chunk_index, first_row, rows, total_rows):
+        self.rng = np.random.default_rng([seed, chunk_index])
+        self.first_row = first_row
+        self.rows = rows
+        self.total_rows = total_rows
+
+    def chance(self, share, size=None):
+        return self.rng.random(self.rows if size is None else size) < share
+
+    def mask(self, share, size=None):
+        return pa.array(self.chance(share, size))
+
+    def lengths(self, name, size=None):
+        empty_share, exponent, longest = LIST_LENGTHS[name]
+        size = self.rows if size is None else size
+        lengths = np.minimum(self.rng.zipf(exponent, size), longest)
+        lengths[self.chance(empty_share, size)] = 0
+        return lengths
+
+    def popular(self, pool_size, size, skew=3.0):
+        """Indexes into a pool where low indexes are drawn far more often (power-law popularity)"""
+        return (max(pool_size, 1) * self.rng.random(size) ** skew).astype(np.int64)
+
+    def pick(self, values, size=None, skew=3.0):
+        size = self.rows if size is None else size
+        return pc.take(pa.array(values), pa.array(self.popular(len(values), size, skew)))
+
+    def sometimes_null(self, array, share):
+        return pc.if_else(self.mask(share, len(array)), pa.scalar(None, array.type), array)
+
+    def integers(self, low, high, size=None):
+        return pa.array(self.rng.integers(low, high, self.rows if size is None else size), type=pa.int64())
+
+    def list_of(self, lengths, values):
+        """Lists with the given lengths; half of the empty ones are null, as in the DuckDB export"""
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        null = (lengths == 0) & self.chance(0.5, len(lengths))
+        return pa.ListArray.from_arrays(pa.array(offsets), values, mask=pa.array(null))
+
+    def kind_display(self, pairs, size):
+        chosen = self.popular(len(pairs), size, 4.0)
+        return _struct({'kind': pc.take(pa.array([kind for kind, _ in pairs]), pa.array(chosen)),
+                        'display_name': pc.take(pa.array([name for _, name in pairs]), pa.array(chosen))})
+
+
+def _struct(fields, mask=None):
+    return pa.StructArray.from_arrays(list(fields.values()), names=list(fields), mask=mask)
+
+
+def _labels(*parts, separator=''):
+    """Element-wise concatenation of string arrays, scalars and integer arrays"""
+    strings = []
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = pa.array(part)
+        if not isinstance(part, str) and not pa.types.is_string(part.type):
+            part = pc.cast(part, pa.string())
+        strings.append(part)
+    return pc.binary_join_element_wise(*strings, separator)
+
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-')
+
+
+def _slugify(names):
+    return pc.replace_substring_regex(pc.utf8_lower(names), r'[^a-z0-9]+', '-')
+
+
+def person_names(person_ids):
+    """(first_name, last_name, name, slug) derived from the person number alone
+
+    Network targets and coinvestors reference persons by number, so their
+    names and slugs must be reproducible without looking the person up.
+    """
+    first_index = pa.array(person_ids * 7919 % len(FIRST_NAMES))
+    last_index = pa.array(person_ids * 104729 // 7 % len(LAST_NAMES))
+    first = pc.take(pa.array(FIRST_NAMES), first_index)
+    last = pc.take(pa.array(LAST_NAMES), last_index)
+    name = _labels(first, last, separator=' ')
+    slug = _labels(pc.take(pa.array([_slug(value) for value in FIRST_NAMES]), first_index),
+                   pc.take(pa.array([_slug(value) for value in LAST_NAMES]), last_index),
+                   person_ids, separator='-')
+    return first, last, name, slug
+
+
+def firm_names(firm_ids):
+    word_index = pa.array(firm_ids % len(FIRM_WORDS))
+    suffix_index = pa.array(firm_ids // len(FIRM_WORDS) % len(FIRM_SUFFIXES))
+    name = _labels(pc.take(pa.array(FIRM_WORDS), word_index), pc.take(pa.array(FIRM_SUFFIXES), suffix_index),
+                   separator=' ')
+    slug = _labels(pc.take(pa.array([_slug(value) for value in FIRM_WORDS]), word_index),
+                   pc.take(pa.array([_slug(value) for value in FIRM_SUFFIXES]), suffix_index), separator='-')
+    # Past the word x suffix combinations, numbered generations ("Atlas Capital 2") keep firms distinct
+    generation = pa.array(firm_ids // (len(FIRM_WORDS) * len(FIRM_SUFFIXES)) + 1)
+    later = pc.greater(generation, 1)
+    return (pc.if_else(later, _labels(name, generation, separator=' '), name),
+            pc.if_else(later, _labels(slug, generation, separator='-'), slug))
+
+
+def _company_names(chunk, company_ids):
+    """Company names with occasional legal-suffix and casing variants of the same company"""
+    words = pc.take(pa.array(COMPANY_WORDS), pa.array(company_ids % len(COMPANY_WORDS)))
+    kinds = pc.take(pa.array(COMPANY_KINDS), pa.array(company_ids // len(COMPANY_WORDS) % len(COMPANY_KINDS)))
+    generation = company_ids // (len(COMPANY_WORDS) * len(COMPANY_KINDS))
+    display_name = _labels(words, kinds, separator=' ')
+    display_name = pc.if_else(pa.array(generation > 0), _labels(display_name, generation + 1, separator=' '),
+                              display_name)
+    variant = pc.take(pa.array(COMPANY_VARIANTS), pa.array(chunk.rng.integers(0, len(COMPANY_VARIANTS),
+                                                                              len(company_ids))))
+    name = pc.if_else(chunk.mask(0.15, len(company_ids)), _labels(display_name, variant), display_name)
+    name = pc.if_else(chunk.mask(0.05, len(company_ids)), pc.utf8_lower(name), name)
+    return name, display_name
+
+
+def _school_names(chunk, size):
+    display_name = chunk.pick(SCHOOLS, size, 3.5)
+    name = pc.if_else(chunk.mask(0.1, size), pc.utf8_lower(display_name), display_name)
+    return name, display_name
+
+
+def _month_year(chunk, size, first_year, last_year, null_share=0.0):
+    return _struct({'month': _labels(chunk.rng.integers(1, 13, size)),
+                    'year': _labels(chunk.rng.integers(first_year, last_year + 1, size))},
+                   mask=chunk.mask(null_share, size))
+
+
+def _dates(chunk, size):
+    # 2005-01-01 .. 2025-01-01 in microseconds
+    micros = chunk.rng.integers(1104537600, 1735689600, size) * 1_000_000
+    return pa.array(micros, type=pa.timestamp('us'))
+
+
+def _person(chunk, person_ids):
+    first, last, name, slug = person_names(person_ids)
+    size = len(person_ids)
+    role_lengths = chunk.lengths('roles', size)
+    return _struct({
+        'slug': slug,
+        'first_name': first,
+        'last_name': last,
+        'name': name,
+        'linkedin_url': chunk.sometimes_null(_labels('https://www.linkedin.com/in/', slug), 0.4),
+        'facebook_url': pa.nulls(size, pa.string()),
+        'twitter_url': chunk.sometimes_null(_labels('https://twitter.com/', slug), 0.7),
+        'crunchbase_url': chunk.sometimes_null(_labels('https://www.crunchbase.com/person/', slug), 0.8),
+        'angellist_url': chunk.sometimes_null(_labels('https://angel.co/', slug), 0.8),
+        'roles': chunk.list_of(role_lengths, chunk.pick(ROLES, int(role_lengths.sum()))),
+        'url': chunk.sometimes_null(_labels('https://', slug, '.com'), 0.9),
+        'is_me': pa.array(np.zeros(size, dtype=bool)),
+        'first_degree_count': pa.array(chunk.rng.zipf(1.6, size) % 30000, type=pa.int64()),
+        'is_on_target_list': chunk.mask(0.02, size),
+        'relationship_strength': pa.nulls(size, pa.string()),
+        'email_from_my_contacts_list': pa.nulls(size, pa.string()),
+    }, mask=chunk.mask(0.01, size))
+
+
+def _kind_display_list(chunk, name, pairs):
+    lengths = chunk.lengths(name)
+    return chunk.list_of(lengths, chunk.kind_display(pairs, int(lengths.sum())))
+
+
+def _degrees(chunk):
+    lengths = chunk.lengths('degrees')
+    size = int(lengths.sum())
+    school_name, school_display_name = _school_names(chunk, size)
+    return chunk.list_of(lengths, _struct({
+        'name': chunk.pick(DEGREES, size),
+        'field_of_study': chunk.sometimes_null(chunk.pick(FIELDS_OF_STUDY, size), 0.3),
+        'school': _struct({'name': school_name, 'display_name': school_display_name,
+                           'total_student_count': chunk.integers(2000, 60000, size)}),
+    }))
+
+
+def _positions(chunk):
+    lengths = chunk.lengths('positions')
+    size = int(lengths.sum())
+    company_name, company_display_name = _company_names(chunk, chunk.popular(chunk.total_rows // 2, size, 2.5))
+    return chunk.list_of(lengths, _struct({
+        'title': chunk.pick(TITLES, size),
+        'company': _struct({'name': company_name, 'display_name': company_display_name,
+                            'total_employee_count': chunk.integers(1, 100000, size)},
+                           mask=chunk.mask(0.03, size)),
+        'start_date': _month_year(chunk, size, 1985, 2024),
+        # Positions without an end date are the current ones
+        'end_date': _month_year(chunk, size, 1990, 2025, null_share=0.4),
+    }))
+
+
+def _media_links(chunk):
+    lengths = chunk.lengths('media_links')
+    size = int(lengths.sum())
+    link_ids = chunk.rng.integers(0, 1 << 31, size)
+    return chunk.list_of(lengths, _struct({
+        'url': _labels('https://medium.com/p/', link_ids),
+        'title': _labels('Notes on investing #', link_ids % 1000),
+        'image_url': chunk.sometimes_null(_labels('https://cdn.example.com/media/', link_ids, '.png'), 0.5),
+    }))
+
+
+def _funding_round_fields(chunk, size):
+    return {
+        'stage': chunk.pick(ROUND_STAGES, size),
+        'date': chunk.sometimes_null(_dates(chunk, size), 0.1),
+        'amount': chunk.sometimes_null(chunk.pick(AMOUNTS, size), 0.2),
+    }
+
+
+def _board_role(chunk, size):
+    return _struct({'title': chunk.pick(BOARD_TITLES, size)}, mask=chunk.mask(0.8, size))
+
+
+def _investments_on_record(chunk):
+    lengths = chunk.lengths('investments')
+    size = int(lengths.sum())
+    _, company_display_name = _company_names(chunk, chunk.popular(chunk.total_rows, size, 2.0))
+
+    raised_lengths = chunk.lengths('total_raised', size)
+    coinvestor_lengths = chunk.lengths('coinvestors', size)
+    coinvestor_count = int(coinvestor_lengths.sum())
+    _, _, coinvestor_names, _ = person_names(chunk.popular(chunk.total_rows, coinvestor_count, 3.0))
+    round_lengths = chunk.lengths('investment_rounds', size)
+    round_count = int(round_lengths.sum())
+    rounds = _funding_round_fields(chunk, round_count)
+
+    node = _struct({
+        'company_display_name': company_display_name,
+        'total_raised': chunk.list_of(raised_lengths, chunk.pick(AMOUNTS, int(raised_lengths.sum()))),
+        'coinvestor_names': chunk.list_of(coinvestor_lengths, coinvestor_names),
+        'investor_profile_funding_rounds': chunk.list_of(round_lengths, _struct({
+            'is_lead': chunk.mask(0.3, round_count),
+            'board_role': _board_role(chunk, round_count),
+            'funding_round': _struct(rounds),
+        })),
+    })
+    return _struct({
+        'pageInfo': _struct({'hasNextPage': pa.array(lengths >= LIST_LENGTHS['investments'][2])}),
+        'record_count': pa.array(lengths, type=pa.int64()),
+        'edges': chunk.list_of(lengths, _struct({'node': node})),
+    }, mask=chunk.mask(0.3))
+
+
+def _investor_profile_funding_rounds(chunk):
+    lengths = chunk.lengths('funding_rounds')
+    size = int(lengths.sum())
+    rounds = _funding_round_fields(chunk, size)
+    _, company_display_name = _company_names(chunk, chunk.popular(chunk.total_rows, size, 2.0))
+    node = _struct({
+        'is_lead': chunk.mask(0.4, size),
+        'board_role': _board_role(chunk, size),
+        'funding_round': _struct({'amount': rounds['amount'], 'date': rounds['date'], 'stage': rounds['stage'],
+                                  'company': _struct({'display_name': company_display_name})}),
+    })
+    return _struct({
+        'pageInfo': _struct({'hasNextPage': pa.array(lengths >= LIST_LENGTHS['funding_rounds'][2])}),
+        'record_count': pa.array(lengths, type=pa.int64()),
+        'edges': chunk.list_of(lengths, _struct({'node': node})),
+    }, mask=chunk.mask(0.5))
+
+
+def _target_person_ids(chunk, size, external_share):
+    """Mostly investors in the file (popular ones far more often), the rest people outside it"""
+    in_file = chunk.popular(chunk.total_rows, size, 2.5)
+    external = chunk.total_rows + chunk.popular(chunk.total_rows, size, 2.5)
+    return np.where(chunk.chance(external_share, size), external, in_file)
+
+
+def _network_list(chunk, name, list_type, position_titles, external_share):
+    lengths = chunk.lengths(name)
+    size = int(lengths.sum())
+    first, last, person_name, slug = person_names(_target_person_ids(chunk, size, external_share))
+    firm_name, firm_slug = firm_names(chunk.popular(chunk.total_rows // 6, size))
+    image_lengths = chunk.lengths('image_urls', size)
+    node = _struct({
+        'position': chunk.pick(position_titles, size),
+        'person': _struct({'name': person_name, 'first_name': first, 'last_name': last, 'slug': slug}),
+        'firm': _struct({'name': firm_name, 'slug': firm_slug}, mask=chunk.mask(0.3, size)),
+        'image_urls': chunk.list_of(image_lengths, _labels('https://cdn.example.com/people/',
+                                                           chunk.rng.integers(0, 1 << 31, int(image_lengths.sum())),
+                                                           '.jpg')),
+    })
+    return _struct({
+        'list_type': pa.array([list_type] * chunk.rows, type=pa.string()),
+        'edges': chunk.list_of(lengths, _struct({'node': node})),
+    }, mask=chunk.mask(0.2))
+
+
+def _investing_connections(chunk):
+    lengths = chunk.lengths('investing_connections')
+    size = int(lengths.sum())
+    first, last, person_name, slug = person_names(_target_person_ids(chunk, size, 0.3))
+    firm_name, firm_slug = firm_names(chunk.popular(chunk.total_rows // 6, size))
+    image_lengths = chunk.lengths('image_urls', size)
+    target = _struct({
+        'name': person_name, 'slug': slug, 'first_name': first, 'last_name': last,
+        'investor_profile': _struct({
+            'firm': _struct({'name': firm_name, 'slug': firm_slug}),
+            'image_urls': chunk.list_of(image_lengths, _labels('https://cdn.example.com/people/',
+                                                               chunk.rng.integers(0, 1 << 31,
+                                                                                  int(image_lengths.sum())),
+                                                               '.jpg')),
+        }, mask=chunk.mask(0.4, size)),
+    })
+    return _struct({
+        'record_count': pa.array(lengths, type=pa.int64()),
+        'edges': chunk.list_of(lengths, _struct({'node': _struct({'target_person': target})})),
+    }, mask=chunk.mask(0.1))
+
+
+def _investor_lists(chunk):
+    lengths = chunk.lengths('investor_lists')
+    size = int(lengths.sum())
+    vertical = chunk.kind_display(SECTORS, size)
+    location = chunk.kind_display(REGIONS, size)
+    stage_name = chunk.pick([name for _, name in STAGES], size)
+    return chunk.list_of(lengths, _struct({
+        'slug': _labels(_slugify(stage_name), _slugify(vertical.field('display_name')), separator='-'),
+        'stage_name': stage_name,
+        'vertical': vertical,
+        'location': _struct({'kind': location.field('kind'), 'display_name': location.field('display_name')},
+                            mask=chunk.mask(0.5, size)),
+    }))
+
+
+def generate_chunk(seed, chunk_index, first_row, rows, total_rows):
+    """One row group of synthetic investors as an Arrow table in INVESTORS_SCHEMA"""
+    chunk = _Chunk(seed, chunk_index, first_row, rows, total_rows)
+    person_ids = np.arange(first_row, first_row + rows)
+    firm_name, firm_slug = firm_names(chunk.popular(total_rows // 6, rows))
+    image_lengths = chunk.lengths('image_urls')
+    edit_lengths = chunk.lengths('image_urls')
+    _, _, _, slug = person_names(person_ids)
+
+    columns = {
+        'claimed': chunk.mask(0.25),
+        'can_edit': pa.array(np.zeros(rows, dtype=bool)),
+        'include_in_list': chunk.mask(0.9),
+        'in_founder_investor_list': chunk.mask(0.1),
+        'in_diverse_investor_list': chunk.mask(0.08),
+        'in_female_investor_list': chunk.mask(0.15),
+        'in_invests_in_diverse_founders_investor_list': chunk.mask(0.05),
+        'in_invests_in_female_founders_investor_list': chunk.mask(0.05),
+        'leads_rounds': chunk.sometimes_null(chunk.pick(['Yes', 'No', 'Sometimes']), 0.3),
+        'person': _person(chunk, person_ids),
+        'stages': _kind_display_list(chunk, 'stages', STAGES),
+        'position': chunk.sometimes_null(chunk.pick(TITLES), 0.1),
+        'min_investment': chunk.sometimes_null(chunk.pick(CHECK_SIZES), 0.4),
+        'max_investment': chunk.sometimes_null(chunk.pick(CHECK_SIZES), 0.4),
+        'target_investment': chunk.sometimes_null(chunk.pick(CHECK_SIZES), 0.3),
+        'areas_of_interest_freeform': chunk.sometimes_null(
+            _labels('Interested in ', chunk.pick([name for _, name in SECTORS])), 0.8),
+        'no_current_interest_freeform': chunk.sometimes_null(
+            _labels('Not investing in ', chunk.pick([name for _, name in SECTORS])), 0.9),
+        'vote_count': pa.array(chunk.rng.zipf(2.0, rows) - 1, type=pa.int64()),
+        'headline': chunk.sometimes_null(_labels(chunk.pick(TITLES), firm_name, separator=' at '), 0.05),
+        'previous_position': chunk.sometimes_null(chunk.pick(TITLES), 0.7),
+        'previous_firm': chunk.sometimes_null(firm_names(chunk.popular(total_rows // 6, rows))[0], 0.7),
+        'location': _struct({'display_name': chunk.pick(CITIES, skew=3.5)}, mask=chunk.mask(0.1)),
+        'firm': _struct({'current_fund_size': chunk.sometimes_null(chunk.pick(FUND_SIZES), 0.5),
+                         'name': firm_name, 'slug': firm_slug}, mask=chunk.mask(0.15)),
+        'degrees': _degrees(chunk),
+        'positions': _positions(chunk),
+        'media_links': _media_links(chunk),
+        'investments_on_record': _investments_on_record(chunk),
+        'investor_profile_funding_rounds': _investor_profile_funding_rounds(chunk),
+        'network_list_investor_profiles': _network_list(chunk, 'network_investors', 'investors',
+                                                        TITLES[:5], 0.2),
+        'network_list_scouts_and_angels_profiles': _network_list(chunk, 'network_scouts', 'scouts_and_angels',
+                                                                 ['Scout', 'Angel', 'Operator Angel'], 0.6),
+        'investing_connections': _investing_connections(chunk),
+        'has_profile_vote': chunk.mask(0.05),
+        'image_urls_edit_mode': chunk.list_of(edit_lengths, _labels('https://cdn.example.com/edit/',
+                                                                    chunk.rng.integers(0, 1 << 31,
+                                                                                       int(edit_lengths.sum())),
+                                                                    '.jpg')),
+        'is_preferred_coinvestor': pa.nulls(rows, pa.string()),
+        'investment_locations': _kind_display_list(chunk, 'investment_locations', REGIONS),
+        'areas_of_interest': _kind_display_list(chunk, 'areas_of_interest', SECTORS),
+        'image_urls': chunk.list_of(image_lengths, _labels('https://cdn.example.com/investors/',
+                                                           pc.take(slug, pa.array(np.repeat(np.arange(rows),
+                                                                                            image_lengths))),
+                                                           '.jpg')),
+        'investor_lists': _investor_lists(chunk),
+    }
+    return pa.Table.from_arrays([columns[field.name] for field in INVESTORS_SCHEMA], schema=INVESTORS_SCHEMA)
+
+
+def generate_investors(path, rows=BASE_ROWS, seed=0, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+    """Write a synthetic investors.parquet one row group at a time; returns its size in bytes"""
+    partial_path = f'{path}.{os.getpid()}.tmp'
+    with pq.ParquetWriter(partial_path, INVESTORS_SCHEMA, compression='snappy') as writer:
+        for chunk_index, first_row in enumerate(range(0, rows, row_group_rows)):
+            chunk_rows = min(row_group_rows, rows - first_row)
+            writer.write_table(generate_chunk(seed, chunk_index, first_row, chunk_rows, rows))
+    os.replace(partial_path, path)
+    return os.path.getsize(path)
+
+
+def schema_leaves(schema_path=SCHEMA_PATH):
+    """(dotted column path, physical type) for every leaf of a parquet schema dump"""
+    leaves = []
+    groups = []
+    for line in open(schema_path):
+        line = line.strip()
+        group = re.match(r'(?:OPTIONAL|REQUIRED|REPEATED) group (\w+)', line)
+        leaf = re.match(r'(?:OPTIONAL|REQUIRED|REPEATED) (\w+) (\w+)', line)
+        if line.startswith('message'):
+            continue
+        if group:
+            groups.append(group.group(1))
+        elif leaf:
+            leaves.append(('.'.join(groups + [leaf.group(2)]), leaf.group(1)))
+        elif line == '}' and groups:
+            groups.pop()
+    return leaves
+
+
+def parquet_leaves(path):
+    schema = pq.ParquetFile(path).schema
+    return [(schema.column(i).path, schema.column(i).physical_type) for i in range(len(schema))]
+
+
+def verify_layout(path, schema_path=SCHEMA_PATH):
+    """Raise ValueError unless the file has the same leaf columns and physical types as the schema dump"""
+    expected = schema_leaves(schema_path)
+    actual = parquet_leaves(path)
+    if actual != expected:
+        mismatches = [f"{want} != {got}" for want, got in zip(expected, actual) if want != got]
+        raise ValueError(f"{path} does not match {schema_path}: {len(expected)} vs {len(actual)} leaf columns"
+                         + (f", first mismatch {mismatches[0]}" if mismatches else ""))
+    return len(actual)
+
+
+def scale_rows(scale):
+    """Row count of a file at the given multiple of the sample (at least one row)"""
+    return max(1, round(BASE_ROWS * scale))
+
+
+def default_path(directory, rows, seed):
+    return os.path.join(directory, f"investors_{rows}_s{seed}_g{GENERATOR_VERSION}.parquet")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic investors.parquet for benchmarks')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f'Multiple of the {BASE_ROWS:,}-row sample to generate (default: 1)')
+    parser.add_argument('--rows', type=int, default=None,
+                        help='Exact row count (overrides --scale)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed; the same rows and seed always produce the same file (default: 0)')
+    parser.add_argument('--row-group-rows', type=int, default=DEFAULT_ROW_GROUP_ROWS,
+                        help=f'Rows per parquet row group (default: {DEFAULT_ROW_GROUP_ROWS})')
+    parser.add_argument('--output', default=None,
+                        help='Output file (default: benchmark_data/investors_<rows>_s<seed>_g<version>.parquet)')
+    args = parser.parse_args()
+
+    rows = args.rows or scale_rows(args.scale)
+    path = args.output or default_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_data'),
+                                       rows, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    print(f"🧪 Generating {rows:,} synthetic investors (seed {args.seed}, generator v{GENERATOR_VERSION})...")
+    started = time.perf_counter()
+    size = generate_investors(path, rows, args.seed, args.row_group_rows)
+    leaf_count = verify_layout(path)
+    print(f"✅ Wrote {path} ({size / (1024 * 1024):.1f} MB, {leaf_count} leaf columns match investors.schema) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Make the top-level loader modules importable from the Python tests
+
+Tests taking the engine fixture run against TEST_DATABASE_URL (a SQLAlchemy
+URL of a scratch Postgres database), each in a schema of its own that is
+dropped afterwards. They are skipped when the variable is unset.
+"""
+
+import os
+import sys
+import uuid
+
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+@pytest.fixture
+def engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    schema = f'test_{uuid.uuid4().hex[:12]}'
+    admin = create_engine(TEST_DATABASE_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA {schema}'))
+    engine = create_engine(TEST_DATABASE_URL, connect_args={'options': f'-csearch_path={schema}'})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        admin.dispose()
+
+
+@pytest.fixture(scope='session')
+def synthetic_path(tmp_path_factory):
+    """A small synthetic investors.parquet with several row groups"""
+    from synthetic_investors import generate_chunk
+    path = tmp_path_factory.mktemp('synthetic') / 'investors.parquet'
+    pq.write_table(generate_chunk(seed=5, chunk_index=0, first_row=0, rows=200, total_rows=200), path,
+                   row_group_size=80)
+    return path
+
+
+@pytest.fixture
+def parents_loaded(engine, synthetic_path, monkeypatch):
+    """engine with the relational schema created and the parent tables of synthetic_path loaded"""
+    import export_relational_fast
+    from load_manifest import execute_raw
+    raw_conn = engine.raw_connection()
+    try:
+        execute_raw(raw_conn, export_relational_fast.create_relational_schema())
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    monkeypatch.setattr(export_relational_fast, 'PARQUET_PATH', str(synthetic_path))
+    export_relational_fast.extract_and_bulk_insert(engine)
+    return engine
@@ -0,0 +1,158 @@
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from arrow_extract import (CHILD_TABLE_COLUMNS, NETWORK_SOURCES, extract_child_tables, group_ordinal,
+                           json_string_lists, map_investment_ids, map_keys, unique_by)
+from synthetic_investors import generate_chunk
+
+START_ID = 101
+
+
+@pytest.fixture(scope='module')
+def investors(tmp_path_factory):
+    # Read back from parquet like the loaders do, which also gives null lists empty offsets
+    path = tmp_path_factory.mktemp('extract') / 'investors.parquet'
+    pq.write_table(generate_chunk(seed=3, chunk_index=0, first_row=0, rows=300, total_rows=300), path)
+    return pq.read_table(path)
+
+
+@pytest.fixture(scope='module')
+def extracted(investors):
+    return extract_child_tables(investors, start_id=START_ID)
+
+
+def rows_of(table):
+    return [tuple(row[name] for name in table.column_names) for row in table.to_pylist()]
+
+
+def investments_of(row):
+    edges = (row['investments_on_record'] or {}).get('edges') or []
+    return [edge['node'] for edge in edges if edge and edge['node']]
+
+
+def reference(investors, table_name):
+    """Row-by-row extraction of one child table, the way the loaders did it before Arrow"""
+    out = []
+    for investor_id, row in enumerate(investors.to_pylist(), START_ID):
+        slug = (row['person'] or {}).get('slug')
+        if table_name in ('areas_of_interest', 'investment_locations', 'investor_stages'):
+            column = 'stages' if table_name == 'investor_stages' else table_name
+            out += [(investor_id, item['kind'], item['display_name']) for item in row[column] or [] if item]
+        elif table_name == 'positions':
+            out += [(investor_id, slug, (p['company'] or {}).get('name'), (p['company'] or {}).get('display_name'),
+                     (p['company'] or {}).get('total_employee_count'), p['title'],
+                     (p['start_date'] or {}).get('month'), (p['start_date'] or {}).get('year'),
+                     (p['end_date'] or {}).get('month'), (p['end_date'] or {}).get('year'))
+                    for p in row['positions'] or [] if p]
+        elif table_name == 'investments':
+            for node in investments_of(row):
+                raised = node['total_raised']
+                out.append((investor_id, node['company_display_name'],
+                            json.dumps(raised, separators=(',', ':')) if raised else None))
+        elif table_name == 'investment_rounds':
+            for index, node in enumerate(investments_of(row)):
+                for item in node['investor_profile_funding_rounds'] or []:
+                    if item:
+                        funding = item['funding_round'] or {}
+                        out.append((investor_id, index, funding.get('stage'), funding.get('amount'),
+                                    funding.get('date'), bool(item['is_lead']),
+                                    (item['board_role'] or {}).get('title'), node['company_display_name']))
+        elif table_name == 'coinvestors':
+            for index, node in enumerate(investments_of(row)):
+                out += [(investor_id, index, name) for name in node['coinvestor_names'] or [] if name]
+        elif table_name == 'investor_lists':
+            out += [(investor_id, item['slug'], item['stage_name'], (item['vertical'] or {}).get('kind'),
+                     (item['vertical'] or {}).get('display_name'), (item['location'] or {}).get('kind'),
+                     (item['location'] or {}).get('display_name'))
+                    for item in row['investor_lists'] or [] if item]
+    return out
+
+
+@pytest.mark.parametrize('table_name', ['areas_of_interest', 'investment_locations', 'investor_stages', 'positions',
+                                        'investments', 'investment_rounds', 'coinvestors', 'investor_lists'])
+def test_extractors_match_row_wise_reference(investors, extracted, table_name):
+    expected = reference(investors, table_name)
+    assert expected
+    assert rows_of(extracted[table_name]) == expected
+
+
+def test_extractors_emit_the_documented_columns(extracted):
+    assert {name: table.column_names for name, table in extracted.items()} == CHILD_TABLE_COLUMNS
+
+
+def test_image_urls_drop_empty_urls_and_flag_edit_mode(investors, extracted):
+    expected = []
+    for column, is_edit_mode in (('image_urls', False), ('image_urls_edit_mode', True)):
+        for investor_id, urls in enumerate(investors.column(column).to_pylist(), START_ID):
+            expected += [(investor_id, url, is_edit_mode) for url in urls or [] if url]
+    assert rows_of(extracted['image_urls']) == expected
+
+
+def test_network_connections_cover_every_source(investors, extracted):
+    expected = []
+    for column, list_type in NETWORK_SOURCES:
+        for investor_id, row in enumerate(investors.column(column).to_pylist(), START_ID):
+            for edge in (row or {}).get('edges') or []:
+                node = edge and edge['node']
+                if not node:
+                    continue
+                person = (node['person'] if list_type is None else node['target_person']) or {}
+                expected.append((investor_id, person.get('slug'), person.get('name'), person.get('first_name'),
+                                 person.get('last_name'), list_type or row['list_type'],
+                                 node['position'] if list_type is None else None))
+    assert rows_of(extracted['network_connections']) == expected
+
+
+def test_slices_extract_like_the_whole_table(investors, extracted):
+    first = extract_child_tables(investors.slice(0, 120), start_id=START_ID)
+    second = extract_child_tables(investors.slice(120), start_id=START_ID + 120)
+    for name, table in extracted.items():
+        merged = rows_of(pa.concat_tables([first[name], second[name]]))
+        if name in ('image_urls', 'network_connections'):
+            # Rows from several source columns are grouped by source within each slice
+            merged, table_rows = sorted(merged, key=repr), sorted(rows_of(table), key=repr)
+        else:
+            table_rows = rows_of(table)
+        assert merged == table_rows, name
+
+
+def test_group_ordinal():
+    assert group_ordinal([]).tolist() == []
+    assert group_ordinal([4, 4, 4, 7, 9, 9]).tolist() == [0, 1, 2, 0, 0, 1]
+
+
+def test_json_string_lists():
+    values = pa.array([['a', 'b"c'], [], None, ['x\ny', None], ['back\\slash']]).slice(0)
+    assert json_string_lists(values).to_pylist() == ['["a","b\\"c"]', None, None, '["x\\ny",null]',
+                                                     '["back\\\\slash"]']
+    assert json_string_lists(values.slice(3)).to_pylist() == ['["x\\ny",null]', '["back\\\\slash"]']
+
+
+def test_json_string_lists_escape_every_control_character():
+    values = pa.array([['a\x01b', '\x1f'], ['\x00\b\f\x7f']])
+    rendered = json_string_lists(values).to_pylist()
+    assert rendered == ['["a\\u0001b","\\u001f"]', '["\\u0000\\b\\f\x7f"]']
+    assert [json.loads(text) for text in rendered] == values.to_pylist()
+
+
+def test_unique_by_keeps_first_row_per_key():
+    table = pa.table({'name': ['b', None, 'a', 'b', 'a'], 'count': [1, 2, 3, 4, 5]})
+    assert unique_by(table, 'name', ['count']).to_pylist() == [{'name': 'b', 'count': 1}, {'name': 'a', 'count': 3}]
+
+
+def test_map_keys():
+    keys = pa.array(['x', None, 'z', 'y'])
+    assert map_keys(keys, {'x': 1, 'y': 2}).to_pylist() == [1, None, None, 2]
+    assert map_keys(keys, {}).to_pylist() == [None] * 4
+
+
+def test_map_investment_ids():
+    investments = pa.table({'investor_id': pa.array([3, 3, 5, 8, 8, 8], type=pa.int32())})
+    rows = pa.table({'investor_id': pa.array([8, 3, 5, 8], type=pa.int32()),
+                     'investment_index': pa.array([2, 1, 0, 0], type=pa.int32())})
+    ids = np.arange(10, 16)
+    assert map_investment_ids(investments, ids, rows).to_pylist() == [15, 11, 12, 13]
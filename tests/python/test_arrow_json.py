@@ -0,0 +1,59 @@
+import json
+import math
+from datetime import date, datetime
+
+import pyarrow as pa
+import pytest
+
+from arrow_json import encode_json, encode_json_column, json_string_literals
+
+NESTED = pa.array([
+    {'name': 'Acme "A"', 'rounds': [{'stage': 'Seed', 'amount': 1.5, 'lead': True}], 'tags': ['a', None]},
+    None,
+    {'name': None, 'rounds': [], 'tags': None},
+    {'name': 'tab\tline\nctrl\x01', 'rounds': [None, {'stage': None, 'amount': None, 'lead': False}], 'tags': []},
+])
+
+
+def decoded(array):
+    return [None if text is None else json.loads(text) for text in encode_json(array).to_pylist()]
+
+
+def test_nested_values_round_trip():
+    assert decoded(NESTED) == NESTED.to_pylist()
+
+
+def test_sliced_and_chunked_arrays():
+    assert decoded(NESTED.slice(2)) == NESTED.to_pylist()[2:]
+    chunked = pa.chunked_array([NESTED.slice(0, 1), NESTED.slice(1)])
+    assert [json.loads(text) if text else None for text in encode_json(chunked).to_pylist()] == NESTED.to_pylist()
+
+
+def test_string_escapes():
+    values = ['quote " back \\ slash', 'ctrl \x00\x1f\x7f', '\b\f\r', 'ünïcode ✓', None]
+    literals = json_string_literals(pa.array(values)).to_pylist()
+    assert [json.loads(text) if text else None for text in literals] == values
+
+
+@pytest.mark.parametrize('values, expected', [
+    (pa.array([1, None, -3], type=pa.int16()), ['1', None, '-3']),
+    (pa.array([True, False, None]), ['true', 'false', None]),
+    (pa.array([0.25, math.nan, math.inf, None]), ['0.25', None, None, None]),
+    (pa.array([datetime(2024, 1, 2, 3, 4, 5)]), ['"2024-01-02T03:04:05"']),
+    (pa.array([date(2024, 1, 2)]), ['"2024-01-02"']),
+    (pa.array(['a', 'b', 'a']).dictionary_encode(), ['"a"', '"b"', '"a"']),
+    (pa.nulls(2), [None, None]),
+])
+def test_scalar_types(values, expected):
+    assert encode_json(values).to_pylist() == expected
+
+
+def test_empty_struct():
+    values = pa.array([{}, None], type=pa.struct([]))
+    assert encode_json(values).to_pylist() == ['{}', None]
+
+
+def test_encode_json_column_nulls_empty_lists():
+    values = pa.array([['x'], [], None], type=pa.large_list(pa.string()))
+    assert encode_json_column(values).to_pylist() == ['["x"]', None, None]
+    assert encode_json_column(values, empty_as_null=False).to_pylist() == ['["x"]', '[]', None]
@@ -0,0 +1,90 @@
+import io
+import struct
+from datetime import date, datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pytest
+
+from bulk_copy import (BINARY_HEADER, BINARY_TRAILER, OID_BOOL, OID_DATE, OID_FLOAT8, OID_INT4, OID_INT8, OID_JSONB,
+                       OID_TEXT, OID_TIMESTAMP, encode_arrow_csv, encode_binary_rows, encode_text_rows,
+                       format_text_value)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, '\\N'),
+    (float('nan'), '\\N'),
+    (True, 't'),
+    (False, 'f'),
+    (np.int64(7), '7'),
+    ('tab\there\nnew\\line\r', 'tab\\there\\nnew\\\\line\\r'),
+    ({'a': [1, 2]}, '{"a": [1, 2]}'),
+    (['x', None], '["x", null]'),
+    (date(2024, 2, 29), '2024-02-29'),
+    (datetime(2024, 2, 29, 13, 5), '2024-02-29T13:05:00'),
+])
+def test_format_text_value(value, expected):
+    assert format_text_value(value) == expected
+
+
+def test_encode_text_rows():
+    assert encode_text_rows([]) == b''
+    assert encode_text_rows([(1, 'a b', None), (2, 'é', True)]) == '1\ta b\t\\N\n2\té\tt\n'.encode('utf-8')
+
+
+def decode_binary(payload, field_count):
+    """Split a COPY binary payload back into rows of raw field bytes (None for NULL)"""
+    assert payload.startswith(BINARY_HEADER) and payload.endswith(BINARY_TRAILER)
+    body = io.BytesIO(payload[len(BINARY_HEADER):-len(BINARY_TRAILER)])
+    rows = []
+    while body.tell() < len(payload) - len(BINARY_HEADER) - len(BINARY_TRAILER):
+        assert struct.unpack('!h', body.read(2))[0] == field_count
+        row = []
+        for _ in range(field_count):
+            length = struct.unpack('!i', body.read(4))[0]
+            row.append(None if length == -1 else body.read(length))
+        rows.append(row)
+    return rows
+
+
+def test_encode_binary_rows():
+    oids = [OID_INT4, OID_INT8, OID_FLOAT8, OID_BOOL, OID_TEXT, OID_JSONB, OID_DATE, OID_TIMESTAMP]
+    rows = [
+        (1, np.int64(1) << 40, 2.5, True, 'naïve', {'k': 'v'}, date(2000, 1, 2), datetime(2000, 1, 1, 0, 0, 1)),
+        (None, None, float('nan'), None, None, None, None, None),
+    ]
+    first, second = decode_binary(encode_binary_rows(rows, oids), len(oids))
+    assert first == [
+        struct.pack('!i', 1),
+        struct.pack('!q', 1 << 40),
+        struct.pack('!d', 2.5),
+        b'\x01',
+        'naïve'.encode('utf-8'),
+        b'\x01{"k": "v"}',
+        struct.pack('!i', 1),
+        struct.pack('!q', 1000000),
+    ]
+    assert second == [None] * len(oids)
+
+
+def test_encode_binary_rows_without_header_and_trailer():
+    payload = encode_binary_rows([(5,)], [OID_INT4], header=False, trailer=False)
+    assert payload == struct.pack('!hii', 1, 4, 5)
+
+
+def test_encode_binary_rows_rejects_unknown_types():
+    with pytest.raises(ValueError, match='OID 1700'):
+        encode_binary_rows([(1,)], [1700])
+
+
+def test_encode_arrow_csv_keeps_nulls_apart_from_empty_strings():
+    table = pa.table({'id': pa.array([1, 2, 3], type=pa.int32()),
+                      'name': pa.array(['a "quoted", name', '', None])})
+    payload = encode_arrow_csv(table)
+    assert payload == b'"1","a ""quoted"", name"\n"2",""\n"3",\n'
+    # Read back the way Postgres does: unquoted empty fields are NULL
+    options = pa_csv.ConvertOptions(strings_can_be_null=True, quoted_strings_can_be_null=False)
+    read = pa_csv.read_csv(io.BytesIO(payload), read_options=pa_csv.ReadOptions(column_names=['id', 'name']),
+                           convert_options=options)
+    assert read.column('name').to_pylist() == ['a "quoted", name', '', None]
@@ -0,0 +1,83 @@
+from itertools import combinations
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from sqlalchemy import text
+
+from co_investments import INCIDENCE_SQL, build_co_investments, co_investment_blocks, incidence_matrix
+
+
+def pairs_table(investor_ids, company_ids):
+    return pa.table({'investor_id': pa.array(investor_ids, type=pa.int32()),
+                     'company_id': pa.array(company_ids, type=pa.int32())})
+
+
+def reference_edges(investor_ids, company_ids):
+    """{(investor1, investor2): shared companies} by comparing every pair of portfolios"""
+    portfolios = {}
+    for investor_id, company_id in zip(investor_ids, company_ids):
+        portfolios.setdefault(investor_id, set()).add(company_id)
+    edges = {}
+    for first, second in combinations(sorted(portfolios), 2):
+        shared = len(portfolios[first] & portfolios[second])
+        if shared:
+            edges[(first, second)] = shared
+    return edges
+
+
+def block_edges(matrix, block_rows):
+    edges = {}
+    for block in co_investment_blocks(matrix, block_rows):
+        for first, second, shared in zip(*(block.column(name).to_pylist() for name in block.column_names)):
+            assert (first, second) not in edges
+            edges[(first, second)] = shared
+    return edges
+
+
+def test_incidence_matrix_holds_each_company_once():
+    matrix = incidence_matrix(pairs_table([1, 1, 3, 3], [500, 500, 500, 700]))
+    assert matrix.shape == (4, 2)
+    assert matrix.toarray().tolist() == [[0, 0], [1, 0], [0, 0], [1, 1]]
+
+
+@pytest.mark.parametrize('block_rows', [1, 7, 1000])
+def test_blocks_match_pairwise_portfolio_overlap(block_rows):
+    rng = np.random.default_rng(block_rows)
+    investor_ids = rng.integers(1, 60, size=400).tolist()
+    company_ids = rng.integers(1000, 1040, size=400).tolist()
+    matrix = incidence_matrix(pairs_table(investor_ids, company_ids))
+    assert block_edges(matrix, block_rows) == reference_edges(investor_ids, company_ids)
+
+
+def test_no_investments_no_edges():
+    assert list(co_investment_blocks(incidence_matrix(pairs_table([], [])))) == []
+
+
+def test_build_matches_a_self_join(parents_loaded):
+    engine = parents_loaded
+    with engine.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO companies (id, name) SELECT g, 'company ' || g FROM generate_series(1, 30) g;
+            INSERT INTO investments (id, investor_id, company_id, company_display_name)
+            SELECT g, 1 + (g * 37) % 150, 1 + (g * 11) % 30, 'company'
+            FROM generate_series(1, 400) g;
+            -- Coinvestors named after an investor's person add that investor to the company
+            INSERT INTO coinvestors (investment_id, name)
+            SELECT inv.id, p.name
+            FROM investments inv
+            JOIN investors i ON i.id = 1 + (inv.id * 13) % 150
+            JOIN persons p ON p.id = i.person_id
+            WHERE inv.id % 4 = 0;
+        """))
+        conn.commit()
+        pairs = conn.execute(text(INCIDENCE_SQL)).fetchall()
+        assert len(pairs) > 400
+
+    edges = build_co_investments(engine, block_rows=64)
+    expected = reference_edges(*zip(*pairs))
+    with engine.connect() as conn:
+        loaded = {(first, second): shared for first, second, shared in
+                  conn.execute(text("SELECT investor1_id, investor2_id, shared_deals FROM co_investments"))}
+    assert edges == len(expected)
+    assert loaded == expected
@@ -0,0 +1,169 @@
+import re
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import text
+
+from arrow_extract import extract_child_tables
+
+from delta_sync import SYNC_COLLECTIONS, collection_hashes, plan_delta, row_hashes, row_sync_keys, sync_delta
+
+
+def test_row_hashes_follow_values_not_layout():
+    table = pa.table({'name': ['a', 'b', 'a', None, ''], 'count': [1, 2, 1, 0, 0]})
+    hashes = row_hashes(table).to_pylist()
+    assert all(re.fullmatch('[0-9a-f]{32}', digest) for digest in hashes)
+    assert hashes[0] == hashes[2]
+    assert len(set(hashes)) == 4
+    # A null is not an empty string
+    assert hashes[3] != hashes[4]
+    chunked = pa.Table.from_batches(table.to_batches(max_chunksize=2))
+    assert row_hashes(chunked).to_pylist() == hashes
+    assert row_hashes(table.slice(1)).to_pylist() == hashes[1:]
+
+
+def test_row_hashes_see_every_column():
+    table = pa.table({'first': ['ab', 'a'], 'second': ['c', 'bc']})
+    first, second = row_hashes(table).to_pylist()
+    assert first != second
+
+
+def test_collection_hashes_group_rows_per_investor():
+    child = pa.table({'investor_id': pa.array([2, 1, 2, 3], type=pa.int32()), 'kind': ['x', 'y', 'z', 'w']})
+    hashes = collection_hashes(child, ['alice', 'bob', None])
+    # Investor 3 has no slug of its own and is left out
+    assert sorted(hashes) == ['alice', 'bob']
+
+    same = pa.table({'investor_id': pa.array([1, 2, 2], type=pa.int32()), 'kind': ['y', 'x', 'z']})
+    assert collection_hashes(same, ['alice', 'bob', None]) == hashes
+    reordered = pa.table({'investor_id': pa.array([1, 2, 2], type=pa.int32()), 'kind': ['y', 'z', 'x']})
+    assert collection_hashes(reordered, ['alice', 'bob', None])['bob'] != hashes['bob']
+    extended = pa.table({'investor_id': pa.array([1, 2, 2, 2], type=pa.int32()), 'kind': ['y', 'x', 'z', 'z']})
+    assert collection_hashes(extended, ['alice', 'bob', None])['bob'] != hashes['bob']
+    assert collection_hashes(child.slice(0, 0), ['alice']) == {}
+
+
+def test_row_sync_keys_key_every_row():
+    assert row_sync_keys(['a', None, 'b', 'a', None, 'a']) == ['a', '#0', 'b', 'a#1', '#1', 'a#2']
+
+
+def test_plan_delta():
+    unchanged = {name: f'{name}-hash' for name in SYNC_COLLECTIONS}
+    current = {
+        'same': ('r1', dict(unchanged)),
+        'edited': ('r2-new', dict(unchanged)),
+        'rounds': ('r3', dict(unchanged, investment_rounds='other')),
+        'fresh': ('r4', dict(unchanged)),
+    }
+    stored = {'same': ('r1', dict(unchanged)), 'edited': ('r2', dict(unchanged)), 'rounds': ('r3', dict(unchanged))}
+    existing = {'same': 1, 'edited': 2, 'rounds': 3, 'gone': 4}
+
+    new, changed_records, removed, changed_collections = plan_delta(current, stored, existing)
+    assert new == ['fresh']
+    assert removed == ['gone']
+    assert changed_records == ['edited', 'fresh']
+    # Investment rounds and coinvestors hang off investments, so all three are rewritten together
+    for name in ('investments', 'investment_rounds', 'coinvestors'):
+        assert sorted(changed_collections[name]) == ['fresh', 'rounds']
+    assert changed_collections['positions'] == ['fresh']
+
+
+def sync_state_exists(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT to_regclass('investor_sync_state')")).scalar() is not None
+
+
+def test_dry_run_writes_nothing(parents_loaded, synthetic_path):
+    sync_delta(parents_loaded, pq.read_table(synthetic_path), dry_run=True)
+    assert not sync_state_exists(parents_loaded)
+
+
+def test_second_sync_of_the_same_file_changes_nothing(parents_loaded, synthetic_path, capsys):
+    table = pq.read_table(synthetic_path)
+    sync_delta(parents_loaded, table)
+    assert sync_state_exists(parents_loaded)
+    with parents_loaded.connect() as conn:
+        positions = conn.execute(text("SELECT COUNT(*) FROM positions")).scalar()
+    assert positions > 0
+    capsys.readouterr()
+
+    sync_delta(parents_loaded, table)
+    assert '0 new, 0 changed, 0 removed' in capsys.readouterr().out
+    with parents_loaded.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM positions")).scalar() == positions
+
+
+def with_repeated_and_missing_slugs(table):
+    """table with some person slugs repeated, one person without a slug and two rows without a person"""
+    person = table.column('person').combine_chunks()
+    slugs = person.field('slug').to_pylist()
+    for row, source in ((3, 1), (4, 1), (10, 2), (11, 12)):
+        slugs[row] = slugs[source]
+    slugs[7] = None
+    valid = person.is_valid().to_pylist()
+    valid[5] = valid[6] = False
+    fields = [pa.array(slugs, type=pa.string()) if field.name == 'slug' else person.field(field.name)
+              for field in person.type]
+    person = pa.StructArray.from_arrays(fields, fields=list(person.type), mask=pa.array([not value for value in valid]))
+    return table.set_column(table.schema.get_field_index('person'), 'person', person)
+
+
+def full_load(engine, path, monkeypatch):
+    """Re-create the schema and load path's parents and children the way a full reload does"""
+    import complete_population
+    import export_relational_fast
+    from entity_resolution import new_resolvers
+    from load_manifest import execute_raw
+    raw_conn = engine.raw_connection()
+    try:
+        execute_raw(raw_conn, "DROP TABLE IF EXISTS investor_sync_state;" + export_relational_fast.create_relational_schema())
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    monkeypatch.setattr(export_relational_fast, 'PARQUET_PATH', str(path))
+    export_relational_fast.extract_and_bulk_insert(engine)
+    with engine.connect() as conn:
+        key_maps = {'persons': dict(conn.execute(text("SELECT slug, id FROM persons")).fetchall()),
+                    **new_resolvers(conn)}
+    complete_population.load_child_tables(engine, extract_child_tables(pq.read_table(path)), key_maps, 'csv')
+
+
+def loaded_rows(engine):
+    with engine.connect() as conn:
+        return {name: sorted(conn.execute(text(sql)).fetchall(), key=repr) for name, sql in {
+            'investors': """SELECT p.slug, f.slug, i.headline, i.vote_count FROM investors i
+                            LEFT JOIN persons p ON p.id = i.person_id LEFT JOIN firms f ON f.id = i.firm_id""",
+            'positions': """SELECT p.slug, s.title, s.start_year, s.start_month, s.end_year FROM positions s
+                            JOIN persons p ON p.id = s.person_id""",
+            'degrees': """SELECT p.slug, d.degree_name, d.field_of_study FROM degrees d
+                          JOIN persons p ON p.id = d.person_id""",
+        }.items()}
+
+
+@pytest.mark.parametrize('modified_first', [False, True])
+def test_delta_sync_matches_a_full_load_with_repeated_and_missing_slugs(engine, synthetic_path, tmp_path,
+                                                                        monkeypatch, modified_first):
+    original = pq.read_table(synthetic_path)
+    modified = with_repeated_and_missing_slugs(original)
+    modified_path = tmp_path / 'modified.parquet'
+    pq.write_table(modified, modified_path)
+    (before, before_path), (after, after_path) = sorted(
+        [(original, synthetic_path), (modified, modified_path)], key=lambda pair: (pair[0] is modified) != modified_first)
+
+    full_load(engine, after_path, monkeypatch)
+    expected = loaded_rows(engine)
+    full_load(engine, before_path, monkeypatch)
+    sync_delta(engine, before)
+    sync_delta(engine, after)
+    actual = loaded_rows(engine)
+
+    assert len(actual['investors']) == after.num_rows
+    # The repeated person keeps the positions of every row carrying its slug
+    repeated = modified.column('person').combine_chunks().field('slug')[1].as_py()
+    after_persons = after.column('person').combine_chunks()
+    assert sum(row[0] == repeated for row in actual['positions']) == sum(
+        len(positions or []) for slug, positions in zip(after_persons.field('slug').to_pylist(),
+                                                        after.column('positions').to_pylist()) if slug == repeated)
+    for name in ('investors', 'positions', 'degrees'):
+        assert actual[name] == expected[name], name
@@ -0,0 +1,104 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import text
+
+import dimension_tables
+from arrow_extract import CHILD_SOURCE_COLUMNS, extract_child_tables
+from dimension_tables import (DIMENSION_TABLES, dimension_allocators_from_db, dimension_keys, encode_dimension,
+                              is_normalized, load_dimension_junction, new_dimension_allocators, normalized_schema,
+                              without_flat_tables)
+from export_relational_fast import create_relational_schema
+from load_finalize import split_schema
+from load_manifest import execute_raw
+
+
+def stage_rows(investor_ids, kinds, names):
+    return pa.table({
+        'investor_id': pa.array(investor_ids, type=pa.int32()),
+        'kind': pa.array(kinds, type=pa.string()),
+        'display_name': pa.array(names, type=pa.string()),
+    })
+
+
+def test_dimension_keys_keep_nulls_apart_from_empty_strings():
+    keys = dimension_keys(stage_rows([1, 1, 1, 1], ['seed', 'seed', None, ''], [None, '', 'x', 'x'])).to_pylist()
+    assert len(set(keys)) == 4
+
+
+def test_encode_dimension_keeps_ids_across_batches():
+    allocator = new_dimension_allocators()['investor_stages']
+    junction, new = encode_dimension('investor_stages', stage_rows([1, 1, 2], ['seed', 'a', 'seed'], ['S', 'A', 'S']),
+                                     allocator)
+    assert junction.column('stage_id').to_pylist() == [1, 2, 1]
+    assert junction.schema.field('stage_id').type == pa.int16()
+    assert new.to_pylist() == [{'id': 1, 'kind': 'seed', 'display_name': 'S'},
+                               {'id': 2, 'kind': 'a', 'display_name': 'A'}]
+
+    junction, new = encode_dimension('investor_stages', stage_rows([3, 3], ['a', None], ['A', None]), allocator)
+    assert junction.column('stage_id').to_pylist() == [2, 3]
+    assert new.to_pylist() == [{'id': 3, 'kind': None, 'display_name': None}]
+
+
+def test_encode_dimension_refuses_more_ids_than_smallint(monkeypatch):
+    monkeypatch.setattr(dimension_tables, 'SMALLINT_MAX', 2)
+    allocator = new_dimension_allocators()['areas_of_interest']
+    with pytest.raises(ValueError, match='more than 2 distinct'):
+        encode_dimension('areas_of_interest', stage_rows([1, 1, 1], ['a', 'b', 'c'], ['A', 'B', 'C']), allocator)
+
+
+def test_without_flat_tables_drops_only_the_flat_tables():
+    _, deferred = split_schema(create_relational_schema())
+    kept = without_flat_tables(deferred)
+    assert 'investor_stages' in deferred['tables'] and 'investor_stages' not in kept['tables']
+    assert 'investors' in kept['tables']
+    assert not any(fk[0] in DIMENSION_TABLES for fk in kept['foreign_keys'])
+    assert not any(sql.split()[2] in DIMENSION_TABLES for _, sql in kept['keys'])
+    assert len(kept['keys']) < len(deferred['keys'])
+
+
+def run_ddl(engine, sql):
+    raw_conn = engine.raw_connection()
+    try:
+        execute_raw(raw_conn, sql)
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+
+
+def test_views_return_the_flat_rows(parents_loaded, synthetic_path):
+    engine = parents_loaded
+    run_ddl(engine, normalized_schema())
+    children = extract_child_tables(pq.read_table(synthetic_path, columns=CHILD_SOURCE_COLUMNS),
+                                    tables=list(DIMENSION_TABLES))
+    allocators = new_dimension_allocators()
+    raw_conn = engine.raw_connection()
+    try:
+        for flat_name, batch in children.items():
+            # Two batches share one allocator, as streamed loads do
+            half = batch.num_rows // 2
+            for part in (batch.slice(0, half), batch.slice(half)):
+                load_dimension_junction(raw_conn, flat_name, part, allocators[flat_name], 'csv')
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+
+    with engine.connect() as conn:
+        assert is_normalized(conn)
+        for flat_name, batch in children.items():
+            rows = conn.execute(text(f"SELECT investor_id, kind, display_name FROM {flat_name}")).fetchall()
+            expected = zip(*(batch.column(name).to_pylist() for name in ('investor_id', 'kind', 'display_name')))
+            assert sorted(rows, key=repr) == sorted(expected, key=repr), flat_name
+        reloaded = dimension_allocators_from_db(conn)
+    for flat_name, allocator in allocators.items():
+        assert reloaded[flat_name].ids == allocator.ids, flat_name
+
+
+def test_flat_schema_can_be_rebuilt_over_the_normalized_one(parents_loaded):
+    run_ddl(parents_loaded, normalized_schema())
+    run_ddl(parents_loaded, normalized_schema())
+    run_ddl(parents_loaded, create_relational_schema())
+    with parents_loaded.connect() as conn:
+        assert not is_normalized(conn)
+        kinds = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('investor_stages')"))
+        assert kinds.scalar() == 'r'
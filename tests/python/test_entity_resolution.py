@@ -0,0 +1,126 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from entity_resolution import ENTITY_KINDS, LEGAL_SUFFIXES, EntityResolver, match_pairs, normalize_names
+from export_relational_fast import create_relational_schema
+from load_manifest import execute_raw
+
+
+def keys_of(kind, names):
+    return normalize_names(pa.array(names, type=pa.string()), ENTITY_KINDS[kind]['stop_words'])
+
+
+def matched(kind, names, first_new=0):
+    keys = keys_of(kind, names)
+    left, right = match_pairs(keys, first_new, ENTITY_KINDS[kind]['generic_words'])
+    return {tuple(sorted((names[a], names[b]))) for a, b in zip(left.tolist(), right.tolist())}
+
+
+def test_normalize_names_drops_legal_suffixes_accents_and_punctuation():
+    names = pa.array(['Acme Corp', 'Acme Corporation', 'Google Inc.', 'google', 'Café Ltd', 'AT&T Inc',
+                      'The Company', None])
+    assert normalize_names(names, LEGAL_SUFFIXES).to_pylist() == [
+        'acme', 'acme', 'google', 'google', 'cafe', 'at and t', 'the company', None]
+
+
+@pytest.mark.parametrize('first, second', [
+    ('Washington University', 'University of Washington'),
+    ('Miami University', 'University of Miami'),
+])
+def test_reordered_school_names_stay_apart(first, second):
+    assert matched('schools', [first, second]) == set()
+
+
+@pytest.mark.parametrize('first, second', [
+    ('apple', 'apple labs'),
+    ('sony group', 'sony'),
+])
+def test_company_names_extended_by_a_word_stay_apart(first, second):
+    assert matched('companies', [first, second]) == set()
+
+
+def test_school_name_extended_by_generic_words_matches():
+    assert matched('schools', ['Stanford', 'stanford university', 'Stanford Graduate School of Business']) == {
+        ('Stanford', 'stanford university')}
+
+
+def test_near_identical_spellings_match():
+    assert matched('companies', ['Andreessen Horowitz', 'Andreesen Horowitz', 'Stripe']) == {
+        ('Andreesen Horowitz', 'Andreessen Horowitz')}
+
+
+def test_known_keys_are_not_compared_with_each_other():
+    names = ['Andreessen Horowitz', 'Andreesen Horowitz', 'Stripe']
+    assert matched('companies', names, first_new=2) == set()
+    assert matched('companies', names, first_new=1) == {('Andreesen Horowitz', 'Andreessen Horowitz')}
+
+
+@pytest.mark.parametrize('first, second', [
+    ('Sequoia Capital', 'Sequoia Capital II'),
+    ('Index Ventures', 'Index Ventures II'),
+    ('Zen Software', 'Zen Software 2'),
+    ('Zen Software 2', 'Zen Software 13'),
+    ('Fund II', 'Fund III'),
+])
+def test_numbered_company_names_stay_apart(first, second):
+    assert matched('companies', [first, second]) == set()
+
+
+def test_numbered_school_names_stay_apart():
+    assert matched('schools', ['Stanford', 'Stanford University II']) == set()
+
+
+def test_equally_numbered_spellings_match():
+    assert matched('companies', ['Andreessen Horowitz II', 'Andreesen Horowitz II', 'Andreesen Horowitz III']) == {
+        ('Andreesen Horowitz II', 'Andreessen Horowitz II')}
+
+
+def company_rows_of(names):
+    return pa.table({'name': pa.array(names, type=pa.string()), 'display_name': pa.array(names, type=pa.string()),
+                     'total_employee_count': pa.nulls(len(names), type=pa.int64())})
+
+
+def resolved_groups(engine, batches):
+    """Groups of raw names resolved to one company after resolving batches in order"""
+    raw_conn = engine.raw_connection()
+    try:
+        execute_raw(raw_conn, create_relational_schema())
+        raw_conn.commit()
+        with engine.connect() as conn:
+            resolver = EntityResolver.from_db(conn, 'companies')
+        for names in batches:
+            resolver.resolve(raw_conn, company_rows_of(names))
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    groups = {}
+    for alias, company_id in resolver.aliases.items():
+        groups.setdefault(company_id, set()).add(alias)
+    return sorted(sorted(group) for group in groups.values())
+
+
+# Each spelling is one edit from the next, but the ends are too far apart to match
+CHAIN = ['Andreessen Horowitz'] * 3 + ['Andreesen Horowitz', 'Andresen Horowitz', 'Andresen Horowits']
+NUMBERED = ['Zen Software'] + [f'Zen Software {number}' for number in range(2, 14)] + [
+    'Sequoia Capital', 'Sequoia Capital II', 'Index Ventures', 'Index Ventures II']
+
+
+def test_resolved_names_are_not_chained(engine):
+    assert resolved_groups(engine, [CHAIN]) == [
+        ['Andreesen Horowitz', 'Andreessen Horowitz'], ['Andresen Horowits', 'Andresen Horowitz']]
+
+
+def test_numbered_companies_resolve_to_separate_rows(engine):
+    assert resolved_groups(engine, [NUMBERED]) == sorted([name] for name in NUMBERED)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_resolution_does_not_depend_on_name_order(engine, seed):
+    names = CHAIN + NUMBERED
+    shuffled = [names[index] for index in np.random.default_rng(seed).permutation(len(names))]
+    assert resolved_groups(engine, [shuffled]) == resolved_groups(engine, [names])
+
+
+def test_numbered_companies_loaded_later_stay_apart(engine):
+    assert resolved_groups(engine, [NUMBERED[::2], NUMBERED[1::2]]) == resolved_groups(engine, [NUMBERED])
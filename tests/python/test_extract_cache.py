@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import pyarrow.parquet as pq
+import pytest
+
+import extract_cache
+from arrow_extract import CHILD_SOURCE_COLUMNS, EXTRACTOR_VERSION, extract_child_tables
+from extract_cache import DIGESTS_FILE, cache_directory, cached_child_tables, file_digest, source_digest
+
+TABLES = ['investor_stages', 'positions']
+
+
+@pytest.fixture
+def investors_path(tmp_path, synthetic_path):
+    path = tmp_path / 'investors.parquet'
+    shutil.copy(synthetic_path, path)
+    return path
+
+
+@pytest.fixture
+def digest_calls(monkeypatch):
+    calls = []
+
+    def counting_digest(path, *args):
+        calls.append(path)
+        return file_digest(path, *args)
+
+    monkeypatch.setattr(extract_cache, 'file_digest', counting_digest)
+    return calls
+
+
+def entries(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name != DIGESTS_FILE)
+
+
+def test_cached_tables_match_a_fresh_extraction(investors_path, tmp_path, digest_calls):
+    cache_dir = tmp_path / 'cache'
+    expected = extract_child_tables(pq.read_table(investors_path, columns=CHILD_SOURCE_COLUMNS), tables=TABLES)
+    first = cached_child_tables(investors_path, TABLES, cache_dir=cache_dir)
+    second = cached_child_tables(investors_path, TABLES, cache_dir=cache_dir)
+    for name in TABLES:
+        assert first[name].equals(expected[name]) and second[name].equals(expected[name]), name
+    assert entries(cache_dir) == [f'{file_digest(investors_path)}-v{EXTRACTOR_VERSION}']
+    # The second run found the digest by size and mtime instead of hashing the file again
+    assert len(digest_calls) == 1
+
+
+def test_copies_share_an_entry(investors_path, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    copy = tmp_path / 'copy.parquet'
+    shutil.copy(investors_path, copy)
+    cached_child_tables(investors_path, TABLES, cache_dir=cache_dir)
+    assert cache_directory(copy, cache_dir) == cache_directory(investors_path, cache_dir)
+
+
+def test_rewritten_file_replaces_its_entry(investors_path, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cached_child_tables(investors_path, TABLES, cache_dir=cache_dir)
+    old_digest = source_digest(investors_path, cache_dir)
+    os.makedirs(cache_dir / f'{old_digest}-v0')
+
+    pq.write_table(pq.read_table(investors_path).slice(0, 50), investors_path)
+    assert source_digest(investors_path, cache_dir) != old_digest
+    tables = cached_child_tables(investors_path, TABLES, cache_dir=cache_dir)
+    assert tables['investor_stages'].column('investor_id').to_pylist()[-1] <= 50
+    assert entries(cache_dir) == [f'{file_digest(investors_path)}-v{EXTRACTOR_VERSION}']
+
+
+def test_entries_shared_with_another_file_are_kept(investors_path, tmp_path, synthetic_path):
+    cache_dir = tmp_path / 'cache'
+    other = tmp_path / 'other.parquet'
+    shutil.copy(synthetic_path, other)
+    cached_child_tables(investors_path, TABLES, cache_dir=cache_dir)
+    cached_child_tables(other, TABLES, cache_dir=cache_dir)
+
+    pq.write_table(pq.read_table(investors_path).slice(0, 50), investors_path)
+    cached_child_tables(investors_path, TABLES, cache_dir=cache_dir)
+    assert entries(cache_dir) == sorted(f'{file_digest(path)}-v{EXTRACTOR_VERSION}'
+                                        for path in (investors_path, other))
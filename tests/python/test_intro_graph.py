@@ -0,0 +1,101 @@
+from collections import deque
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from intro_graph import IntroGraph
+
+
+def random_edges(seed, nodes=60, edges=90):
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(0, nodes, size=(edges, 2))
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return [(f'p{a:03d}', f'p{b:03d}') for a, b in pairs.tolist()]
+
+
+def graph_of(edges):
+    return IntroGraph.from_edges(pa.array([a for a, _ in edges]), pa.array([b for _, b in edges]))
+
+
+def neighbours_of(edges):
+    neighbours = {}
+    for a, b in edges:
+        neighbours.setdefault(a, set()).add(b)
+        neighbours.setdefault(b, set()).add(a)
+    return neighbours
+
+
+def bfs_hops(neighbours, start):
+    hops, queue = {start: 0}, deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbour in neighbours[node]:
+            if neighbour not in hops:
+                hops[neighbour] = hops[node] + 1
+                queue.append(neighbour)
+    return hops
+
+
+def test_from_edges_collapses_duplicate_and_reversed_pairs():
+    graph = graph_of([('b', 'a'), ('a', 'b'), ('a', 'b'), ('c', 'a')])
+    assert graph.slugs == ['a', 'b', 'c']
+    assert graph.num_nodes == 3
+    assert graph.num_edges == 2
+    assert graph.indptr.tolist() == [0, 2, 3, 4]
+    assert graph.indices.tolist() == [1, 2, 0, 0]
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_k_hop_matches_reference_bfs(seed):
+    edges = random_edges(seed)
+    graph, neighbours = graph_of(edges), neighbours_of(edges)
+    for start in sorted(neighbours)[:10]:
+        reference = bfs_hops(neighbours, start)
+        for k in (1, 2, 3):
+            assert graph.k_hop(start, k) == {node: hops for node, hops in reference.items() if 0 < hops <= k}
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_shortest_path_matches_reference_bfs(seed):
+    edges = random_edges(seed)
+    graph, neighbours = graph_of(edges), neighbours_of(edges)
+    slugs = sorted(neighbours)
+    for source in slugs[:8]:
+        reference = bfs_hops(neighbours, source)
+        for target in slugs:
+            path = graph.shortest_path(source, target)
+            if target not in reference:
+                assert path is None
+                continue
+            assert len(path) == reference[target] + 1
+            assert path[0] == source and path[-1] == target
+            assert all(b in neighbours[a] for a, b in zip(path, path[1:]))
+            limited = graph.shortest_path(source, target, max_hops=2)
+            assert (limited is not None) == (reference[target] <= 2)
+
+
+def test_shortest_path_edge_cases():
+    graph = graph_of([('a', 'b'), ('c', 'd')])
+    assert graph.shortest_path('a', 'a') == ['a']
+    assert graph.shortest_path('a', 'd') is None
+    with pytest.raises(KeyError, match='zed'):
+        graph.shortest_path('a', 'zed')
+
+
+def test_snapshot_round_trip(tmp_path):
+    graph = graph_of(random_edges(4) + [('ünïcode', 'p000')])
+    path = tmp_path / 'intro_graph.bin'
+    graph.save(path)
+    loaded = IntroGraph.load(path)
+    assert loaded.slugs == graph.slugs
+    assert loaded.indptr.tolist() == graph.indptr.tolist()
+    assert loaded.indices.tolist() == graph.indices.tolist()
+    assert loaded.k_hop('ünïcode', 2) == graph.k_hop('ünïcode', 2)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError, match='not an intro graph snapshot'):
+        IntroGraph.load(path)
@@ -0,0 +1,51 @@
+from load_finalize import split_schema
+
+SCHEMA = """
+    DROP TABLE IF EXISTS children CASCADE;
+    CREATE TABLE parents (
+        id SERIAL PRIMARY KEY,
+        slug VARCHAR(255) UNIQUE,
+        -- a comment line
+        name TEXT NOT NULL
+    );
+
+    CREATE TABLE children (
+        id SERIAL PRIMARY KEY,
+        parent_id INTEGER REFERENCES parents(id),
+        note TEXT
+    );
+
+    CREATE INDEX idx_children_parent_id ON children(parent_id);
+    CREATE UNIQUE INDEX idx_children_note ON children(note);
+"""
+
+
+def test_split_schema_defers_keys_indexes_and_foreign_keys():
+    bare, deferred = split_schema(SCHEMA)
+    assert deferred['tables'] == ['parents', 'children']
+    assert deferred['keys'] == [
+        ('parents_pkey', 'ALTER TABLE parents ADD CONSTRAINT parents_pkey PRIMARY KEY (id)'),
+        ('parents_slug_key', 'ALTER TABLE parents ADD CONSTRAINT parents_slug_key UNIQUE (slug)'),
+        ('children_pkey', 'ALTER TABLE children ADD CONSTRAINT children_pkey PRIMARY KEY (id)'),
+    ]
+    assert deferred['foreign_keys'] == [
+        ('children', 'children_parent_id_fkey', 'FOREIGN KEY (parent_id) REFERENCES parents(id)'),
+    ]
+    assert deferred['indexes'] == [
+        ('idx_children_parent_id', 'CREATE INDEX idx_children_parent_id ON children(parent_id);'),
+        ('idx_children_note', 'CREATE UNIQUE INDEX idx_children_note ON children(note);'),
+    ]
+
+
+def test_split_schema_leaves_bare_tables():
+    bare, _ = split_schema(SCHEMA)
+    assert 'DROP TABLE IF EXISTS children CASCADE;' in bare
+    assert 'CREATE TABLE parents (\n        id SERIAL,\n        slug VARCHAR(255),\n        name TEXT NOT NULL\n    );' in bare
+    assert 'CREATE TABLE children (\n        id SERIAL,\n        parent_id INTEGER,\n        note TEXT\n    );' in bare
+    for deferred_ddl in ('PRIMARY KEY', 'UNIQUE', 'REFERENCES', 'INDEX', '--'):
+        assert deferred_ddl not in bare
+
+
+def test_split_schema_of_schema_without_tables():
+    assert split_schema('DROP VIEW IF EXISTS v;') == ('DROP VIEW IF EXISTS v;', {
+        'tables': [], 'keys': [], 'indexes': [], 'foreign_keys': []})
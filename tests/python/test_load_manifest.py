@@ -0,0 +1,92 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import text
+
+import complete_population
+from load_manifest import LoadManifest, reset_manifest, run_unit, source_fingerprint
+
+
+def test_source_fingerprint_covers_file_and_layout(tmp_path):
+    path = tmp_path / 'investors.parquet'
+    path.write_bytes(b'abc')
+    whole = source_fingerprint(path, mode='whole')
+    assert whole == source_fingerprint(path, mode='whole')
+    assert whole != source_fingerprint(path, mode='batches', batch_size=100)
+    assert source_fingerprint(path, batch_size=100, mode='batches') == \
+        source_fingerprint(path, mode='batches', batch_size=100)
+    os.utime(path, ns=(0, 0))
+    assert source_fingerprint(path, mode='whole') != whole
+
+
+def insert_rows(values):
+    def load(raw_conn):
+        with raw_conn.cursor() as cursor:
+            for value in values:
+                cursor.execute("INSERT INTO loaded (value) VALUES (%s)", (value,))
+        if None in values:
+            raise RuntimeError('connection dropped')
+        return len(values)
+    return load
+
+
+def loaded_values(engine):
+    with engine.connect() as conn:
+        return sorted(row[0] for row in conn.execute(text("SELECT value FROM loaded")))
+
+
+@pytest.fixture
+def loaded_table(engine):
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE loaded (value INTEGER)"))
+        conn.commit()
+    return engine
+
+
+def test_units_commit_with_their_mark_and_resume_skips_them(loaded_table):
+    engine = loaded_table
+    manifest = LoadManifest(engine, 'children', 'file-a')
+    assert run_unit(engine, manifest, 'loaded', 1, 10, insert_rows([1, 2])) == 2
+    with pytest.raises(RuntimeError):
+        run_unit(engine, manifest, 'loaded', 11, 20, insert_rows([3, None]))
+    # The failed unit's rows rolled back with it
+    assert loaded_values(engine) == [1, 2]
+    with engine.connect() as conn:
+        assert sorted(conn.execute(text("SELECT first_id, status, rows_loaded FROM load_manifest"))) == \
+            [(1, 'done', 2), (11, 'failed', None)]
+
+    resumed = LoadManifest(engine, 'children', 'file-a', resume=True)
+    assert run_unit(engine, resumed, 'loaded', 1, 10, insert_rows([99])) == 2
+    assert run_unit(engine, resumed, 'loaded', 11, 20, insert_rows([3, 4])) == 2
+    assert loaded_values(engine) == [1, 2, 3, 4]
+    assert (resumed.skipped, resumed.loaded) == (1, 1)
+    assert resumed.finished_counts(['loaded'], 11, 20) == {'loaded': 2}
+
+
+def test_resume_refuses_another_source(loaded_table):
+    manifest = LoadManifest(loaded_table, 'children', 'file-a')
+    run_unit(loaded_table, manifest, 'loaded', 1, 10, insert_rows([1]))
+    with pytest.raises(ValueError, match='rerun without --resume'):
+        LoadManifest(loaded_table, 'children', 'file-b', resume=True)
+
+
+def test_fresh_run_forgets_only_its_stage(loaded_table):
+    run_unit(loaded_table, LoadManifest(loaded_table, 'parents', 'file-a'), 'loaded', 1, 10, insert_rows([1]))
+    run_unit(loaded_table, LoadManifest(loaded_table, 'children', 'file-a'), 'loaded', 1, 10, insert_rows([2]))
+    LoadManifest(loaded_table, 'children', 'file-a')
+    with loaded_table.connect() as conn:
+        assert [row[0] for row in conn.execute(text("SELECT stage FROM load_manifest"))] == ['parents']
+    reset_manifest(loaded_table)
+    assert LoadManifest(loaded_table, 'parents', 'file-a', resume=True).units == {}
+
+
+def test_failed_load_exits_with_status_one(monkeypatch):
+    def fail(**kwargs):
+        raise RuntimeError('load failed')
+
+    monkeypatch.setattr(complete_population, 'process_all_nested_data', fail)
+    monkeypatch.setattr(sys, 'argv', ['complete_population.py'])
+    with pytest.raises(SystemExit) as exit_info:
+        complete_population.main()
+    assert exit_info.value.code == 1
@@ -0,0 +1,101 @@
+import argparse
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import load_metrics
+from load_metrics import (add_metrics_arguments, counting_connect_args, finish_run, measure_stage, measure_unit,
+                          start_run)
+
+
+@pytest.fixture
+def run(monkeypatch):
+    monkeypatch.setattr(load_metrics, '_active', None)
+    return start_run('test_job')
+
+
+def metrics_args(*argv):
+    parser = argparse.ArgumentParser()
+    add_metrics_arguments(parser)
+    return parser.parse_args(list(argv))
+
+
+def test_measuring_outside_a_run_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(load_metrics, '_active', None)
+    with measure_stage('children') as stage, measure_unit('positions') as unit:
+        unit['rows'] = 5
+    assert stage == {}
+    finish_run(metrics_args())
+
+
+def test_stage_rows_default_to_their_units(run):
+    with measure_stage('children'):
+        for first_id in (1, 101):
+            with measure_unit('positions', first_id, first_id + 99) as unit:
+                unit['rows'] = 40
+        with measure_unit('degrees', 1, 200) as unit:
+            unit['rows'] = 7
+    with measure_stage('views') as stage:
+        stage['rows'] = 3
+
+    children, views = run.stages
+    assert (children['stage'], children['rows'], children['tables'], children['status']) == ('children', 87, 2, 'done')
+    assert views['rows'] == 3
+    totals = {total['table']: total for total in run.table_totals()}
+    assert (totals['positions']['units'], totals['positions']['rows']) == (2, 80)
+    assert all(unit['stage'] == 'children' for unit in run.units)
+
+
+def test_failed_units_and_stages_are_recorded(run):
+    with pytest.raises(RuntimeError):
+        with measure_stage('children'):
+            with measure_unit('positions', 1, 100) as unit:
+                unit['rows'] = 10
+                raise RuntimeError('COPY failed')
+    assert run.stages[0]['status'] == 'failed'
+    assert run.table_totals()[0]['failed_units'] == 1
+    run.finish(RuntimeError('COPY failed\nCONTEXT: line 3'))
+    report = run.report()
+    assert (report['status'], report['error'], report['rows']) == ('failed', 'COPY failed', 0)
+
+
+def test_reports_are_written(run, tmp_path, capsys):
+    with measure_stage('parents'):
+        with measure_unit('investors', 1, 10) as unit:
+            unit['rows'] = 10
+    json_path, prom_path = tmp_path / 'run.json', tmp_path / 'metrics' / 'run.prom'
+    finish_run(metrics_args('--metrics-json', str(json_path), '--metrics-prom', str(prom_path)))
+    assert 'Run metrics (success' in capsys.readouterr().out
+
+    report = json.loads(json_path.read_text())
+    assert (report['job'], report['status'], report['rows']) == ('test_job', 'success', 10)
+    assert [stage['stage'] for stage in report['stages']] == ['parents']
+
+    prometheus = prom_path.read_text().splitlines()
+    assert 'nvestiv_load_run_success{job="test_job"} 1' in prometheus
+    assert 'nvestiv_load_stage_rows{job="test_job",stage="parents"} 10' in prometheus
+    assert 'nvestiv_load_table_rows{job="test_job",stage="parents",table="investors"} 10' in prometheus
+    assert '# TYPE nvestiv_load_stage_duration_seconds gauge' in prometheus
+
+
+def test_prometheus_labels_are_escaped(run):
+    run.job = 'say "hi"\\'
+    with measure_stage('empty'):
+        pass
+    run.finish()
+    text_format = run.prometheus_text()
+    assert 'nvestiv_load_stage_rows{job="say \\"hi\\"\\\\",stage="empty"} 0' in text_format.splitlines()
+
+
+def test_round_trips_are_counted_per_stage_and_unit(run, engine):
+    counting = create_engine(engine.url.render_as_string(hide_password=False), connect_args=counting_connect_args())
+    try:
+        with measure_stage('queries'):
+            with measure_unit('statements'), counting.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text('SELECT 1'))
+    finally:
+        counting.dispose()
+    assert run.units[0]['round_trips'] >= 3
+    assert run.stages[0]['round_trips'] >= run.units[0]['round_trips']
@@ -0,0 +1,74 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from arrow_extract import CHILD_SOURCE_COLUMNS, extract_child_tables
+from bulk_copy import copy_arrow_raw
+from load_statistics import (RelationshipStatistics, latest_statistics, new_load_id, save_statistics_from_db,
+                             summarize)
+
+TABLES = ['investor_stages', 'areas_of_interest', 'investor_lists']
+
+
+def test_summarize_counts_investors_without_rows():
+    summary = summarize({1: 2, 3: 1, 0: 99}, investors=5)
+    assert summary == {
+        'total_records': 5,
+        'total_investors': 5,
+        'unique_investors': 3,
+        'avg_per_investor': 1.67,
+        'max_per_investor': 3,
+        'median_per_investor': 1,
+        'p90_per_investor': 3,
+        'length_histogram': {'0': 2, '1': 2, '3': 1},
+    }
+    assert summarize({}, investors=0)['avg_per_investor'] == 0
+
+
+def children(investor_ids):
+    return {'investor_stages': pa.table({'investor_id': pa.array(investor_ids, type=pa.int32())})}
+
+
+def test_batches_add_up_to_the_whole_load():
+    whole = RelationshipStatistics(['investor_stages'])
+    whole.add(children([1, 1, 2, 4, 4, 4]), investors=6)
+    batched = RelationshipStatistics(['investor_stages'])
+    batched.add(children([1, 1, 2]), investors=3)
+    batched.add(children([4, 4, 4]), investors=3)
+    batched.add(children([]), investors=0)
+    assert batched.histograms == whole.histograms == {'investor_stages': {2: 1, 1: 1, 3: 1}}
+    assert batched.investors == 6
+
+
+def test_saved_statistics_match_the_loaded_tables(parents_loaded, synthetic_path):
+    engine = parents_loaded
+    investors = pq.read_table(synthetic_path, columns=CHILD_SOURCE_COLUMNS)
+    statistics = RelationshipStatistics(TABLES)
+    raw_conn = engine.raw_connection()
+    try:
+        for start_id, batch in ((1, investors.slice(0, 120)), (121, investors.slice(120))):
+            child_tables = extract_child_tables(batch, start_id, tables=TABLES)
+            for table_name, table in child_tables.items():
+                copy_arrow_raw(raw_conn, table_name, table)
+            statistics.add(child_tables, batch.num_rows)
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+
+    extracted = statistics.save(engine, new_load_id(), 'test')
+    counted = save_statistics_from_db(engine, 'z-recount', 'recount', TABLES)
+    assert extracted == counted
+    with engine.connect() as conn:
+        latest = latest_statistics(conn)
+        assert latest['investor_stages']['load_id'] == 'z-recount'
+        assert latest['investors']['total_records'] == investors.num_rows
+        assert latest['investor_lists']['total_records'] == \
+            conn.execute(text("SELECT COUNT(*) FROM investor_lists")).scalar()
+
+
+def test_skipped_batches_are_recounted_from_the_tables(parents_loaded):
+    statistics = RelationshipStatistics(TABLES)
+    statistics.add({name: pa.table({'investor_id': pa.array([1, 1], type=pa.int32())}) for name in TABLES}, 2)
+    statistics.skip()
+    rows = statistics.save(parents_loaded, new_load_id())
+    assert all(row['total_records'] == 0 for row in rows.values())
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import text
+
+from name_lookup import NAME_COLUMNS, build_name_indexes, fuzzy_lookup, trigram_index_name
+
+
+def test_blank_names_match_nothing():
+    # Returns before touching the connection
+    assert fuzzy_lookup(None, '   ') == []
+
+
+def trigram_available(engine):
+    with engine.connect() as conn:
+        return bool(conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar())
+
+
+def indexes(engine):
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"))}
+
+
+def test_indexes_are_skipped_without_pg_trgm(parents_loaded, capsys):
+    if trigram_available(parents_loaded):
+        pytest.skip('pg_trgm is available on the test server')
+    assert build_name_indexes(parents_loaded) is False
+    assert 'pg_trgm is not available' in capsys.readouterr().out
+    assert not {trigram_index_name(table, column) for table, column in NAME_COLUMNS.items()} & indexes(parents_loaded)
+
+
+@pytest.fixture
+def indexed(parents_loaded):
+    if not trigram_available(parents_loaded):
+        pytest.skip('pg_trgm is not available on the test server')
+    with parents_loaded.connect() as conn:
+        conn.execute(text("""
+            UPDATE persons SET name = 'Marguerite Okonkwo-Castellanos'
+            WHERE id = (SELECT person_id FROM investors WHERE id = 1);
+            UPDATE firms SET name = 'Castellan Ventures' WHERE id = (SELECT MIN(id) FROM firms);
+        """))
+        conn.commit()
+    assert build_name_indexes(parents_loaded) is True
+    # Rebuilding keeps the existing indexes
+    assert build_name_indexes(parents_loaded) is True
+    assert {trigram_index_name(table, column) for table, column in NAME_COLUMNS.items()} <= indexes(parents_loaded)
+    return parents_loaded
+
+
+def test_misspelled_names_are_found(indexed):
+    with indexed.connect() as conn:
+        best = fuzzy_lookup(conn, 'Margerite  Okonkwo')[0]
+        assert (best['kind'], best['name'], best['investor_id']) == ('person', 'Marguerite Okonkwo-Castellanos', 1)
+        firms = fuzzy_lookup(conn, 'castelan ventures', kinds=('firms',))
+        assert firms[0]['name'] == 'Castellan Ventures'
+        assert all(match['kind'] == 'firm' for match in firms)
+
+
+def test_results_are_limited_and_ordered(indexed):
+    with indexed.connect() as conn:
+        matches = fuzzy_lookup(conn, 'castellan', limit=2, threshold=0.1)
+        assert len(matches) == 2
+        assert matches[0]['score'] >= matches[1]['score']
+        assert fuzzy_lookup(conn, 'qqqxxzz') == []
@@ -0,0 +1,98 @@
+from collections import deque
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from scipy import sparse
+
+from intro_graph import IntroGraph
+from network_metrics import adjacency_matrix, betweenness, degrees, pagerank
+
+
+def random_graph(seed, nodes=40, edges=70):
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(0, nodes, size=(edges, 2))
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return IntroGraph.from_edges(pa.array([f'p{a:02d}' for a in pairs[:, 0]]),
+                                 pa.array([f'p{b:02d}' for b in pairs[:, 1]]))
+
+
+def brandes(graph):
+    """Normalized betweenness of an undirected graph, one plain BFS per source"""
+    size = graph.num_nodes
+    neighbours = [graph.indices[graph.indptr[node]:graph.indptr[node + 1]].tolist() for node in range(size)]
+    scores = [0.0] * size
+    for source in range(size):
+        order, predecessors = [], [[] for _ in range(size)]
+        paths, distance = [0] * size, [-1] * size
+        paths[source], distance[source] = 1, 0
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for neighbour in neighbours[node]:
+                if distance[neighbour] < 0:
+                    distance[neighbour] = distance[node] + 1
+                    queue.append(neighbour)
+                if distance[neighbour] == distance[node] + 1:
+                    paths[neighbour] += paths[node]
+                    predecessors[neighbour].append(node)
+        dependency = [0.0] * size
+        for node in reversed(order):
+            for predecessor in predecessors[node]:
+                dependency[predecessor] += paths[predecessor] / paths[node] * (1 + dependency[node])
+            if node != source:
+                scores[node] += dependency[node]
+    pairs = (size - 1) * (size - 2)
+    return np.array(scores) / pairs
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_exact_betweenness_matches_brandes(seed):
+    graph = random_graph(seed)
+    adjacency = adjacency_matrix(graph)
+    expected = brandes(graph)
+    for block_cells in (adjacency.shape[0] * 7, 1 << 22):
+        assert np.allclose(betweenness(adjacency, samples=graph.num_nodes, block_cells=block_cells), expected)
+
+
+def test_sampled_betweenness_is_scaled_to_all_sources():
+    graph = random_graph(5, nodes=120, edges=300)
+    adjacency = adjacency_matrix(graph)
+    estimate = betweenness(adjacency, samples=60, seed=1)
+    exact = brandes(graph)
+    assert estimate.sum() == pytest.approx(exact.sum(), rel=0.25)
+    assert np.argmax(estimate) in np.argsort(exact)[-5:]
+
+
+def test_betweenness_of_a_path():
+    # a - b - c - d: b and c each sit on two of the three pairs they do not end
+    graph = IntroGraph.from_edges(pa.array(['a', 'b', 'c']), pa.array(['b', 'c', 'd']))
+    assert betweenness(adjacency_matrix(graph), samples=4).tolist() == pytest.approx([0, 2 / 3, 2 / 3, 0])
+    assert betweenness(sparse.csr_matrix((2, 2)), samples=2).tolist() == [0, 0]
+
+
+def test_pagerank_matches_the_stationary_distribution():
+    graph = random_graph(3)
+    adjacency = adjacency_matrix(graph)
+    size = adjacency.shape[0]
+    out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    transition = np.where(out_degree[:, None] > 0, adjacency.toarray() / np.maximum(out_degree, 1)[:, None], 1 / size)
+    google = 0.85 * transition + 0.15 / size
+    values, vectors = np.linalg.eig(google.T)
+    stationary = np.real(vectors[:, np.argmax(np.real(values))])
+    stationary /= stationary.sum()
+    rank = pagerank(adjacency)
+    assert rank.sum() == pytest.approx(1.0)
+    assert np.allclose(rank, stationary, atol=1e-8)
+
+
+def test_pagerank_spreads_isolated_rank():
+    rank = pagerank(sparse.csr_matrix((3, 3)))
+    assert rank.tolist() == pytest.approx([1 / 3] * 3)
+    assert len(pagerank(sparse.csr_matrix((0, 0)))) == 0
+
+
+def test_degrees_count_distinct_neighbours():
+    graph = IntroGraph.from_edges(pa.array(['a', 'a', 'b', 'c']), pa.array(['b', 'b', 'a', 'a']))
+    assert degrees(graph).tolist() == [2, 1, 1]
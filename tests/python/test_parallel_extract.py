@@ -0,0 +1,103 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import parallel_extract
+from arrow_extract import extract_child_tables
+from parallel_extract import iter_parallel_extract, parallel_extract_child_tables, plan_slices, read_slice
+from synthetic_investors import generate_chunk
+
+TABLES = ['investor_stages', 'positions', 'investments', 'coinvestors']
+
+
+@pytest.fixture(scope='module')
+def investors_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('parallel') / 'investors.parquet'
+    pq.write_table(generate_chunk(seed=7, chunk_index=0, first_row=0, rows=250, total_rows=250), path,
+                   row_group_size=60)
+    return path
+
+
+@pytest.fixture
+def single_group_path(tmp_path, investors_path):
+    path = tmp_path / 'single.parquet'
+    pq.write_table(pq.read_table(investors_path), path)
+    return path
+
+
+def test_plan_slices(investors_path, single_group_path):
+    assert plan_slices(investors_path, 2) == [(1, 60, 0), (61, 120, 1), (121, 180, 2), (181, 240, 3), (241, 250, 4)]
+    assert plan_slices(single_group_path, 4) == [(1, 63, 0), (64, 126, 0), (127, 189, 0), (190, 250, 0)]
+    assert plan_slices(single_group_path, 1) == [(1, 250, 0)]
+    assert read_slice(investors_path, (241, 250, 4)).num_rows == 10
+
+
+@pytest.mark.parametrize('path_fixture', ['investors_path', 'single_group_path'])
+def test_parallel_extract_matches_single_process(request, path_fixture):
+    path = request.getfixturevalue(path_fixture)
+    expected = extract_child_tables(pq.read_table(path), tables=TABLES)
+    merged = parallel_extract_child_tables(path, workers=2, tables=TABLES)
+    for name in TABLES:
+        assert merged[name].equals(expected[name]), name
+
+
+class InlineExecutor:
+    """Runs submissions on the spot and records how many results are outstanding"""
+
+    submitted = []
+    functions = []
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, args):
+        self.submitted.append(args[1][0])
+        self.functions.append(fn.__name__)
+        return InlineFuture(fn(args))
+
+
+class InlineFuture:
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def test_window_and_skip(monkeypatch, investors_path):
+    InlineExecutor.submitted, InlineExecutor.functions = [], []
+    monkeypatch.setattr(parallel_extract, 'ProcessPoolExecutor', InlineExecutor)
+    results = iter_parallel_extract(investors_path, workers=2, tables=['investor_stages'], skip={61})
+
+    start_id, child_tables = next(results)
+    assert start_id == 1 and child_tables['investor_stages'].num_rows
+    # Skipped slices take a place in the window but are never submitted
+    assert InlineExecutor.submitted == [1, 121]
+    assert next(results) == (61, None)
+    assert InlineExecutor.submitted == [1, 121, 181]
+    assert [start_id for start_id, _ in results] == [121, 181, 241]
+    assert InlineExecutor.submitted == [1, 121, 181, 241]
+
+
+def test_single_row_group_is_split_across_workers(monkeypatch, single_group_path):
+    InlineExecutor.submitted, InlineExecutor.functions = [], []
+    monkeypatch.setattr(parallel_extract, 'ProcessPoolExecutor', InlineExecutor)
+    results = list(iter_parallel_extract(single_group_path, workers=4, tables=TABLES))
+    assert [start_id for start_id, _ in results] == [1, 64, 127, 190]
+    # Every row range goes to the pool, decoded once here and shipped as an IPC buffer
+    assert InlineExecutor.submitted == [1, 64, 127, 190]
+    assert InlineExecutor.functions == ['_extract_rows'] * 4
+    expected = extract_child_tables(pq.read_table(single_group_path), tables=TABLES)
+    for name in TABLES:
+        assert pa.concat_tables([child_tables[name] for _, child_tables in results]).equals(expected[name]), name
+
+    InlineExecutor.submitted = []
+    results = list(iter_parallel_extract(single_group_path, workers=4, tables=TABLES, skip={64}))
+    assert [start_id for start_id, child_tables in results if child_tables is None] == [64]
+    assert InlineExecutor.submitted == [1, 127, 190]
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from parallel_load import LOAD_DEPENDENCIES, run_load_dag
+
+
+def recording_steps(names, log, lock, seconds=0.01):
+    def step(name):
+        with lock:
+            log.append(('start', name))
+        time.sleep(seconds)
+        with lock:
+            log.append(('end', name))
+        return name.upper()
+    return {name: (lambda name=name: step(name)) for name in names}
+
+
+def test_steps_start_after_their_dependencies_finish():
+    log, lock = [], threading.Lock()
+    steps = recording_steps(['companies', 'positions', 'investments', 'investment_rounds', 'coinvestors',
+                             'schools', 'degrees', 'investor_stages'], log, lock)
+    results = run_load_dag(steps, max_workers=3)
+    assert results == {name: name.upper() for name in steps}
+    for name, dependencies in LOAD_DEPENDENCIES.items():
+        if name in steps:
+            for dependency in dependencies:
+                assert log.index(('end', dependency)) < log.index(('start', name)), (dependency, name)
+
+
+def test_at_most_max_workers_steps_run_at_once():
+    log, lock = [], threading.Lock()
+    run_load_dag(recording_steps([f'table_{index}' for index in range(8)], log, lock), {}, max_workers=3)
+    running = peak = 0
+    for event, _ in log:
+        running += 1 if event == 'start' else -1
+        peak = max(peak, running)
+    assert 1 < peak <= 3
+
+
+def test_dependencies_outside_the_steps_are_ignored():
+    assert run_load_dag({'positions': lambda: 1}) == {'positions': 1}
+
+
+def test_unsatisfiable_dependencies_raise():
+    with pytest.raises(ValueError, match='a, b'):
+        run_load_dag({'a': lambda: 1, 'b': lambda: 2}, {'a': ['b'], 'b': ['a']})
+
+
+def test_failure_skips_dependent_steps():
+    started = []
+
+    def fail():
+        raise RuntimeError('COPY failed')
+
+    steps = {'companies': fail, 'positions': lambda: started.append('positions')}
+    with pytest.raises(RuntimeError, match='COPY failed'):
+        run_load_dag(steps)
+    assert started == []
@@ -0,0 +1,44 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from arrow_extract import CHILD_SOURCE_COLUMNS, extract_child_tables
+from parquet_stream import current_rss_mb, iter_parquet_batches, parquet_row_count, peak_rss_mb
+from synthetic_investors import generate_chunk
+
+TABLES = ['investor_stages', 'positions', 'investments', 'investor_lists']
+
+
+@pytest.fixture(scope='module')
+def investors_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('stream') / 'investors.parquet'
+    pq.write_table(generate_chunk(seed=11, chunk_index=0, first_row=0, rows=230, total_rows=230), path,
+                   row_group_size=100)
+    return path
+
+
+def test_parquet_row_count(investors_path):
+    assert parquet_row_count(investors_path) == 230
+
+
+def test_batches_number_investors_from_one(investors_path):
+    batches = list(iter_parquet_batches(investors_path, columns=['person.slug'], batch_size=64))
+    assert [start_id for start_id, _ in batches] == [1, 65, 129, 193]
+    assert sum(batch.num_rows for _, batch in batches) == 230
+    assert all(batch.schema.names == ['person'] for _, batch in batches)
+    slugs = pa.concat_arrays([batch.column('person').field('slug') for _, batch in batches])
+    assert slugs.equals(pq.read_table(investors_path).column('person').combine_chunks().field('slug'))
+
+
+def test_streamed_extraction_matches_whole_file(investors_path):
+    expected = extract_child_tables(pq.read_table(investors_path, columns=CHILD_SOURCE_COLUMNS), tables=TABLES)
+    streamed = {name: [] for name in TABLES}
+    for start_id, batch in iter_parquet_batches(investors_path, CHILD_SOURCE_COLUMNS, batch_size=50):
+        for name, table in extract_child_tables(batch, start_id, tables=TABLES).items():
+            streamed[name].append(table)
+    for name in TABLES:
+        assert pa.concat_tables(streamed[name]).equals(expected[name]), name
+
+
+def test_rss_is_reported_in_megabytes():
+    assert 0 < current_rss_mb() <= peak_rss_mb() < 1 << 20
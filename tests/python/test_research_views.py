@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import text
+
+from research_views import (ADDED_KEY_COLUMNS, MATERIALIZED_VIEWS, RESEARCH_VIEWS_SQL, check_redeployable,
+                            deploy_materialized_views, drop_materialized_views, materialized_views,
+                            read_view_definitions, refresh_materialized_views, view_dependencies)
+
+
+def test_view_definitions_are_read_from_the_sql_file():
+    definitions = read_view_definitions(RESEARCH_VIEWS_SQL)
+    assert set(MATERIALIZED_VIEWS) < set(definitions)
+    assert 'investor_network' in definitions
+    assert not any(body.endswith(';') for body in definitions.values())
+
+
+def test_added_keys_are_the_unique_index_columns():
+    definitions = read_view_definitions(RESEARCH_VIEWS_SQL)
+    for name, column in ADDED_KEY_COLUMNS.items():
+        assert MATERIALIZED_VIEWS[name] == [column.split(' AS ')[1]]
+        assert definitions[name].startswith('SELECT')
+
+
+def test_check_redeployable():
+    check_redeployable({'investor_profiles': 'm', 'investor_network': 'v'})
+    with pytest.raises(ValueError, match='investor_network, my_report'):
+        check_redeployable({'investor_network': 'm', 'my_report': 'v'})
+
+
+def rows(conn, sql, drop=()):
+    result = conn.execute(text(sql)).mappings().fetchall()
+    return sorted(repr(sorted((key, value) for key, value in row.items() if key not in drop)) for row in result)
+
+
+def test_materialized_views_match_the_plain_ones_through_refreshes(parents_loaded):
+    engine = parents_loaded
+    drop_materialized_views(engine)
+    deploy_materialized_views(engine)
+    definitions = read_view_definitions(RESEARCH_VIEWS_SQL)
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE VIEW top_plain AS SELECT * FROM top_performers"))
+        conn.execute(text("CREATE MATERIALIZED VIEW top_votes AS SELECT investor_id, vote_count FROM top_plain"))
+        conn.execute(text("UPDATE investors SET vote_count = COALESCE(vote_count, 0) + 5 WHERE id % 3 = 0"))
+        conn.commit()
+        views = materialized_views(conn)
+        assert all(views[name] == (True, True) for name in MATERIALIZED_VIEWS)
+        assert views['top_votes'] == (True, False)
+        # Dependencies are followed through the plain view in between
+        assert view_dependencies(conn, views)['top_votes'] == ['top_performers']
+
+    results = refresh_materialized_views(engine)
+    assert set(results) == set(MATERIALIZED_VIEWS) | {'top_votes'}
+    assert all(results[name][2] for name in MATERIALIZED_VIEWS)
+
+    with engine.connect() as conn:
+        for name in MATERIALIZED_VIEWS:
+            added = [ADDED_KEY_COLUMNS[name].split(' AS ')[1]] if name in ADDED_KEY_COLUMNS else []
+            assert rows(conn, f"SELECT * FROM {name}", added) == rows(conn, definitions[name]), name
+        assert rows(conn, "SELECT * FROM top_votes") == rows(conn, "SELECT investor_id, vote_count FROM top_performers")
+        logged = conn.execute(text("SELECT COUNT(*) FROM research_view_refreshes")).scalar()
+        assert logged == len(results)
+        conn.execute(text("DROP MATERIALIZED VIEW top_votes; DROP VIEW top_plain"))
+        conn.commit()
+
+    drop_materialized_views(engine)
+    with engine.connect() as conn:
+        assert materialized_views(conn) == {}
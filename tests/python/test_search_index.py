@@ -0,0 +1,52 @@
+from sqlalchemy import text
+
+from search_index import build_search_index, search_investors, update_search_index_raw
+
+
+def set_names(conn):
+    conn.execute(text("""
+        UPDATE persons SET name = 'Zephyrine Quillfeather'
+        WHERE id = (SELECT person_id FROM investors WHERE id = 1);
+        UPDATE investors SET headline = 'Backs zephyrine-adjacent founders' WHERE id = 2;
+        UPDATE investors SET areas_of_interest_freeform = 'zephyrine' WHERE id = 3;
+    """))
+    conn.commit()
+
+
+def matches(conn, query):
+    return [row['investor_id'] for row in search_investors(conn, query)]
+
+
+def test_search_ranks_names_above_headlines_and_freeform(parents_loaded):
+    with parents_loaded.connect() as conn:
+        set_names(conn)
+    assert build_search_index(parents_loaded) == 200
+    with parents_loaded.connect() as conn:
+        assert matches(conn, 'zephyrine') == [1, 2, 3]
+        assert matches(conn, '"zephyrine quillfeather"') == [1]
+        assert matches(conn, 'zephyrine -quillfeather') == [2, 3]
+
+
+def test_update_rewrites_single_investors(parents_loaded):
+    raw_conn = parents_loaded.raw_connection()
+    try:
+        # Nothing to update before the index is built
+        assert update_search_index_raw(raw_conn, [1]) == 0
+    finally:
+        raw_conn.close()
+
+    build_search_index(parents_loaded)
+    with parents_loaded.connect() as conn:
+        set_names(conn)
+        assert matches(conn, 'zephyrine') == []
+
+    raw_conn = parents_loaded.raw_connection()
+    try:
+        assert update_search_index_raw(raw_conn, [1, 2]) == 2
+        assert update_search_index_raw(raw_conn, []) == 0
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    with parents_loaded.connect() as conn:
+        assert matches(conn, 'zephyrine') == [1, 2]
+        assert conn.execute(text("SELECT COUNT(*) FROM investor_search")).scalar() == 200
@@ -0,0 +1,45 @@
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from arrow_extract import CHILD_SOURCE_COLUMNS, extract_degrees, extract_positions
+from staging_load import load_via_staging
+
+
+def test_staging_resolves_people_companies_and_schools(parents_loaded, synthetic_path):
+    engine = parents_loaded
+    investors = pq.read_table(synthetic_path, columns=CHILD_SOURCE_COLUMNS)
+    positions, degrees = extract_positions(investors), extract_degrees(investors)
+
+    counts = load_via_staging(engine, positions, degrees)
+    # Rows without a person slug have no person to attach to
+    assert counts['positions'] == positions.num_rows - positions.column('person_slug').null_count
+    assert counts['degrees'] == degrees.num_rows - degrees.column('person_slug').null_count
+
+    with engine.connect() as conn:
+        loaded = conn.execute(text("""
+            SELECT p.slug, c.name, s.title
+            FROM positions s JOIN persons p ON p.id = s.person_id LEFT JOIN companies c ON c.id = s.company_id
+        """)).fetchall()
+        aliases = dict(conn.execute(text("""
+            SELECT a.alias, c.name FROM company_aliases a JOIN companies c ON c.id = a.company_id
+        """)).fetchall())
+        staged = conn.execute(text("SELECT (SELECT COUNT(*) FROM stg_positions) + (SELECT COUNT(*) FROM stg_degrees)"))
+        assert staged.scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM degrees WHERE school_id IS NULL")).scalar() == \
+            degrees.column('school_name').null_count
+
+    expected = [(slug, aliases.get(company), title) for slug, company, title in
+                zip(*(positions.column(name).to_pylist() for name in ('person_slug', 'company_name', 'title')))
+                if slug is not None]
+    assert sorted(loaded, key=repr) == sorted(expected, key=repr)
+
+
+def test_reloading_reuses_the_resolved_entities(parents_loaded, synthetic_path):
+    engine = parents_loaded
+    investors = pq.read_table(synthetic_path, columns=CHILD_SOURCE_COLUMNS)
+    positions, degrees = extract_positions(investors), extract_degrees(investors)
+    first = load_via_staging(engine, positions, degrees)
+    second = load_via_staging(engine, positions, degrees)
+    assert first['companies'] > 0 and first['schools'] > 0
+    assert second['companies'] == second['schools'] == 0
+    assert second['positions'] == first['positions']
@@ -0,0 +1,54 @@
+import pyarrow as pa
+
+from surrogate_keys import KeyAllocator
+
+
+def test_assign_allocates_in_first_seen_order():
+    allocator = KeyAllocator()
+    ids, new_rows = allocator.assign(pa.array(['b', 'a', None, 'b', 'c']))
+    assert ids.to_pylist() == [1, 2, None, 1, 3]
+    assert new_rows.tolist() == [0, 1, 4]
+    assert len(allocator) == 3
+    assert allocator.last_id == 3
+
+
+def test_assign_keeps_ids_across_batches():
+    allocator = KeyAllocator(start=10)
+    allocator.assign(pa.chunked_array([['x', 'y'], ['x']]))
+    ids, new_rows = allocator.assign(pa.array(['z', 'y', 'z', 'w']))
+    assert ids.to_pylist() == [12, 11, 12, 13]
+    assert new_rows.tolist() == [0, 3]
+    assert allocator.get('x') == 10
+    assert allocator.get('missing') is None
+
+
+def test_assign_without_new_keys():
+    allocator = KeyAllocator()
+    allocator.assign(pa.array(['a']))
+    ids, new_rows = allocator.assign(pa.array(['a', None]))
+    assert ids.to_pylist() == [1, None]
+    assert len(new_rows) == 0
+    assert allocator.last_id == 1
+
+
+def test_lookup_does_not_allocate():
+    allocator = KeyAllocator()
+    assert allocator.last_id == 0
+    allocator.assign(pa.array(['a', 'b']))
+    assert allocator.lookup(pa.array(['b', 'c', None])).to_pylist() == [2, None, None]
+    assert len(allocator) == 2
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, statement):
+        return iter(self.rows)
+
+
+def test_from_query_continues_after_existing_ids():
+    allocator = KeyAllocator.from_query(FakeConnection([('a', 4), ('b', 9)]), 'SELECT slug, id FROM persons')
+    ids, new_rows = allocator.assign(pa.array(['b', 'c']))
+    assert ids.to_pylist() == [9, 10]
+    assert new_rows.tolist() == [1]
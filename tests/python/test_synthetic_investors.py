@@ -0,0 +1,63 @@
+import sys
+
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+import synthetic_investors
+from synthetic_investors import (BASE_ROWS, INVESTORS_SCHEMA, LIST_LENGTHS, generate_chunk, generate_investors,
+                                 parquet_leaves, scale_rows, schema_leaves, verify_layout)
+
+
+@pytest.fixture(scope='module')
+def generated_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('synthetic') / 'investors.parquet'
+    generate_investors(path, rows=250, seed=3, row_group_rows=100)
+    return path
+
+
+def test_generated_file_reads_back_in_the_reference_schema(generated_path):
+    table = pq.read_table(generated_path)
+    assert table.schema.equals(INVESTORS_SCHEMA)
+    assert table.num_rows == 250
+    assert pq.ParquetFile(generated_path).metadata.num_row_groups == 3
+
+
+def test_generated_leaves_match_the_schema_dump(generated_path):
+    assert parquet_leaves(generated_path) == schema_leaves()
+    assert verify_layout(generated_path) == len(schema_leaves())
+
+
+def test_same_seed_generates_the_same_rows(tmp_path, generated_path):
+    again = tmp_path / 'again.parquet'
+    generate_investors(again, rows=250, seed=3, row_group_rows=100)
+    assert pq.read_table(again).equals(pq.read_table(generated_path))
+    generate_investors(again, rows=250, seed=4, row_group_rows=100)
+    assert not pq.read_table(again).equals(pq.read_table(generated_path))
+
+
+@pytest.mark.parametrize('column', ['positions', 'degrees', 'investor_lists'])
+def test_list_lengths_are_skewed(column):
+    empty_share, _, longest = LIST_LENGTHS[column]
+    table = generate_chunk(seed=1, chunk_index=0, first_row=0, rows=5000, total_rows=5000)
+    values = table.column(column).combine_chunks()
+    lengths = pc.fill_null(pc.list_value_length(values), 0).to_numpy()
+    assert abs(np.mean(lengths == 0) - empty_share) < 0.03
+    # Most investors have a handful of entries and a few have many
+    assert np.median(lengths[lengths > 0]) <= 2
+    assert lengths.max() == longest
+
+
+@pytest.mark.parametrize('scale, rows', [(1, BASE_ROWS), (0.01, 328), (2.5, 81950), (0.00001, 1)])
+def test_scale_rows(scale, rows):
+    assert scale_rows(scale) == rows
+
+
+def test_main_writes_the_scaled_row_count(tmp_path, monkeypatch):
+    path = tmp_path / 'scaled.parquet'
+    monkeypatch.setattr(sys, 'argv', ['synthetic_investors.py', '--scale', '0.01', '--row-group-rows', '200',
+                                      '--output', str(path)])
+    synthetic_investors.main()
+    metadata = pq.ParquetFile(path).metadata
+    assert (metadata.num_rows, metadata.num_row_groups) == (328, 2)